@@ -4,7 +4,6 @@ import os
 import re
 from pathlib import Path
 from dotenv import load_dotenv
-from routes.contact import contact_bp
 
 BASE_DIR = Path(__file__).resolve().parent
 manual_env_path = BASE_DIR / '.env'
@@ -19,6 +18,19 @@ print("\n" + "="*70)
 print("🔒 ENVIRONMENT VARIABLES CHECK")
 print("="*70)
 
+# Offline mode: serve Supabase from the local SQLite emulator
+# (SUPABASE_EMULATOR_DB=path keeps data between runs, default in-memory)
+if os.getenv('SUPABASE_EMULATOR', '').lower() in ('1', 'true', 'yes'):
+    from devtools.supabase_emulator import SupabaseEmulator
+    _emulator = SupabaseEmulator(
+        os.getenv('SUPABASE_EMULATOR_DB', ':memory:'),
+        strict=os.getenv('SUPABASE_EMULATOR_STRICT', '').lower() in ('1', 'true', 'yes')
+    )
+    _, _emulator_url = _emulator.serve(port=int(os.getenv('SUPABASE_EMULATOR_PORT', '0')))
+    os.environ['SUPABASE_URL'] = _emulator_url
+    os.environ.setdefault('SUPABASE_SERVICE_ROLE_KEY', 'emulator')
+    print(f"🧪 SUPABASE_EMULATOR:   serving {_emulator_url}")
+
 supabase_url    = os.getenv('SUPABASE_URL')
 supabase_key    = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
 stripe_key      = os.getenv('STRIPE_SECRET_KEY')
@@ -39,7 +51,21 @@ if not supabase_url:
     import sys
     sys.exit(1)
 
+# The checkout outbox and the idempotency keys are SQLite files
+# (CHECKOUT_OUTBOX_PATH, IDEMPOTENCY_DB_PATH; see .env.example). Unset, they
+# fall back to the temp dir, which a redeploy or restart can wipe, taking
+# queued Stripe events with it. Point them at persistent storage (e.g. a
+# mounted volume); REQUIRE_PERSISTENT_PATHS=1 refuses to start without them.
+_missing_paths = [name for name in ('CHECKOUT_OUTBOX_PATH', 'IDEMPOTENCY_DB_PATH') if not os.getenv(name)]
+if _missing_paths and os.getenv('FLASK_ENV') not in ('development', 'testing'):
+    print(f"🚨 CRITICAL WARNING: {', '.join(_missing_paths)} not set — using the temp dir; "
+          f"queued Stripe events are lost if it is wiped. Point them at persistent storage!")
+    if os.getenv('REQUIRE_PERSISTENT_PATHS', '').lower() in ('1', 'true', 'yes'):
+        import sys
+        sys.exit(1)
+
 # Import routes AFTER environment is loaded
+from routes.contact import contact_bp
 from routes.payment import payment_bp
 from routes.blast import blast_bp
 from routes.auth import auth_bp
@@ -55,9 +81,27 @@ from routes.guest_routes import guest_bp
 from routes.drip_campaign import drip_campaign_bp  # ✅ NEW
 from routes.employer_lead import employer_lead_bp  # ✅ NEW: Employer Network lead capture
 from routes.profile import profile_bp  # ✅ NEW: user profile (first/last/phone/skills)
+from routes.metrics import metrics_bp
+from routes.profiling import profiling_bp
+from routes.export import export_bp
 
 app = Flask(__name__)
 
+# Structured JSON logging + X-Request-ID correlation ids
+from services.structured_logging import install as install_logging, get_logger
+install_logging(app)
+log = get_logger("app")
+
+# Outbound call tracing → Server-Timing header + "Request summary" log records
+from services.request_tracing import install as install_request_tracing, add_observer
+from services.metrics import observe_outbound_call
+install_request_tracing(app)
+add_observer(observe_outbound_call)
+
+# Opt-in cProfile of admin requests (PROFILING=1 + X-Profile: 1)
+from services.profiling import install as install_profiling
+install_profiling(app)
+
 # ─────────────────────────────────────────────────────────────────────────────
 # CORS
 # ─────────────────────────────────────────────────────────────────────────────
@@ -95,7 +139,7 @@ def cors_preflight():
         return
     origin = request.headers.get('Origin', '')
     if not _is_allowed(origin):
-        print(f"[CORS] ❌ Preflight blocked: {origin}")
+        log.warning(f"CORS preflight blocked: {origin}")
         return make_response('Forbidden', 403)
     resp = make_response('', 204)
     resp.headers['Access-Control-Allow-Origin']      = origin
@@ -112,7 +156,8 @@ def cors_headers(response):
     if origin and _is_allowed(origin):
         response.headers['Access-Control-Allow-Origin']      = origin
         response.headers['Access-Control-Allow-Credentials'] = 'true'
-        response.headers['Access-Control-Expose-Headers']    = 'Content-Type'
+        response.headers['Access-Control-Expose-Headers']    = 'Content-Type, Server-Timing'
+        response.headers['Timing-Allow-Origin']              = origin
     return response
 
 
@@ -143,36 +188,57 @@ app.register_blueprint(guest_bp)
 app.register_blueprint(drip_campaign_bp)   # ✅ existing
 app.register_blueprint(employer_lead_bp)   # ✅ NEW: /api/employer-lead
 app.register_blueprint(profile_bp)         # ✅ NEW: /api/user/profile
+app.register_blueprint(metrics_bp)         # /metrics (Prometheus)
+app.register_blueprint(profiling_bp)       # /api/admin/profiling/*
+app.register_blueprint(export_bp)          # /api/admin/export/<table>
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # ✅ APScheduler — Drip Email Scheduler
-# Runs every 30 minutes to process Day 4 & Day 8 emails
+# Event-driven (default): an in-process dispatcher sends each campaign the
+# moment it becomes eligible; APScheduler only reconciles the queue with the
+# database every DRIP_RECONCILE_MINUTES.
+# Polling (DRIP_EVENT_DRIVEN=0): legacy tick every 30 minutes.
 # ─────────────────────────────────────────────────────────────────────────────
 def _start_drip_scheduler():
-    """Start APScheduler for drip email processing."""
+    """Start APScheduler (and the wave dispatcher) for drip email processing."""
     try:
         from apscheduler.schedulers.background import BackgroundScheduler
-        from services.drip_scheduler import run_scheduler_tick
+        from services.drip_scheduler import (
+            run_scheduler_tick, start_wave_dispatcher, reconcile_wave_queue,
+            DRIP_EVENT_DRIVEN, DRIP_RECONCILE_MINUTES,
+        )
 
         scheduler = BackgroundScheduler(timezone="UTC")
-        scheduler.add_job(
-            func=run_scheduler_tick,
-            trigger="interval",
-            minutes=30,
-            id="drip_email_scheduler",
-            name="Drip Email Scheduler",
-            replace_existing=True
-        )
-        scheduler.start()
-        print("✅ Drip email scheduler started (runs every 30 minutes)")
+        if DRIP_EVENT_DRIVEN:
+            start_wave_dispatcher()
+            scheduler.add_job(
+                func=reconcile_wave_queue,
+                trigger="interval",
+                minutes=DRIP_RECONCILE_MINUTES,
+                id="drip_wave_reconcile",
+                name="Drip Wave Queue Reconcile",
+                replace_existing=True
+            )
+            scheduler.start()
+            log.info(f"Drip wave dispatcher started (reconcile every {DRIP_RECONCILE_MINUTES} minutes)")
+        else:
+            scheduler.add_job(
+                func=run_scheduler_tick,
+                trigger="interval",
+                minutes=30,
+                id="drip_email_scheduler",
+                name="Drip Email Scheduler",
+                replace_existing=True
+            )
+            scheduler.start()
+            log.info("Drip email scheduler started (runs every 30 minutes)")
         return scheduler
     except ImportError:
-        print("⚠️ APScheduler not installed — drip scheduler disabled")
-        print("   Run: pip install apscheduler")
+        log.warning("APScheduler not installed — drip scheduler disabled (pip install apscheduler)")
         return None
     except Exception as e:
-        print(f"⚠️ Could not start drip scheduler: {e}")
+        log.exception(f"Could not start drip scheduler: {e}")
         return None
 
 
@@ -189,11 +255,19 @@ if os.getenv('FLASK_ENV') != 'testing':
         _drip_scheduler = _start_drip_scheduler()
     except ImportError:
         # Windows / Local behavior: fcntl doesn't exist, safely bypass the lock
-        print("ℹ️ Windows environment detected. Starting scheduler without fcntl lock.")
+        log.info("Windows environment detected. Starting scheduler without fcntl lock.")
         _drip_scheduler = _start_drip_scheduler()
     except BlockingIOError:
         # Railway behavior: The lock is already held by Worker #1, do nothing here
-        print("ℹ️ Scheduler already running in another Gunicorn worker. Skipping duplicate start.")
+        log.info("Scheduler already running in another Gunicorn worker. Skipping duplicate start.")
+
+
+# Stripe checkout pipeline workers (services/checkout_pipeline.py). Every
+# worker runs them — outbox rows are leased, so events are processed once —
+# and starting here resumes anything queued before a restart.
+if os.getenv('FLASK_ENV') != 'testing':
+    from routes.payment_webhook import checkout_pipeline
+    checkout_pipeline.start()
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -214,9 +288,25 @@ def health():
         'stripe_webhook_configured': bool(os.getenv('STRIPE_WEBHOOK_SECRET')),
         'brevo_configured':          bool(os.getenv('BREVO_API_KEY')),
         'drip_scheduler_running':    _drip_scheduler is not None and _drip_scheduler.running if _drip_scheduler else False,
+        'drip_wave_queue_size':      _drip_wave_queue_size(),
+        'checkout_outbox':           _checkout_outbox_status(),
     })
 
 
+def _checkout_outbox_status():
+    from routes.payment_webhook import checkout_pipeline
+    try:
+        return checkout_pipeline.status()
+    except Exception as e:
+        return {'error': str(e)}
+
+
+def _drip_wave_queue_size():
+    from services.drip_scheduler import get_wave_queue
+    queue = get_wave_queue()
+    return len(queue) if queue is not None else None
+
+
 @app.route('/api/test-cors', methods=['GET', 'POST', 'PATCH', 'OPTIONS'])
 def test_cors():
     origin = request.headers.get('Origin', 'no-origin')
@@ -309,6 +399,6 @@ if __name__ == '__main__':
     print(f'👤 Guest Tracking:  /api/guest/*')
     print(f'📧 Drip Campaigns:  /api/drip/*')
     print(f'🏢 Employer Leads:  /api/employer-lead')
-    print(f'⏰ Scheduler:       Every 30 min (Business hours only)')
+    print(f'⏰ Scheduler:       Event-driven wave dispatch (Business hours for Waves 2-3)')
     print('='*70 + "\n")
     app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
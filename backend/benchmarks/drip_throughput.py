@@ -0,0 +1,294 @@
+# backend/benchmarks/drip_throughput.py
+"""
+End-to-end drip throughput benchmark.
+
+Runs the real services/drip_scheduler.py code against the SQLite-backed
+Supabase emulator (devtools/supabase_emulator.py) and the local fake Brevo
+server (devtools/fake_mail_server.py) — no network, no Supabase.
+
+Scenarios:
+  day1_blast      run_day1_blast() for every seeded campaign
+  scheduler_tick  one run_scheduler_tick() over campaigns spread across
+                  Wave 1 / Wave 2 / Wave 3
+
+For each scenario it reports emails/sec, DB round-trips per email (and per
+endpoint), wall time and peak RSS, as JSON:
+
+    cd backend
+    python -m benchmarks.drip_throughput --campaigns 30 --recruiters 3000 \
+        --output bench.json
+    python -m benchmarks.drip_throughput --compare bench.json
+
+--compare exits non-zero when emails/sec drops (or DB round-trips per
+email rise) by more than --tolerance against a previous result file.
+--max-db-per-email exits non-zero when any scenario exceeds that budget.
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import psutil
+
+PLANS = ["starter", "basic", "professional", "growth", "advanced", "premium"]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Measurement helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+class PeakRSS:
+    """Samples this process's RSS on a background thread and keeps the peak."""
+
+    def __init__(self, interval=0.01):
+        self._proc     = psutil.Process()
+        self._interval = interval
+        self._stop     = threading.Event()
+        self.peak      = 0
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._proc.memory_info().rss)
+            self._stop.wait(self._interval)
+
+    def __enter__(self):
+        self.peak = self._proc.memory_info().rss
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._proc.memory_info().rss)
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Seeding
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _seed_recruiters(count):
+    return [{"id": i, "email": f"recruiter{i}@bench.example"} for i in range(1, count + 1)]
+
+
+def _seed_campaigns(count, spread_waves):
+    now = datetime.utcnow().isoformat()
+    campaigns = []
+    for i in range(count):
+        campaign = {
+            "id":                  f"bench-{i:05d}",
+            "status":              "active",
+            "plan_name":           PLANS[i % len(PLANS)],
+            "candidate_name":      f"Candidate {i}",
+            "candidate_email":     f"candidate{i}@bench.example",
+            "job_role":            "Engineer",
+            "resume_url":          "http://bench.invalid/resume.pdf",
+            "resume_name":         "Resume.pdf",
+            "created_at":          now,
+            "drip_day1_sent_at":   None,
+            "drip_day2_sent_at":   None,
+            "drip_day3_sent_at":   None,
+            "drip_day1_delivered": 0,
+            "drip_day2_delivered": 0,
+            "drip_day3_delivered": 0,
+        }
+        # Spread campaigns over the three waves so every tick query has work
+        stage = i % 3 if spread_waves else 0
+        if stage >= 1:
+            campaign["drip_day1_sent_at"]   = now
+            campaign["drip_day1_delivered"] = 10 ** 6
+        if stage >= 2:
+            campaign["drip_day2_sent_at"]   = now
+            campaign["drip_day2_delivered"] = 10 ** 6
+        campaigns.append(campaign)
+    return campaigns
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Scenarios
+# ─────────────────────────────────────────────────────────────────────────────
+
+@contextlib.contextmanager
+def _quiet():
+    """Silence scheduler output (stdout and sub-ERROR log records)."""
+    logging.disable(logging.WARNING)
+    try:
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def _run_scenario(name, fn, emulator, mail, verbose):
+    emulator.reset_counts()
+    mail.state.reset()
+
+    sink = contextlib.nullcontext() if verbose else _quiet()
+    with PeakRSS() as rss, sink:
+        started = time.perf_counter()
+        fn()
+        wall = time.perf_counter() - started
+
+    sent      = mail.state.stats()["sent"]
+    db_calls  = emulator.total_requests()
+    return {
+        "scenario":              name,
+        "wall_seconds":          round(wall, 4),
+        "emails_sent":           sent,
+        "emails_per_second":     round(sent / wall, 2) if wall else None,
+        "db_round_trips":        db_calls,
+        "db_round_trips_per_email": round(db_calls / sent, 3) if sent else None,
+        "db_round_trips_by_endpoint": emulator.query_counts(),
+        "peak_rss_mb":           round(rss.peak / (1024 * 1024), 2),
+    }
+
+
+def run(args):
+    # Servers first: their ports go into the env the drip modules read at import
+    from devtools.supabase_emulator import SupabaseEmulator
+    from devtools.fake_mail_server import start_fake_mail_server
+
+    emulator = SupabaseEmulator()
+    _, db_url = emulator.serve()
+    mail, mail_url = start_fake_mail_server(latency_ms=args.mail_latency_ms,
+                                            error_rate=args.mail_error_rate,
+                                            credits=args.credits, seed=1)
+
+    os.environ.update({
+        "SUPABASE_URL":              db_url,
+        "SUPABASE_SERVICE_ROLE_KEY": "bench",
+        "BREVO_API_KEY":             "bench",
+        "BREVO_API_BASE":            f"{mail_url}/v3",
+        "MAIL_TRANSPORT":            "brevo",
+        "DRIP_SEND_DELAY_SCALE":     str(args.delay_scale),
+        # Always inside a send window so Wave 2 / Wave 3 run on every tick
+        "SEND_WINDOWS":              "00:00-23:59:59",
+        "SEND_WEEKDAYS":             "0-6",
+        "SEND_CALENDAR_US_HOLIDAYS": "0",
+    })
+
+    from services import drip_scheduler
+    from services.throughput_planner import ThroughputPlanner
+    import services.throughput_planner as throughput_planner
+
+    results = []
+
+    def fresh_state(spread_waves):
+        for table in ("recruiters", "blast_campaigns"):
+            emulator.truncate(table)
+        emulator.seed("recruiters", _seed_recruiters(args.recruiters))
+        emulator.seed("blast_campaigns", _seed_campaigns(args.campaigns, spread_waves))
+        # New planner so each scenario plans its own day from scratch
+        throughput_planner._planner = ThroughputPlanner()
+
+    fresh_state(spread_waves=False)
+    campaign_ids = [f"bench-{i:05d}" for i in range(args.campaigns)]
+    results.append(_run_scenario(
+        "day1_blast",
+        lambda: [drip_scheduler.run_day1_blast(cid) for cid in campaign_ids],
+        emulator, mail, args.verbose))
+
+    fresh_state(spread_waves=True)
+    results.append(_run_scenario(
+        "scheduler_tick", drip_scheduler.run_scheduler_tick, emulator, mail, args.verbose))
+
+    return {
+        "benchmark": "drip_throughput",
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "params": {
+            "campaigns":       args.campaigns,
+            "recruiters":      args.recruiters,
+            "mail_latency_ms": args.mail_latency_ms,
+            "mail_error_rate": args.mail_error_rate,
+            "delay_scale":     args.delay_scale,
+            "credits":         args.credits,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Print per-scenario deltas; return True when a regression exceeds tolerance."""
+    previous = {r["scenario"]: r for r in baseline.get("results", [])}
+    regressed = False
+    for result in current["results"]:
+        before = previous.get(result["scenario"])
+        if not before:
+            continue
+        for metric, higher_is_better in (("emails_per_second", True),
+                                         ("db_round_trips_per_email", False),
+                                         ("wall_seconds", False),
+                                         ("peak_rss_mb", False)):
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse  = -change if higher_is_better else change
+            flag   = ""
+            if worse > tolerance and metric in ("emails_per_second", "db_round_trips_per_email"):
+                flag, regressed = "  REGRESSION", True
+            print(f"{result['scenario']:>15} {metric:<26} {old:>10} -> {new:<10} "
+                  f"({change:+.1%}){flag}", file=sys.stderr)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drip scheduler throughput benchmark")
+    parser.add_argument("--campaigns", type=int, default=30)
+    parser.add_argument("--recruiters", type=int, default=2000)
+    parser.add_argument("--mail-latency-ms", type=float, default=0.0)
+    parser.add_argument("--mail-error-rate", type=float, default=0.0)
+    parser.add_argument("--delay-scale", type=float, default=0.0,
+                        help="multiplier on per-plan send delays (0 = no pacing sleeps)")
+    parser.add_argument("--credits", type=int, default=10 ** 7,
+                        help="Brevo credits reported by the fake account endpoint")
+    parser.add_argument("--output", help="write the JSON result here as well as stdout")
+    parser.add_argument("--compare", help="previous result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--max-db-per-email", type=float,
+                        help="fail when DB round-trips per email exceed this budget")
+    parser.add_argument("--verbose", action="store_true", help="keep scheduler output")
+    args = parser.parse_args()
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            sys.exit(1)
+
+    if args.max_db_per_email is not None:
+        over = [r for r in report["results"]
+                if (r["db_round_trips_per_email"] or 0) > args.max_db_per_email]
+        for r in over:
+            print(f"{r['scenario']:>15} db_round_trips_per_email {r['db_round_trips_per_email']} "
+                  f"> budget {args.max_db_per_email}", file=sys.stderr)
+        if over:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
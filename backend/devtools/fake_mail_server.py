@@ -0,0 +1,259 @@
+# backend/devtools/fake_mail_server.py
+"""
+Local stand-in for the Brevo and Resend HTTP APIs.
+
+Lets the send / pacing code be load-tested on one machine with no network:
+
+    python -m devtools.fake_mail_server --port 8025 --latency-ms 80 \
+        --error-rate 0.01 --rate-limit 10
+
+    BREVO_API_BASE=http://127.0.0.1:8025/v3 \
+    RESEND_API_URL=http://127.0.0.1:8025 \
+    BREVO_API_KEY=fake RESEND_API_KEY=fake python app.py
+
+Endpoints:
+  POST /v3/smtp/email                       Brevo transactional send
+  GET  /v3/account                          Brevo account / plan credits
+  GET  /v3/smtp/statistics/aggregatedReport Brevo usage counters
+  POST /emails                              Resend send
+  GET  /files/<name>                        small dummy attachment (resume_url)
+  GET  /__stats                             counters for the load test
+  POST /__reset                             zero the counters
+
+Behaviour knobs (CLI flags or start_fake_mail_server kwargs):
+  latency_ms / jitter_ms   per-request delay
+  error_rate               fraction of sends answered with HTTP 500
+  rate_limit               sends per second before 429s (0 = unlimited)
+  credits                  credits reported by /v3/account
+Run from the backend/ directory.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+DUMMY_ATTACHMENT = b"%PDF-1.4\n% fake resume for local load tests\n%%EOF\n"
+
+
+class FakeMailState:
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+                 rate_limit=0.0, credits=100000, seed=None):
+        self.latency_ms  = latency_ms
+        self.jitter_ms   = jitter_ms
+        self.error_rate  = error_rate
+        self.rate_limit  = rate_limit
+        self.credits     = credits
+        self._random     = random.Random(seed)
+        self._lock       = threading.Lock()
+        self._tokens     = rate_limit
+        self._refill_at  = time.monotonic()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = {"brevo": 0, "resend": 0, "errors": 0, "rate_limited": 0, "bad_request": 0}
+            self.started_at = time.time()
+
+    def sleep(self):
+        delay = self.latency_ms + (self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def admit(self):
+        """Returns None to accept a send, else (status, retry_after) for the failure."""
+        with self._lock:
+            if self.rate_limit > 0:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit,
+                                   self._tokens + (now - self._refill_at) * self.rate_limit)
+                self._refill_at = now
+                if self._tokens < 1:
+                    self.counts["rate_limited"] += 1
+                    return 429, (1 - self._tokens) / self.rate_limit
+                self._tokens -= 1
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.counts["errors"] += 1
+                return 500, None
+            return None
+
+    def record(self, key):
+        with self._lock:
+            self.counts[key] += 1
+            if key in ("brevo", "resend"):
+                self.credits = max(self.credits - 1, 0)
+
+    def stats(self):
+        with self._lock:
+            elapsed = max(time.time() - self.started_at, 1e-9)
+            sent = self.counts["brevo"] + self.counts["resend"]
+            return {**self.counts, "sent": sent, "elapsed_seconds": round(elapsed, 3),
+                    "sent_per_second": round(sent / elapsed, 2)}
+
+
+class FakeMailHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version   = "FakeMail/1.0"
+    # Headers and body go out as separate writes; without this, Nagle plus
+    # delayed ACKs add ~40ms to every keep-alive request.
+    disable_nagle_algorithm = True
+
+    @property
+    def state(self) -> FakeMailState:
+        return self.server.state
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return None
+
+    # ── GET ──────────────────────────────────────────────────────────────────
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/__stats":
+            return self._send_json(200, self.state.stats())
+        if path == "/v3/account":
+            return self._send_json(200, {
+                "email": "loadtest@example.com", "firstName": "Load", "lastName": "Test",
+                "companyName": "Fake Mail",
+                "plan": [{"type": "subscription", "credits": self.state.credits}],
+            })
+        if path == "/v3/smtp/statistics/aggregatedReport":
+            return self._send_json(200, {"requests": self.state.stats()["brevo"]})
+        if path.startswith("/files/"):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(len(DUMMY_ATTACHMENT)))
+            self.end_headers()
+            self.wfile.write(DUMMY_ATTACHMENT)
+            return
+        self._send_json(404, {"code": "not_found", "message": path})
+
+    # ── POST ─────────────────────────────────────────────────────────────────
+
+    def do_POST(self):
+        path    = urlparse(self.path).path
+        payload = self._read_json()
+
+        if path == "/__reset":
+            self.state.reset()
+            return self._send_json(200, {"reset": True})
+        if path == "/v3/smtp/email":
+            return self._brevo_send(payload)
+        if path == "/emails":
+            return self._resend_send(payload)
+        self._send_json(404, {"code": "not_found", "message": path})
+
+    def _brevo_send(self, payload):
+        self.state.sleep()
+        if not self.headers.get("api-key"):
+            return self._send_json(401, {"code": "unauthorized", "message": "Key not found"})
+        if not payload or not payload.get("sender") or not payload.get("to") or not (
+                payload.get("htmlContent") or payload.get("textContent") or payload.get("templateId")):
+            self.state.record("bad_request")
+            return self._send_json(400, {"code": "missing_parameter", "message": "invalid payload"})
+
+        failure = self.state.admit()
+        if failure:
+            status, retry_after = failure
+            if status == 429:
+                reset = f"{retry_after:.3f}"
+                return self._send_json(429, {"code": "too_many_requests", "message": "Rate limit"},
+                                       {"Retry-After": reset, "x-sib-ratelimit-reset": reset,
+                                        "x-sib-ratelimit-limit": str(int(self.state.rate_limit)),
+                                        "x-sib-ratelimit-remaining": "0"})
+            return self._send_json(500, {"code": "internal_error", "message": "Injected failure"})
+
+        self.state.record("brevo")
+        self._send_json(201, {"messageId": f"<{uuid.uuid4()}@fake.brevo>"})
+
+    def _resend_send(self, payload):
+        self.state.sleep()
+        if not (self.headers.get("Authorization") or "").startswith("Bearer "):
+            return self._send_json(401, {"statusCode": 401, "name": "missing_api_key",
+                                         "message": "Missing API key"})
+        if not payload or not payload.get("from") or not payload.get("to"):
+            self.state.record("bad_request")
+            return self._send_json(422, {"statusCode": 422, "name": "validation_error",
+                                         "message": "invalid payload"})
+
+        failure = self.state.admit()
+        if failure:
+            status, retry_after = failure
+            if status == 429:
+                return self._send_json(429, {"statusCode": 429, "name": "rate_limit_exceeded",
+                                             "message": "Too many requests"},
+                                       {"Retry-After": f"{retry_after:.3f}"})
+            return self._send_json(500, {"statusCode": 500, "name": "application_error",
+                                         "message": "Injected failure"})
+
+        self.state.record("resend")
+        self._send_json(200, {"id": str(uuid.uuid4())})
+
+
+def start_fake_mail_server(host="127.0.0.1", port=0, verbose=False, **state_kwargs):
+    """Start the server on a daemon thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), FakeMailHandler)
+    server.daemon_threads = True
+    server.state   = FakeMailState(**state_kwargs)
+    server.verbose = verbose
+    threading.Thread(target=server.serve_forever, name="FakeMailServer", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Brevo/Resend API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="sends/second, 0 = unlimited")
+    parser.add_argument("--credits", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), FakeMailHandler)
+    server.daemon_threads = True
+    server.state = FakeMailState(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                 error_rate=args.error_rate, rate_limit=args.rate_limit,
+                                 credits=args.credits, seed=args.seed)
+    server.verbose = args.verbose
+    base = f"http://{args.host}:{server.server_address[1]}"
+    print(f"[FakeMail] Listening on {base}")
+    print(f"[FakeMail]   BREVO_API_BASE={base}/v3")
+    print(f"[FakeMail]   RESEND_API_URL={base}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,835 @@
+# backend/devtools/supabase_emulator.py
+"""
+SQLite-backed Supabase (PostgREST + auth admin) emulator.
+
+Serves the subset of the Supabase HTTP API this backend uses, so the app,
+the drip scheduler and the benchmarks can run fully offline:
+
+  /rest/v1/<table>
+    GET     select=a,b  order=col.asc|desc[.nullsfirst|.nullslast]
+            limit / offset (or a Range header)
+            filters: eq neq gt gte lt lte like ilike in is, not.<op>,
+                     or=(col.op.value,...)
+            embedded resources (select=a,other(b)) are not emulated: they
+            answer 400 PGRST200, as PostgREST does without a relationship
+    POST    insert one row or a list; on_conflict=<cols> with
+            Prefer: resolution=merge-duplicates | ignore-duplicates upserts
+    PATCH   update matching rows
+    DELETE  delete matching rows
+    Prefer: return=representation  -> rows in the body (else 201/204 empty)
+    Prefer: count=exact            -> Content-Range: <from>-<to>/<total>
+  /rest/v1/rpc/<function>          POST, JSON args -> rows (see RPCS;
+                                   unknown functions 404 like PostgREST)
+  /auth/v1/admin/users[/<id>]      GET / POST / PUT / DELETE
+
+Tables come from SCHEMA (blast_campaigns, recruiters, payments, users,
+resumes, guest_users, guest_activity_events, brevo_event_logs, plans). Unknown columns are added on
+first use and unknown tables on first insert, unless strict=True, in which
+case they are rejected the way PostgREST does (404 / 400).
+
+Every request is counted per endpoint ("GET blast_campaigns", ...), so
+benchmarks can assert round-trip budgets:
+
+    emu = SupabaseEmulator()
+    server, url = emu.serve()
+    ...
+    emu.assert_round_trips(max_total=40)
+
+Standalone:
+    python -m devtools.supabase_emulator --port 54321 --db emulator.sqlite
+
+Or set SUPABASE_EMULATOR=1 and app.py starts one in-process.
+Run from the backend/ directory.
+"""
+import argparse
+import json
+import re
+import sqlite3
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl, unquote
+
+# Column types: text, integer, real, boolean, json, timestamp.
+# "id" is the primary key of every table: "uuid" ids are generated as
+# uuid4 strings, "serial" ids are SQLite integer row ids.
+SCHEMA = {
+    "blast_campaigns": {
+        "id": "uuid",
+        "columns": {
+            "user_id": "text", "user_type": "text", "resume_id": "text",
+            "stripe_session_id": "text", "plan_name": "text", "status": "text",
+            "candidate_name": "text", "candidate_email": "text", "candidate_phone": "text",
+            "job_role": "text", "resume_url": "text", "resume_name": "text",
+            "years_experience": "text", "key_skills": "text", "location": "text",
+            "industry": "text", "recipients_count": "integer",
+            "day4_scheduled_for": "timestamp", "day8_scheduled_for": "timestamp",
+            "drip_day1_sent_at": "timestamp", "drip_day2_sent_at": "timestamp",
+            "drip_day3_sent_at": "timestamp",
+            "drip_day1_status": "text", "drip_day2_status": "text", "drip_day3_status": "text",
+            "drip_day1_delivered": "integer", "drip_day2_delivered": "integer",
+            "drip_day3_delivered": "integer",
+            "day1_sent_count": "integer", "day4_sent_count": "integer", "day8_sent_count": "integer",
+            "drip_day1_last_date": "text", "drip_day2_last_date": "text",
+            "drip_day3_last_date": "text",
+            "emails_opened": "integer", "emails_clicked": "integer", "emails_bounced": "integer",
+            "initiated_at": "timestamp", "completed_at": "timestamp", "created_at": "timestamp",
+        },
+    },
+    "recruiters": {
+        "id": "serial",
+        "columns": {
+            "email": "text", "name": "text", "company": "text", "industry": "text",
+            "location": "text", "is_active": "boolean", "created_at": "timestamp",
+        },
+    },
+    "payments": {
+        "id": "uuid",
+        "columns": {
+            "stripe_session_id": "text", "user_id": "text", "guest_id": "text",
+            "user_email": "text", "user_name": "text", "plan_name": "text",
+            "amount": "integer", "currency": "text", "status": "text",
+            "payment_method": "text", "card_brand": "text", "card_last4": "text",
+            "receipt_url": "text", "metadata": "json",
+            "initiated_at": "timestamp", "completed_at": "timestamp", "created_at": "timestamp",
+        },
+    },
+    "users": {
+        "id": "uuid",
+        "columns": {
+            "email": "text", "first_name": "text", "last_name": "text", "full_name": "text",
+            "phone": "text", "primary_skills": "json", "profile_completed": "boolean",
+            "plan_name": "text", "created_at": "timestamp", "updated_at": "timestamp",
+        },
+    },
+    "resumes": {
+        "id": "uuid",
+        "columns": {
+            "user_id": "text", "file_name": "text", "file_url": "text", "file_type": "text",
+            "file_size": "integer", "ats_score": "integer", "analysis_data": "json",
+            "status": "text", "created_at": "timestamp", "updated_at": "timestamp",
+        },
+    },
+    "guest_users": {
+        "id": "text",
+        "columns": {
+            "ip_address": "text", "ip_history": "json", "visit_count": "integer",
+            "payment_status": "text", "resume_status": "text", "plan_name": "text",
+            "stripe_session_id": "text", "amount_paid": "integer",
+            "file_name": "text", "file_url": "text", "metadata": "json",
+            "blast_industry": "text", "blast_recipients_count": "integer",
+            "blast_initiated_at": "timestamp", "blast_results": "json",
+            "created_at": "timestamp", "last_active_at": "timestamp",
+        },
+    },
+    "guest_activity_events": {
+        "id": "serial",
+        "columns": {
+            "guest_id": "text", "event_type": "text", "data": "json",
+            "occurred_at": "timestamp", "created_at": "timestamp",
+        },
+    },
+    "brevo_event_logs": {
+        "id": "serial",
+        "columns": {
+            "campaign_id": "text", "email_from": "text", "email_to": "text",
+            "email_subject": "text", "event_type": "text", "timestamp": "timestamp",
+            "brevo_raw_data": "json", "created_at": "timestamp",
+        },
+    },
+    "plans": {
+        "id": "serial",
+        "columns": {
+            "key_name": "text", "display_name": "text", "price_cents": "integer",
+            "recruiter_limit": "integer", "is_active": "boolean", "features": "json",
+            "created_at": "timestamp", "updated_at": "timestamp",
+        },
+    },
+}
+
+_SQL_TYPES = {"text": "TEXT", "integer": "INTEGER", "real": "REAL", "boolean": "INTEGER",
+              "json": "TEXT", "timestamp": "TEXT", "uuid": "TEXT", "serial": "INTEGER"}
+
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_OPS   = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=",
+          "like": "LIKE", "ilike": "LIKE"}
+
+
+
+def _rpc_brevo_event_summary(emu, p_start, p_end=None, p_email=None):
+    """sql/brevo_event_daily.sql: brevo_event_summary(p_start, p_end, p_email)."""
+    emu._table("brevo_event_logs")
+    p_end = p_end or datetime.now(timezone.utc).date().isoformat()
+    sql = ('SELECT substr(COALESCE("timestamp", ?), 1, 10) AS day, '
+           'COALESCE(event_type, \'unknown\') AS event_type, COUNT(*) AS events '
+           'FROM brevo_event_logs WHERE day BETWEEN ? AND ?')
+    args = [_now_iso(), p_start, p_end]
+    if p_email:
+        sql += " AND email_to LIKE ?"
+        args.append(f"%{p_email}%")
+    sql += " GROUP BY 1, 2"
+    return [dict(r) for r in emu._conn.execute(sql, args)]
+
+
+RPCS = {
+    "brevo_event_summary": _rpc_brevo_event_summary,
+}
+
+class PostgrestError(Exception):
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status, self.code, self.message = status, code, message
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _infer_type(value):
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "real"
+    if isinstance(value, (dict, list)):
+        return "json"
+    return "text"
+
+
+def _split_top_level(text):
+    """Split 'a.eq.1,b.in.(x,y)' on commas outside parentheses."""
+    parts, depth, current = [], 0, ""
+    for ch in text:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append(current)
+            current = ""
+        else:
+            current += ch
+    if current:
+        parts.append(current)
+    return parts
+
+
+class SupabaseEmulator:
+
+    def __init__(self, db_path=":memory:", schema=None, strict=False):
+        self.schema   = {name: {"id": spec["id"], "columns": dict(spec["columns"])}
+                         for name, spec in (schema or SCHEMA).items()}
+        self.strict   = strict
+        self.requests = Counter()
+        self._lock    = threading.RLock()
+        self._conn    = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        if db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        for table in list(self.schema):
+            self._create_table(table)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS auth_users (id TEXT PRIMARY KEY, email TEXT UNIQUE, data TEXT)"
+        )
+        self.rpcs = dict(RPCS)
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Schema
+    # ─────────────────────────────────────────────────────────────────────
+
+    def _create_table(self, table):
+        spec = self.schema[table]
+        if spec["id"] == "serial":
+            cols = ['"id" INTEGER PRIMARY KEY AUTOINCREMENT']
+        else:
+            cols = ['"id" TEXT PRIMARY KEY']
+        cols += [f'"{c}" {_SQL_TYPES[t]}' for c, t in spec["columns"].items()]
+        self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({", ".join(cols)})')
+        # Pick up columns added to a persistent DB by an earlier run
+        for row in self._conn.execute(f'PRAGMA table_info("{table}")'):
+            if row["name"] != "id" and row["name"] not in spec["columns"]:
+                spec["columns"][row["name"]] = "text"
+
+    def _table(self, table, create=False):
+        if not _IDENT.match(table or ""):
+            raise PostgrestError(404, "PGRST205", f"Could not find the table 'public.{table}'")
+        if table not in self.schema:
+            if self.strict or not create:
+                raise PostgrestError(404, "PGRST205", f"Could not find the table 'public.{table}' in the schema cache")
+            self.schema[table] = {"id": "uuid", "columns": {}}
+            self._create_table(table)
+        return self.schema[table]
+
+    def _column_type(self, table, column):
+        spec = self.schema[table]
+        if column == "id":
+            return "integer" if spec["id"] == "serial" else "text"
+        if column not in spec["columns"]:
+            if self.strict or not _IDENT.match(column):
+                raise PostgrestError(400, "42703", f"column {table}.{column} does not exist")
+            # Permissive mode: a column the schema doesn't know yet reads as NULL
+            with self._lock:
+                self._conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}" TEXT')
+                spec["columns"][column] = "text"
+        return spec["columns"][column]
+
+    def _ensure_columns(self, table, record):
+        spec = self.schema[table]
+        for column, value in record.items():
+            if column == "id" or column in spec["columns"]:
+                continue
+            if self.strict or not _IDENT.match(column):
+                raise PostgrestError(400, "PGRST204",
+                                     f"Could not find the '{column}' column of '{table}' in the schema cache")
+            col_type = _infer_type(value) if value is not None else "text"
+            self._conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {_SQL_TYPES[col_type]}')
+            spec["columns"][column] = col_type
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Value conversion
+    # ─────────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _to_db(col_type, value):
+        if value is None:
+            return None
+        if col_type == "json":
+            return json.dumps(value)
+        if col_type == "boolean":
+            return 1 if value in (True, "true", 1, "1") else 0
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        return value
+
+    @staticmethod
+    def _literal(col_type, raw):
+        """Filter literal (always text on the wire) -> DB value."""
+        if col_type == "boolean":
+            return 1 if raw == "true" else 0
+        if col_type == "integer":
+            try:
+                return int(raw)
+            except ValueError:
+                return raw
+        if col_type == "real":
+            try:
+                return float(raw)
+            except ValueError:
+                return raw
+        return raw
+
+    def _from_db(self, table, row):
+        out = {}
+        for key in row.keys():
+            value = row[key]
+            col_type = "text" if key == "id" else self.schema[table]["columns"].get(key, "text")
+            if value is not None and col_type == "json":
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass
+            elif value is not None and col_type == "boolean":
+                value = bool(value)
+            out[key] = value
+        return out
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Query building
+    # ─────────────────────────────────────────────────────────────────────
+
+    def _condition(self, table, column, expr):
+        if not _IDENT.match(column):
+            raise PostgrestError(400, "PGRST100", f"invalid column '{column}'")
+        negate = expr.startswith("not.")
+        if negate:
+            expr = expr[4:]
+        op, _, raw = expr.partition(".")
+        if op not in ("in", "is") and len(raw) > 1 and raw[0] == raw[-1] == '"':
+            raw = raw[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+        col_type = self._column_type(table, column)
+        quoted = f'"{column}"'
+
+        if op == "is":
+            lowered = raw.lower()
+            if lowered == "null":
+                sql, args = f"{quoted} IS NULL", []
+            elif lowered in ("true", "false"):
+                sql, args = f"{quoted} = ?", [1 if lowered == "true" else 0]
+            else:
+                raise PostgrestError(400, "PGRST100", f"invalid is. value '{raw}'")
+        elif op == "in":
+            values = [v.strip().strip('"') for v in _split_top_level(raw.strip()[1:-1])]
+            if not values:
+                sql, args = "0", []
+            else:
+                sql  = f"{quoted} IN ({', '.join('?' * len(values))})"
+                args = [self._literal(col_type, v) for v in values]
+        elif op in _OPS:
+            value = raw.replace("*", "%") if op in ("like", "ilike") else self._literal(col_type, raw)
+            if op == "like":
+                # SQLite LIKE is case-insensitive for ASCII; GLOB keeps case
+                sql, args = f"{quoted} GLOB ?", [value.replace("%", "*").replace("_", "?")]
+            elif op == "ilike":
+                sql, args = f"{quoted} LIKE ?", [value]
+            else:
+                sql, args = f"{quoted} {_OPS[op]} ?", [value]
+        else:
+            raise PostgrestError(400, "PGRST100", f"unsupported operator '{op}'")
+
+        return (f"NOT ({sql})", args) if negate else (sql, args)
+
+    def _or_group(self, table, expr, joiner):
+        clauses, args = [], []
+        for part in _split_top_level(expr.strip()[1:-1]):
+            column, _, rest = part.partition(".")
+            nested = re.match(r"^(or|and)(\(.*\))$", part)   # or=(a.eq.1,and(b.eq.2,c.eq.3))
+            if nested:
+                column, rest = nested.group(1), nested.group(2)
+            if column in ("or", "and"):
+                sql, part_args = self._or_group(table, rest, " OR " if column == "or" else " AND ")
+            else:
+                sql, part_args = self._condition(table, column, rest)
+            clauses.append(sql)
+            args.extend(part_args)
+        return f"({joiner.join(clauses)})", args
+
+    def _where(self, table, params):
+        clauses, args = [], []
+        for key, value in params:
+            if key in ("select", "order", "limit", "offset", "on_conflict", "columns") or "." in key:
+                continue   # "." keys (resumes.order=...) address embedded resources
+            if key in ("or", "and"):
+                sql, part_args = self._or_group(table, value, " OR " if key == "or" else " AND ")
+            else:
+                sql, part_args = self._condition(table, key, value)
+            clauses.append(sql)
+            args.extend(part_args)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def _select_list(self, table, select):
+        if not select or select.strip() == "*":
+            return "*"
+        columns = []
+        for item in select.split(","):
+            item = item.strip()
+            if not item:
+                continue  # trailing commas
+            if "(" in item:
+                other = item.split("(", 1)[0].split(":")[-1].strip()
+                raise PostgrestError(400, "PGRST200",
+                                     f"Could not find a relationship between '{table}' and '{other}' in the schema cache")
+            if ":" in item and "::" not in item:
+                item = item.split(":", 1)[1]
+            item = item.split("::", 1)[0]
+            if item == "*":
+                return "*"
+            self._column_type(table, item)
+            columns.append(f'"{item}"')
+        return ", ".join(columns) or "*"
+
+    def _order(self, table, order):
+        if not order:
+            return ""
+        terms = []
+        for clause in order.split(","):
+            parts = clause.strip().split(".")
+            column = parts[0]
+            self._column_type(table, column)
+            desc = "desc" in parts[1:]
+            nulls = "FIRST" if ("nullsfirst" in parts or (desc and "nullslast" not in parts)) else "LAST"
+            terms.append(f'"{column}" {"DESC" if desc else "ASC"} NULLS {nulls}')
+        return " ORDER BY " + ", ".join(terms)
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Operations
+    # ─────────────────────────────────────────────────────────────────────
+
+    def select(self, table, params, range_header=None, count=False):
+        self._table(table)
+        options = dict(p for p in params if p[0] in ("select", "order", "limit", "offset"))
+        where, args = self._where(table, params)
+        sql = f'SELECT {self._select_list(table, options.get("select"))} FROM "{table}"{where}'
+        sql += self._order(table, options.get("order"))
+
+        offset = int(options.get("offset") or 0)
+        limit  = int(options["limit"]) if options.get("limit") else None
+        if range_header:
+            match = re.match(r"(\d+)-(\d*)", range_header)
+            if match:
+                offset = int(match.group(1))
+                if match.group(2):
+                    limit = int(match.group(2)) - offset + 1
+        if limit is not None or offset:
+            sql += f" LIMIT {limit if limit is not None else -1} OFFSET {offset}"
+
+        with self._lock:
+            rows = [self._from_db(table, r) for r in self._conn.execute(sql, args)]
+            total = None
+            if count:
+                total = self._conn.execute(f'SELECT COUNT(*) FROM "{table}"{where}', args).fetchone()[0]
+        return rows, offset, total
+
+    def _insert_one(self, table, record):
+        spec = self.schema[table]
+        record = dict(record)
+        if spec["id"] != "serial" and record.get("id") is None:
+            record["id"] = str(uuid.uuid4())
+        if "created_at" in spec["columns"] and record.get("created_at") is None:
+            record["created_at"] = _now_iso()
+        self._ensure_columns(table, record)
+        columns = list(record)
+        values  = [self._to_db(self._column_type(table, c), record[c]) for c in columns]
+        cursor = self._conn.execute(
+            f'INSERT INTO "{table}" ({", ".join(f"{chr(34)}{c}{chr(34)}" for c in columns)}) '
+            f'VALUES ({", ".join("?" * len(columns))})', values)
+        return cursor.lastrowid if spec["id"] == "serial" and record.get("id") is None else record["id"]
+
+    def _update_where(self, table, where, args, body):
+        self._ensure_columns(table, body)
+        if not body:
+            return
+        sets   = ", ".join(f'"{c}" = ?' for c in body)
+        values = [self._to_db(self._column_type(table, c), v) for c, v in body.items()]
+        self._conn.execute(f'UPDATE "{table}" SET {sets}{where}', values + args)
+
+    def insert(self, table, body, on_conflict=None, resolution=None):
+        self._table(table, create=True)
+        records = body if isinstance(body, list) else [body]
+        conflict_cols = [c.strip() for c in (on_conflict or "id").split(",") if c.strip()]
+        written = []
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for record in records:
+                    existing = None
+                    if all(record.get(c) is not None for c in conflict_cols):
+                        self._ensure_columns(table, {c: record[c] for c in conflict_cols})
+                        where = " WHERE " + " AND ".join(f'"{c}" = ?' for c in conflict_cols)
+                        args  = [self._to_db(self._column_type(table, c), record[c]) for c in conflict_cols]
+                        row = self._conn.execute(f'SELECT id FROM "{table}"{where}', args).fetchone()
+                        existing = (where, args, row["id"]) if row else None
+
+                    if existing and resolution == "merge-duplicates":
+                        where, args, row_id = existing
+                        self._update_where(table, where, args, record)
+                        written.append(row_id)
+                    elif existing and resolution == "ignore-duplicates":
+                        continue
+                    elif existing:
+                        raise PostgrestError(409, "23505", f"duplicate key value violates unique "
+                                                           f"constraint on {table}({', '.join(conflict_cols)})")
+                    else:
+                        written.append(self._insert_one(table, record))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return self._rows_by_id(table, written)
+
+    def update(self, table, params, body):
+        self._table(table)
+        where, args = self._where(table, params)
+        with self._lock:
+            ids = [r["id"] for r in self._conn.execute(f'SELECT id FROM "{table}"{where}', args)]
+            self._update_where(table, where, args, body)
+            return self._rows_by_id(table, ids)
+
+    def delete(self, table, params):
+        self._table(table)
+        where, args = self._where(table, params)
+        with self._lock:
+            rows = [self._from_db(table, r) for r in
+                    self._conn.execute(f'SELECT * FROM "{table}"{where}', args)]
+            self._conn.execute(f'DELETE FROM "{table}"{where}', args)
+            return rows
+
+    def _rows_by_id(self, table, ids):
+        if not ids:
+            return []
+        placeholders = ", ".join("?" * len(ids))
+        rows = self._conn.execute(f'SELECT * FROM "{table}" WHERE id IN ({placeholders})', ids)
+        by_id = {r["id"]: self._from_db(table, r) for r in rows}
+        return [by_id[i] for i in ids if i in by_id]
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Auth admin
+    # ─────────────────────────────────────────────────────────────────────
+
+    def auth_list(self):
+        with self._lock:
+            return [json.loads(r["data"]) for r in self._conn.execute("SELECT data FROM auth_users")]
+
+    def auth_get(self, user_id):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM auth_users WHERE id = ?", [user_id]).fetchone()
+            return json.loads(row["data"]) if row else None
+
+    def auth_create(self, body):
+        now  = _now_iso()
+        user = {
+            "id":            body.get("id") or str(uuid.uuid4()),
+            "aud":           "authenticated",
+            "role":          "authenticated",
+            "email":         (body.get("email") or "").lower(),
+            "email_confirmed_at": now if body.get("email_confirm") else None,
+            "user_metadata": body.get("user_metadata") or {},
+            "app_metadata":  body.get("app_metadata") or {"provider": "email"},
+            "created_at":    now,
+            "updated_at":    now,
+        }
+        with self._lock:
+            try:
+                self._conn.execute("INSERT INTO auth_users (id, email, data) VALUES (?, ?, ?)",
+                                   [user["id"], user["email"], json.dumps(user)])
+            except sqlite3.IntegrityError:
+                raise PostgrestError(422, "email_exists",
+                                     "A user with this email address has already been registered")
+        return user
+
+    def auth_update(self, user_id, body):
+        with self._lock:
+            user = self.auth_get(user_id)
+            if not user:
+                return None
+            for key in ("email", "user_metadata", "app_metadata"):
+                if key in body:
+                    user[key] = body[key]
+            user["updated_at"] = _now_iso()
+            self._conn.execute("UPDATE auth_users SET email = ?, data = ? WHERE id = ?",
+                               [user["email"], json.dumps(user), user_id])
+            return user
+
+    def auth_delete(self, user_id):
+        with self._lock:
+            return self._conn.execute("DELETE FROM auth_users WHERE id = ?", [user_id]).rowcount > 0
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Embedding helpers
+    # ─────────────────────────────────────────────────────────────────────
+
+    # ─────────────────────────────────────────────────────────────────────
+    # RPC (Postgres functions from backend/sql, emulated in Python)
+    # ─────────────────────────────────────────────────────────────────────
+
+    def rpc(self, name, args):
+        fn = self.rpcs.get(name)
+        if fn is None:
+            raise PostgrestError(404, "PGRST202", f"Could not find the function public.{name}")
+        with self._lock:
+            return fn(self, **args)
+
+    def seed(self, table, rows):
+        """Bulk insert rows directly (not counted as round-trips)."""
+        return self.insert(table, list(rows))
+
+    def truncate(self, table):
+        with self._lock:
+            if table in self.schema:
+                self._conn.execute(f'DELETE FROM "{table}"')
+
+    def count(self, endpoint):
+        with self._lock:
+            self.requests[endpoint] += 1
+
+    def query_counts(self):
+        with self._lock:
+            return dict(sorted(self.requests.items()))
+
+    def total_requests(self):
+        with self._lock:
+            return sum(self.requests.values())
+
+    def reset_counts(self):
+        with self._lock:
+            self.requests.clear()
+
+    def assert_round_trips(self, max_total=None, **max_per_endpoint):
+        """
+        Raise AssertionError when the counted requests exceed a budget.
+        Per-endpoint budgets use the counter key with spaces as underscores,
+        e.g. assert_round_trips(GET_recruiters=12).
+        """
+        counts = self.query_counts()
+        if max_total is not None and sum(counts.values()) > max_total:
+            raise AssertionError(f"{sum(counts.values())} round-trips > budget {max_total}: {counts}")
+        for key, budget in max_per_endpoint.items():
+            endpoint = key.replace("_", " ", 1)
+            if counts.get(endpoint, 0) > budget:
+                raise AssertionError(f"{endpoint}: {counts[endpoint]} round-trips > budget {budget}")
+
+    def serve(self, host="127.0.0.1", port=0):
+        """Serve on a daemon thread. Returns (server, base_url)."""
+        server = ThreadingHTTPServer((host, port), EmulatorHandler)
+        server.daemon_threads = True
+        server.emulator = self
+        threading.Thread(target=server.serve_forever, name="SupabaseEmulator", daemon=True).start()
+        return server, f"http://{host}:{server.server_address[1]}"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# HTTP layer
+# ─────────────────────────────────────────────────────────────────────────────
+
+class EmulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version   = "SupabaseEmulator/1.0"
+    # Headers and body go out as separate writes; without this, Nagle plus
+    # delayed ACKs add ~40ms to every keep-alive request.
+    disable_nagle_algorithm = True
+
+    @property
+    def emulator(self) -> SupabaseEmulator:
+        return self.server.emulator
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _prefer(self):
+        prefer = {}
+        for part in (self.headers.get("Prefer") or "").split(","):
+            key, _, value = part.strip().partition("=")
+            if key:
+                prefer[key] = value
+        return prefer
+
+    def _reply(self, status, body=None, headers=None):
+        data = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        if body is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def _dispatch(self, method):
+        parsed = urlparse(self.path)
+        path   = unquote(parsed.path)
+        params = parse_qsl(parsed.query, keep_blank_values=True)
+        try:
+            if not (self.headers.get("apikey") or self.headers.get("Authorization")):
+                raise PostgrestError(401, "401", "No API key found in request")
+            if path.startswith("/rest/v1/rpc/") and method == "POST":
+                name = path[len("/rest/v1/rpc/"):].strip("/")
+                self.emulator.count(f"POST rpc/{name}")
+                return self._reply(200, self.emulator.rpc(name, self._body()))
+            if path.startswith("/rest/v1/"):
+                table = path[len("/rest/v1/"):].strip("/")
+                self.emulator.count(f"{method} {table}")
+                return self._rest(method, table, params)
+            if path.startswith("/auth/v1/admin/users"):
+                self.emulator.count(f"{method} auth/admin/users")
+                return self._auth(method, path[len("/auth/v1/admin/users"):].strip("/"), params)
+            raise PostgrestError(404, "404", f"No route for {path}")
+        except PostgrestError as e:
+            self._reply(e.status, {"code": e.code, "message": e.message, "details": None, "hint": None})
+        except (ValueError, sqlite3.Error) as e:
+            self._reply(400, {"code": "PGRST100", "message": str(e), "details": None, "hint": None})
+
+    def _rest(self, method, table, params):
+        prefer = self._prefer()
+        representation = prefer.get("return") == "representation"
+
+        if method == "GET":
+            rows, offset, total = self.emulator.select(
+                table, params, self.headers.get("Range"), count=prefer.get("count") == "exact")
+            end = offset + len(rows) - 1
+            content_range = f"{offset}-{end}" if rows else "*"
+            content_range += f"/{total}" if total is not None else "/*"
+            partial = total is not None and self.headers.get("Range") and len(rows) < total
+            return self._reply(206 if partial else 200, rows, {"Content-Range": content_range})
+
+        if method == "POST":
+            on_conflict = dict(params).get("on_conflict")
+            rows = self.emulator.insert(table, self._body(), on_conflict, prefer.get("resolution"))
+            return self._reply(201, rows if representation else None)
+
+        if method == "PATCH":
+            rows = self.emulator.update(table, params, self._body())
+            return self._reply(200, rows) if representation else self._reply(204)
+
+        if method == "DELETE":
+            rows = self.emulator.delete(table, params)
+            return self._reply(200, rows) if representation else self._reply(204)
+
+        raise PostgrestError(405, "405", f"{method} not supported")
+
+    def _auth(self, method, user_id, params):
+        if not user_id:
+            if method == "GET":
+                users = self.emulator.auth_list()
+                page, per_page = int(dict(params).get("page", 1)), int(dict(params).get("per_page", 50))
+                start = (page - 1) * per_page
+                return self._reply(200, {"users": users[start:start + per_page], "aud": "authenticated"})
+            if method == "POST":
+                return self._reply(200, self.emulator.auth_create(self._body()))
+            raise PostgrestError(405, "405", f"{method} not supported")
+
+        if method == "GET":
+            user = self.emulator.auth_get(user_id)
+        elif method == "PUT":
+            user = self.emulator.auth_update(user_id, self._body())
+        elif method == "DELETE":
+            user = {} if self.emulator.auth_delete(user_id) else None
+        else:
+            raise PostgrestError(405, "405", f"{method} not supported")
+        if user is None:
+            raise PostgrestError(404, "user_not_found", "User not found")
+        return self._reply(200, user)
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/__emulator/stats":
+            return self._reply(200, self.emulator.query_counts())
+        self._dispatch("GET")
+
+    def do_POST(self):
+        if urlparse(self.path).path == "/__emulator/reset":
+            self.emulator.reset_counts()
+            return self._reply(200, {"reset": True})
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Supabase (PostgREST) emulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--db", default=":memory:", help="SQLite file (default: in-memory)")
+    parser.add_argument("--strict", action="store_true", help="reject unknown tables/columns")
+    args = parser.parse_args()
+
+    emulator = SupabaseEmulator(args.db, strict=args.strict)
+    server = ThreadingHTTPServer((args.host, args.port), EmulatorHandler)
+    server.daemon_threads = True
+    server.emulator = emulator
+    print(f"[SupabaseEmulator] Listening on http://{args.host}:{server.server_address[1]} "
+          f"(db={args.db})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# backend/gunicorn.conf.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Picked up automatically by `gunicorn app:app` (see procfile).
+#
+# Prepares the Prometheus multiprocess directory before any worker imports
+# the app, so /metrics aggregates samples from every worker, and drops a
+# worker's live gauges when it exits. Workers flush their batched activity
+# inserts (services/batch_writer.py) on the way out.
+# ─────────────────────────────────────────────────────────────────────────────
+import os
+import shutil
+import tempfile
+
+
+def on_starting(server):
+    path = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "resumeblast-metrics")
+    )
+    # Samples from a previous run would otherwise be added to this one
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    print(f"[Metrics] Multiprocess metrics dir: {path}")
+
+
+def worker_exit(server, worker):
+    # Runs in the worker process: write what is still buffered
+    from services.batch_writer import stop_all
+    stop_all()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
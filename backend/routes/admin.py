@@ -3,9 +3,16 @@ import os
 import requests
 from datetime import datetime, timedelta, timezone
 import time
-import traceback
 from urllib.parse import quote
 from services.user_service import UserService
+from services.brevo_stats_service import BrevoStatsService
+from services.plans_catalog import plans_catalog
+from services.profile_index import profile_index, record_profile, USER_TYPE_ORDER
+from services import list_query
+from services.list_query import ListSpec, ListQueryError
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -32,47 +39,140 @@ def _read_headers():
     }
 
 # ── CHANGE 2: use _read_headers() inside get_all_rows ────────────────────────
+PAGE_SIZE = 1000
+ADMIN_FETCH_CONCURRENCY = int(os.getenv('ADMIN_FETCH_CONCURRENCY', '4'))
+
+
+def _query_params(query):
+    """'a=eq.1&select=x' -> [('a', 'eq.1'), ('select', 'x')], minus limit/offset.
+    Values are kept exactly as written (already URL-safe in callers)."""
+    params = []
+    for part in (query or '').split('&'):
+        key, _, value = part.partition('=')
+        if key and key not in ('limit', 'offset'):
+            params.append((key, value))
+    return params
+
+
+def _stable_order(params):
+    """Offset pages are only disjoint under a total order: add id as the
+    (last) sort key so rows cannot shift between pages."""
+    for i, (key, value) in enumerate(params):
+        if key == 'order':
+            columns = [c.split('.')[0] for c in value.split(',')]
+            if 'id' not in columns:
+                params[i] = (key, f"{value},id")
+            return params
+    return params + [('order', 'id')]
+
+
+def _page_url(table, params, limit, offset):
+    parts = [f"{k}={v}" for k, v in params] + [f"limit={limit}", f"offset={offset}"]
+    return f"{SUPABASE_URL}/rest/v1/{table}?" + "&".join(parts)
+
+
+def _content_range_total(resp):
+    """Total from 'Content-Range: 0-999/12345' (None when unknown: '*')."""
+    total = (resp.headers.get('Content-Range') or '').rpartition('/')[2]
+    return int(total) if total.isdigit() else None
+
+
+def _fetch_page(table, params, offset, count=False):
+    headers = _read_headers()
+    if count:
+        headers['Prefer'] = 'count=exact'
+    resp = requests.get(_page_url(table, params, PAGE_SIZE, offset), headers=headers, timeout=30)
+    if resp.status_code not in (200, 206):
+        raise RuntimeError(f"{table} offset={offset}: {resp.status_code} — {resp.text[:200]}")
+    data = resp.json()
+    if not isinstance(data, list):
+        raise RuntimeError(f"{table} offset={offset}: unexpected response {str(data)[:200]}")
+    return data, (_content_range_total(resp) if count else None)
+
+
+def count_rows(table, query=''):
+    """Row count via count=exact — no rows are transferred. 0 (logged) on errors."""
+    try:
+        headers = {**_read_headers(), 'Prefer': 'count=exact'}
+        resp = requests.get(_page_url(table, _query_params(query), 0, 0), headers=headers, timeout=30)
+        if resp.status_code not in (200, 206):
+            log.warning(f"count_rows failed for {table}: {resp.status_code} — {resp.text[:200]}")
+            return 0
+        total = _content_range_total(resp)
+        if total is None:
+            # Server did not return a total: count the rows instead
+            total = sum(1 for _ in iter_all_rows(table, query))
+        return total
+    except Exception as e:
+        log.warning(f"count_rows failed for {table}: {e}")
+        return 0
+
+
+def iter_all_rows(table, query='', ordered=False, concurrency=None):
+    """
+    Yield every row matching `query`. The first page also asks for
+    count=exact; the remaining pages are then fetched concurrently (at most
+    `concurrency` in flight, ADMIN_FETCH_CONCURRENCY by default) and yielded
+    as they arrive — or in page order with ordered=True (needed when the
+    query has an order=). Pages are always sorted with id as the final key
+    (_stable_order), so no row is skipped or repeated between pages.
+    Raises RuntimeError if a page fails.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    params = _stable_order(_query_params(query))
+    first, total = _fetch_page(table, params, 0, count=True)
+    yield from first
+    if len(first) < PAGE_SIZE:
+        return
+
+    if total is None:
+        # No total from the server: page sequentially until a short page
+        offset = PAGE_SIZE
+        while True:
+            page, _ = _fetch_page(table, params, offset)
+            yield from page
+            if len(page) < PAGE_SIZE:
+                return
+            offset += PAGE_SIZE
+
+    offsets = iter(range(PAGE_SIZE, total, PAGE_SIZE))
+    workers = max(1, concurrency or ADMIN_FETCH_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Sliding window: never more than `workers` pages fetched but not yet consumed
+        pending = []
+        for offset in offsets:
+            pending.append(pool.submit(_fetch_page, table, params, offset))
+            if len(pending) == workers:
+                break
+        while pending:
+            if ordered:
+                future = pending.pop(0)
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                future = next(f for f in pending if f in done)
+                pending.remove(future)
+            page, _ = future.result()
+            nxt = next(offsets, None)
+            if nxt is not None:
+                pending.append(pool.submit(_fetch_page, table, params, nxt))
+            yield from page
+
+
 def get_all_rows(table, query=''):
     """
     Standard query parameter pagination to prevent timeouts and fetch all real-time data.
+    Returns the rows fetched before any error (logged) instead of raising.
     """
+    rows = []
     try:
-        all_results = []
-        offset = 0
-        limit = 1000
-        
-        while True:
-            base_url = f"{SUPABASE_URL}/rest/v1/{table}"
-            params = []
-            if query:
-                params = [p for p in query.split('&') if not p.startswith('limit=') and not p.startswith('offset=')]
-            
-            params.append(f"limit={limit}")
-            params.append(f"offset={offset}")
-            url = base_url + "?" + "&".join(params)
-            
-            resp = requests.get(url, headers=_read_headers())
-            
-            if resp.status_code in [200, 206]:
-                data = resp.json()
-                if not isinstance(data, list):
-                    print(f"[Admin] get_all_rows unexpected response for {table}: {type(data)} — {str(data)[:200]}")
-                    break
-                if len(data) == 0:
-                    break
-                all_results.extend(data)
-                
-                if len(data) < limit:
-                    break
-                offset += limit
-            else:
-                print(f"[Admin] get_all_rows failed for {table}: {resp.status_code} — {resp.text[:200]}")
-                break
-                
-        return all_results
-    except Exception as e:
-        traceback.print_exc()
-        return []
+        for row in iter_all_rows(table, query, ordered=True):
+            rows.append(row)
+    except RuntimeError as e:
+        log.warning(f"get_all_rows failed for {table}: {e}")
+    except Exception:
+        log.exception("get_all_rows failed")
+    return rows
 
 # =========================================================
 # 1. REVENUE ANALYTICS
@@ -83,32 +183,12 @@ def get_revenue():
         start_date_str = request.args.get('start_date')
         end_date_str   = request.args.get('end_date')
 
-        all_payments = []
-        offset = 0
-        limit  = 1000
-        while True:
-            url = (
-                f"{SUPABASE_URL}/rest/v1/payments"
-                f"?select=id,amount,status,created_at,initiated_at,"
-                f"completed_at,refund_amount,user_email,"
-                f"payment_intent_id,plan_name"
-                f"&limit={limit}&offset={offset}"
-            )
-            resp = requests.get(url, headers=_read_headers(), timeout=15)
-            print(f"[Revenue] Supabase GET status={resp.status_code} offset={offset}")
-            if resp.status_code not in [200, 206]:
-                print(f"[Revenue] ERROR: {resp.status_code} {resp.text[:300]}")
-                break
-            batch = resp.json()
-            if not isinstance(batch, list):
-                print(f"[Revenue] Unexpected type: {type(batch)} {str(batch)[:200]}")
-                break
-            all_payments.extend(batch)
-            print(f"[Revenue] Batch {len(batch)}, total {len(all_payments)}")
-            if len(batch) < limit:
-                break
-            offset += limit
-        print(f"[Revenue] Total rows: {len(all_payments)}")
+        all_payments = get_all_rows(
+            'payments',
+            'select=id,amount,status,created_at,initiated_at,'
+            'completed_at,refund_amount,user_email,payment_intent_id,plan_name'
+        )
+        log.info(f"Total rows: {len(all_payments)}")
 
         now = datetime.now(timezone.utc)
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -151,7 +231,7 @@ def get_revenue():
                     if best_date(p) and start_dt <= best_date(p) < end_dt
                 ]
             except Exception as e:
-                print(f"[Revenue] Date filter error: {e}")
+                log.warning(f"Date filter error: {e}")
 
         valid_success = ['completed', 'paid', 'success', 'succeeded']
         
@@ -164,7 +244,7 @@ def get_revenue():
         failed = [p for p in filtered_payments if (p.get('status') or '').lower() in ['failed', 'error', 'canceled', 'cancelled']]
         refunded = [p for p in filtered_payments if (p.get('status') or '').lower() == 'refunded']
 
-        print(f"[Revenue] completed={len(completed)} failed={len(failed)} refunded={len(refunded)}")
+        log.info(f"completed={len(completed)} failed={len(failed)} refunded={len(refunded)}")
 
         total_revenue = sum(safe_float(p.get('amount')) for p in completed) / 100
         
@@ -224,7 +304,7 @@ def get_revenue():
         }), 200
 
     except Exception as e:
-        traceback.print_exc()
+        log.exception("best_date failed")
         return jsonify({'error': str(e)}), 500
 
 # =========================================================
@@ -281,16 +361,7 @@ def get_drip_stats():
         
         if not total_recipients:
             plan_name = str(campaign.get('plan_name') or '').lower().strip()
-            all_plans = get_all_rows('plans', 'select=key_name,display_name,recruiter_limit')
-            
-            matching_plan = None
-            for p in all_plans:
-                k_name = str(p.get('key_name') or '').lower().strip()
-                d_name = str(p.get('display_name') or '').lower().strip()
-                if plan_name == k_name or plan_name == d_name:
-                    matching_plan = p
-                    break
-            
+            matching_plan = plans_catalog.get(plan_name)
             total_recipients = matching_plan.get('recruiter_limit') if matching_plan else 0
 
         actual_status = campaign.get('status', 'unknown')
@@ -317,7 +388,7 @@ def get_drip_stats():
         }), 200
         
     except Exception as e:
-        traceback.print_exc()
+        log.exception("get_drip_stats failed")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @admin_bp.route('/api/admin/drip-campaign/force-wave', methods=['POST'])
@@ -347,7 +418,7 @@ def force_drip_wave():
         if patch_resp.status_code in [200, 204]: return jsonify({'success': True, 'message': f'Wave {target_wave} forced.'}), 200
         else: return jsonify({'error': f'Failed: {patch_resp.text}'}), 500
     except Exception as e:
-        traceback.print_exc()
+        log.exception("force_drip_wave failed")
         return jsonify({'error': str(e)}), 500
 
 # =========================================================
@@ -417,73 +488,85 @@ def get_brevo_logs():
             return jsonify({'success': False, 'error': f'Query failed: {resp.text}'}), resp.status_code
 
     except Exception as e:
-        traceback.print_exc()
+        log.exception("get_brevo_logs failed")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _brevo_daily_counts(start_day, end_day, email_to=''):
+    """
+    [(day, event_type, events)] for start_day..end_day (UTC days).
+    Reads the brevo_event_summary RPC (rollup, see sql/brevo_event_daily.sql);
+    if that is not deployed yet, counts a narrow scan of brevo_event_logs.
+    Returns (rows, source).
+    """
+    resp = requests.post(
+        f"{SUPABASE_URL}/rest/v1/rpc/brevo_event_summary",
+        headers=_read_headers(),
+        json={'p_start': start_day.isoformat(), 'p_end': end_day.isoformat(), 'p_email': email_to or None},
+        timeout=30,
+    )
+    if resp.status_code in [200, 206]:
+        return [(r['day'][:10], r['event_type'] or 'unknown', int(r['events'])) for r in resp.json()], 'rollup'
+    if resp.status_code != 404:
+        raise RuntimeError(f"brevo_event_summary failed: {resp.status_code} — {resp.text[:200]}")
+
+    log.warning("brevo_event_summary RPC missing; counting brevo_event_logs directly (apply sql/brevo_event_daily.sql)")
+    query = (f"select=timestamp,event_type"
+             f"&timestamp=gte.{start_day.isoformat()}"
+             f"&timestamp=lt.{(end_day + timedelta(days=1)).isoformat()}")
+    if email_to: query += f"&email_to=ilike.{quote('*' + email_to + '*')}"
+    counts = {}
+    for entry in iter_all_rows('brevo_event_logs', query):
+        key = ((entry.get('timestamp') or '')[:10], entry.get('event_type') or 'unknown')
+        counts[key] = counts.get(key, 0) + 1
+    return [(day, event_type, n) for (day, event_type), n in counts.items()], 'scan'
+
+
 @admin_bp.route('/api/admin/brevo-logs/summary', methods=['GET'])
 def get_brevo_logs_summary():
+    """
+    Event counts for the last ?days= UTC days (today included), optionally
+    for recipients matching ?email_to=. Counts are exact at any volume; the
+    payload is bounded by days x event types.
+    """
     try:
-        days = int(request.args.get('days', 7))
+        days = max(int(request.args.get('days', 7)), 1)
         email_to = request.args.get('email_to', '').strip()
 
         now = datetime.now(timezone.utc)
-        start_date = (now - timedelta(days=days))
-        
-        params = [
-            ("select", "*"),
-            ("timestamp", f"gte.{start_date.strftime('%Y-%m-%dT%H:%M:%SZ')}"),
-            ("order", "timestamp.desc"),
-            ("limit", "5000")
-        ]
-        
-        if email_to: params.append(("email_to", f"ilike.%{email_to}%"))
+        start_date = now.date() - timedelta(days=days - 1)   # `days` calendar days ending today
 
-        url = f"{SUPABASE_URL}/rest/v1/brevo_event_logs"
-        resp = requests.get(url, headers=_read_headers(), params=params)
-
-        if resp.status_code not in [200, 206]:
-            return jsonify({'success': False, 'error': 'Failed to fetch logs'}), 400
-
-        logs = resp.json()
+        rows, source = _brevo_daily_counts(start_date, now.date(), email_to)
 
         event_breakdown = {}
         daily_breakdown = {}
-
-        for log in logs:
-            event_type = log.get('event_type', 'unknown')
-            timestamp = log.get('timestamp', '')
-
-            event_breakdown[event_type] = event_breakdown.get(event_type, 0) + 1
-
-            if timestamp:
-                try:
-                    date_key = timestamp[:10]
-                    if date_key not in daily_breakdown: daily_breakdown[date_key] = {}
-                    daily_breakdown[date_key][event_type] = daily_breakdown[date_key].get(event_type, 0) + 1
-                except: pass
+        for date_key, event_type, events in rows:
+            event_breakdown[event_type] = event_breakdown.get(event_type, 0) + events
+            day_data = daily_breakdown.setdefault(date_key, {})
+            day_data[event_type] = day_data.get(event_type, 0) + events
 
         top_events_by_date = []
         for date_key in sorted(daily_breakdown.keys(), reverse=True):
             day_data = daily_breakdown[date_key]
+            day_data['total'] = sum(day_data.values())
             day_data['date'] = date_key
-            day_data['total'] = sum(day_data.values()) - 1
             top_events_by_date.append(day_data)
 
         return jsonify({
             'success': True,
             'summary': {
-                'total_events': len(logs),
+                'total_events': sum(event_breakdown.values()),
                 'event_breakdown': event_breakdown,
                 'date_range': {
                     'start': start_date.strftime('%Y-%m-%d'), 
                     'end': now.strftime('%Y-%m-%d')
                 },
-                'top_events_by_date': top_events_by_date[:30]
+                'top_events_by_date': top_events_by_date[:30],
+                'source': source,
             }
         }), 200
 
     except Exception as e:
-        traceback.print_exc()
+        log.exception("get_brevo_logs_summary failed")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # =========================================================
@@ -492,53 +575,14 @@ def get_brevo_logs_summary():
 @admin_bp.route('/api/admin/brevo-stats', methods=['GET'])
 def get_brevo_stats():
     try:
-        api_key = os.getenv('BREVO_API_KEY')
-        if not api_key: return jsonify({'success': False, 'error': 'BREVO_API_KEY not configured.'}), 500
-
-        brevo_headers = {'accept': 'application/json', 'api-key': api_key}
-        account_resp = requests.get('https://api.brevo.com/v3/account', headers=brevo_headers, timeout=10)
-        
-        if account_resp.status_code != 200: return jsonify({'success': False, 'error': f"Brevo API error {account_resp.status_code}"}), 500
-
-        account_data = account_resp.json()
-        all_plans = account_data.get('plan', [])
-        plan_info = (next((p for p in all_plans if p.get('type') == 'subscription'), None)
-                    or next((p for p in all_plans if p.get('type') == 'payAsYouGo'), None)
-                    or next((p for p in all_plans if p.get('type') == 'free'), None) or {})
-
-        plan_type = plan_info.get('type', 'free')
-        credits_left = plan_info.get('credits', 0)
-        now_utc = datetime.now(timezone.utc)
-        today_str = now_utc.strftime('%Y-%m-%d')
-        month_start_str = now_utc.replace(day=1).strftime('%Y-%m-%d')
-
-        daily_sent, monthly_sent = 0, 0
-        try:
-            day_stats_resp = requests.get('https://api.brevo.com/v3/smtp/statistics/aggregatedReport', headers=brevo_headers, params={'startDate': today_str, 'endDate': today_str}, timeout=10)
-            if day_stats_resp.status_code == 200: daily_sent = day_stats_resp.json().get('requests', 0)
-            month_stats_resp = requests.get('https://api.brevo.com/v3/smtp/statistics/aggregatedReport', headers=brevo_headers, params={'startDate': month_start_str, 'endDate': today_str}, timeout=10)
-            if month_stats_resp.status_code == 200: monthly_sent = month_stats_resp.json().get('requests', 0)
-        except: pass
-
-        if plan_type == 'free':
-            total_limit, credits_used, usage_label = 300, daily_sent, "today's free daily limit"
-        else:
-            total_limit, credits_used, usage_label = credits_left + monthly_sent, monthly_sent, "monthly plan limit"
-
-        usage_percentage = round((credits_used / total_limit) * 100, 2) if total_limit > 0 else 0.0
+        stats = BrevoStatsService.get_account_stats()
+        if not stats['success']: return jsonify(stats), 500
 
+        account_data = stats['account']
         return jsonify({
             'success': True,
-            'fetched_at': now_utc.strftime('%Y-%m-%d %H:%M:%S UTC'),
-            'plan_details': {
-                'type': plan_type, 'total_limit': total_limit, 'credits_remaining': credits_left,
-                'credits_used': credits_used, 'usage_percent': usage_percentage,
-                'usage_label': usage_label, 'trigger_alert': usage_percentage >= 75,
-                'daily_sent': daily_sent, 'monthly_sent': monthly_sent,
-                'purchase_date': plan_info.get('startDate') or account_data.get('createdAt', 'N/A'),
-                'plan_end_date': plan_info.get('endDate') or 'N/A',
-                'features': ["Transactional Email", "REST API Access", "Email Templates"]
-            },
+            'fetched_at': stats['fetched_at'].strftime('%Y-%m-%d %H:%M:%S UTC'),
+            'plan_details': stats['plan_details'],
             'account_holder': f"{account_data.get('firstName', '')} {account_data.get('lastName', '')}".strip() or 'N/A',
             'account_email': account_data.get('email', 'N/A'),
             'company': account_data.get('companyName', 'N/A')
@@ -546,9 +590,45 @@ def get_brevo_stats():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# =========================================================
+# LIST ENDPOINTS: ?limit=&cursor=&sort=&fields=&<field>=<op>.<value>
+# (services/list_query.py). Without any of those the full list is
+# returned as before; with them one page plus total / next_cursor.
+# =========================================================
+USERS_LIST = ListSpec(
+    filterable=('email', 'first_name', 'last_name', 'plan_name', 'profile_completed', 'created_at'),
+    sortable=('created_at', 'email', 'last_name', 'plan_name'),
+)
+SUPPORT_TICKETS_LIST = ListSpec(
+    filterable=('status', 'user_email', 'subject', 'ticket_id', 'created_at'),
+    sortable=('created_at', 'status', 'user_email'),
+)
+APP_RECRUITERS_LIST = ListSpec(
+    filterable=('status', 'email', 'company', 'created_at'),
+    sortable=('created_at', 'email', 'company', 'status'),
+)
+INCOMPLETE_PROFILES_LIST = ListSpec(
+    filterable=('user_type', 'campaign_status', 'email', 'created_at'),
+    sortable=('created_at', 'email', 'user_type', 'campaign_status'),
+)
+
+
+def _list_page(table, query, extra_params=(), select=True):
+    """One page of a ListQuery from Supabase: (rows, meta)."""
+    return list_query.run(query, f"{SUPABASE_URL}/rest/v1/{table}", _read_headers(),
+                          extra_params, select=select)
+
+
 @admin_bp.route('/api/admin/users', methods=['GET'])
 def get_users():
-    try: return jsonify({'count': len(get_all_rows('users', 'select=*')), 'users': get_all_rows('users', 'select=*')}), 200
+    try:
+        query = USERS_LIST.parse(request.args)
+        if not query.active:
+            users = get_all_rows('users', 'select=*')
+            return jsonify({'count': len(users), 'users': users}), 200
+        users, meta = _list_page('users', query)
+        return jsonify({'count': len(users), 'users': users, **meta}), 200
+    except ListQueryError as e: return jsonify({'error': str(e)}), 400
     except Exception as e: return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/api/admin/users/delete', methods=['POST'])
@@ -581,16 +661,23 @@ def get_server_status():
 def get_contact_submissions():
     try:
         filter_status = request.args.get('filter', 'all')
-        query = 'select=*'
-        if filter_status == 'unread': query += '&status=eq.unread'
-        elif filter_status == 'open': query += '&status=eq.open'
-        elif filter_status == 'resolved': query += '&status=eq.resolved'
-        return jsonify({'submissions': [{'id': sub.get('id'), 'name': sub.get('user_name'), 'email': sub.get('user_email'), 'subject': sub.get('subject'), 'message': sub.get('message'), 'status': sub.get('status', 'open'), 'submitted_at': sub.get('created_at'), 'ticket_id': sub.get('ticket_id'), 'admin_notes': sub.get('admin_notes', '')} for sub in get_all_rows('support_tickets', query)]}), 200
+        status = filter_status if filter_status in ('unread', 'open', 'resolved') else None
+        list_q = SUPPORT_TICKETS_LIST.parse(request.args)
+        meta = {}
+        if list_q.active:
+            # fields= names the response keys below, so the select stays *
+            rows, meta = _list_page('support_tickets', list_q,
+                                    [('status', f'eq.{status}')] if status else (), select=False)
+        else:
+            rows = get_all_rows('support_tickets', 'select=*' + (f'&status=eq.{status}' if status else ''))
+        submissions = [{'id': sub.get('id'), 'name': sub.get('user_name'), 'email': sub.get('user_email'), 'subject': sub.get('subject'), 'message': sub.get('message'), 'status': sub.get('status', 'open'), 'submitted_at': sub.get('created_at'), 'ticket_id': sub.get('ticket_id'), 'admin_notes': sub.get('admin_notes', '')} for sub in rows]
+        return jsonify({'submissions': list_q.project(submissions), **meta}), 200
+    except ListQueryError as e: return jsonify({'error': str(e)}), 400
     except Exception as e: return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/api/admin/contact-submissions/unread-count', methods=['GET'])
 def get_unread_count():
-    try: return jsonify({'unread_count': len(get_all_rows('support_tickets', 'select=id&status=eq.unread'))}), 200
+    try: return jsonify({'unread_count': count_rows('support_tickets', 'status=eq.unread')}), 200
     except Exception as e: return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/api/admin/contact-submissions/<ticket_id>/mark-read', methods=['PATCH'])
@@ -623,8 +710,13 @@ def get_stats():
         def safe_float(val):
             try: return float(val) if val is not None else 0.0
             except: return 0.0
-        payments = get_all_rows('payments', 'select=amount,status')
-        return jsonify({'total_users': len(get_all_rows('users', 'select=id')), 'active_users': len(get_all_rows('users', 'select=id&account_status=eq.active')), 'total_blasts': len(get_all_rows('blast_campaigns', 'select=id')), 'total_resume_uploads': len(get_all_rows('resumes', 'select=id')), 'total_revenue': round(sum(safe_float(p.get('amount')) for p in payments if (p.get('status') or '').lower() in ['completed', 'paid', 'success', 'succeeded']) / 100, 2)}), 200
+        # Counts come from count=exact; revenue is summed as pages stream in
+        revenue_cents = sum(
+            safe_float(p.get('amount'))
+            for p in iter_all_rows('payments', 'select=amount,status')
+            if (p.get('status') or '').lower() in ['completed', 'paid', 'success', 'succeeded']
+        )
+        return jsonify({'total_users': count_rows('users'), 'active_users': count_rows('users', 'account_status=eq.active'), 'total_blasts': count_rows('blast_campaigns'), 'total_resume_uploads': count_rows('resumes'), 'total_revenue': round(revenue_cents / 100, 2)}), 200
     except Exception as e: return jsonify({'error': str(e)}), 500
 
 
@@ -727,8 +819,10 @@ def delete_recruiter_by_email():
 @admin_bp.route('/api/admin/plans', methods=['GET'])
 def get_plans():
     try: 
-        resp = requests.get(f"{SUPABASE_URL}/rest/v1/plans?select=*", headers=_read_headers())
-        return jsonify({'plans': resp.json() if resp.status_code in [200, 206] else []}), 200
+        # Always fresh for the editor; also renews this worker's snapshot
+        try: plans = plans_catalog.refresh()
+        except RuntimeError: plans = []
+        return jsonify({'plans': plans}), 200
     except Exception as e: return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/api/admin/plans/update', methods=['PATCH'])
@@ -736,18 +830,24 @@ def update_plan():
     try:
         data = request.json
         resp = requests.patch(f"{SUPABASE_URL}/rest/v1/plans?id=eq.{data.get('id')}", json={'price_cents': data.get('price_cents'), 'recruiter_limit': data.get('recruiter_limit'), 'display_name': data.get('display_name'), 'updated_at': datetime.utcnow().isoformat()}, headers=_get_headers())
-        if resp.status_code in [200, 204]: return jsonify({'success': True}), 200
+        if resp.status_code in [200, 204]:
+            plans_catalog.invalidate()
+            try: plans_catalog.refresh()
+            except RuntimeError as e: log.warning(f"Plans refresh after update failed: {e}")
+            return jsonify({'success': True}), 200
         else: return jsonify({'error': resp.text}), 500
     except Exception as e: return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/api/admin/resumes/all', methods=['GET'])
 def get_all_resumes():
-    try: return jsonify({'success': True, 'count': len(get_all_rows('resumes', 'select=*')), 'resumes': get_all_rows('resumes', 'select=*')}), 200
+    try:
+        resumes = get_all_rows('resumes', 'select=*')
+        return jsonify({'success': True, 'count': len(resumes), 'resumes': resumes}), 200
     except Exception as e: return jsonify({'success': False, 'error': str(e)}), 500
 
 @admin_bp.route('/api/admin/users/count', methods=['GET'])
 def get_user_count():
-    try: return jsonify({'success': True, 'total_users': len(get_all_rows('users', 'select=id'))}), 200
+    try: return jsonify({'success': True, 'total_users': count_rows('users')}), 200
     except Exception as e: return jsonify({'success': False, 'error': str(e)}), 500
 
 # =========================================================
@@ -769,13 +869,18 @@ def get_pending_recruiters_count():
             
         return jsonify({'pending_count': 0}), 200
     except Exception as e:
-        traceback.print_exc()
+        log.exception("get_pending_recruiters_count failed")
         return jsonify({"error": str(e)}), 500
 
 
 @admin_bp.route('/api/admin/app-registered-recruiters', methods=['GET'])
 def get_app_registered_recruiters():
     try:
+        query = APP_RECRUITERS_LIST.parse(request.args)
+        if query.active:
+            rows, meta = _list_page('app_registered_recruiters', query)
+            return jsonify({"success": True, "data": rows, **meta}), 200
+
         response = requests.get(
             f"{SUPABASE_URL}/rest/v1/app_registered_recruiters?select=*&order=created_at.desc",
             headers=_read_headers()
@@ -784,8 +889,10 @@ def get_app_registered_recruiters():
             return jsonify({"success": True, "data": response.json()}), 200
             
         return jsonify({"success": False, "error": response.text}), response.status_code
+    except ListQueryError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
-        traceback.print_exc()
+        log.exception("get_app_registered_recruiters failed")
         return jsonify({"success": False, "error": str(e)}), 500
 
 
@@ -844,20 +951,38 @@ def approve_app_registered_recruiter(recruiter_id):
             return jsonify({"success": False, "error": "Added recruiter, but failed to update status. Have you added the 'status' column to the database?"}), 500
             
     except Exception as e:
-        traceback.print_exc()
+        log.exception("approve_app_registered_recruiter failed")
         return jsonify({"success": False, "error": str(e)}), 500
 
 # =========================================================
 # PROFILE MANAGEMENT (admin safety net)
 # =========================================================
-def _classify_user_type(user_id, paid_user_ids, resume_user_ids, email=None, paid_emails=None):
-    """paid > analyzed-only > signup-only. Paid matches by user_id OR email."""
-    email_l = (email or '').strip().lower()
-    if user_id in paid_user_ids or (paid_emails and email_l in paid_emails):
-        return 'paid'
-    if user_id in resume_user_ids:
-        return 'analyzed-only'
-    return 'signup-only'
+# Both views read the in-memory classification index (services/profile_index.py)
+# instead of pulling users / payments / resumes / blast_campaigns per request.
+#   ?limit=&offset=   page through the user list(s); counts are always totals
+#   ?refresh=full     rebuild the index first (?refresh=delta for a delta refresh)
+_PROFILE_ENTRY_FIELDS = ['id', 'email', 'first_name', 'last_name', 'phone',
+                         'primary_skills', 'user_type', 'campaign_status', 'created_at']
+
+
+def _page_args():
+    """(limit, offset) from the query string; limit None = everything."""
+    limit = request.args.get('limit', type=int)
+    offset = max(request.args.get('offset', 0, type=int) or 0, 0)
+    if limit is not None:
+        limit = min(max(limit, 1), 5000)
+    return limit, offset
+
+
+def _page(rows, limit, offset):
+    end = None if limit is None else offset + limit
+    return [{k: r[k] for k in _PROFILE_ENTRY_FIELDS} for r in rows[offset:end]]
+
+
+def _load_profile_index():
+    refresh = request.args.get('refresh')
+    profile_index.ensure_fresh(force=refresh if refresh in ('full', 'delta') else None)
+    return profile_index.entries()
 
 
 @admin_bp.route('/api/admin/profiles/incomplete', methods=['GET'])
@@ -865,54 +990,19 @@ def get_incomplete_profiles():
     """
     List users whose profile is not complete, each classified as
     paid / analyzed-only / signup-only, with their latest campaign status.
+    ?limit=&offset= keep the default ordering below; cursor / sort / fields /
+    field filters switch to list-query paging over the index entries.
     """
     try:
-        # Users missing a complete profile
-        users = get_all_rows(
-            'users',
-            'profile_completed=eq.false&select=id,email,first_name,last_name,phone,primary_skills,created_at'
-        )
-
-        # Build lookup sets for classification
-        campaigns = get_all_rows('blast_campaigns', 'select=user_id,status,created_at')
-        payments = get_all_rows('payments', "status=eq.completed&select=user_id,user_email")
-        resumes = get_all_rows('resumes', 'select=user_id')
-
-        # PAID = has a COMPLETED payment. Many guest payments have NULL user_id
-        # and are linked only by user_email, so match on BOTH.
-        paid_ids = {p.get('user_id') for p in payments if p.get('user_id')}
-        paid_emails = {(p.get('user_email') or '').strip().lower()
-                       for p in payments if p.get('user_email')}
-        paid_emails.discard('guest@resumeblast.ai')  # placeholder, not a real user
-        resume_ids = {r.get('user_id') for r in resumes if r.get('user_id')}
-
-        # latest campaign status per user
-        latest_status = {}
-        for c in campaigns:
-            uid = c.get('user_id')
-            if not uid:
-                continue
-            if uid not in latest_status or (c.get('created_at') or '') > latest_status[uid][1]:
-                latest_status[uid] = (c.get('status'), c.get('created_at') or '')
-
-        result = []
-        for u in users:
-            uid = u.get('id')
-            result.append({
-                'id': uid,
-                'email': u.get('email'),
-                'first_name': u.get('first_name'),
-                'last_name': u.get('last_name'),
-                'phone': u.get('phone'),
-                'primary_skills': u.get('primary_skills'),
-                'user_type': _classify_user_type(uid, paid_ids, resume_ids, u.get('email'), paid_emails),
-                'campaign_status': latest_status.get(uid, (None,))[0],
-                'created_at': u.get('created_at'),
-            })
+        limit, offset = _page_args()
+        list_q = INCOMPLETE_PROFILES_LIST.parse(request.args)
+        # profile_completed=false only; NULL rows are excluded, as before
+        result = [e for e in _load_profile_index()
+                  if e['profile_completed'] is not None and not e['profile_completed']]
 
-        # Sort: paid first, then analyzed-only, then signup-only
-        order = {'paid': 0, 'analyzed-only': 1, 'signup-only': 2}
-        result.sort(key=lambda r: order.get(r['user_type'], 3))
+        # Sort: paid first, then analyzed-only, then signup-only (newest first within each)
+        result.sort(key=lambda r: r['created_at'] or '', reverse=True)
+        result.sort(key=lambda r: USER_TYPE_ORDER.get(r['user_type'], 3))
 
         counts = {
             'total': len(result),
@@ -921,10 +1011,26 @@ def get_incomplete_profiles():
             'signup_only': sum(1 for r in result if r['user_type'] == 'signup-only'),
         }
 
-        return jsonify({'success': True, 'counts': counts, 'users': result}), 200
+        if list_q.filters or any(k in request.args for k in ('cursor', 'sort', 'fields')):
+            if not list_q.fields:
+                list_q.fields = _PROFILE_ENTRY_FIELDS
+            users, pagination = list_q.apply(result)
+        else:
+            users = _page(result, limit, offset)
+            pagination = {'offset': offset, 'limit': limit, 'total': len(result)}
+
+        return jsonify({
+            'success': True,
+            'counts': counts,
+            'users': users,
+            'pagination': pagination,
+            'index': profile_index.status(),
+        }), 200
 
+    except ListQueryError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
-        traceback.print_exc()
+        log.exception("get_incomplete_profiles failed")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -959,6 +1065,7 @@ def admin_create_profile():
         resp = requests.patch(url, json=payload, headers=_get_headers())
 
         if resp.status_code in (200, 204):
+            record_profile(email, payload)
             return jsonify({
                 'success': True,
                 'profile_completed': payload['profile_completed'],
@@ -967,7 +1074,7 @@ def admin_create_profile():
         return jsonify({'success': False, 'error': f'update failed ({resp.status_code}): {resp.text[:200]}'}), 500
 
     except Exception as e:
-        traceback.print_exc()
+        log.exception("admin_create_profile failed")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -977,31 +1084,11 @@ def get_profiles_overview():
     Full structured breakdown of ALL users:
       paid vs non-paid  X  profile complete vs not completed.
     Returns counts + the user lists for each bucket.
+    ?bucket=paid_incomplete returns just that bucket; limit/offset apply per bucket.
     """
     try:
-        users = get_all_rows(
-            'users',
-            'select=id,email,first_name,last_name,phone,primary_skills,profile_completed,created_at'
-        )
-        campaigns = get_all_rows('blast_campaigns', 'select=user_id,status,created_at')
-        payments = get_all_rows('payments', "status=eq.completed&select=user_id,user_email")
-        resumes = get_all_rows('resumes', 'select=user_id')
-
-        # PAID = has a COMPLETED payment. Many guest payments have NULL user_id
-        # and are linked only by user_email, so match on BOTH.
-        paid_ids = {p.get('user_id') for p in payments if p.get('user_id')}
-        paid_emails = {(p.get('user_email') or '').strip().lower()
-                       for p in payments if p.get('user_email')}
-        paid_emails.discard('guest@resumeblast.ai')  # placeholder, not a real user
-        resume_ids = {r.get('user_id') for r in resumes if r.get('user_id')}
-
-        latest_status = {}
-        for c in campaigns:
-            uid = c.get('user_id')
-            if not uid:
-                continue
-            if uid not in latest_status or (c.get('created_at') or '') > latest_status[uid][1]:
-                latest_status[uid] = (c.get('status'), c.get('created_at') or '')
+        limit, offset = _page_args()
+        only = request.args.get('bucket')
 
         buckets = {
             'paid_complete': [],
@@ -1009,27 +1096,17 @@ def get_profiles_overview():
             'nonpaid_complete': [],
             'nonpaid_incomplete': [],
         }
+        if only and only not in buckets:
+            return jsonify({'success': False, 'error': f'bucket must be one of {list(buckets)}'}), 400
 
-        for u in users:
-            uid = u.get('id')
-            is_paid = uid in paid_ids or (u.get('email') or '').strip().lower() in paid_emails
-            is_complete = bool(u.get('profile_completed'))
-            entry = {
-                'id': uid,
-                'email': u.get('email'),
-                'first_name': u.get('first_name'),
-                'last_name': u.get('last_name'),
-                'phone': u.get('phone'),
-                'primary_skills': u.get('primary_skills'),
-                'user_type': _classify_user_type(uid, paid_ids, resume_ids, u.get('email'), paid_emails),
-                'campaign_status': latest_status.get(uid, (None,))[0],
-                'created_at': u.get('created_at'),
-            }
-            key = ('paid' if is_paid else 'nonpaid') + ('_complete' if is_complete else '_incomplete')
+        entries = _load_profile_index()
+        entries.sort(key=lambda r: r['created_at'] or '', reverse=True)
+        for entry in entries:
+            key = ('paid' if entry['is_paid'] else 'nonpaid') + ('_complete' if entry['is_complete'] else '_incomplete')
             buckets[key].append(entry)
 
         counts = {
-            'total': len(users),
+            'total': len(entries),
             'paid': len(buckets['paid_complete']) + len(buckets['paid_incomplete']),
             'nonpaid': len(buckets['nonpaid_complete']) + len(buckets['nonpaid_incomplete']),
             'complete': len(buckets['paid_complete']) + len(buckets['nonpaid_complete']),
@@ -1040,8 +1117,14 @@ def get_profiles_overview():
             'nonpaid_incomplete': len(buckets['nonpaid_incomplete']),
         }
 
-        return jsonify({'success': True, 'counts': counts, 'buckets': buckets}), 200
+        return jsonify({
+            'success': True,
+            'counts': counts,
+            'buckets': {k: _page(v, limit, offset) for k, v in buckets.items() if not only or k == only},
+            'pagination': {'offset': offset, 'limit': limit},
+            'index': profile_index.status(),
+        }), 200
 
     except Exception as e:
-        traceback.print_exc()
-        return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
+        log.exception("get_profiles_overview failed")
+        return jsonify({'success': False, 'error': str(e)}), 500
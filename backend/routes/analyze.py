@@ -4,8 +4,15 @@ import anthropic
 import os
 import re
 import json
+import time
 from datetime import datetime
 
+from services.metrics import CLAUDE_ANALYSIS_SECONDS, CLAUDE_TOKENS
+from services.profile_index import record_analysis
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
 analyze_bp = Blueprint('analyze', __name__, url_prefix='/api')
 
 # Initialize Anthropic client
@@ -157,10 +164,7 @@ def analyze_resume():
                 'error': 'Resume text is too short or empty'
             }), 400
         
-        print(f"\n{'='*70}")
-        print("📊 STARTING COMPREHENSIVE RESUME ANALYSIS")
-        print(f"{'='*70}")
-        print(f"📄 Resume Length: {len(resume_text)} characters")
+        log.info("Resume analysis started", extra={"resume_chars": len(resume_text)})
         
         # Construct enhanced prompt for Claude
         analysis_prompt = f"""You are an expert ATS (Applicant Tracking System) analyzer and career consultant. Analyze the following resume COMPLETELY and extract ALL information in structured JSON format.
@@ -208,22 +212,29 @@ IMPORTANT:
 - Be thorough in extracting ALL skills from the entire resume
 - If information is not found, use "Not Found" or "Not Specified" as appropriate"""
 
-        print("🤖 Sending request to Claude AI...")
         
         # ✅ FIXED: Updated to a valid, currently available Claude model
-        message = anthropic_client.messages.create(
-            model="claude-haiku-4-5",
-            max_tokens=4000,
-            temperature=0.3,
-            messages=[{
-                "role": "user",
-                "content": analysis_prompt
-            }]
-        )
+        started = time.perf_counter()
+        try:
+            message = anthropic_client.messages.create(
+                model="claude-haiku-4-5",
+                max_tokens=4000,
+                temperature=0.3,
+                messages=[{
+                    "role": "user",
+                    "content": analysis_prompt
+                }]
+            )
+        except Exception:
+            CLAUDE_ANALYSIS_SECONDS.labels(outcome="error").observe(time.perf_counter() - started)
+            raise
+        CLAUDE_ANALYSIS_SECONDS.labels(outcome="ok").observe(time.perf_counter() - started)
+        if getattr(message, "usage", None):
+            CLAUDE_TOKENS.labels(direction="input").inc(message.usage.input_tokens or 0)
+            CLAUDE_TOKENS.labels(direction="output").inc(message.usage.output_tokens or 0)
         
         # Extract response
         response_text = message.content[0].text.strip()
-        print(f"✅ Claude Response received ({len(response_text)} chars)")
         
         # Clean up response (remove markdown if present)
         response_text = response_text.replace('```json', '').replace('```', '').strip()
@@ -232,8 +243,7 @@ IMPORTANT:
         try:
             ai_analysis = json.loads(response_text)
         except json.JSONDecodeError as e:
-            print(f"❌ JSON Parse Error: {e}")
-            print(f"Response text: {response_text[:500]}...")
+            log.error(f"AI returned invalid JSON: {e}", extra={"response_head": response_text[:500]})
             raise ValueError("AI returned invalid JSON format")
         
         # Calculate ATS Score with breakdown
@@ -242,29 +252,25 @@ IMPORTANT:
         ai_analysis['score_breakdown'] = score_result['breakdown']
         ai_analysis['total_skills_count'] = score_result['total_skills_found']
         
-        print(f"\n{'='*70}")
-        print("✅ ANALYSIS COMPLETE")
-        print(f"{'='*70}")
-        print(f"👤 Candidate: {ai_analysis.get('candidate_name', 'N/A')}")
-        print(f"💼 Role: {ai_analysis.get('detected_role', 'N/A')}")
-        print(f"📊 ATS Score: {ai_analysis['ats_score']}/100")
-        print(f"🔧 Total Skills Found: {score_result['total_skills_found']}")
-        print(f"Score Breakdown: {score_result['breakdown']}")
-        print(f"{'='*70}\n")
+        log.info("Resume analysis complete", extra={
+            "detected_role": ai_analysis.get('detected_role'),
+            "ats_score":     ai_analysis['ats_score'],
+            "skills_found":  score_result['total_skills_found'],
+            "breakdown":     score_result['breakdown'],
+        })
+        record_analysis(data.get('user_id'))
         
         return jsonify(ai_analysis), 200
         
     except anthropic.APIError as e:
-        print(f"❌ Anthropic API Error: {e}")
+        log.error(f"Anthropic API error: {e}")
         return jsonify({
             'success': False,
             'error': f'AI service error: {str(e)}'
         }), 500
         
     except Exception as e:
-        print(f"❌ Unexpected Error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Unexpected error during resume analysis")
         return jsonify({
             'success': False,
             'error': f'Analysis failed: {str(e)}'
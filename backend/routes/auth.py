@@ -4,12 +4,16 @@ import os
 import requests
 import random
 import time
+from services.mail_transport import get_transport
+from services import identity_resolver
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
 
 auth_bp = Blueprint('auth', __name__)
 
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-BREVO_API_KEY = os.getenv('BREVO_API_KEY')
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
 
 # ─────────────────────────────────────────────
@@ -39,11 +43,11 @@ def is_user_blacklisted(email):
             if results and len(results) > 0:
                 blacklist_entry = results[0]
                 reason = blacklist_entry.get('reason', 'Account suspended')
-                print(f"🚫 Blacklisted user attempt: {email} - Reason: {reason}")
+                log.info(f"Blacklisted user attempt: {email} - Reason: {reason}")
                 return True, reason
         return False, None
     except Exception as e:
-        print(f"⚠️ Error checking blacklist: {e}")
+        log.warning(f"Error checking blacklist: {e}")
         return False, None
 
 
@@ -61,7 +65,7 @@ def check_blacklist():
             return jsonify({'success': False, 'error': 'Email is required'}), 400
         is_blacklisted_flag, reason = is_user_blacklisted(email)
         if is_blacklisted_flag:
-            print(f"🚫 Blocking access for: {email}")
+            log.info(f"Blocking access for: {email}")
             return jsonify({
                 'success': False,
                 'is_blacklisted': True,
@@ -74,7 +78,7 @@ def check_blacklist():
             'message': 'Account is in good standing'
         }), 200
     except Exception as e:
-        print(f"❌ Error checking blacklist: {e}")
+        log.error(f"Error checking blacklist: {e}")
         return jsonify({'success': False, 'error': 'Error checking account status'}), 500
 
 
@@ -93,9 +97,11 @@ def validate_signup():
                 'is_blacklisted': True,
                 'message': "For the signup/login contact support"
             }), 403
+        # A new account may reuse this email — drop any cached checkout identity
+        identity_resolver.forget(email=email)
         return jsonify({'allowed': True, 'message': 'Email is eligible for signup'}), 200
     except Exception as e:
-        print(f"❌ Error validating signup: {e}")
+        log.error(f"Error validating signup: {e}")
         return jsonify({'allowed': True, 'message': 'Validation check completed'}), 200
 
 
@@ -116,7 +122,7 @@ def validate_login():
             }), 403
         return jsonify({'allowed': True, 'message': 'Login allowed'}), 200
     except Exception as e:
-        print(f"❌ Error validating login: {e}")
+        log.error(f"Error validating login: {e}")
         return jsonify({'allowed': True, 'message': 'Validation check completed'}), 200
 
 
@@ -144,7 +150,7 @@ def check_auth_status():
             'message': 'Account status: Active'
         }), 200
     except Exception as e:
-        print(f"❌ Error checking auth status: {e}")
+        log.error(f"Error checking auth status: {e}")
         return jsonify({'success': False, 'error': 'Error checking account status'}), 500
 
 
@@ -189,7 +195,7 @@ def send_reset_code():
                 'used': False
             }
 
-            print(f"🔑 Reset code for {email}: {code}")
+            log.info(f"Reset code generated for {email}")
 
             # ── Send via Brevo transactional email ──
             brevo_payload = {
@@ -212,21 +218,13 @@ def send_reset_code():
                 """
             }
 
-            brevo_resp = requests.post(
-                'https://api.brevo.com/v3/smtp/email',
-                json=brevo_payload,
-                headers={
-                    'api-key': BREVO_API_KEY,
-                    'Content-Type': 'application/json'
-                },
-                timeout=10
-            )
+            brevo_resp = get_transport('brevo').send(brevo_payload, timeout=10, retries=0)
 
-            if brevo_resp.status_code not in (200, 201):
-                print(f"❌ Brevo error: {brevo_resp.status_code} {brevo_resp.text}")
+            if not brevo_resp['success']:
+                log.error(f"Brevo error: {brevo_resp['error']}")
                 return jsonify({'success': False, 'error': 'Failed to send email. Please try again.'}), 500
 
-            print(f"✅ Reset code email sent to {email}")
+            log.info(f"Reset code email sent to {email}")
 
         # Always return success (security: don't reveal whether account exists)
         return jsonify({
@@ -235,7 +233,7 @@ def send_reset_code():
         }), 200
 
     except Exception as e:
-        print(f"❌ Error sending reset code: {e}")
+        log.error(f"Error sending reset code: {e}")
         return jsonify({'success': False, 'error': 'Failed to send reset code. Please try again.'}), 500
 
 
@@ -272,11 +270,11 @@ def verify_reset_code():
         # Mark code as used so it cannot be reused
         _reset_codes[email]['used'] = True
 
-        print(f"✅ Reset code verified for {email}")
+        log.info(f"Reset code verified for {email}")
         return jsonify({'success': True, 'message': 'Code verified successfully.'}), 200
 
     except Exception as e:
-        print(f"❌ Error verifying reset code: {e}")
+        log.error(f"Error verifying reset code: {e}")
         return jsonify({'success': False, 'error': 'Verification failed. Please try again.'}), 500
 
 
@@ -326,15 +324,15 @@ def reset_password():
         )
 
         if update_resp.status_code not in (200, 201):
-            print(f"❌ Supabase admin password update failed: {update_resp.status_code} {update_resp.text}")
+            log.error(f"Supabase admin password update failed: {update_resp.status_code} {update_resp.text}")
             return jsonify({'success': False, 'error': 'Failed to update password. Please try again.'}), 500
 
         # Clean up the used reset code entry
         del _reset_codes[email]
 
-        print(f"✅ Password successfully reset for {email}")
+        log.info(f"Password successfully reset for {email}")
         return jsonify({'success': True, 'message': 'Password updated successfully.'}), 200
 
     except Exception as e:
-        print(f"❌ Error resetting password: {e}")
+        log.error(f"Error resetting password: {e}")
         return jsonify({'success': False, 'error': 'Failed to reset password. Please try again.'}), 500
\ No newline at end of file
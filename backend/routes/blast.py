@@ -1,12 +1,19 @@
 from flask import Blueprint, request, jsonify
 import os, requests, sys
 from datetime import datetime
+from functools import partial
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from services.recruiter_email_service import RecruiterEmailService
 from services.freemium_email_service import FreemiumEmailService
 from routes.drip_campaign import create_drip_campaign
 from services.drip_scheduler import run_day1_blast
+from services.throughput_planner import get_limit_for_plan
+from services.idempotency import idempotency_store, InFlight
+from services.stripe_sessions import stripe_sessions
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
 
 blast_bp = Blueprint("blast", __name__)
 email_service = RecruiterEmailService()
@@ -17,6 +24,10 @@ SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 DRIP_PLANS = {"starter", "basic", "professional", "growth", "advanced", "premium"}
 FREE_PLANS  = {"free", "freemium"}
 
+# Idempotency keys for blast creation (services/idempotency.py)
+BLAST_USER_WINDOW_SECONDS = 600     # same window as the "recent campaign" guard
+BLAST_IDEMPOTENCY_WAIT    = float(os.getenv("BLAST_IDEMPOTENCY_WAIT", "30"))
+
 def get_db_headers():
     return {
         "apikey": SUPABASE_KEY,
@@ -61,48 +72,27 @@ def fetch_candidate_details_from_db(resume_url):
         return None, None, None, None, None, None
 
 def get_plan_limit(plan_name):
-    """Get recruiter limit for a plan, with fallback defaults."""
-    fb = {
-        "starter": 250, "basic": 500, "professional": 750,
-        "growth": 1000, "advanced": 1250, "premium": 1500, "free": 11
-    }
-    try:
-        r = requests.get(
-            f"{SUPABASE_URL}/rest/v1/plans?key_name=eq.{plan_name}&select=recruiter_limit",
-            headers=get_db_headers()
-        )
-        if r.status_code == 200 and r.json():
-            return r.json()[0]["recruiter_limit"]
-    except:
-        pass
-    return fb.get(plan_name, 250)
+    """Get recruiter limit for a plan (plans catalog snapshot, with fallback defaults)."""
+    return get_limit_for_plan(plan_name)
 
-def verify_stripe_session(session_id):
+def verify_stripe_session(session_id, session=None):
     """
     Verify a Stripe session and return plan_name + user_id from metadata.
     This prevents duplicate blasts — if blast_campaigns already has this
     stripe_session_id, we skip re-sending.
+    `session` is an already verified session object (webhook payload); without
+    it the session comes from the stripe_sessions cache, or Stripe on a miss.
     Returns: (plan_name, user_id, already_processed)
     """
     if not session_id:
         return None, None, False
 
-    stripe_key = os.getenv("STRIPE_SECRET_KEY")
-    if not stripe_key:
-        print("[Blast] WARNING: STRIPE_SECRET_KEY not set, skipping Stripe verification")
-        return None, None, False
-
     try:
-        resp = requests.get(
-            f"https://api.stripe.com/v1/checkout/sessions/{session_id}",
-            auth=(stripe_key, "")
-        )
-        if resp.status_code != 200:
-            print(f"[Blast] Stripe session fetch failed: {resp.status_code}")
+        session_data = stripe_sessions.put(session) if session is not None else stripe_sessions.fetch(session_id)
+        if session_data is None:
             return None, None, False
 
-        session_data = resp.json()
-        metadata = session_data.get("metadata", {})
+        metadata = session_data.get("metadata") or {}
         plan_name = metadata.get("plan", "")
         user_id   = metadata.get("user_id", "")
 
@@ -115,7 +105,7 @@ def verify_stripe_session(session_id):
 
         return plan_name, user_id, already_processed
     except Exception as e:
-        print(f"[Blast] Stripe verification error: {e}")
+        log.warning(f"Stripe verification error: {e}")
         return None, None, False
 
 
@@ -161,8 +151,7 @@ def send_blast():
         return jsonify(result), status_code
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log.exception("send_blast failed")
         return jsonify({"success": False, "error": str(e)}), 500
 
 
@@ -171,6 +160,10 @@ def send_blast():
 # in payment_webhook.py (server-side path).
 # The stripe_session deduplication guard makes both paths safe to call — whichever
 # fires first wins; the second call is a no-op that returns already_processed=True.
+#
+# Repeats are answered from the local idempotency store ("blast:session:<id>",
+# then "blast:user:<id>" for 10 minutes) without touching Supabase or Stripe,
+# and concurrent calls for the same key wait for the one that is running.
 def send_blast_internal(
     plan_name,
     user_id,
@@ -184,21 +177,74 @@ def send_blast_internal(
     years_experience  = "0",
     key_skills        = "Professional Skills",
     location          = "Remote",
+    dispatch_day1     = True,
+    session           = None,
+):
+    """
+    Returns a plain dict (not a Flask response object).
+    dispatch_day1=False stops after creating the campaign ("day1_pending": True);
+    the checkout pipeline runs Wave 1 as its own stage.
+    session: the pre-verified Stripe session object, when the caller has it,
+    so the duplicate check does not fetch it from Stripe again.
+    """
+    args = dict(plan_name=plan_name, user_id=user_id, resume_url=resume_url, resume_name=resume_name,
+                stripe_session=stripe_session, candidate_name=candidate_name,
+                candidate_email=candidate_email, candidate_phone=candidate_phone, job_role=job_role,
+                years_experience=years_experience, key_skills=key_skills, location=location,
+                dispatch_day1=dispatch_day1, session=session)
+    run = partial(_send_blast, **args)
+
+    keys = []
+    if stripe_session:
+        keys.append((f"blast:session:{stripe_session}", None))
+    if user_id and str(user_id).strip() not in ["", "None", "null", "undefined"]:
+        keys.append((f"blast:user:{user_id}", BLAST_USER_WINDOW_SECONDS))
+
+    # Innermost call runs the blast; each key wraps the one after it
+    for key, ttl in reversed(keys):
+        run = partial(_run_once, key, run, ttl)
+
+    try:
+        return run()
+    except InFlight as e:
+        log.info(f"Blast for {e} is still running elsewhere — returning in-progress")
+        return {
+            "success":           True,
+            "already_processed": True,
+            "in_progress":       True,
+            "message":           "Blast is already being processed for this payment session.",
+            "plan_used":         (plan_name or "starter").lower(),
+        }
+
+
+def _run_once(key, fn, ttl):
+    result, duplicate = idempotency_store.run_once(
+        key, fn, ttl=ttl, wait=BLAST_IDEMPOTENCY_WAIT,
+        should_store=lambda r: bool(r.get("success")))
+    if duplicate and not result.get("already_processed"):
+        log.info(f"Duplicate blast request collapsed ({key})")
+        result = {**result, "already_processed": True,
+                  "message": "Blast already initiated for this payment session."}
+    return result
+
+
+def _send_blast(
+    plan_name, user_id, resume_url, resume_name, stripe_session, candidate_name, candidate_email,
+    candidate_phone, job_role, years_experience, key_skills, location, dispatch_day1, session,
 ):
-    """Returns a plain dict (not a Flask response object)."""
     try:
         plan_name = (plan_name or "starter").lower()
 
-        print(f"\n[Blast] ========================================")
-        print(f"[Blast] Incoming blast request")
-        print(f"[Blast] plan={plan_name} user_id={user_id!r} session={stripe_session!r}")
-        print(f"[Blast] resume_url={resume_url!r}")
+        log.info("Incoming blast request", extra={
+            "plan": plan_name, "user_id": user_id,
+            "session_id": stripe_session, "resume_url": resume_url,
+        })
 
         # ── Deduplication guard: prevent double-blast on webhook retries ──
         if stripe_session:
-            _, _, already_processed = verify_stripe_session(stripe_session)
+            _, _, already_processed = verify_stripe_session(stripe_session, session)
             if already_processed:
-                print(f"[Blast] Session {stripe_session} already processed — returning cached result")
+                log.info(f"Session {stripe_session} already processed — returning cached result")
                 existing = requests.get(
                     f"{SUPABASE_URL}/rest/v1/blast_campaigns?stripe_session_id=eq.{stripe_session}&select=*",
                     headers=get_db_headers()
@@ -236,9 +282,9 @@ def send_blast_internal(
                 # or if it belongs to a DIFFERENT session (real duplicate)
                 existing_session = existing_camp.get("stripe_session_id", "")
                 if (existing_session and existing_session != stripe_session) or                    existing_camp.get("status") not in ["processing", None, ""]:
-                    print(f"[Blast] ⛔ Recent campaign found for user {user_id} "
-                          f"(id={existing_camp['id']}, session={existing_session[:20] if existing_session else 'none'}) "
-                          f"— duplicate blast prevented")
+                    log.info(f"Recent campaign found for user {user_id} "
+                             f"(id={existing_camp['id']}, session={existing_session[:20] if existing_session else 'none'}) "
+                             f"— duplicate blast prevented")
                     return {
                         "success":          True,
                         "already_processed": True,
@@ -264,8 +310,8 @@ def send_blast_internal(
         final_years    = db_years    or years_experience or ""
         final_location = db_location or location        or "Remote"
 
-        print(f"[Blast] Candidate: {final_name} | {final_role} | {final_email}")
-        print(f"[Blast] User type: {user_type} | Plan limit: {plan_limit}")
+        log.info(f"Candidate: {final_name} | {final_role} | {final_email}")
+        log.info(f"User type: {user_type} | Plan limit: {plan_limit}")
 
         # ── CHANGE 3: pass final_* values to create_drip_campaign ────────────
         drip_result = create_drip_campaign({
@@ -286,11 +332,20 @@ def send_blast_internal(
         })
 
         if not drip_result.get("success"):
-            print(f"[Blast] Failed to create drip campaign: {drip_result.get('error')}")
+            log.warning(f"Failed to create drip campaign: {drip_result.get('error')}")
             return {"success": False, "error": "Failed to create drip campaign record"}
 
         drip_campaign_id = drip_result["campaign_id"]
-        print(f"[Blast] Campaign created: {drip_campaign_id}")
+        log.info(f"Campaign created: {drip_campaign_id}")
+
+        if not dispatch_day1:
+            return {
+                "success":          True,
+                "drip_mode":        True,
+                "drip_campaign_id": drip_campaign_id,
+                "day1_pending":     True,
+                "plan_used":        plan_name,
+            }
 
         # ── Fire Day 1 blast immediately ──
         day1_result = run_day1_blast(drip_campaign_id)
@@ -300,7 +355,7 @@ def send_blast_internal(
         failed = s.get("failed", 0)
         total  = s.get("total", plan_limit)
 
-        print(f"[Blast] Day 1 complete: sent={sent} failed={failed} total={total}")
+        log.info(f"Day 1 complete: sent={sent} failed={failed} total={total}")
 
         return {
             "success":             True,
@@ -321,8 +376,7 @@ def send_blast_internal(
         }
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log.exception("send_blast_internal failed")
         return {"success": False, "error": str(e)}
 
 
@@ -382,8 +436,7 @@ def send_freemium_blast():
         return jsonify({"success": True, "message": "Free blast sent!", "details": result}), 200
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log.exception("send_freemium_blast failed")
         return jsonify({"success": False, "error": str(e)}), 500
 
 
@@ -401,11 +454,7 @@ def get_blast_status(campaign_id):
         if resp.status_code == 200 and resp.json():
             campaign = resp.json()[0]
             plan_name = campaign.get("plan_name", "starter")
-            plan_limits = {
-                "starter": 250, "basic": 500, "professional": 750,
-                "growth": 1000, "advanced": 1250, "premium": 1500, "free": 11
-            }
-            plan_limit = plan_limits.get(plan_name, 250)
+            plan_limit = get_limit_for_plan(plan_name)
 
             w1_sent = int(campaign.get("drip_day1_delivered") or 0)
             w2_sent = int(campaign.get("drip_day2_delivered") or 0)
@@ -4,6 +4,9 @@ import os
 from datetime import datetime
 import requests
 from dotenv import load_dotenv
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
 
 load_dotenv()
 
@@ -26,9 +29,7 @@ def submit_contact():
     try:
         data = request.get_json()
         
-        print("📧 Received contact form submission:")
-        print(f"   Name: {data.get('name')}")
-        print(f"   Email: {data.get('email')}")
+        log.info("Received contact form submission", extra={"contact_name": data.get('name'), "email": data.get('email')})
         
         # 1. Validate required fields
         required_fields = ['name', 'email', 'subject', 'message']
@@ -62,11 +63,11 @@ def submit_contact():
         response = requests.post(url, json=submission_data, headers=headers, verify=False)
         
         if response.status_code in [200, 201]:
-            print(f"✅ Ticket saved to DB. ID: {ticket_id}")
+            log.info(f"Ticket saved to DB. ID: {ticket_id}")
             
             # 5. Send Email via Brevo
             if BREVO_API_KEY:
-                print(f"📨 Sending email to {SUPPORT_EMAIL}...")
+                log.info(f"Sending email to {SUPPORT_EMAIL}...")
                 
                 email_payload = {
                     "sender": {"name": BREVO_SENDER_NAME, "email": BREVO_SENDER_EMAIL},
@@ -104,13 +105,13 @@ def submit_contact():
                         timeout=10
                     )
                     if brevo_response.status_code in [200, 201]:
-                        print(f"✅ Support email sent successfully!")
+                        log.info(f"Support email sent successfully!")
                     else:
-                        print(f"⚠️ Failed to send support email: {brevo_response.text}")
+                        log.warning(f"Failed to send support email: {brevo_response.text}")
                 except Exception as e:
-                    print(f"❌ Error sending email: {str(e)}")
+                    log.error(f"Error sending email: {str(e)}")
             else:
-                print("⚠️ BREVO_API_KEY not configured, skipping email notification.")
+                log.warning("BREVO_API_KEY not configured, skipping email notification.")
 
             return jsonify({
                 'success': True,
@@ -118,12 +119,9 @@ def submit_contact():
                 'ticket_id': ticket_id
             }), 200
         else:
-            print(f"❌ Supabase error: {response.status_code}")
-            print(f"   Response: {response.text}")
+            log.error(f"Supabase error: {response.status_code} {response.text}")
             return jsonify({'error': f'Database error: {response.text}'}), 500
         
     except Exception as e:
-        print(f"❌ Contact submission error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception(f"Contact submission error: {str(e)}")
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
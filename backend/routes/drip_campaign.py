@@ -9,6 +9,12 @@ _env_path = Path(__file__).resolve().parent.parent / '.env'
 if _env_path.exists():
     load_dotenv(dotenv_path=_env_path, override=False)
 
+from services.throughput_planner import DAILY_EMAIL_LIMIT, get_limit_for_plan
+from services.structured_logging import get_logger
+from services.profile_index import record_campaign
+
+log = get_logger(__name__)
+
 drip_campaign_bp = Blueprint('drip_campaign', __name__)
 
 def _get_supabase_url():
@@ -29,19 +35,16 @@ def _get_headers():
 
 def calculate_next_send_window(base_time: datetime, days_offset: int) -> datetime:
     """
-    Calculate the next optimal send time, skipping weekends.
-    Targets 10:00 AM EST (15:00 UTC) on a weekday.
+    Calculate the next send window opening on or after base_time + days_offset.
+    Uses the shared send calendar, so weekends, US holidays and DST are handled
+    (first window is 10:00 AM America/New_York by default).
     """
-    target = base_time + timedelta(days=days_offset)
-
-    # Skip weekends
-    while target.weekday() >= 5:   # 5=Sat, 6=Sun
-        target += timedelta(days=1)
-
-    # Set to 10:00 AM EST (UTC-5 = 15:00 UTC)
-    target = target.replace(hour=15, minute=0, second=0, microsecond=0)
+    from services.send_calendar import calendar_for
 
-    return target
+    target = (base_time + timedelta(days=days_offset)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    return calendar_for().next_open(target)
 
 
 def calculate_wave_start(plan_name: str, base_time: datetime, wave: int) -> datetime:
@@ -52,7 +55,9 @@ def calculate_wave_start(plan_name: str, base_time: datetime, wave: int) -> date
     Wave 2 starts the day after Wave 1 finishes.
     Wave 3 starts the day after Wave 2 finishes.
 
-    Days per wave = plan_recruiter_limit / 50 (daily sending limit)
+    Days per wave = plan_recruiter_limit / DAILY_EMAIL_LIMIT (50). This is the
+    slowest-case estimate: the throughput planner usually gives a campaign a
+    larger daily allotment, and the scheduler chains waves on completion.
 
     Plan breakdown:
       Starter       250 recruiters  -->  5 days/wave  --> Wave2 day  6, Wave3 day 11
@@ -62,19 +67,9 @@ def calculate_wave_start(plan_name: str, base_time: datetime, wave: int) -> date
       Advanced     1250 recruiters  --> 25 days/wave  --> Wave2 day 26, Wave3 day 51
       Premium      1500 recruiters  --> 30 days/wave  --> Wave2 day 31, Wave3 day 61
     """
-    DAILY_LIMIT = 50
-    PLAN_LIMIT_MAP = {
-        "starter":      250,
-        "basic":        500,
-        "professional": 750,
-        "growth":       1000,
-        "advanced":     1250,
-        "premium":      1500
-    }
-
-    recruiter_limit = PLAN_LIMIT_MAP.get(plan_name, 250)
+    recruiter_limit = get_limit_for_plan(plan_name)
     # Ceiling division: e.g. 250/50=5, 500/50=10, 750/50=15
-    days_per_wave   = (recruiter_limit + DAILY_LIMIT - 1) // DAILY_LIMIT
+    days_per_wave   = (recruiter_limit + DAILY_EMAIL_LIMIT - 1) // DAILY_EMAIL_LIMIT
 
     if wave == 2:
         # Wave 2 starts the day after Wave 1 finishes
@@ -113,7 +108,7 @@ def create_drip_campaign(campaign_data: dict) -> dict:
     raw_user_id = campaign_data.get("user_id", "")
     user_id     = raw_user_id if raw_user_id and str(raw_user_id).strip() else None
 
-    print(f"[Drip] Creating campaign: plan={plan_name} user_id={user_id!r}")
+    log.info(f"Creating campaign: plan={plan_name} user_id={user_id!r}")
 
     # Calculate wave start times -- continuous, no gaps
     day4_time = calculate_wave_start(plan_name, now, wave=2)   # Wave 2 start
@@ -150,14 +145,14 @@ def create_drip_campaign(campaign_data: dict) -> dict:
     if resp.status_code in [200, 201]:
         created     = resp.json()
         campaign_id = created[0]["id"] if isinstance(created, list) else created.get("id")
-        print(f"[Drip] Campaign created: {campaign_id}")
-        print(f"[Drip]   Plan         : {plan_name}")
-        print(f"[Drip]   User ID      : {user_id!r}")
-        print(f"[Drip]   Wave 2 start : {day4_time.strftime('%Y-%m-%d %H:%M UTC')}")
-        print(f"[Drip]   Wave 3 start : {day8_time.strftime('%Y-%m-%d %H:%M UTC')}")
+        log.info(f"Campaign created: {campaign_id}", extra={
+            "campaign_id": campaign_id, "plan": plan_name, "user_id": user_id,
+            "wave2_start": day4_time.isoformat(), "wave3_start": day8_time.isoformat(),
+        })
+        record_campaign(user_id, record["status"], record["created_at"])
         return {"success": True, "campaign_id": campaign_id}
     else:
-        print(f"[Drip] Failed to create campaign: {resp.status_code} {resp.text}")
+        log.warning(f"Failed to create campaign: {resp.status_code} {resp.text}")
         return {"success": False, "error": resp.text}
 
 
@@ -11,6 +11,9 @@ from flask import Blueprint, request, jsonify
 import os
 import requests
 from datetime import datetime
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
 
 employer_lead_bp = Blueprint('employer_lead', __name__, url_prefix='/api/employer-lead')
 
@@ -44,13 +47,13 @@ def _save_to_supabase(data: dict) -> dict:
         }
         response = requests.post(url, headers=_supabase_headers(), json=payload, timeout=10)
         if response.status_code in (200, 201):
-            print(f"✅ Employer lead saved: {data.get('email')}")
+            log.info(f"Employer lead saved: {data.get('email')}")
             return {'success': True}
         else:
-            print(f"❌ Supabase insert failed: {response.status_code} {response.text}")
+            log.error(f"Supabase insert failed: {response.status_code} {response.text}")
             return {'success': False, 'error': response.text}
     except Exception as e:
-        print(f"❌ Supabase error: {e}")
+        log.error(f"Supabase error: {e}")
         return {'success': False, 'error': str(e)}
 
 
@@ -61,7 +64,7 @@ def _add_to_brevo(email: str, company_name: str) -> None:
     """
     api_key = os.getenv('BREVO_API_KEY')
     if not api_key:
-        print("⚠️ BREVO_API_KEY not set — skipping Brevo contact creation")
+        log.warning("BREVO_API_KEY not set — skipping Brevo contact creation")
         return
 
     try:
@@ -79,9 +82,9 @@ def _add_to_brevo(email: str, company_name: str) -> None:
             timeout=10,
         )
         if r.status_code in (200, 201):
-            print(f"✅ Brevo contact created/updated for {email}")
+            log.info(f"Brevo contact created/updated for {email}")
         else:
-            print(f"⚠️ Brevo contact creation: {r.status_code} {r.text}")
+            log.warning(f"Brevo contact creation: {r.status_code} {r.text}")
 
         # 2. Send welcome transactional email
         welcome_html = f"""
@@ -131,12 +134,12 @@ def _add_to_brevo(email: str, company_name: str) -> None:
             timeout=15,
         )
         if re2.status_code in (200, 201):
-            print(f"✅ Brevo welcome email sent to {email}")
+            log.info(f"Brevo welcome email sent to {email}")
         else:
-            print(f"⚠️ Brevo welcome email: {re2.status_code} {re2.text}")
+            log.warning(f"Brevo welcome email: {re2.status_code} {re2.text}")
 
     except Exception as e:
-        print(f"⚠️ Brevo integration error (non-blocking): {e}")
+        log.warning(f"Brevo integration error (non-blocking): {e}")
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -163,7 +166,7 @@ def create_employer_lead():
         if not hiring_roles:
             return jsonify({'success': False, 'error': 'hiring_roles is required'}), 400
 
-        print(f"\n📥 New employer lead: {company_name} <{email}>")
+        log.info(f"New employer lead: {company_name} <{email}>")
 
         # 1. Save to Supabase
         save_result = _save_to_supabase({
@@ -176,7 +179,7 @@ def create_employer_lead():
 
         if not save_result['success']:
             # Log the error but don't hard-fail — still send the welcome email
-            print(f"⚠️ Supabase save failed, continuing with Brevo: {save_result.get('error')}")
+            log.warning(f"Supabase save failed, continuing with Brevo: {save_result.get('error')}")
 
         # 2. Add to Brevo + send welcome email (non-blocking)
         _add_to_brevo(email, company_name)
@@ -187,7 +190,5 @@ def create_employer_lead():
         }), 201
 
     except Exception as e:
-        print(f"❌ employer_lead endpoint error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception(f"employer_lead endpoint error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
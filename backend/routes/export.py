@@ -0,0 +1,163 @@
+# backend/routes/export.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Streaming admin exports.
+#
+# GET /api/admin/export/<table>
+#   table    users | resumes | payments | blast_campaigns | brevo_event_logs
+#   format   ndjson (default) | csv
+#   columns  comma-separated column list (default: all)
+#   gzip     1 = gzip the body (Content-Encoding: gzip)
+#   limit    stop after this many rows
+#
+# Rows are read from Supabase with keyset paging (id > last id, ordered by
+# id) and written to the response page by page, so memory stays flat and
+# the first rows reach the client while later pages are still loading.
+# The first page is fetched before the response starts, so a Supabase
+# error still gets a proper status code; a failure mid-stream ends the
+# export with an {"error": ...} line (NDJSON) or a truncated file (CSV).
+# ─────────────────────────────────────────────────────────────────────────────
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from datetime import datetime, timezone
+import csv
+import io
+import json
+import os
+import re
+import zlib
+
+import requests
+
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+export_bp = Blueprint('export', __name__)
+
+EXPORT_TABLES  = ('users', 'resumes', 'payments', 'blast_campaigns', 'brevo_event_logs')
+EXPORT_PAGE_SIZE = int(os.getenv('EXPORT_PAGE_SIZE', '1000'))
+
+_COLUMN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _read_headers():
+    key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+    return {
+        'apikey':        key,
+        'Authorization': f'Bearer {key}',
+        'Accept':        'application/json',
+    }
+
+
+def _fetch_page(table, select, after_id, limit):
+    params = [('select', select), ('order', 'id.asc'), ('limit', str(limit))]
+    if after_id is not None:
+        params.append(('id', f'gt.{after_id}'))
+    resp = requests.get(f"{os.getenv('SUPABASE_URL')}/rest/v1/{table}",
+                        headers=_read_headers(), params=params, timeout=30)
+    if resp.status_code not in (200, 206):
+        raise RuntimeError(f"{resp.status_code} — {resp.text[:200]}")
+    return resp.json()
+
+
+def _pages(table, select, max_rows, first_page):
+    """Keyset pages starting with an already fetched first page."""
+    page, sent = first_page, 0
+    while page:
+        if max_rows is not None:
+            page = page[:max_rows - sent]
+        yield page
+        sent += len(page)
+        if len(page) < EXPORT_PAGE_SIZE or (max_rows is not None and sent >= max_rows):
+            return
+        size = EXPORT_PAGE_SIZE if max_rows is None else min(EXPORT_PAGE_SIZE, max_rows - sent)
+        page = _fetch_page(table, select, page[-1]['id'], size)
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def _encode(table, pages, fmt, columns):
+    """Yield text chunks, one per page (plus the CSV header)."""
+    try:
+        if fmt == 'csv':
+            fieldnames, header_written = columns, False
+            for page in pages:
+                buf = io.StringIO()
+                fieldnames = fieldnames or list(page[0].keys())
+                writer = csv.DictWriter(buf, fieldnames=fieldnames, extrasaction='ignore')
+                if not header_written:
+                    writer.writeheader()
+                    header_written = True
+                writer.writerows({k: _csv_value(v) for k, v in row.items()} for row in page)
+                yield buf.getvalue()
+            if not header_written and fieldnames:
+                buf = io.StringIO()
+                csv.DictWriter(buf, fieldnames=fieldnames).writeheader()
+                yield buf.getvalue()
+        else:
+            for page in pages:
+                yield ''.join(json.dumps(row, default=str) + '\n' for row in page)
+    except Exception as e:
+        log.error(f"Export of {table} failed mid-stream: {e}")
+        if fmt != 'csv':
+            yield json.dumps({'error': str(e)}) + '\n'
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)   # wbits=31 -> gzip container
+    for chunk in chunks:
+        # Sync-flush every page so the client can decompress what it has so far
+        yield compressor.compress(chunk.encode('utf-8')) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+@export_bp.route('/api/admin/export/<table>', methods=['GET'])
+def export_table(table):
+    if table not in EXPORT_TABLES:
+        return jsonify({'success': False, 'error': f'table must be one of {list(EXPORT_TABLES)}'}), 404
+
+    fmt = (request.args.get('format') or 'ndjson').lower()
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'success': False, 'error': 'format must be ndjson or csv'}), 400
+
+    columns = None
+    if request.args.get('columns'):
+        columns = [c.strip() for c in request.args['columns'].split(',') if c.strip()]
+        bad = [c for c in columns if not _COLUMN.match(c)]
+        if bad:
+            return jsonify({'success': False, 'error': f'invalid column(s): {bad}'}), 400
+    # id is always fetched: it is the keyset cursor
+    select = ','.join(['id'] + [c for c in columns if c != 'id']) if columns else '*'
+
+    max_rows = request.args.get('limit', type=int)
+    if max_rows is not None and max_rows < 1:
+        return jsonify({'success': False, 'error': 'limit must be positive'}), 400
+
+    try:
+        first = _fetch_page(table, select, None, min(EXPORT_PAGE_SIZE, max_rows or EXPORT_PAGE_SIZE))
+    except Exception as e:
+        log.warning(f"Export of {table} failed: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 502
+
+    log.info(f"Exporting {table}", extra={'format': fmt, 'columns': columns, 'limit': max_rows})
+
+    chunks = _encode(table, _pages(table, select, max_rows, first), fmt, columns)
+    use_gzip = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    body = _gzip(chunks) if use_gzip else (c.encode('utf-8') for c in chunks)
+
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    ext = 'csv' if fmt == 'csv' else 'ndjson'
+    headers = {
+        'Content-Disposition': f'attachment; filename="{table}-{stamp}.{ext}"',
+        'Cache-Control':       'no-store',
+        'X-Accel-Buffering':   'no',    # let proxies pass chunks through
+    }
+    if use_gzip:
+        headers['Content-Encoding'] = 'gzip'
+        headers['Vary'] = 'Accept-Encoding'
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
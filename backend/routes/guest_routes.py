@@ -1,8 +1,11 @@
 # backend/routes/guest_routes.py
 from flask import Blueprint, request, jsonify
 import os
-import stripe
 from services.guest_service import GuestService
+from services.stripe_sessions import stripe_sessions
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
 
 guest_bp = Blueprint('guest', __name__, url_prefix='/api/guest')
 
@@ -25,7 +28,7 @@ def init_session():
         return jsonify({'success': False, 'error': 'Invalid guest_id'}), 400
 
     ip = get_client_ip()
-    print(f"[GuestRoute] /init  guest={guest_id}  ip={ip}")
+    log.info(f"/init  guest={guest_id}  ip={ip}")
 
     result = GuestService.init_session(guest_id, ip_address=ip)
     return jsonify(result), 200 if result['success'] else 500
@@ -42,7 +45,7 @@ def log_guest_activity():
         return jsonify({'success': False, 'error': 'Invalid guest_id'}), 400
 
     result = GuestService.log_activity(guest_id, event_type, metadata)
-    return jsonify(result), 200 if result['success'] else 500
+    return jsonify(result), 202 if result['success'] else 503 if result.get('dropped') else 500
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -67,23 +70,22 @@ def save_payment():
     # This handles the case where PaymentSuccessHandler sends minimal data
     if stripe_session and (not plan_name or not amount_paid):
         try:
-            stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
-            session = stripe.checkout.Session.retrieve(stripe_session)
+            session = stripe_sessions.fetch(stripe_session) or {}
 
             if not plan_name:
-                plan_name = session.metadata.get('plan_name', 'basic')
-                print(f"[GuestRoute] Fetched plan_name from Stripe: {plan_name}")
+                plan_name = (session.get('metadata') or {}).get('plan_name', 'basic')
+                log.info(f"Fetched plan_name from Stripe: {plan_name}")
 
-            if not amount_paid and session.amount_total:
-                amount_paid = session.amount_total
-                print(f"[GuestRoute] Fetched amount from Stripe: {amount_paid}")
+            if not amount_paid and session.get('amount_total'):
+                amount_paid = session['amount_total']
+                log.info(f"Fetched amount from Stripe: {amount_paid}")
 
         except Exception as e:
-            print(f"[GuestRoute] ⚠️ Could not fetch Stripe session details: {e}")
+            log.warning(f"Could not fetch Stripe session details: {e}")
             # Continue with whatever we have — don't fail the whole request
 
     ip = get_client_ip()
-    print(f"[GuestRoute] /payment  guest={guest_id}  plan={plan_name}  amount={amount_paid}  session={stripe_session}  ip={ip}")
+    log.info(f"/payment  guest={guest_id}  plan={plan_name}  amount={amount_paid}  session={stripe_session}  ip={ip}")
 
     if GuestService._exists(guest_id):
         GuestService._update_ip(guest_id, ip)
@@ -0,0 +1,24 @@
+# backend/routes/metrics.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Prometheus scrape endpoint. Metric definitions live in services/metrics.py.
+#
+# GET /metrics
+#   Aggregated across gunicorn workers when PROMETHEUS_MULTIPROC_DIR is set.
+#   If METRICS_TOKEN is set, requires  Authorization: Bearer <METRICS_TOKEN>.
+# ─────────────────────────────────────────────────────────────────────────────
+from flask import Blueprint, request, jsonify, Response
+import os
+
+from services.metrics import render
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    token = os.getenv('METRICS_TOKEN')
+    if token and request.headers.get('Authorization', '') != f'Bearer {token}':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    body, content_type = render()
+    return Response(body, content_type=content_type)
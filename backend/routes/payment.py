@@ -2,11 +2,19 @@ from flask import Blueprint, request, jsonify
 import os
 import stripe
 from datetime import datetime
-import requests
+from functools import partial
 from dotenv import load_dotenv
 from pathlib import Path
 
 from services.guest_service import GuestService
+from services.idempotency import idempotency_store, InFlight
+from services.plans_catalog import plans_catalog
+from services.profile_index import record_payment
+from services.stripe_sessions import stripe_sessions
+from services.upsert import upsert
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
 
 _env_path = Path(__file__).resolve().parent.parent / '.env'
 if _env_path.exists():
@@ -17,51 +25,18 @@ payment_bp = Blueprint('payment', __name__)
 def _get_stripe_key():
     return os.getenv('STRIPE_SECRET_KEY')
 
-def _get_supabase_url():
-    return os.getenv('SUPABASE_URL')
-
-def _get_supabase_key():
-    return os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-
 def _get_frontend_url():
     return os.getenv('FRONTEND_URL', 'http://localhost:5173')
 
-_stripe_key = os.getenv('STRIPE_SECRET_KEY')
-_supabase_url = os.getenv('SUPABASE_URL')
-print(f"🔑 payment.py STRIPE_SECRET_KEY: {'✅ SET (' + _stripe_key[:15] + '...)' if _stripe_key else '❌ NOT SET'}")
-print(f"🔑 payment.py SUPABASE_URL: {'✅ SET' if _supabase_url else '❌ NOT SET'}")
-
-
-# ── FIX 1: Separate headers for INSERT vs PATCH ──────────────────────────────
-# Previously both used 'resolution=merge-duplicates' which caused Supabase to
-# silently drop inserts when no unique constraint was declared to PostgREST.
-def _insert_headers():
-    """Headers for POST (INSERT) — standard return=representation."""
-    key = _get_supabase_key()
-    return {
-        'apikey': key,
-        'Authorization': f'Bearer {key}',
-        'Content-Type': 'application/json',
-        'Prefer': 'return=representation',
-    }
+# Browser/CDN cache lifetime for /api/plans/public (revalidated with the ETag)
+PLANS_PUBLIC_MAX_AGE = int(os.getenv('PLANS_PUBLIC_MAX_AGE', '60'))
 
-def _patch_headers():
-    """Headers for PATCH (UPDATE)."""
-    key = _get_supabase_key()
-    return {
-        'apikey': key,
-        'Authorization': f'Bearer {key}',
-        'Content-Type': 'application/json',
-        'Prefer': 'return=representation',
-    }
+# How long a successful /api/payment/verify result is reused for a session
+PAYMENT_VERIFY_CACHE_TTL = float(os.getenv('PAYMENT_VERIFY_CACHE_TTL', '3600'))
 
-def _read_headers():
-    """Headers for GET (SELECT)."""
-    key = _get_supabase_key()
-    return {
-        'apikey': key,
-        'Authorization': f'Bearer {key}',
-    }
+_stripe_key = os.getenv('STRIPE_SECRET_KEY')
+_supabase_url = os.getenv('SUPABASE_URL')
+log.info("Payment config", extra={"stripe_key_set": bool(_stripe_key), "supabase_url_set": bool(_supabase_url)})
 
 
 # ── FIX 3: UUID sanitizer ─────────────────────────────────────────────────────
@@ -80,63 +55,35 @@ def _safe_uuid(value):
 
 
 # ── FIX 5: Upsert helper ─────────────────────────────────────────────────────
-# Called by both create_checkout_session AND verify_payment.
-# Checks if the row exists first, then INSERT or PATCH as needed.
-def _upsert_payment(supabase_url, session_id, record):
+# Called by create_checkout_session. One on_conflict=stripe_session_id upsert
+# (services/upsert.py, sql/payments_stripe_session_unique.sql) instead of
+# check-then-INSERT/PATCH.
+def _upsert_payment(session_id, record, ignore_duplicates=False):
     """
-    Safe upsert: check existence → INSERT if missing, PATCH if present.
+    Write the payments row for session_id in one statement.
     Logs every outcome so Railway logs always show what happened.
     """
     try:
-        check = requests.get(
-            f"{supabase_url}/rest/v1/payments?stripe_session_id=eq.{session_id}&select=id,status",
-            headers=_read_headers(),
-            timeout=10
-        )
-        exists = check.status_code == 200 and len(check.json()) > 0
-
-        if exists:
-            resp = requests.patch(
-                f"{supabase_url}/rest/v1/payments?stripe_session_id=eq.{session_id}",
-                json=record,
-                headers=_patch_headers(),
-                timeout=10
-            )
-            if resp.status_code in [200, 204]:
-                print(f"[Payment] ✅ PATCH success for session {session_id}")
-            else:
-                print(f"[Payment] ❌ PATCH failed: {resp.status_code} — {resp.text}")
-            return resp.status_code in [200, 204]
-        else:
-            resp = requests.post(
-                f"{supabase_url}/rest/v1/payments",
-                json=record,
-                headers=_insert_headers(),
-                timeout=10
-            )
-            if resp.status_code in [200, 201]:
-                print(f"[Payment] ✅ INSERT success for session {session_id}")
-            else:
-                print(f"[Payment] ❌ INSERT failed: {resp.status_code} — {resp.text}")
-            return resp.status_code in [200, 201]
-
+        upsert('payments', {**record, 'stripe_session_id': session_id},
+               on_conflict='stripe_session_id', ignore_duplicates=ignore_duplicates)
+        log.info(f"Payment upsert success for session {session_id}")
+        return True
     except Exception as e:
-        print(f"[Payment] ❌ _upsert_payment exception: {e}")
+        log.error(f"_upsert_payment failed: {e}")
         return False
 
 
 @payment_bp.route('/api/plans/public', methods=['GET'])
 def get_public_plans():
     try:
-        supabase_url = _get_supabase_url()
-        url = f"{supabase_url}/rest/v1/plans?is_active=eq.true&order=price_cents.asc"
-        resp = requests.get(url, headers=_read_headers())
-        if resp.status_code == 200:
-            return jsonify({'plans': resp.json()}), 200
-        else:
-            return jsonify({'plans': []}), 200
+        plans, etag = plans_catalog.public()
+        resp = jsonify({'plans': plans})
+        resp.set_etag(etag)
+        resp.cache_control.public  = True
+        resp.cache_control.max_age = PLANS_PUBLIC_MAX_AGE
+        return resp.make_conditional(request)
     except Exception as e:
-        print(f"Error fetching plans: {e}")
+        log.warning(f"Error fetching plans: {e}")
         return jsonify({'error': str(e)}), 500
 
 
@@ -146,10 +93,9 @@ def create_checkout_session():
         stripe.api_key = _get_stripe_key()
 
         if not stripe.api_key:
-            print("❌ STRIPE_SECRET_KEY is not set in environment!")
+            log.error("STRIPE_SECRET_KEY is not set in environment!")
             return jsonify({"success": False, "error": "Payment system not configured"}), 500
 
-        supabase_url = _get_supabase_url()
         frontend_url = _get_frontend_url()
 
         data = request.get_json()
@@ -161,16 +107,14 @@ def create_checkout_session():
         price_id     = data.get('price_id')
         front_amount = data.get('amount')
 
-        # 1. Fetch plan details from database
+        # 1. Plan details from the plans catalog (services/plans_catalog.py)
         plan_amount       = 999
         plan_display_name = 'Basic Plan'
         plan_limit        = 250
 
         try:
-            url = f"{supabase_url}/rest/v1/plans?key_name=eq.{plan_type}&limit=1"
-            plan_resp = requests.get(url, headers=_read_headers())
-            if plan_resp.status_code == 200 and plan_resp.json():
-                db_plan           = plan_resp.json()[0]
+            db_plan = plans_catalog.get(plan_type)
+            if db_plan:
                 plan_amount       = db_plan.get('price_cents', 999)
                 plan_display_name = db_plan.get('display_name', f"{plan_type.capitalize()} Plan")
                 plan_limit        = db_plan.get('recruiter_limit', 250)
@@ -217,7 +161,7 @@ def create_checkout_session():
                 f'&session_id={{CHECKOUT_SESSION_ID}}'
                 f'&guest_id={user_id}'
             )
-            print(f"[Payment] 🏷️ Guest checkout — embedding guest_id: {user_id}")
+            log.info(f"Guest checkout — embedding guest_id: {user_id}")
         else:
             success_url = f'{frontend_url}?payment=success&session_id={{CHECKOUT_SESSION_ID}}'
 
@@ -267,7 +211,8 @@ def create_checkout_session():
         }
 
         # ── FIX 5: use safe upsert so the row is guaranteed to be created ──
-        _upsert_payment(supabase_url, checkout_session.id, payment_record)
+        # (insert-if-missing: never overwrite a row the webhook already completed)
+        _upsert_payment(checkout_session.id, payment_record, ignore_duplicates=True)
 
         return jsonify({
             "success": True,
@@ -276,7 +221,7 @@ def create_checkout_session():
         })
 
     except Exception as e:
-        print("❌ Checkout Error:", str(e))
+        log.exception(f"Checkout Error: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 
@@ -288,129 +233,100 @@ def verify_payment():
         if not stripe.api_key:
             return jsonify({"error": "Payment system not configured"}), 500
 
-        print("\n================ PAYMENT VERIFY =================")
         data       = request.get_json()
         session_id = data.get('session_id')
+        log.info("Verifying payment", extra={"session_id": session_id})
 
         if not session_id:
             return jsonify({"error": "session_id required"}), 400
 
-        session = stripe.checkout.Session.retrieve(
-            session_id,
-            expand=['payment_intent', 'payment_intent.payment_method']
-        )
-
-        if session.payment_status != 'paid':
-            return jsonify({"success": False})
-
-        payment_intent = session.payment_intent
-        card_brand  = None
-        card_last4  = None
-        receipt_url = None
-
-        if payment_intent.payment_method:
-            pm = payment_intent.payment_method
-            if isinstance(pm, str):
-                pm = stripe.PaymentMethod.retrieve(pm)
-            if pm.card:
-                card_brand = pm.card.brand
-                card_last4 = pm.card.last4
-
-        if payment_intent.latest_charge:
-            charge      = stripe.Charge.retrieve(payment_intent.latest_charge)
-            receipt_url = charge.receipt_url
-
-        plan_name = session.metadata.get('plan_name', 'basic')
-        user_id   = session.metadata.get('user_id')
-
-        # Build the complete record with all known data from Stripe
-        customer         = session.customer_details or {}
-        customer_email   = customer.get('email', '') or ''
-        customer_name    = customer.get('name', '')  or ''
-
-        update_record = {
-            "status":             "completed",
-            "payment_intent_id":  payment_intent.id,
-            "completed_at":       datetime.utcnow().isoformat(),
-            "payment_method":     "card",
-            "amount":             session.amount_total,
-            "currency":           session.currency,
-            "plan_name":          plan_name,
-        }
-        # Only add optional fields when available
-        if card_brand:   update_record["card_brand"]   = card_brand
-        if card_last4:   update_record["card_last4"]   = card_last4
-        if receipt_url:  update_record["receipt_url"]  = receipt_url
-        if customer_email: update_record["user_email"] = customer_email
-        if customer_name:
-            update_record["user_name"] = customer_name
-
-        supabase_url = _get_supabase_url()
-
-        # ── FIX 4+5: check existence first; INSERT if missing, PATCH if present
-        check = requests.get(
-            f"{supabase_url}/rest/v1/payments?stripe_session_id=eq.{session_id}&select=id,status",
-            headers=_read_headers(),
-            timeout=10
-        )
-        row_exists = check.status_code == 200 and len(check.json()) > 0
-
-        if row_exists:
-            # Normal path — row was created at checkout, just update status
-            resp = requests.patch(
-                f"{supabase_url}/rest/v1/payments?stripe_session_id=eq.{session_id}",
-                json=update_record,
-                headers=_patch_headers(),
-                timeout=10
-            )
-            if resp.status_code in [200, 204]:
-                print(f"[Payment] ✅ verify_payment PATCH success for {session_id}")
-            else:
-                print(f"[Payment] ❌ verify_payment PATCH failed: {resp.status_code} — {resp.text}")
-                return jsonify({"error": "Supabase update failed"}), 500
-        else:
-            # ── FIX 4: Row was never created (Bug 1/2/3 struck earlier)
-            # Build a full record from Stripe data and INSERT it now.
-            print(f"[Payment] ⚠️ No existing row for {session_id} — inserting full record now")
-            is_guest      = GuestService.is_guest(str(user_id or ''))
-            safe_user_id  = _safe_uuid(user_id) if not is_guest else None
-            safe_guest_id = _safe_uuid(user_id) if is_guest else None
-
-            full_record = {
-                "stripe_session_id":  session_id,
-                "user_id":            safe_user_id,
-                "guest_id":           safe_guest_id,
-                "user_email":         customer_email or "",
-                "user_name":          customer_name or (customer_email.split('@')[0] if customer_email else "unknown"),
-                "amount":             session.amount_total,
-                "currency":           session.currency,
-                "plan_name":          plan_name,
-                "initiated_at":       datetime.utcnow().isoformat(),
-                **update_record,
-            }
-            resp = requests.post(
-                f"{supabase_url}/rest/v1/payments",
-                json=full_record,
-                headers=_insert_headers(),
-                timeout=10
-            )
-            if resp.status_code in [200, 201]:
-                print(f"[Payment] ✅ verify_payment INSERT (recovery) success for {session_id}")
-            else:
-                print(f"[Payment] ❌ verify_payment INSERT failed: {resp.status_code} — {resp.text}")
-                return jsonify({"error": "Supabase insert failed"}), 500
-
-        if user_id and GuestService.is_guest(user_id):
-            print(f"[Guest Payment] Updating guest status for: {user_id}")
-            GuestService.save_payment(
-                guest_id=user_id,
-                plan_name=plan_name,
-                stripe_session_id=session_id,
-                amount=session.amount_total
+        # PaymentSuccessHandler re-posts on every redirect/refresh: the first
+        # successful result is reused, and concurrent calls wait for it.
+        try:
+            (body, status), duplicate = idempotency_store.run_once(
+                f"payment-verify:{session_id}",
+                partial(_verify_session, session_id),
+                ttl=PAYMENT_VERIFY_CACHE_TTL,
+                should_store=lambda result: result[1] == 200 and result[0].get("success"),
             )
-
-        return jsonify({"success": True})
+        except InFlight:
+            return jsonify({"success": False, "in_progress": True}), 202
+        if duplicate:
+            log.info("verify_payment served from cache", extra={"session_id": session_id})
+        return jsonify(body), status
 
     except Exception as e:
-        print("❌ VERIFY PAYMENT CRASH:", str(e))
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        log.exception(f"Verify payment crash: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+def _verify_session(session_id):
+    """(body, status) for /api/payment/verify: one Stripe call, one payments upsert."""
+    # Card and receipt come in the same retrieve — no PaymentMethod/Charge calls
+    session = stripe.checkout.Session.retrieve(
+        session_id,
+        expand=['payment_intent.payment_method', 'payment_intent.latest_charge']
+    )
+    stripe_sessions.put(session)   # the blast call that follows reuses it
+
+    if session.payment_status != 'paid':
+        return {"success": False}, 200
+
+    payment_intent = session.payment_intent
+    pm     = payment_intent.payment_method if payment_intent else None
+    charge = payment_intent.latest_charge  if payment_intent else None
+    card   = getattr(pm, 'card', None) if pm and not isinstance(pm, str) else None
+    receipt_url = getattr(charge, 'receipt_url', None) if charge and not isinstance(charge, str) else None
+
+    metadata  = session.metadata or {}
+    plan_name = metadata.get('plan_name', 'basic')
+    user_id   = metadata.get('user_id') or metadata.get('guest_id')
+    is_guest  = GuestService.is_guest(str(user_id or ''))
+
+    # Build the complete record with all known data from Stripe
+    customer         = session.customer_details or {}
+    customer_email   = customer.get('email', '') or ''
+    customer_name    = customer.get('name', '')  or ''
+
+    record = {
+        "stripe_session_id":  session_id,
+        "status":             "completed",
+        "payment_intent_id":  payment_intent.id if payment_intent else None,
+        "completed_at":       datetime.utcnow().isoformat(),
+        "payment_method":     "card",
+        "amount":             session.amount_total,
+        "currency":           session.currency,
+        "plan_name":          plan_name,
+    }
+    # Only add optional fields when available, so the upsert never blanks
+    # what checkout stored (initiated_at is the column default on insert)
+    if _safe_uuid(user_id):
+        record["guest_id" if is_guest else "user_id"] = _safe_uuid(user_id)
+    if card:         record["card_brand"]  = card.brand
+    if card:         record["card_last4"]  = card.last4
+    if receipt_url:  record["receipt_url"] = receipt_url
+    if customer_email:
+        record["user_email"] = customer_email
+        record["user_name"]  = customer_name or customer_email.split('@')[0]
+    elif customer_name:
+        record["user_name"] = customer_name
+
+    if not _upsert_payment(session_id, record):
+        return {"error": "Supabase update failed"}, 500
+
+    record_payment(
+        user_id=None if is_guest else _safe_uuid(user_id),
+        email=customer_email,
+        completed_at=record["completed_at"],
+    )
+
+    if user_id and is_guest:
+        log.info(f"Updating guest status for: {user_id}")
+        GuestService.save_payment(
+            guest_id=user_id,
+            plan_name=plan_name,
+            stripe_session_id=session_id,
+            amount=session.amount_total
+        )
+
+    return {"success": True}, 200
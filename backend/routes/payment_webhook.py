@@ -1,7 +1,6 @@
 import os
 import stripe
 import requests
-import traceback
 from flask import Blueprint, request, jsonify
 from datetime import datetime
 from pathlib import Path
@@ -9,6 +8,16 @@ from dotenv import load_dotenv
 
 # Import invoice service
 from services.invoice_email_service import InvoiceEmailService
+from services.checkout_pipeline import CheckoutPipeline, Stage, CHECKOUT_KEEP_DAYS
+from services.idempotency import idempotency_store
+from services.stripe_sessions import stripe_sessions
+from services.upsert import upsert
+from services import identity_resolver
+from services.metrics import count_webhook_event
+from services.profile_index import record_payment
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
 
 _env_path = Path(__file__).resolve().parent.parent / ".env"
 if _env_path.exists():
@@ -24,7 +33,7 @@ stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 try:
     _invoice_service = InvoiceEmailService()
 except Exception as e:
-    print(f"⚠️ Warning: InvoiceEmailService failed to initialize: {e}")
+    log.warning(f"InvoiceEmailService failed to initialize: {e}")
     _invoice_service = None
 
 def _headers():
@@ -45,12 +54,17 @@ def _create_fallback_campaign(session_id, user_id, plan_name, resume_url,
     fails for any reason after a confirmed Stripe payment.
 
     Creates a blast_campaigns record with status='active' so the drip
-    scheduler picks it up within 30 minutes and sends Day 1 emails.
+    scheduler picks it up on its next reconcile (DRIP_RECONCILE_MINUTES,
+    30 by default) and sends Day 1 emails.
     Guards against duplicates — never creates if campaign already exists
     for this stripe_session_id.
     """
     try:
-        # Idempotency: skip if campaign already exists for this session
+        # Idempotency: skip if a blast already ran for this session (local
+        # store first, then the database)
+        if idempotency_store.get(f"blast:session:{session_id}") is not None:
+            log.info(f"Fallback skipped — blast already recorded for session {session_id}")
+            return
         existing = requests.get(
             f"{SUPABASE_URL}/rest/v1/blast_campaigns"
             f"?stripe_session_id=eq.{session_id}&select=id,status",
@@ -58,8 +72,8 @@ def _create_fallback_campaign(session_id, user_id, plan_name, resume_url,
         )
         if existing.status_code == 200 and existing.json():
             camp = existing.json()[0]
-            print(f"[Webhook] Fallback skipped — campaign already exists: "
-                  f"id={camp['id']} status={camp.get('status')}")
+            log.info(f"Fallback skipped — campaign already exists: "
+                     f"id={camp['id']} status={camp.get('status')}")
             return
 
         # No campaign found — create one for the scheduler to pick up
@@ -80,20 +94,38 @@ def _create_fallback_campaign(session_id, user_id, plan_name, resume_url,
         })
 
         if result.get("success"):
-            print(f"[Webhook] Fallback campaign created: {result.get('campaign_id')} "
-                  f"-- scheduler starts blast within 30 min")
+            log.info(f"Fallback campaign created: {result.get('campaign_id')} "
+                     f"-- scheduler starts blast within 30 min")
+            idempotency_store.put(f"blast:session:{session_id}", {
+                "success": True, "drip_campaign_id": result.get("campaign_id"), "fallback": True})
         else:
-            print(f"[Webhook] Fallback campaign failed: {result.get('error')}")
+            log.warning(f"Fallback campaign failed: {result.get('error')}")
 
     except Exception as e:
-        print(f"[Webhook] _create_fallback_campaign exception: {e}")
-
-
-def handle_checkout_completed(session: dict):
-    """
-    Called when Stripe fires checkout.session.completed.
-    Saves payment record + sends receipt email via Brevo.
-    """
+        log.warning(f"_create_fallback_campaign exception: {e}")
+
+
+def _clean_id(value):
+    """Metadata ids arrive as strings; "None" / "null" / "undefined" mean absent."""
+    return value if (value and str(value).strip() not in ["None", "null", "undefined"]) else None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# checkout.session.completed — processed in stages by services/checkout_pipeline
+#
+#   payment  -> upsert the payments row as 'completed'        (logged and skipped when exhausted)
+#   identity -> recover the real user_id + resume             (optional)
+#   campaign -> create the drip campaign                      (fallback campaign when exhausted)
+#   day1     -> Wave 1 send                                   (scheduler sends it when exhausted)
+#   receipt  -> Brevo receipt email                           (optional; runs after a stop too)
+#
+# Every stage reads and extends the event context (ctx) and raises to be
+# retried; finished stages are never repeated. The receipt comes last so a
+# Brevo outage and its retries never hold back the campaign.
+# ─────────────────────────────────────────────────────────────────────────────
+def _stage_payment(ctx: dict):
+    """Saves the payment record; stops the pipeline for unpaid sessions."""
+    session = ctx["session"]
     session_id   = session.get("id", "")
     
     # Safely fallback to {} if the payload explicitly sends `null`
@@ -108,12 +140,6 @@ def handle_checkout_completed(session: dict):
     user_id      = metadata.get("user_id", "")
     guest_id     = metadata.get("guest_id", "")
 
-    # Read blast metadata stored by payment.py at checkout creation
-    resume_url     = metadata.get("resume_url", "")
-    candidate_name = metadata.get("candidate_name", "")
-    job_role       = metadata.get("job_role", "")
-    location       = metadata.get("location", "Remote")
-
     # ── Determine the customer email ────────────────────────────────────────
     customer_email = customer.get("email", "")
     customer_name  = customer.get("name", "")
@@ -128,17 +154,35 @@ def handle_checkout_completed(session: dict):
             if resp.status_code == 200 and resp.json():
                 customer_email = resp.json()[0].get("email", "")
         except Exception as e:
-            print(f"[Webhook] Could not fetch user email: {e}")
+            log.warning(f"Could not fetch user email: {e}")
 
-    print(f"\n[Webhook] checkout.session.completed")
-    print(f"  session_id={session_id!r}")
-    print(f"  plan={plan_name!r} user_id={user_id!r} guest_id={guest_id!r}")
-    print(f"  amount={amount_total} {currency.upper()} status={payment_status}")
-    print(f"  customer_email={customer_email!r}")
+    ctx.update({
+        "session_id":     session_id,
+        "plan_name":      plan_name,
+        "user_id":        user_id,
+        "guest_id":       guest_id,
+        "amount_total":   amount_total,
+        "currency":       currency,
+        "customer_email": customer_email,
+        "customer_name":  customer_name,
+        # Blast metadata stored by payment.py at checkout creation
+        "resume_url":     metadata.get("resume_url", ""),
+        "candidate_name": metadata.get("candidate_name", ""),
+        "job_role":       metadata.get("job_role", ""),
+        "location":       metadata.get("location", "Remote"),
+    })
+
+    log.info("checkout.session.completed", extra={
+        "session_id": session_id, "plan": plan_name, "user_id": user_id, "guest_id": guest_id,
+        "amount": amount_total, "currency": currency.upper(), "payment_status": payment_status,
+        "customer_email": customer_email,
+    })
 
     if payment_status != "paid":
-        print(f"[Webhook] Payment not paid (status={payment_status}) — skipping")
+        log.info(f"Payment not paid (status={payment_status}) — skipping")
+        ctx["stop"] = "unpaid"
         return
+    ctx["paid"] = True
 
     # ── ✅ FIX 1: Update payments table status to 'completed' ────────────────
     # Changed 'customer_email' -> 'user_email' and 'customer_name' -> 'user_name' to resolve PGRST204 Schema Cache mismatch.
@@ -152,222 +196,209 @@ def handle_checkout_completed(session: dict):
         "completed_at":   datetime.utcnow().isoformat(),
     }
 
-    try:
-        existing = requests.get(
-            f"{SUPABASE_URL}/rest/v1/payments?stripe_session_id=eq.{session_id}&select=id,status",
-            headers=_headers()
-        )
-        
-        if existing.status_code == 200 and existing.json():
-            # Record exists as 'initiated' — patch it to 'completed'
-            requests.patch(
-                f"{SUPABASE_URL}/rest/v1/payments?stripe_session_id=eq.{session_id}",
-                json=payment_completed,
-                headers=_headers()
-            )
-            print(f"[Webhook] Payment record patched to 'completed' for session {session_id}")
-        else:
-            # No record at all — insert a full new completed record
-            # We enforce checking that UUID inputs are valid strings, otherwise we pass None
-            db_user_id = user_id if (user_id and str(user_id).strip() not in ["None", "null", "undefined"]) else None
-            db_guest_id = guest_id if (guest_id and str(guest_id).strip() not in ["None", "null", "undefined"]) else None
-            
-            resp = requests.post(
-                f"{SUPABASE_URL}/rest/v1/payments",
-                json={
-                    "stripe_session_id": session_id,
-                    "user_id":           db_user_id,
-                    "guest_id":          db_guest_id,
-                    **payment_completed,
-                },
-                headers=_headers()
-            )
-            if resp.status_code in [200, 201]:
-                print(f"[Webhook] Payment record inserted (new)")
-            else:
-                print(f"[Webhook] Failed to save payment: {resp.status_code} {resp.text}")
-    except Exception as e:
-        print(f"[Webhook] DB error saving payment: {e}")
+    # One upsert: patches the 'initiated' row from checkout, or inserts a full
+    # completed record if there is none. Ids are only sent when valid, so an
+    # existing row keeps its own. UpsertError propagates -> stage retry.
+    db_user_id  = _clean_id(user_id)
+    db_guest_id = _clean_id(guest_id)
+    record = {"stripe_session_id": session_id, **payment_completed}
+    if db_user_id:  record["user_id"]  = db_user_id
+    if db_guest_id: record["guest_id"] = db_guest_id
+    upsert("payments", record, on_conflict="stripe_session_id")
+    log.info(f"Payment record upserted as 'completed' for session {session_id}")
+    record_payment(user_id=db_user_id, email=customer_email,
+                   completed_at=payment_completed["completed_at"])
+
+
+def _payment_exhausted(ctx: dict):
+    # The customer has paid: still create the campaign. The payments row is
+    # written later by /api/payment/verify, or by hand from this log line.
+    if "session_id" not in ctx:
+        ctx["stop"] = "unreadable_session"   # nothing downstream can run without it
+        return
+    log.error("Payment record not written — continuing with the campaign",
+              extra={"session_id": ctx["session_id"], "plan": ctx.get("plan_name")})
 
-    # ── Receipt email via Brevo ─────────────────────────────────
-    if customer_email and _invoice_service:
-        try:
-            receipt_result = _invoice_service.send_payment_receipt(
-                recipient_email   = customer_email,
-                recipient_name    = customer_name or customer_email.split("@")[0],
-                amount_cents      = amount_total,
-                currency          = currency,
-                plan_name         = plan_name,
-                stripe_session_id = session_id,
-                payment_date      = datetime.utcnow().strftime("%B %d, %Y"),
-            )
-            if receipt_result["success"]:
-                print(f"[Webhook] ✅ Receipt email sent to {customer_email}")
-            else:
-                print(f"[Webhook] ⚠️ Receipt email failed: {receipt_result.get('error')}")
-        except Exception as e:
-            print(f"[Webhook] ⚠️ Receipt email exception (non-blocking): {e}")
-
-    # ── ✅ PERMANENT FIX: Resolve User Identity After Guest-Then-Register Flow ──
-    #
-    # ROOT CAUSE THIS FIXES:
-    #   User pays as guest (user_id=guest_xxx, email=guest@resumeblast.ai)
-    #   → registers AFTER payment → webhook fires but can't find real user_id
-    #   → blast never triggered → user raises support ticket
-    #
-    # RECOVERY CHAIN (tries each source in order until user_id found):
-    #   1. metadata user_id          (registered users who paid while logged in)
-    #   2. client_reference_id       (always set by payment.py line 239)
-    #   3. metadata customer_email   (real email stored by our payment.py fix)
-    #   4. Stripe customer_details email (works when not guest checkout)
-    #   5. Stripe client_reference_id via API (ultimate fallback)
-
-    active_user_id = user_id or guest_id or ""
+
+def _stage_receipt(ctx: dict):
+    """Receipt email via Brevo, for any paid session (also after a stop)."""
+    customer_email = ctx.get("customer_email")
+    if not ctx.get("paid") or not customer_email or not _invoice_service:
+        return
+    receipt_result = _invoice_service.send_payment_receipt(
+        recipient_email   = customer_email,
+        recipient_name    = ctx["customer_name"] or customer_email.split("@")[0],
+        amount_cents      = ctx["amount_total"],
+        currency          = ctx["currency"],
+        plan_name         = ctx["plan_name"],
+        stripe_session_id = ctx["session_id"],
+        payment_date      = datetime.utcnow().strftime("%B %d, %Y"),
+    )
+    if not receipt_result["success"]:
+        raise RuntimeError(f"Receipt email failed: {receipt_result.get('error')}")
+    log.info(f"Receipt email sent to {customer_email}")
+
+
+def _stage_identity(ctx: dict):
+    """
+    ✅ PERMANENT FIX: Resolve User Identity After Guest-Then-Register Flow
+
+    ROOT CAUSE THIS FIXES:
+      User pays as guest (user_id=guest_xxx, email=guest@resumeblast.ai)
+      → registers AFTER payment → webhook fires but can't find real user_id
+      → blast never triggered → user raises support ticket
+
+    RECOVERY CHAIN (first match wins):
+      1. metadata user_id          (registered users who paid while logged in)
+      2. client_reference_id       (always set by payment.py line 239)
+      3. metadata customer_email   (real email stored by our payment.py fix)
+      4. Stripe customer_details email (works when not guest checkout)
+    2-4 (and the latest resume, if metadata has none) are one users query via
+    services/identity_resolver. Lookup errors raise, so the stage is retried.
+    """
+    session        = ctx["session"]
+    metadata       = session.get("metadata") or {}
+
+    active_user_id = ctx["user_id"] or ctx["guest_id"] or ""
 
     # Sanitize corrupted tokens from old frontends
     if str(active_user_id).strip() in ["None", "null", "undefined"]:
         active_user_id = ""
 
-    # Fallback A: Use client_reference_id from Stripe session
-    # payment.py always sets client_reference_id=str(user_id) — even for guests
+    need_resume = not ctx["resume_url"]
+    resume = None
     if not active_user_id or str(active_user_id).startswith("guest_"):
-        try:
-            cref = session.get("client_reference_id", "") or ""
-            if cref and str(cref).strip() not in ["", "None", "null", "undefined"]:
-                print(f"[Webhook] Trying client_reference_id: {cref!r}")
-                # Check if this is a real registered user
-                ref_check = requests.get(
-                    f"{SUPABASE_URL}/rest/v1/users?id=eq.{cref}&select=id,email",
-                    headers=_headers()
-                )
-                if ref_check.status_code == 200 and ref_check.json():
-                    active_user_id = ref_check.json()[0].get("id", "")
-                    print(f"[Webhook] ✅ Recovered user_id from client_reference_id: {active_user_id}")
-        except Exception as e:
-            print(f"[Webhook] ⚠️ client_reference_id lookup fault (non-blocking): {e}")
+        found = identity_resolver.resolve(
+            user_id=session.get("client_reference_id"),
+            emails=[metadata.get("customer_email", ""), ctx["customer_email"]],
+            with_resume=need_resume,
+        )
+        if found["user_id"]:
+            active_user_id = found["user_id"]
+            resume = found["resume"]
+            log.info(f"Recovered user_id from {found['matched']}: {active_user_id}")
+
+    ctx["active_user_id"] = active_user_id
+    log.info(f"Final active_user_id: {active_user_id!r}")
+
+    # If metadata lacks a resume_url, use the latest record they uploaded before checking out
+    if need_resume and active_user_id:
+        log.warning(f"Missing resume_url asset string. Scanning user document database logs...")
+        if resume is None:
+            resume = identity_resolver.latest_resume(active_user_id)
+        if resume:
+            ctx["resume_url"] = resume.get("file_url", "")
+            
+            # Rehydrate metadata attributes if empty
+            analysis_data = resume.get("analysis_data") or {}
+            # Use 'or' not .get(key, default) — when key exists with None value,
+            # .get() returns None and ignores the default.
+            # 'or' correctly falls back on both None AND empty string.
+            if not ctx["candidate_name"]:
+                ctx["candidate_name"] = analysis_data.get("candidate_name") or ""
+            if not ctx["job_role"]:
+                ctx["job_role"] = analysis_data.get("detected_role") or ""
+            if not ctx["location"]:
+                ctx["location"] = analysis_data.get("location") or "Remote"
+            log.info(f"Recovered: name={ctx['candidate_name']!r} role={ctx['job_role']!r} location={ctx['location']!r}")
+            log.info(f"Dynamic Recovery successful! Pulled target asset: {ctx['resume_url']}")
+
+
+def _identity_exhausted(ctx: dict):
+    # Carry on with whatever id the checkout itself had
+    ctx.setdefault("active_user_id", _clean_id(ctx.get("user_id")) or _clean_id(ctx.get("guest_id")) or "")
+
+
+FREE_PLANS_WH = {"free", "freemium"}
+
+
+def _stage_campaign(ctx: dict):
+    """Authoritative blast campaign creation (Wave 1 is the next stage)."""
+    plan_name = ctx["plan_name"]
+    if not ctx["resume_url"]:
+        log.warning("Operation Aborted: Unable to map a valid resume file path for user.")
+        ctx["stop"] = "no_resume"
+        return
+    if not plan_name or plan_name.lower() in FREE_PLANS_WH:
+        ctx["stop"] = "free_plan"
+        return
 
-    # Fallback B: Use real email stored in Stripe metadata by payment.py
-    # This handles the guest-then-register case — metadata stores the real email
-    if not active_user_id or str(active_user_id).startswith("guest_"):
-        meta_email = metadata.get("customer_email", "").strip()
-        lookup_email = meta_email if (meta_email and meta_email != "guest@resumeblast.ai") else None
-        if not lookup_email:
-            # Also try Stripe customer_details email
-            lookup_email = customer_email if (customer_email and customer_email != "guest@resumeblast.ai") else None
-        if lookup_email:
-            try:
-                print(f"[Webhook] Trying email lookup: {lookup_email!r}")
-                user_resp = requests.get(
-                    f"{SUPABASE_URL}/rest/v1/users?email=eq.{lookup_email}&select=id",
-                    headers=_headers()
-                )
-                if user_resp.status_code == 200 and user_resp.json():
-                    active_user_id = user_resp.json()[0].get("id", "")
-                    print(f"[Webhook] ✅ Recovered user_id from email: {active_user_id}")
-            except Exception as e:
-                print(f"[Webhook] ⚠️ Email lookup fault (non-blocking): {e}")
-
-    # Fallback C: Original email lookup (kept for backward compatibility)
-    if not active_user_id and customer_email and customer_email != "guest@resumeblast.ai":
-        try:
-            print(f"[Webhook] Fallback C — profile lookup: {customer_email}")
-            user_resp = requests.get(
-                f"{SUPABASE_URL}/rest/v1/users?email=eq.{customer_email}&select=id",
-                headers=_headers()
-            )
-            if user_resp.status_code == 200 and user_resp.json():
-                active_user_id = user_resp.json()[0].get("id", "")
-                print(f"[Webhook] ✅ Dynamic Recovery successful! Found User ID: {active_user_id}")
-        except Exception as e:
-            print(f"[Webhook] ⚠️ Profile mapping lookup fault (non-blocking): {e}")
+    from routes.blast import send_blast_internal
+
+    log.info(f"Creating blast campaign: plan={plan_name} user={ctx['active_user_id']!r}")
+    blast_result = send_blast_internal(
+        plan_name      = plan_name,
+        user_id        = ctx["active_user_id"],
+        resume_url     = ctx["resume_url"],
+        candidate_name = ctx["candidate_name"],
+        job_role       = ctx["job_role"],
+        location       = ctx["location"],
+        stripe_session = ctx["session_id"],
+        dispatch_day1  = False,
+        session        = ctx["session"],
+    )
+
+    if blast_result.get("already_processed"):
+        # Frontend (or an earlier delivery) already created it and ran Day 1
+        log.info("Blast already handled by frontend — skipped (idempotent)")
+        ctx["stop"] = "already_processed"
+    elif blast_result.get("success"):
+        ctx["campaign_id"] = blast_result.get("drip_campaign_id")
+        log.info(f"Campaign created: {ctx['campaign_id']}")
+    else:
+        raise RuntimeError(f"Blast failed: {blast_result.get('error')}")
+
+
+def _campaign_exhausted(ctx: dict):
+    """
+    ✅ PERMANENT FIX 2: Payment confirmed but campaign creation kept failing.
+    Create fallback campaign so scheduler starts blast within 30 min.
+    This ensures EVERY completed payment triggers a blast.
+    """
+    from routes.drip_campaign import create_drip_campaign
+    log.info("Creating fallback campaign — scheduler picks up within 30 min")
+    _create_fallback_campaign(
+        session_id=ctx["session_id"], user_id=ctx["active_user_id"],
+        plan_name=ctx["plan_name"], resume_url=ctx["resume_url"],
+        candidate_name=ctx["candidate_name"], job_role=ctx["job_role"],
+        location=ctx["location"], create_fn=create_drip_campaign,
+    )
+    ctx["stop"] = "fallback_campaign"
 
-    print(f"[Webhook] Final active_user_id: {active_user_id!r}")
 
-    # Fallback B: If metadata lacks a resume_url, locate the latest record they uploaded before checking out
-    if not resume_url and active_user_id:
-        try:
-            print(f"[Webhook] Missing resume_url asset string. Scanning user document database logs...")
-            resume_resp = requests.get(
-                f"{SUPABASE_URL}/rest/v1/resumes?user_id=eq.{active_user_id}&order=created_at.desc&limit=1",
-                headers=_headers()
-            )
-            if resume_resp.status_code == 200 and resume_resp.json():
-                found_resume_record = resume_resp.json()[0]
-                resume_url = found_resume_record.get("file_url", "")
-                
-                # Rehydrate metadata attributes if empty
-                analysis_data = found_resume_record.get("analysis_data") or {}
-                # Use 'or' not .get(key, default) — when key exists with None value,
-                # .get() returns None and ignores the default.
-                # 'or' correctly falls back on both None AND empty string.
-                if not candidate_name:
-                    candidate_name = analysis_data.get("candidate_name") or ""
-                if not job_role:
-                    job_role = analysis_data.get("detected_role") or ""
-                if not location:
-                    location = analysis_data.get("location") or "Remote"
-                print(f"[Webhook] Recovered: name={candidate_name!r} role={job_role!r} location={location!r}")
-                print(f"[Webhook] Dynamic Recovery successful! Pulled target asset: {resume_url}")
-        except Exception as e:
-            print(f"[Webhook] ⚠️ Asset collection lookup fault (non-blocking): {e}")
+def _stage_day1(ctx: dict):
+    """Wave 1 send for the campaign created by the previous stage."""
+    from services.drip_scheduler import run_day1_blast
 
-    # ── Authoritative blast campaign runner ──
-    FREE_PLANS_WH = {"free", "freemium"}
-    if resume_url and plan_name and plan_name.lower() not in FREE_PLANS_WH:
-        try:
-            from routes.blast import send_blast_internal
-            from routes.drip_campaign import create_drip_campaign
-
-            print(f"[Webhook] Triggering blast: plan={plan_name} user={active_user_id!r}")
-
-            blast_result = send_blast_internal(
-                plan_name      = plan_name,
-                user_id        = active_user_id,
-                resume_url     = resume_url,
-                candidate_name = candidate_name,
-                job_role       = job_role,
-                location       = location,
-                stripe_session = session_id,
-            )
+    result = run_day1_blast(ctx["campaign_id"])
+    if not result.get("success"):
+        raise RuntimeError(f"Day 1 dispatch failed for campaign {ctx['campaign_id']}")
+    stats = result.get("stats") or {}
+    log.info(f"Day 1 complete: sent={stats.get('sent', 0)} failed={stats.get('failed', 0)}",
+             extra={"campaign_id": ctx["campaign_id"], "skipped": result.get("skipped", False)})
 
-            if blast_result.get("already_processed"):
-                print("[Webhook] Blast already handled by frontend — skipped (idempotent)")
-            elif blast_result.get("success"):
-                print(f"[Webhook] Blast triggered: campaign={blast_result.get('drip_campaign_id')} "
-                      f"sent={blast_result.get('successful_sends', 0)}")
-            else:
-                # ✅ PERMANENT FIX 2: Payment confirmed but blast failed.
-                # Create fallback campaign so scheduler starts blast within 30 min.
-                # This ensures EVERY completed payment triggers a blast — even
-                # when send_blast_internal() fails (Supabase error, Brevo timeout,
-                # resume parse failure, Stripe API error, etc.)
-                print(f"[Webhook] Blast failed: {blast_result.get('error')}")
-                print("[Webhook] Creating fallback campaign — scheduler picks up within 30 min")
-                _create_fallback_campaign(
-                    session_id=session_id, user_id=active_user_id,
-                    plan_name=plan_name, resume_url=resume_url,
-                    candidate_name=candidate_name, job_role=job_role,
-                    location=location, create_fn=create_drip_campaign,
-                )
 
-        except Exception as e:
-            # Non-blocking — never return 500 to Stripe (would cause webhook retries)
-            print(f"[Webhook] Blast trigger exception (non-blocking): {e}")
-            traceback.print_exc()
-            # ✅ PERMANENT FIX 2 (exception path): Fallback on any exception too
-            try:
-                from routes.drip_campaign import create_drip_campaign
-                print("[Webhook] Exception fallback — creating campaign for scheduler")
-                _create_fallback_campaign(
-                    session_id=session_id, user_id=active_user_id,
-                    plan_name=plan_name, resume_url=resume_url,
-                    candidate_name=candidate_name, job_role=job_role,
-                    location=location, create_fn=create_drip_campaign,
-                )
-            except Exception as fe:
-                print(f"[Webhook] Fallback campaign creation also failed: {fe}")
-    elif not resume_url:
-        print("[Webhook] Operation Aborted: Unable to map a valid resume file path for user.")
+def _day1_exhausted(ctx: dict):
+    log.warning("Day 1 dispatch gave up — the drip scheduler sends Wave 1 for this campaign",
+                extra={"campaign_id": ctx.get("campaign_id")})
+
+
+checkout_pipeline = CheckoutPipeline([
+    Stage("payment",  _stage_payment,  required=False, on_exhausted=_payment_exhausted),
+    Stage("identity", _stage_identity, required=False, on_exhausted=_identity_exhausted),
+    Stage("campaign", _stage_campaign, required=False, on_exhausted=_campaign_exhausted),
+    Stage("day1",     _stage_day1,     required=False, on_exhausted=_day1_exhausted),
+    Stage("receipt",  _stage_receipt,  required=False, after_stop=True),
+])
+
+
+def handle_checkout_completed(session: dict):
+    """
+    Process a checkout.session.completed session synchronously (all stages,
+    no retries). The webhook queues events on checkout_pipeline instead.
+    """
+    return checkout_pipeline.run_inline(session.get("id", ""), "checkout.session.completed",
+                                        {"session": session})
 
 
 # ── ROUTE WITH SIGNATURE VERIFICATION ───────────────────────────────────────
@@ -379,7 +410,7 @@ def stripe_webhook():
 
     # ✅ Fail fast if webhook secret is missing (often the cause of live-mode errors)
     if not endpoint_secret:
-        print("❌ CRITICAL: STRIPE_WEBHOOK_SECRET is not set in environment!")
+        log.error("CRITICAL: STRIPE_WEBHOOK_SECRET is not set in environment!")
         return jsonify({"error": "Webhook secret missing"}), 500
 
     try:
@@ -387,22 +418,35 @@ def stripe_webhook():
             payload, sig_header, endpoint_secret
         )
     except ValueError as e:
-        print("❌ Webhook Error: Invalid payload")
+        log.error("Webhook Error: Invalid payload")
         return jsonify({"error": "Invalid payload"}), 400
     except stripe.error.SignatureVerificationError as e:
-        print("❌ Webhook Error: Invalid signature (Check your STRIPE_WEBHOOK_SECRET)")
+        log.error("Webhook Error: Invalid signature (Check your STRIPE_WEBHOOK_SECRET)")
         return jsonify({"error": "Invalid signature"}), 400
     except Exception as e:
-        print(f"❌ Webhook Exception: {str(e)}")
+        log.error(f"Webhook Exception: {str(e)}")
         return jsonify({"error": str(e)}), 400
 
-    # ✅ Wrap internal processing in a try/except to prevent 500 crashes
+    count_webhook_event("stripe", event["type"])
+
+    if event["type"] != "checkout.session.completed":
+        return jsonify({"received": True}), 200
+
+    # Acknowledge first: persist the event and let the pipeline workers run it.
+    # Only a failure to persist returns 500, so Stripe retries the delivery.
+    event_key = f"stripe-event:{event['id']}"
+    if idempotency_store.get(event_key) is not None:
+        log.info("Duplicate Stripe delivery ignored", extra={"event_id": event["id"]})
+        return jsonify({"received": True, "queued": False}), 200
+    session = stripe_sessions.put(event["data"]["object"])
     try:
-        if event["type"] == "checkout.session.completed":
-            handle_checkout_completed(event["data"]["object"])
-    except Exception as e:
-        print(f"❌ CRITICAL ERROR processing checkout.session.completed:")
-        traceback.print_exc()
+        queued = checkout_pipeline.enqueue(event["id"], event["type"], {"session": session})
+        idempotency_store.put(event_key, {"queued": True}, ttl=CHECKOUT_KEEP_DAYS * 86400)
+        checkout_pipeline.start()
+    except Exception:
+        log.exception("Could not queue checkout.session.completed")
         return jsonify({"error": "Internal processing error"}), 500
 
-    return jsonify({"received": True}), 200
\ No newline at end of file
+    if not queued:
+        log.info("Duplicate Stripe delivery ignored", extra={"event_id": event["id"]})
+    return jsonify({"received": True, "queued": queued}), 200
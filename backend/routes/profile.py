@@ -3,6 +3,8 @@ import os
 import requests
 from urllib.parse import quote
 
+from services.profile_index import record_profile
+
 profile_bp = Blueprint('profile', __name__, url_prefix='/api/user')
 
 SUPABASE_URL = os.getenv('SUPABASE_URL')
@@ -115,6 +117,7 @@ def update_profile():
             return jsonify({'success': False, 'error': f'update failed ({upd.status_code})'}), 500
 
         updated = upd.json()[0] if upd.text and upd.json() else merged
+        record_profile(email, payload)
         return jsonify({
             'success': True,
             'profile_completed': payload['profile_completed'],
@@ -0,0 +1,68 @@
+# backend/routes/profiling.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Saved cProfile captures (see services/profiling.py for how they are made).
+#
+# GET    /api/admin/profiling/profiles              newest first
+# GET    /api/admin/profiling/profiles/<name>       raw pstats file (snakeviz)
+#        ?format=text[&sort=cumulative|tottime|calls][&limit=50]   text summary
+# DELETE /api/admin/profiling/profiles/<name>
+#
+# If PROFILING_TOKEN is set, requires  Authorization: Bearer <PROFILING_TOKEN>.
+# ─────────────────────────────────────────────────────────────────────────────
+from flask import Blueprint, request, jsonify, Response, send_file
+import os
+
+from services.profiling import (
+    PROFILE_DIR, PROFILE_KEEP, PROFILING, PROFILE_SCHEDULER,
+    list_profiles, profile_path, render_text,
+)
+
+profiling_bp = Blueprint('profiling', __name__)
+
+_SORT_KEYS = {'cumulative', 'tottime', 'calls', 'ncalls', 'time'}
+
+
+@profiling_bp.before_request
+def _check_token():
+    token = os.getenv('PROFILING_TOKEN')
+    if token and request.headers.get('Authorization', '') != f'Bearer {token}':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+
+@profiling_bp.route('/api/admin/profiling/profiles', methods=['GET'])
+def get_profiles():
+    profiles = list_profiles()
+    return jsonify({
+        'success':            True,
+        'request_profiling':  PROFILING,
+        'scheduler_profiling': PROFILE_SCHEDULER or None,
+        'profile_dir':        PROFILE_DIR,
+        'keep':               PROFILE_KEEP,
+        'count':              len(profiles),
+        'profiles':           profiles,
+    }), 200
+
+
+@profiling_bp.route('/api/admin/profiling/profiles/<name>', methods=['GET'])
+def get_profile(name):
+    path = profile_path(name)
+    if path is None:
+        return jsonify({'success': False, 'error': 'Profile not found'}), 404
+
+    if request.args.get('format') == 'text':
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in _SORT_KEYS:
+            return jsonify({'success': False, 'error': f'sort must be one of {sorted(_SORT_KEYS)}'}), 400
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        return Response(render_text(path, sort, limit), content_type='text/plain; charset=utf-8')
+
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True, download_name=name)
+
+
+@profiling_bp.route('/api/admin/profiling/profiles/<name>', methods=['DELETE'])
+def delete_profile(name):
+    path = profile_path(name)
+    if path is None:
+        return jsonify({'success': False, 'error': 'Profile not found'}), 404
+    os.remove(path)
+    return jsonify({'success': True, 'deleted': name}), 200
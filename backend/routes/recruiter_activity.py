@@ -24,7 +24,8 @@ def log_activity():
             activity_details=activity_details
         )
         
-        return jsonify(result), 200 if result['success'] else 500
+        # 202: the event is queued and written by the batch flusher
+        return jsonify(result), 202 if result['success'] else 503 if result.get('dropped') else 500
         
     except Exception as e:
         return jsonify({
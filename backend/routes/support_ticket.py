@@ -4,6 +4,9 @@ import os
 import requests
 from datetime import datetime
 from dotenv import load_dotenv
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
 
 load_dotenv()
 
@@ -27,8 +30,7 @@ def submit_support_ticket():
     try:
         data = request.get_json()
         
-        print("\n" + "=" * 60)
-        print("🎫 SUPPORT TICKET RECEIVED")
+        log.info("Support ticket received")
         
         # 1. Validate inputs
         required_fields = ['name', 'email', 'subject', 'message']
@@ -43,8 +45,8 @@ def submit_support_ticket():
         
         # 2. Generate ID
         ticket_id = f"TKT-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
-        print(f"   User: {user_name} ({user_email})")
-        print(f"   Ticket ID: {ticket_id}")
+        log.info(f"User: {user_name} ({user_email})")
+        log.info(f"Ticket ID: {ticket_id}")
 
         # 3. Store in DB with 'unread' status
         db_payload = {
@@ -74,16 +76,16 @@ def submit_support_ticket():
         )
         
         if db_response.status_code in [200, 201]:
-            print(f"✅ DB Save Success (Status: unread)")
+            log.info(f"DB Save Success (Status: unread)")
         else:
-            print(f"⚠️ DB Save Failed: {db_response.text}")
+            log.warning(f"DB Save Failed: {db_response.text}")
 
         # 4. Send Email
         if not BREVO_API_KEY:
-            print("❌ BREVO_API_KEY is missing in .env")
+            log.error("BREVO_API_KEY is missing in .env")
             return jsonify({'success': True, 'message': 'Ticket saved, but email config missing'}), 200
 
-        print(f"📤 Sending email to: {SUPPORT_EMAIL}")
+        log.info(f"Sending email to: {SUPPORT_EMAIL}")
         
         email_payload = {
             "sender": {
@@ -135,16 +137,10 @@ def submit_support_ticket():
             timeout=10
         )
         
-        # 📝 DETAILED LOGGING FOR DEBUGGING
-        print(f"   Brevo Status: {brevo_resp.status_code}")
-        print(f"   Brevo Response: {brevo_resp.text}")
-
         if brevo_resp.status_code in [200, 201]:
-            print("✅ Email Sent Successfully")
+            log.info("Support email sent", extra={"brevo_status": brevo_resp.status_code})
         else:
-            print("❌ Email Failed to Send")
-
-        print("=" * 60 + "\n")
+            log.error(f"Support email failed: {brevo_resp.status_code} {brevo_resp.text}")
 
         return jsonify({
             'success': True,
@@ -153,5 +149,5 @@ def submit_support_ticket():
         }), 200
 
     except Exception as e:
-        print(f"❌ Exception: {str(e)}")
+        log.error(f"Exception: {str(e)}")
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
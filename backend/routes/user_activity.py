@@ -1,6 +1,9 @@
 # backend/routes/user_activity.py
 from flask import Blueprint, request, jsonify
 from services.user_activity_service import UserActivityService
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
 
 user_activity_bp = Blueprint('user_activity', __name__, url_prefix='/api/user-activity')
 
@@ -31,11 +34,12 @@ def log_user_activity():
             metadata=metadata
         )
         
-        status_code = 200 if result['success'] else 500
+        # 202: the event is queued and written by the batch flusher
+        status_code = 202 if result['success'] else 503 if result.get('dropped') else 500
         return jsonify(result), status_code
         
     except Exception as e:
-        print(f"❌ Route Error: {str(e)}")
+        log.error(f"Route Error: {str(e)}")
         return jsonify({
             'success': False,
             'error': str(e)
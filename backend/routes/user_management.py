@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify
 from services.user_service import UserService
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
 
 user_management_bp = Blueprint('user_management', __name__)
 
@@ -26,5 +29,5 @@ def delete_user():
         }), 200
         
     except Exception as e:
-        print(f"❌ Delete User Error: {str(e)}")
+        log.error(f"Delete User Error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
@@ -7,9 +7,14 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime, timezone
 import os
 import requests
-import traceback
+import time
 import uuid
 
+from services.metrics import WEBHOOK_COUNTER_LAG, count_webhook_event
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
 webhooks_bp = Blueprint('webhooks', __name__, url_prefix='/api/webhooks')
 
 # Supabase configuration
@@ -34,7 +39,7 @@ def get_supabase_headers():
 def _log_brevo_event(event_type, email_to, email_from, email_subject, timestamp, campaign_id=None, raw_data=None):
     try:
         if not email_to:
-            print(f"⚠️ _log_brevo_event: email_to is required, skipping log")
+            log.warning("_log_brevo_event: email_to is required, skipping log")
             return False
 
         log_entry = {
@@ -54,15 +59,14 @@ def _log_brevo_event(event_type, email_to, email_from, email_subject, timestamp,
         )
 
         if resp.status_code in [200, 201]:
-            print(f"✅ Brevo event logged: {event_type} → {email_to}")
             return True
         else:
-            print(f"⚠️ Failed to log Brevo event: {resp.status_code} {resp.text}")
+            log.warning("Failed to log Brevo event", extra={
+                "event": event_type, "status": resp.status_code, "body": resp.text[:500]})
             return False
 
-    except Exception as e:
-        print(f"❌ Error logging Brevo event: {str(e)}")
-        traceback.print_exc()
+    except Exception:
+        log.exception("Error logging Brevo event")
         return False
 
 
@@ -111,7 +115,7 @@ def update_recruiter_status(email, status, bounce_type, reason):
             return True
             
     except Exception as e:
-        traceback.print_exc()
+        log.exception("update_recruiter_status failed")
         return False
 
 # ============================================================
@@ -143,13 +147,22 @@ def delete_recruiter(email):
             return False
             
     except Exception as e:
-        traceback.print_exc()
+        log.exception("delete_recruiter failed")
         return False
 
 
 # ============================================================
 # EXISTING HELPER FUNCTION - UNTOUCHED
 # ============================================================
+def _observe_counter_lag(data):
+    """Seconds between Brevo recording the event and our counter update."""
+    event_ts = data.get('ts_event') or data.get('ts')
+    try:
+        WEBHOOK_COUNTER_LAG.observe(max(time.time() - float(event_ts), 0))
+    except (TypeError, ValueError):
+        pass
+
+
 def _update_blast_campaign_counter(campaign_id, field, increment=1):
     try:
         if not campaign_id:
@@ -182,7 +195,7 @@ def _update_blast_campaign_counter(campaign_id, field, increment=1):
             return False
 
     except Exception as e:
-        traceback.print_exc()
+        log.exception("_update_blast_campaign_counter failed")
         return False
 
 
@@ -201,6 +214,7 @@ def handle_brevo_webhook():
         
         event = data.get('event', '')
         email = data.get('email', '')
+        count_webhook_event('brevo', event)
         
         if event in ['hard_bounce', 'soft_bounce']:
             bounce_type = 'hard' if event == 'hard_bounce' else 'soft'
@@ -214,7 +228,7 @@ def handle_brevo_webhook():
         return jsonify({'status': 'ok'}), 200
         
     except Exception as e:
-        traceback.print_exc()
+        log.exception("handle_brevo_webhook failed")
         return jsonify({'error': str(e)}), 500
 
 
@@ -233,7 +247,7 @@ def handle_brevo_email_events():
         token = auth_header.split(' ')[1]
         
     if token != BREVO_WEBHOOK_SECRET:
-        print("❌ Invalid or missing webhook token")
+        log.warning("Invalid or missing Brevo webhook token")
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
@@ -243,6 +257,7 @@ def handle_brevo_email_events():
 
         event   = data.get('event', '')
         email   = data.get('email', '')
+        count_webhook_event('brevo', event)
         
         tag         = data.get('tag', '')
         campaign_id = tag.strip() if tag else None
@@ -260,14 +275,8 @@ def handle_brevo_email_events():
         # Grabbing the server's exact UTC time ensures Supabase perfectly accepts the record.
         timestamp = datetime.now(timezone.utc).isoformat()
 
-        print(f"\n{'='*70}")
-        print(f"🔔 BREVO EMAIL EVENT RECEIVED")
-        print(f"{'='*70}")
-        print(f"  Event:       {event}")
-        print(f"  Email:       {email}")
-        print(f"  Campaign ID: {campaign_id}")
-        print(f"  Subject:     {email_subject}")
-        print(f"{'='*70}\n")
+        log.info("Brevo email event", extra={
+            "event": event, "email": email, "campaign_id": campaign_id, "subject": email_subject})
 
         _log_brevo_event(
             event_type=event,
@@ -279,6 +288,9 @@ def handle_brevo_email_events():
             raw_data=data
         )
 
+        if campaign_id and event in ('delivered', 'opened', 'click', 'hard_bounce', 'soft_bounce'):
+            _observe_counter_lag(data)
+
         if event == 'delivered':
             if campaign_id: _update_blast_campaign_counter(campaign_id, 'delivered_count')
 
@@ -309,7 +321,7 @@ def handle_brevo_email_events():
         return jsonify({'status': 'ok', 'event': event, 'campaign_id': campaign_id}), 200
 
     except Exception as e:
-        traceback.print_exc()
+        log.exception("handle_brevo_email_events failed")
         return jsonify({'error': str(e)}), 500
 
 
@@ -324,6 +336,7 @@ def handle_resend_webhook():
         
         event_type = data.get('type')
         event_data = data.get('data', {})
+        count_webhook_event('resend', event_type)
         to_field = event_data.get('to', [])
         email = to_field[0] if isinstance(to_field, list) and len(to_field) > 0 else None
         
@@ -340,7 +353,7 @@ def handle_resend_webhook():
         return jsonify({'status': 'success', 'event': event_type}), 200
         
     except Exception as e:
-        traceback.print_exc()
+        log.exception("handle_resend_webhook failed")
         return jsonify({'error': str(e)}), 500
 
 
@@ -0,0 +1,228 @@
+# backend/services/batch_writer.py
+"""
+Buffered, batched inserts into a Supabase table.
+
+    guest_events = BatchWriter("guest_activity_events")
+    guest_events.add({"guest_id": gid, "event_type": "page_view", ...})
+
+add() never does I/O. It puts the row on a bounded in-memory queue and
+returns; if the queue is full the row is dropped and counted, the same
+policy as the log queue (services/structured_logging.py). A daemon thread,
+started on first use so each Gunicorn worker gets its own, drains the queue
+and POSTs rows as one JSON array per batch. A batch is sent when it reaches
+BATCH_WRITER_SIZE rows or BATCH_WRITER_FLUSH_SECONDS after its first row,
+whichever comes first. PostgREST wants uniform keys in a bulk body, so a
+batch is split by key set.
+
+A batch that fails on the network, a 5xx, 408 or 429 is retried with
+backoff (BATCH_WRITER_RETRIES times) and then dropped and counted. A
+400/409/422 carrying a Postgres data or constraint error (22xxx / 23xxx)
+means some rows are bad: the batch is split in half and each half written
+on its own until the bad rows are isolated, and only those are dropped
+(a bad row costs about 2*log2(batch) requests). Any other 4xx (missing
+table, 401/403, ...) is a table-level error: the batch is dropped at once
+and logged once. stop() drains whatever is still queued; it is
+registered with atexit, and gunicorn.conf.py's worker_exit hook calls
+stop_all() so a worker flushes its buffers before it goes away.
+Queue depth and row outcomes are exported as batch_writer_queue_depth and
+batch_writer_rows_total (services/metrics.py); stats() has the same numbers
+for this process.
+
+Env:
+  BATCH_WRITER_SIZE           rows per request          (200)
+  BATCH_WRITER_FLUSH_SECONDS  max wait for a batch      (2)
+  BATCH_WRITER_QUEUE_SIZE     rows buffered per writer  (10000)
+  BATCH_WRITER_RETRIES        attempts per batch        (3)
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+
+import requests
+
+from services.metrics import BATCH_WRITER_QUEUE_DEPTH, BATCH_WRITER_ROWS
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+BATCH_WRITER_SIZE          = int(os.getenv("BATCH_WRITER_SIZE", "200"))
+BATCH_WRITER_FLUSH_SECONDS = float(os.getenv("BATCH_WRITER_FLUSH_SECONDS", "2"))
+BATCH_WRITER_QUEUE_SIZE    = int(os.getenv("BATCH_WRITER_QUEUE_SIZE", "10000"))
+BATCH_WRITER_RETRIES       = int(os.getenv("BATCH_WRITER_RETRIES", "3"))
+
+
+def _get_supabase_url():
+    return os.getenv("SUPABASE_URL")
+
+
+def _headers():
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    return {
+        "apikey":        key,
+        "Authorization": f"Bearer {key}",
+        "Content-Type":  "application/json",
+        "Prefer":        "return=minimal",
+    }
+
+
+_writers = []      # every BatchWriter in this process, for stop_all()
+
+
+def stop_all(timeout: float = 10) -> None:
+    """Drain every writer (worker shutdown)."""
+    for writer in list(_writers):
+        writer.stop(timeout)
+
+
+class BatchWriter:
+
+    POLL_SECONDS = 0.25     # how often a waiting flusher re-checks stop()
+
+    def __init__(self, table, batch_size=BATCH_WRITER_SIZE, flush_seconds=BATCH_WRITER_FLUSH_SECONDS,
+                 max_queue=BATCH_WRITER_QUEUE_SIZE, retries=BATCH_WRITER_RETRIES):
+        self.table         = table
+        self.batch_size    = batch_size
+        self.flush_seconds = flush_seconds
+        self.retries       = retries
+        self._queue        = queue.Queue(maxsize=max_queue)
+        self._thread       = None
+        self._stopping     = threading.Event()
+        self._lock         = threading.Lock()
+        self.dropped       = 0      # queue full
+        self.failed        = 0      # gave up after retries
+        self.written       = 0
+        _writers.append(self)
+
+    # ─────────────────────────────────────────────────────────────────────
+    # PUBLIC METHODS
+    # ─────────────────────────────────────────────────────────────────────
+
+    def add(self, row: dict) -> bool:
+        """Queue one row; False if it was dropped (queue full or stopped)."""
+        if self._stopping.is_set():
+            self._count("dropped", 1)
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._count("dropped", 1)
+            return False
+        BATCH_WRITER_ROWS.labels(table=self.table, outcome="queued").inc()
+        BATCH_WRITER_QUEUE_DEPTH.labels(table=self.table).set(self._queue.qsize())
+        return True
+
+    def stop(self, timeout: float = 10) -> None:
+        """Stop accepting rows and write what is queued. Registered with atexit."""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        # Never started, or the flusher timed out: write the rest here
+        while not self._queue.empty():
+            self._write(self._take(block=False))
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize(), "written": self.written,
+                "dropped": self.dropped, "failed": self.failed}
+
+    # ─────────────────────────────────────────────────────────────────────
+    # INTERNALS
+    # ─────────────────────────────────────────────────────────────────────
+
+    def _count(self, outcome: str, rows: int):
+        setattr(self, outcome, getattr(self, outcome) + rows)
+        BATCH_WRITER_ROWS.labels(table=self.table, outcome=outcome).inc(rows)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"BatchWriter-{self.table}", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._take(block=True)
+            if batch:
+                self._write(batch)
+
+    def _take(self, block: bool) -> list:
+        """Up to batch_size rows: waits for the first, then until the flush deadline."""
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            try:
+                if not block or self._stopping.is_set():
+                    row = self._queue.get_nowait()
+                elif deadline is None:
+                    row = self._queue.get(timeout=self.POLL_SECONDS)
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    row = self._queue.get(timeout=min(remaining, self.POLL_SECONDS))
+            except queue.Empty:
+                if not block or self._stopping.is_set():
+                    break
+                continue                # idle, or waiting out the flush deadline
+            batch.append(row)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_seconds
+        if batch:
+            BATCH_WRITER_QUEUE_DEPTH.labels(table=self.table).set(self._queue.qsize())
+        return batch
+
+    def _write(self, batch: list):
+        groups = {}
+        for row in batch:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        for rows in groups.values():
+            self._write_rows(rows)
+
+    @staticmethod
+    def _row_error(resp) -> bool:
+        """A Postgres data (22xxx) or constraint (23xxx) error: some rows are bad."""
+        if resp.status_code not in (400, 409, 422):
+            return False
+        try:
+            code = str(resp.json().get("code") or "")
+        except ValueError:
+            return False
+        return code.startswith(("22", "23"))
+
+    def _write_rows(self, rows: list):
+        """POST rows; retry transient failures, bisect on row errors, drop on the rest."""
+        outcome = "transient"
+        for attempt in range(1, self.retries + 1):
+            try:
+                resp = requests.post(f"{_get_supabase_url()}/rest/v1/{self.table}",
+                                     json=rows, headers=_headers(), timeout=10)
+                if resp.status_code in (200, 201, 204):
+                    self._count("written", len(rows))
+                    return
+                error = f"{resp.status_code} {resp.text[:200]}"
+                if 400 <= resp.status_code < 500 and resp.status_code not in (408, 429):
+                    outcome = "row" if self._row_error(resp) else "table"
+                    break
+            except requests.RequestException as e:
+                error = str(e)
+            if attempt < self.retries and not self._stopping.is_set():
+                time.sleep(min(2 ** attempt, 30))
+
+        if outcome == "row" and len(rows) > 1:
+            middle = len(rows) // 2
+            self._write_rows(rows[:middle])
+            self._write_rows(rows[middle:])
+            return
+        self._count("failed", len(rows))
+        if outcome == "row":
+            log.error("Row rejected, dropped", extra={"table": self.table, "error": error,
+                                                      "row": str(rows[0])[:500]})
+        else:
+            log.error("Batch insert failed, rows dropped",
+                      extra={"table": self.table, "rows": len(rows), "error": error})
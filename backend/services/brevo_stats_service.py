@@ -0,0 +1,90 @@
+# backend/services/brevo_stats_service.py
+"""
+Account-wide Brevo sending capacity.
+
+Shared by the admin dashboard (/api/admin/brevo-stats) and the drip
+throughput planner, so both read the same plan / usage numbers.
+"""
+import os
+import requests
+from datetime import datetime, timezone
+
+BREVO_API_BASE = os.getenv("BREVO_API_BASE", "https://api.brevo.com/v3")
+
+# Brevo free plan: 300 emails per day, no monthly credits
+FREE_DAILY_LIMIT = 300
+
+
+class BrevoStatsService:
+
+    @staticmethod
+    def _headers(api_key: str) -> dict:
+        return {'accept': 'application/json', 'api-key': api_key}
+
+    @staticmethod
+    def _requests_between(headers: dict, start_date: str, end_date: str) -> int:
+        resp = requests.get(
+            f"{BREVO_API_BASE}/smtp/statistics/aggregatedReport",
+            headers=headers,
+            params={'startDate': start_date, 'endDate': end_date},
+            timeout=10
+        )
+        return resp.json().get('requests', 0) if resp.status_code == 200 else 0
+
+    @staticmethod
+    def get_account_stats() -> dict:
+        """
+        Returns {'success': True, 'plan_details': {...}, 'account': {...}} or
+        {'success': False, 'error': ...}. plan_details carries the numbers the
+        admin dashboard shows: type, total_limit, credits_remaining,
+        credits_used, daily_sent, monthly_sent, ...
+        """
+        api_key = os.getenv('BREVO_API_KEY')
+        if not api_key:
+            return {'success': False, 'error': 'BREVO_API_KEY not configured.'}
+
+        headers = BrevoStatsService._headers(api_key)
+        account_resp = requests.get(f"{BREVO_API_BASE}/account", headers=headers, timeout=10)
+        if account_resp.status_code != 200:
+            return {'success': False, 'error': f"Brevo API error {account_resp.status_code}"}
+
+        account_data = account_resp.json()
+        all_plans = account_data.get('plan', [])
+        plan_info = (next((p for p in all_plans if p.get('type') == 'subscription'), None)
+                     or next((p for p in all_plans if p.get('type') == 'payAsYouGo'), None)
+                     or next((p for p in all_plans if p.get('type') == 'free'), None) or {})
+
+        plan_type = plan_info.get('type', 'free')
+        credits_left = plan_info.get('credits', 0)
+        now_utc = datetime.now(timezone.utc)
+        today_str = now_utc.strftime('%Y-%m-%d')
+        month_start_str = now_utc.replace(day=1).strftime('%Y-%m-%d')
+
+        daily_sent, monthly_sent = 0, 0
+        try:
+            daily_sent = BrevoStatsService._requests_between(headers, today_str, today_str)
+            monthly_sent = BrevoStatsService._requests_between(headers, month_start_str, today_str)
+        except Exception:
+            pass
+
+        if plan_type == 'free':
+            total_limit, credits_used, usage_label = FREE_DAILY_LIMIT, daily_sent, "today's free daily limit"
+        else:
+            total_limit, credits_used, usage_label = credits_left + monthly_sent, monthly_sent, "monthly plan limit"
+
+        usage_percentage = round((credits_used / total_limit) * 100, 2) if total_limit > 0 else 0.0
+
+        return {
+            'success': True,
+            'fetched_at': now_utc,
+            'plan_details': {
+                'type': plan_type, 'total_limit': total_limit, 'credits_remaining': credits_left,
+                'credits_used': credits_used, 'usage_percent': usage_percentage,
+                'usage_label': usage_label, 'trigger_alert': usage_percentage >= 75,
+                'daily_sent': daily_sent, 'monthly_sent': monthly_sent,
+                'purchase_date': plan_info.get('startDate') or account_data.get('createdAt', 'N/A'),
+                'plan_end_date': plan_info.get('endDate') or 'N/A',
+                'features': ["Transactional Email", "REST API Access", "Email Templates"]
+            },
+            'account': account_data,
+        }
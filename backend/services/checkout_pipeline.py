@@ -0,0 +1,352 @@
+# backend/services/checkout_pipeline.py
+"""
+Acknowledge-first processing for Stripe checkout events.
+
+The webhook only verifies the signature and writes the event to a local
+SQLite outbox (enqueue); it then answers Stripe immediately. Worker threads
+claim outbox rows and run them through a fixed list of stages:
+
+    payment -> identity -> campaign -> day1 -> receipt
+
+Each row carries a JSON context that stages read and extend; it is saved
+after every stage, so a retry or a restart resumes at the failed stage
+instead of repeating finished work (a sent receipt is never sent twice,
+a created campaign is never created twice).
+
+  * A stage signals failure by raising. The row is retried at the same stage
+    with exponential backoff (CHECKOUT_RETRY_BASE_SECONDS * 2^attempt, capped
+    at CHECKOUT_RETRY_MAX_SECONDS) up to CHECKOUT_MAX_ATTEMPTS times.
+  * When a stage runs out of attempts its on_exhausted hook runs. An optional
+    stage (required=False) is then skipped; a required one parks the row as
+    'failed' for inspection (status(), or the SQLite file).
+  * A stage may set ctx["stop"] = "<reason>" to finish the row early
+    (unpaid session, free plan, ...). Stages built with after_stop=True
+    still run after a stop (the receipt goes out for a free plan too).
+  * Stripe retries and duplicate deliveries share the event id, which is the
+    primary key, so they are no-ops.
+
+Rows are claimed with a lease (CHECKOUT_LEASE_SECONDS), so several Gunicorn
+workers can share one outbox file. Every claim gets its own token and the
+lease is renewed while a stage runs, so a slow stage keeps its row; a
+worker that dies mid-stage releases it when the lease expires. Saves are
+conditional on the token, so a worker that lost its lease stops there
+instead of overwriting the new owner's progress.
+
+Env:
+  CHECKOUT_OUTBOX_PATH        SQLite file; put it on persistent storage (default
+                              <tmp>/resumeblast-checkout-outbox.sqlite, which app.py
+                              warns about outside development)
+  CHECKOUT_WORKERS            worker threads per process (default 2)
+  CHECKOUT_MAX_ATTEMPTS       per stage (default 6)
+  CHECKOUT_RETRY_BASE_SECONDS first retry delay (default 5)
+  CHECKOUT_RETRY_MAX_SECONDS  backoff cap (default 600)
+  CHECKOUT_LEASE_SECONDS      claim lease, renewed every third of it (default 120)
+  CHECKOUT_KEEP_DAYS          finished rows kept for (default 7)
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from services.metrics import CHECKOUT_STAGE_SECONDS
+from services.structured_logging import correlation, get_logger
+
+log = get_logger(__name__)
+
+CHECKOUT_OUTBOX_PATH = os.getenv(
+    "CHECKOUT_OUTBOX_PATH", os.path.join(tempfile.gettempdir(), "resumeblast-checkout-outbox.sqlite"))
+CHECKOUT_WORKERS            = int(os.getenv("CHECKOUT_WORKERS", "2"))
+CHECKOUT_MAX_ATTEMPTS       = int(os.getenv("CHECKOUT_MAX_ATTEMPTS", "6"))
+CHECKOUT_RETRY_BASE_SECONDS = float(os.getenv("CHECKOUT_RETRY_BASE_SECONDS", "5"))
+CHECKOUT_RETRY_MAX_SECONDS  = float(os.getenv("CHECKOUT_RETRY_MAX_SECONDS", "600"))
+CHECKOUT_LEASE_SECONDS      = float(os.getenv("CHECKOUT_LEASE_SECONDS", "120"))
+CHECKOUT_KEEP_DAYS          = float(os.getenv("CHECKOUT_KEEP_DAYS", "7"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkout_outbox (
+    event_id      TEXT PRIMARY KEY,
+    event_type    TEXT NOT NULL,
+    stage         TEXT NOT NULL,
+    state         TEXT NOT NULL DEFAULT 'pending',   -- pending | done | failed
+    context       TEXT NOT NULL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    next_run_at   REAL NOT NULL,
+    lease_owner   TEXT,
+    lease_until   REAL NOT NULL DEFAULT 0,
+    last_error    TEXT,
+    created_at    REAL NOT NULL,
+    updated_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS checkout_outbox_due ON checkout_outbox (state, next_run_at);
+"""
+
+
+class Stage:
+
+    def __init__(self, name, fn, required=True, on_exhausted=None, after_stop=False):
+        self.name         = name
+        self.fn           = fn
+        self.required     = required
+        self.on_exhausted = on_exhausted
+        self.after_stop   = after_stop      # run even when an earlier stage set ctx["stop"]
+
+
+class CheckoutPipeline:
+
+    POLL_SECONDS = 1.0
+
+    def __init__(self, stages, path=CHECKOUT_OUTBOX_PATH, workers=CHECKOUT_WORKERS):
+        self.stages   = list(stages)
+        self._index   = {stage.name: i for i, stage in enumerate(self.stages)}
+        self.path     = path
+        self.workers  = workers
+        self._local   = threading.local()
+        self._wake    = threading.Event()
+        self._stopped = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._db().executescript(_SCHEMA)
+
+    # ─────────────────────────────────────────────────────────────────────
+    # PUBLIC METHODS
+    # ─────────────────────────────────────────────────────────────────────
+
+    def enqueue(self, event_id: str, event_type: str, context: dict) -> bool:
+        """Persist an event. False if it was already in the outbox (duplicate delivery)."""
+        now = time.time()
+        with self._db() as db:
+            cur = db.execute(
+                "INSERT OR IGNORE INTO checkout_outbox "
+                "(event_id, event_type, stage, context, next_run_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (event_id, event_type, self.stages[0].name, json.dumps(context), now, now, now),
+            )
+        created = cur.rowcount == 1
+        if created:
+            self._wake.set()
+        return created
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self.running:
+                return
+            self._stopped.clear()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"CheckoutPipeline-{i}", daemon=True)
+                for i in range(max(1, self.workers))
+            ]
+            for thread in self._threads:
+                thread.start()
+        log.info("Checkout pipeline started", extra={"workers": len(self._threads), "outbox": self.path})
+
+    def stop(self, timeout=10) -> None:
+        self._stopped.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def run_pending(self, max_rows=None) -> int:
+        """Process due rows on the calling thread until none are left. Returns rows processed."""
+        done = 0
+        while max_rows is None or done < max_rows:
+            row = self._claim()
+            if row is None:
+                return done
+            self._process(row)
+            done += 1
+        return done
+
+    def run_inline(self, event_id: str, event_type: str, context: dict) -> dict:
+        """Run every stage now, without the outbox (no retries). Returns the final context."""
+        ctx = dict(context)
+        for stage in self.stages:
+            if ctx.get("stop") and not stage.after_stop:
+                continue
+            try:
+                stage.fn(ctx)
+            except Exception:
+                log.exception("Checkout stage failed (inline)", extra={"event_id": event_id, "stage": stage.name})
+                if stage.on_exhausted:
+                    stage.on_exhausted(ctx)
+                if stage.required:
+                    break
+        return ctx
+
+    def status(self) -> dict:
+        with self._db() as db:
+            rows = db.execute(
+                "SELECT state, stage, COUNT(*) FROM checkout_outbox GROUP BY state, stage").fetchall()
+        summary = {"pending": {}, "failed": {}, "done": 0}
+        for state, stage, count in rows:
+            if state == "done":
+                summary["done"] += count
+            else:
+                summary.setdefault(state, {})[stage] = count
+        return summary
+
+    def get(self, event_id: str):
+        with self._db() as db:
+            row = db.execute("SELECT * FROM checkout_outbox WHERE event_id = ?", (event_id,)).fetchone()
+        if row is None:
+            return None
+        entry = dict(row)
+        entry["context"] = json.loads(entry["context"])
+        return entry
+
+    def retry(self, event_id: str) -> bool:
+        """Re-queue a failed row at the stage it failed on."""
+        with self._db() as db:
+            cur = db.execute(
+                "UPDATE checkout_outbox SET state = 'pending', attempts = 0, next_run_at = ?, updated_at = ? "
+                "WHERE event_id = ? AND state = 'failed'", (time.time(), time.time(), event_id))
+        self._wake.set()
+        return cur.rowcount == 1
+
+    # ─────────────────────────────────────────────────────────────────────
+    # INTERNALS
+    # ─────────────────────────────────────────────────────────────────────
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _claim(self):
+        now   = time.time()
+        token = f"{os.getpid()}-{uuid.uuid4().hex}"
+        with self._db() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT * FROM checkout_outbox WHERE state = 'pending' AND next_run_at <= ? "
+                "AND lease_until <= ? ORDER BY next_run_at LIMIT 1", (now, now)).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE checkout_outbox SET lease_owner = ?, lease_until = ? WHERE event_id = ?",
+                (token, now + CHECKOUT_LEASE_SECONDS, row["event_id"]))
+        return {**dict(row), "lease_owner": token}
+
+    def _save(self, event_id, token, **fields) -> bool:
+        """Update the row if this claim still holds it; False when the lease was lost."""
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._db() as db:
+            cur = db.execute(f"UPDATE checkout_outbox SET {assignments} WHERE event_id = ? AND lease_owner = ?",
+                             (*fields.values(), event_id, token))
+        if cur.rowcount != 1:
+            log.warning("Checkout lease lost — another worker owns this event", extra={"event_id": event_id})
+            return False
+        return True
+
+    @contextmanager
+    def _renewing(self, event_id, token):
+        """Extend the lease every third of CHECKOUT_LEASE_SECONDS until the block exits."""
+        finished = threading.Event()
+
+        def renew():
+            try:
+                while not finished.wait(CHECKOUT_LEASE_SECONDS / 3):
+                    with self._db() as db:
+                        db.execute("UPDATE checkout_outbox SET lease_until = ? WHERE event_id = ? AND lease_owner = ?",
+                                   (time.time() + CHECKOUT_LEASE_SECONDS, event_id, token))
+            except Exception:
+                log.exception("Checkout lease renewal failed", extra={"event_id": event_id})
+            finally:
+                conn = getattr(self._local, "conn", None)
+                if conn is not None:
+                    conn.close()
+
+        renewer = threading.Thread(target=renew, name=f"CheckoutLease-{event_id[-12:]}", daemon=True)
+        renewer.start()
+        try:
+            yield
+        finally:
+            finished.set()
+
+    def _process(self, row):
+        event_id = row["event_id"]
+        token    = row["lease_owner"]
+        ctx      = json.loads(row["context"])
+        attempts = row["attempts"]
+        position = self._index.get(row["stage"], len(self.stages))
+
+        with correlation(f"checkout-{event_id[-12:]}"):
+            while position < len(self.stages):
+                stage = self.stages[position]
+                if ctx.get("stop") and not stage.after_stop:
+                    position += 1
+                    continue
+                started = time.perf_counter()
+                try:
+                    with self._renewing(event_id, token):
+                        stage.fn(ctx)
+                except Exception as e:
+                    CHECKOUT_STAGE_SECONDS.labels(stage=stage.name, outcome="error").observe(
+                        time.perf_counter() - started)
+                    attempts += 1
+                    if attempts < CHECKOUT_MAX_ATTEMPTS:
+                        delay = min(CHECKOUT_RETRY_BASE_SECONDS * 2 ** (attempts - 1), CHECKOUT_RETRY_MAX_SECONDS)
+                        log.warning("Checkout stage failed — will retry", extra={
+                            "event_id": event_id, "stage": stage.name, "attempt": attempts,
+                            "retry_in": delay, "error": str(e)})
+                        self._save(event_id, token, stage=stage.name, context=json.dumps(ctx), attempts=attempts,
+                                   next_run_at=time.time() + delay, lease_until=0, last_error=str(e)[:1000])
+                        return
+                    log.exception("Checkout stage exhausted its retries",
+                                  extra={"event_id": event_id, "stage": stage.name, "attempts": attempts})
+                    if stage.on_exhausted:
+                        try:
+                            stage.on_exhausted(ctx)
+                        except Exception:
+                            log.exception("on_exhausted hook failed", extra={"stage": stage.name})
+                    if stage.required:
+                        self._save(event_id, token, stage=stage.name, state="failed", context=json.dumps(ctx),
+                                   attempts=attempts, lease_until=0, last_error=str(e)[:1000])
+                        return
+                else:
+                    CHECKOUT_STAGE_SECONDS.labels(stage=stage.name, outcome="ok").observe(
+                        time.perf_counter() - started)
+
+                position += 1
+                attempts = 0
+                next_stage = self.stages[position].name if position < len(self.stages) else "done"
+                if not self._save(event_id, token, stage=next_stage, context=json.dumps(ctx),
+                                  attempts=0, last_error=None):
+                    return
+
+            if self._save(event_id, token, state="done", stage="done", context=json.dumps(ctx), lease_until=0):
+                log.info("Checkout event processed", extra={"event_id": event_id, "stop": ctx.get("stop")})
+
+    def _prune(self):
+        cutoff = time.time() - CHECKOUT_KEEP_DAYS * 86400
+        with self._db() as db:
+            db.execute("DELETE FROM checkout_outbox WHERE state = 'done' AND updated_at < ?", (cutoff,))
+
+    def _run(self):
+        last_prune = 0.0
+        while not self._stopped.is_set():
+            try:
+                if not self.run_pending():
+                    if time.time() - last_prune > 3600:
+                        self._prune()
+                        last_prune = time.time()
+                    self._wake.wait(self.POLL_SECONDS)
+                    self._wake.clear()
+            except Exception:
+                log.exception("Checkout pipeline worker error")
+                time.sleep(self.POLL_SECONDS)
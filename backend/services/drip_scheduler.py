@@ -4,17 +4,34 @@ Runs every 30 minutes via APScheduler.
 Checks blast_campaigns table for Wave 1, Wave 2, and Wave 3 emails due.
 Works for both registered and guest users.
 
-DAILY QUOTA ENFORCED: Max 50 emails per campaign per wave per calendar day.
+DAILY QUOTA ENFORCED: One batch per campaign per wave per calendar day. The
+batch size is the campaign's daily allotment from services/throughput_planner.py
+(share of today's Brevo capacity by plan priority; DAILY_EMAIL_LIMIT fallback).
+The first Wave 1 batch runs inside the checkout request (run_day1_blast), so
+it is capped at DAILY_EMAIL_LIMIT to keep that request short. A sender
+claims the day's batch by stamping the wave's last_date before it sends
+(_claim_batch), so two senders never send the same batch.
 
 WAVE TRIGGER LOGIC:
   Wave 1 → starts immediately when campaign is created (status=active)
-  Wave 2 → starts automatically the next business-hours tick AFTER Wave 1 completes
-  Wave 3 → starts automatically the next business-hours tick AFTER Wave 2 completes
+  Wave 2 → starts as soon as business hours allow AFTER Wave 1 completes
+  Wave 3 → starts as soon as business hours allow AFTER Wave 2 completes
   No fixed scheduled dates used — waves chain directly on completion.
-  Weekends and non-business hours are skipped for Wave 2 and Wave 3.
+  Weekends, holidays and non-business hours are skipped for Wave 2 and Wave 3
+  (send windows come from services/send_calendar.py, recruiter-local time).
+
+EVENT-DRIVEN DISPATCH (DRIP_EVENT_DRIVEN=1, default):
+  Every open campaign is kept in an in-process WaveQueue keyed by the time it
+  next becomes eligible. The queue is seeded from blast_campaigns at startup,
+  updated by _update_campaign_after_wave, and a dispatcher thread sends each
+  campaign exactly when it becomes eligible. run_scheduler_tick() remains for
+  polling mode (DRIP_EVENT_DRIVEN=0); in event mode the periodic job only
+  reconciles the queue with the database (campaigns created by other workers,
+  which schedule_campaign cannot reach) every DRIP_RECONCILE_MINUTES, 30 by
+  default, so such campaigns still start within 30 minutes.
 """
-import os, time, requests
-from datetime import datetime
+import os, time, threading, requests
+from datetime import datetime, timedelta
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -22,6 +39,16 @@ _env_path = Path(__file__).resolve().parent.parent / ".env"
 if _env_path.exists():
     load_dotenv(dotenv_path=_env_path, override=False)
 
+from services.throughput_planner import (
+    DAILY_EMAIL_LIMIT, get_limit_for_plan, get_delay_for_plan, get_planner
+)
+from services.mail_transport import get_transport
+from services.metrics import DRIP_EMAILS, DRIP_CAMPAIGNS, time_job
+from services.structured_logging import get_logger, correlation
+from services.profiling import profile_job
+
+log = get_logger(__name__)
+
 BREVO_API_KEY      = os.getenv("BREVO_API_KEY")
 BREVO_SENDER_EMAIL = os.getenv("BREVO_SENDER_EMAIL", "noreply@resumeblast.ai")
 BREVO_SENDER_NAME  = os.getenv("BREVO_SENDER_NAME", "ResumeBlast.ai")
@@ -30,25 +57,10 @@ BREVO_TEMPLATE_DAY1 = int(os.getenv("BREVO_TEMPLATE_DAY1", "3"))
 BREVO_TEMPLATE_DAY4 = int(os.getenv("BREVO_TEMPLATE_DAY4", "4"))
 BREVO_TEMPLATE_DAY8 = int(os.getenv("BREVO_TEMPLATE_DAY8", "5"))
 
-DAILY_EMAIL_LIMIT = int(os.getenv("DAILY_EMAIL_LIMIT", "50"))
 
-PLAN_SEND_DELAYS = {
-    "starter":      2.0,
-    "basic":        2.5,
-    "professional": 3.0,
-    "growth":       3.5,
-    "advanced":     4.0,
-    "premium":      4.5
-}
-
-PLAN_LIMIT_MAP = {
-    "starter":      250,
-    "basic":        500,
-    "professional": 750,
-    "growth":       1000,
-    "advanced":     1250,
-    "premium":      1500
-}
+DRIP_EVENT_DRIVEN       = os.getenv("DRIP_EVENT_DRIVEN", "1") not in ("0", "false", "False")
+DRIP_RECONCILE_MINUTES  = int(os.getenv("DRIP_RECONCILE_MINUTES", "30"))
+DRIP_WAVE_RETRY_MINUTES = int(os.getenv("DRIP_WAVE_RETRY_MINUTES", "30"))
 
 WAVE_FIELDS = {
     1: {
@@ -92,19 +104,28 @@ def _headers():
     }
 
 def _get_delay_for_plan(plan_name: str) -> float:
-    return PLAN_SEND_DELAYS.get(plan_name, 2.0)
+    return get_delay_for_plan(plan_name)
 
 def _get_limit_for_plan(plan_name: str) -> int:
-    return PLAN_LIMIT_MAP.get(plan_name, 250)
+    return get_limit_for_plan(plan_name)
 
-def _is_business_hours() -> bool:
-    now = datetime.utcnow()
-    if now.weekday() >= 5:
-        return False
-    hour, minute = now.hour, now.minute
-    in_morning   = (14 <= hour < 16)
-    in_afternoon = (hour == 17 and minute >= 30) or (hour == 18)
-    return in_morning or in_afternoon
+def _campaign_calendar(campaign: dict = None):
+    """Send-window calendar for a campaign (recruiter timezone when it carries one)."""
+    from services.send_calendar import calendar_for
+    return calendar_for((campaign or {}).get("send_timezone"))
+
+def _is_business_hours(now: datetime = None, campaign: dict = None) -> bool:
+    return _campaign_calendar(campaign).is_open(now or datetime.utcnow())
+
+def _next_business_window(after: datetime, campaign_id: str = "", campaign: dict = None) -> datetime:
+    """
+    First send slot at or after `after`. Campaigns that become due while the
+    window is closed are staggered across it by campaign id.
+    """
+    return _campaign_calendar(campaign).next_slot(after, key=campaign_id)
+
+def _start_of_tomorrow_utc(now: datetime) -> datetime:
+    return now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
 
 def _today_utc_str() -> str:
     return datetime.utcnow().strftime("%Y-%m-%d")
@@ -121,11 +142,45 @@ def _already_sent_today(campaign: dict, drip_day: int) -> bool:
     quota_used    = (last_date_str == today)
 
     if quota_used:
-        print(f"[Scheduler] Daily quota used — campaign={campaign['id']} "
-              f"wave={drip_day} last_date={last_date_str} today={today} "
-              f"-- will resume tomorrow")
+        log.info("Daily quota used -- will resume tomorrow",
+                 extra={"campaign_id": campaign["id"], "wave": drip_day, "last_date": last_date_str})
     return quota_used
 
+def _claim_batch(campaign: dict, drip_day: int):
+    """
+    Stamp today's last_date before sending, so exactly one sender (request
+    path, checkout pipeline, tick or dispatcher, in any worker) gets the
+    wave's batch for today. The PATCH only matches while last_date is older
+    than today. Returns True (claimed), False (another sender has today's
+    batch) or None (Supabase error).
+    """
+    column = WAVE_FIELDS[drip_day]["last_date"]
+    today  = _today_utc_str()
+    resp = requests.patch(
+        f"{_get_supabase_url()}/rest/v1/blast_campaigns"
+        f"?id=eq.{campaign['id']}&or=({column}.is.null,{column}.lt.{today})",
+        json={column: today},
+        headers=_headers()
+    )
+    if resp.status_code not in (200, 204):
+        log.warning("Failed to claim batch", extra={"campaign_id": campaign["id"], "wave": drip_day,
+                                                    "status": resp.status_code, "body": resp.text[:200]})
+        return None
+    return bool(resp.json())
+
+def _release_batch(campaign: dict, drip_day: int):
+    """Undo _claim_batch when nothing was sent, so the batch is retried today."""
+    column = WAVE_FIELDS[drip_day]["last_date"]
+    resp = requests.patch(
+        f"{_get_supabase_url()}/rest/v1/blast_campaigns"
+        f"?id=eq.{campaign['id']}&{column}=eq.{_today_utc_str()}",
+        json={column: campaign.get(column)},
+        headers=_headers()
+    )
+    if resp.status_code not in (200, 204):
+        log.warning("Failed to release batch claim", extra={"campaign_id": campaign["id"], "wave": drip_day,
+                                                            "status": resp.status_code})
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # _fetch_recruiters_for_plan
@@ -159,8 +214,8 @@ def _fetch_recruiters_for_plan(plan_name: str, offset: int = 0, batch_size: int
     resp = requests.get(url, headers=_headers())
 
     if resp.status_code not in [200, 206]:
-        print(f"[Scheduler] Failed to fetch recruiters: {resp.status_code}")
-        print(f"[Scheduler] SUPABASE ERROR DETAILS: {resp.text}")
+        log.error("Failed to fetch recruiters",
+                  extra={"status": resp.status_code, "body": resp.text[:500]})
         return []
 
     need = min(batch_size, remaining)
@@ -183,8 +238,8 @@ def _fetch_recruiters_for_plan(plan_name: str, offset: int = 0, batch_size: int
         if len(result) >= need:
             break
 
-    print(f"[Scheduler] Fetched {len(result)} recruiters "
-          f"(plan={plan_name}, offset={offset}, need={need}, plan_limit={plan_limit})")
+    log.debug("Fetched recruiters", extra={"count": len(result), "plan": plan_name,
+                                           "offset": offset, "need": need, "plan_limit": plan_limit})
     return result
 
 
@@ -196,26 +251,22 @@ def _send_brevo_email(to_email, to_name, template_id, params):
     if not reply_to_email:
         reply_to_email = BREVO_SENDER_EMAIL
 
-    resp = requests.post(
-        "https://api.brevo.com/v3/smtp/email",
-        json={
-            "to":         [{"email": to_email, "name": to_name or "Hiring Manager"}],
-            "templateId": template_id,
-            "params":     params,
-            "sender":     {"name": BREVO_SENDER_NAME, "email": BREVO_SENDER_EMAIL},
-            "replyTo":    {"email": reply_to_email}
-        },
-        headers={"api-key": BREVO_API_KEY, "Content-Type": "application/json"}
-    )
-    if resp.status_code in [200, 201]:
-        return {"success": True, "message_id": resp.json().get("messageId")}
-    return {"success": False, "error": resp.text, "status": resp.status_code}
+    result = get_transport("brevo").send({
+        "to":         [{"email": to_email, "name": to_name or "Hiring Manager"}],
+        "templateId": template_id,
+        "params":     params,
+        "sender":     {"name": BREVO_SENDER_NAME, "email": BREVO_SENDER_EMAIL},
+        "replyTo":    {"email": reply_to_email}
+    })
+    if result["success"]:
+        return {"success": True, "message_id": result["message_id"]}
+    return {"success": False, "error": result["error"], "status": result["status"]}
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # _send_drip_wave
 # ─────────────────────────────────────────────────────────────────────────────
-def _send_drip_wave(campaign: dict, drip_day: int) -> dict:
+def _send_drip_wave(campaign: dict, drip_day: int, max_batch: int = None) -> dict:
     template_map = {1: BREVO_TEMPLATE_DAY1, 4: BREVO_TEMPLATE_DAY4, 8: BREVO_TEMPLATE_DAY8}
     template_id  = template_map[drip_day]
     campaign_id  = campaign["id"]
@@ -225,28 +276,41 @@ def _send_drip_wave(campaign: dict, drip_day: int) -> dict:
     fields       = WAVE_FIELDS[drip_day]
 
     already_sent = int(campaign.get(fields["delivered"]) or 0)
+    daily_limit  = get_planner().allotment_for(campaign_id, plan_name)
+    if max_batch is not None:
+        daily_limit = min(daily_limit, max_batch)
 
-    print(f"[Scheduler] {'='*55}")
-    print(f"[Scheduler] Campaign : {campaign_id}")
-    print(f"[Scheduler] Wave {drip_day}    : plan={plan_name} "
-          f"sent_so_far={already_sent}/{plan_limit} daily_limit={DAILY_EMAIL_LIMIT}")
+    log.info("Wave batch starting", extra={
+        "campaign_id": campaign_id, "wave": drip_day, "plan": plan_name,
+        "sent_so_far": already_sent, "plan_limit": plan_limit, "daily_limit": daily_limit,
+    })
 
     if already_sent >= plan_limit:
         return {"sent": 0, "failed": 0, "total": plan_limit,
                 "cumulative": already_sent, "wave_complete": True, "quota_exceeded": False}
 
-    if _already_sent_today(campaign, drip_day):
+    if _already_sent_today(campaign, drip_day) or daily_limit <= 0:
+        # daily_limit == 0 means the account-wide Brevo capacity is used up today
         return {"sent": 0, "failed": 0, "total": plan_limit,
                 "cumulative": already_sent, "wave_complete": False, "quota_exceeded": True}
 
+    # The row may be stale: claim today's batch in the database before sending
+    claimed = _claim_batch(campaign, drip_day)
+    if not claimed:
+        if claimed is False:
+            log.info("Batch already claimed today -- skipping", extra={"campaign_id": campaign_id, "wave": drip_day})
+        return {"sent": 0, "failed": 0, "total": plan_limit, "cumulative": already_sent,
+                "wave_complete": False, "quota_exceeded": claimed is False}
+
     recruiters = _fetch_recruiters_for_plan(
         plan_name  = plan_name,
         offset     = already_sent,
-        batch_size = DAILY_EMAIL_LIMIT
+        batch_size = daily_limit
     )
 
     if not recruiters:
-        print(f"[Scheduler] No recruiters returned at offset={already_sent}")
+        log.warning("No recruiters returned", extra={"campaign_id": campaign_id, "offset": already_sent})
+        _release_batch(campaign, drip_day)
         return {"sent": 0, "failed": 0, "total": plan_limit,
                 "cumulative": already_sent, "wave_complete": False, "quota_exceeded": False}
 
@@ -268,8 +332,8 @@ def _send_drip_wave(campaign: dict, drip_day: int) -> dict:
     batch_start       = already_sent + 1
     batch_end         = already_sent + len(recruiters)
 
-    print(f"[Scheduler] Sending recruiters {batch_start}-{batch_end} of {plan_limit} "
-          f"(delay={delay}s each)")
+    log.debug("Sending recruiters", extra={"campaign_id": campaign_id, "from": batch_start,
+                                           "to": batch_end, "plan_limit": plan_limit, "delay": delay})
 
     for recruiter in recruiters:
         result = _send_brevo_email(
@@ -277,17 +341,25 @@ def _send_drip_wave(campaign: dict, drip_day: int) -> dict:
         )
         if result["success"]:
             sent_this_batch += 1
+            DRIP_EMAILS.labels(wave=WAVE_NUMBER[drip_day], plan=plan_name, outcome="sent").inc()
         else:
             failed_this_batch += 1
-            print(f"[Scheduler] Failed: {recruiter['email']} -- {result.get('error','')[:80]}")
+            DRIP_EMAILS.labels(wave=WAVE_NUMBER[drip_day], plan=plan_name, outcome="failed").inc()
+            log.warning("Drip send failed", extra={"campaign_id": campaign_id, "to": recruiter["email"],
+                                                   "error": (result.get("error") or "")[:200]})
         time.sleep(delay)
 
+    if sent_this_batch == 0:
+        _release_batch(campaign, drip_day)   # every send failed: retry today
+
     cumulative_sent = already_sent + sent_this_batch
     wave_complete   = cumulative_sent >= plan_limit
 
-    print(f"[Scheduler] Batch done -- sent_today={sent_this_batch} "
-          f"failed={failed_this_batch} cumulative={cumulative_sent}/{plan_limit} "
-          f"wave_complete={wave_complete}")
+    log.info("Wave batch done", extra={
+        "campaign_id": campaign_id, "wave": drip_day, "sent": sent_this_batch,
+        "failed": failed_this_batch, "cumulative": cumulative_sent, "plan_limit": plan_limit,
+        "wave_complete": wave_complete,
+    })
 
     return {
         "sent":           sent_this_batch,
@@ -302,7 +374,7 @@ def _send_drip_wave(campaign: dict, drip_day: int) -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # _update_campaign_after_wave
 # ─────────────────────────────────────────────────────────────────────────────
-def _update_campaign_after_wave(campaign_id: str, drip_day: int, stats: dict):
+def _update_campaign_after_wave(campaign_id: str, drip_day: int, stats: dict, campaign: dict = None):
     if stats.get("quota_exceeded"):
         return
 
@@ -337,10 +409,9 @@ def _update_campaign_after_wave(campaign_id: str, drip_day: int, stats: dict):
     #   User gets Day 1 emails as soon as Brevo recovers — same day as payment.
     if emails_sent_this_batch > 0:
         update[fields["last_date"]] = today_str
-        print(f"[Scheduler] last_date stamped ({today_str}) -- "
-              f"{emails_sent_this_batch} emails sent this batch")
     else:
-        print(f"[Scheduler] last_date NOT stamped -- sent=0, will retry next tick")
+        log.info("last_date not stamped -- sent=0, will retry",
+                 extra={"campaign_id": campaign_id, "wave": drip_day})
 
     if wave_complete:
         update[fields["sent_at"]] = now
@@ -354,48 +425,80 @@ def _update_campaign_after_wave(campaign_id: str, drip_day: int, stats: dict):
             # Wave 2 will be picked up on the next business-hours tick automatically
             update["drip_day2_status"] = "pending"
             update["drip_day3_status"] = "pending"
-            print(f"[Scheduler] Wave 1 COMPLETE -- "
-                  f"drip_day2_status & drip_day3_status set to 'pending' "
-                  f"-- Wave 2 will start next business-hours tick "
-                  f"-- campaign={campaign_id}")
 
         elif drip_day == 4:
             # Wave 2 complete → ensure Wave 3 is pending
             # Wave 3 will be picked up on the next business-hours tick automatically
             update["drip_day3_status"] = "pending"
-            print(f"[Scheduler] Wave 2 COMPLETE -- "
-                  f"drip_day3_status set to 'pending' "
-                  f"-- Wave 3 will start next business-hours tick "
-                  f"-- campaign={campaign_id}")
 
         elif drip_day == 8:
             # Wave 3 complete → entire campaign is done
             update["status"] = "completed"
-            print(f"[Scheduler] Wave 3 COMPLETE -- "
-                  f"campaign marked as completed "
-                  f"-- campaign={campaign_id}")
 
-        print(f"[Scheduler] Wave {drip_day} COMPLETE -- sent_at stamped campaign={campaign_id}")
-
-    else:
-        print(f"[Scheduler] Wave {drip_day} IN PROGRESS -- {cumulative} sent total, "
-              f"next batch tomorrow -- campaign={campaign_id}")
+        log.info("Wave complete", extra={"campaign_id": campaign_id, "wave": drip_day,
+                                         "campaign_completed": drip_day == 8})
 
     resp = requests.patch(
         f"{supabase_url}/rest/v1/blast_campaigns?id=eq.{campaign_id}",
         json=update,
         headers=_headers()
     )
-    if resp.status_code in [200, 204]:
-        print(f"[Scheduler] Progress saved -- campaign={campaign_id}")
-    else:
-        print(f"[Scheduler] Failed to save progress: {resp.status_code} {resp.text}")
+    if resp.status_code not in [200, 204]:
+        log.error("Failed to save wave progress", extra={
+            "campaign_id": campaign_id, "status": resp.status_code, "body": resp.text[:500]})
+
+    # Chain the next batch / next wave straight into the dispatcher queue
+    schedule_campaign(campaign_id, _next_time_after_wave(campaign_id, drip_day, stats, campaign=campaign))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# _prepare_campaign
+# ─────────────────────────────────────────────────────────────────────────────
+def _prepare_campaign(campaign: dict, drip_day: int) -> bool:
+    """
+    Shared pre-send checks for the scheduler tick and the wave dispatcher.
+    Returns False when the campaign must not be sent right now.
+    """
+    cid = campaign["id"]
+
+    # ✅ GUARD: Skip junk campaigns with no candidate data.
+    # Prevents broken template emails (empty subject/fields) going to recruiters.
+    # These are abandoned checkouts or corrupted records where candidate_name
+    # was never set. This guard ensures they are never processed.
+    if not campaign.get("candidate_name") or not campaign.get("plan_name"):
+        log.info("Skipping incomplete campaign (candidate_name or plan_name is NULL)",
+                 extra={"campaign_id": cid, "wave": drip_day})
+        return False
+
+    # ✅ Auto-promote 'initiated' → 'active' before sending
+    # This permanently fixes campaigns stuck after payment
+    if campaign.get("status") == "initiated":
+        promote_resp = requests.patch(
+            f"{_get_supabase_url()}/rest/v1/blast_campaigns?id=eq.{cid}",
+            json={"status": "active"},
+            headers=_headers()
+        )
+        if promote_resp.status_code in [200, 204]:
+            log.info("Auto-promoted campaign initiated -> active", extra={"campaign_id": cid})
+            campaign["status"] = "active"
+        else:
+            log.warning("Failed to promote campaign",
+                        extra={"campaign_id": cid, "status": promote_resp.status_code})
+            return False
+
+    return True
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # run_day1_blast
 # ─────────────────────────────────────────────────────────────────────────────
-def run_day1_blast(campaign_id: str) -> dict:
+def run_day1_blast(campaign_id: str, max_batch: int = DAILY_EMAIL_LIMIT) -> dict:
+    """
+    First Wave 1 batch, sent inline by /api/blast/send and the payment webhook.
+    Capped at max_batch so the caller is not held for a full planner allotment
+    (up to MAX_DAILY_PER_CAMPAIGN sends with the plan's per-email delay); the
+    rest of the wave goes out in the dispatcher's daily batches.
+    """
     supabase_url = _get_supabase_url()
 
     resp = requests.get(
@@ -416,12 +519,11 @@ def run_day1_blast(campaign_id: str) -> dict:
     if _already_sent_today(campaign, drip_day=1):
         return {"success": True, "skipped": True, "reason": "daily_quota_used"}
 
-    total_days = (plan_limit + DAILY_EMAIL_LIMIT - 1) // DAILY_EMAIL_LIMIT
-    print(f"[Drip] Wave 1 blast -- campaign={campaign_id} plan={plan_name} "
-          f"sending_today={DAILY_EMAIL_LIMIT} total_wave_days={total_days}")
+    log.info("Wave 1 blast", extra={"campaign_id": campaign_id, "plan": plan_name,
+                                    "remaining": plan_limit - already_sent})
 
-    stats = _send_drip_wave(campaign, drip_day=1)
-    _update_campaign_after_wave(campaign_id, drip_day=1, stats=stats)
+    stats = _send_drip_wave(campaign, drip_day=1, max_batch=max_batch)
+    _update_campaign_after_wave(campaign_id, drip_day=1, stats=stats, campaign=campaign)
 
     return {"success": True, "stats": stats}
 
@@ -429,17 +531,14 @@ def run_day1_blast(campaign_id: str) -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # run_scheduler_tick
 # ─────────────────────────────────────────────────────────────────────────────
+@time_job("tick")
+@correlation()
+@profile_job("tick")
 def run_scheduler_tick():
     now_utc      = datetime.utcnow()
-    in_biz_hours = _is_business_hours()
     today_str    = _today_utc_str()
 
-    print(f"\n[Scheduler] {'='*55}")
-    print(f"[Scheduler] Tick at        : {now_utc.strftime('%Y-%m-%d %H:%M UTC')}")
-    print(f"[Scheduler] Today          : {today_str}")
-    print(f"[Scheduler] Business hours : {'YES' if in_biz_hours else 'NO'}")
-    print(f"[Scheduler] Daily limit    : {DAILY_EMAIL_LIMIT} emails/campaign/wave/day")
-    print(f"[Scheduler] {'='*55}")
+    log.info("Scheduler tick", extra={"today": today_str, "fallback_daily_limit": DAILY_EMAIL_LIMIT})
 
     supabase_url = _get_supabase_url()
 
@@ -469,125 +568,257 @@ def run_scheduler_tick():
         headers=_headers()
     )
     wave1_campaigns = resp_a.json() if resp_a.status_code == 200 else []
-    print(f"[Scheduler] Wave 1 campaigns found  : {len(wave1_campaigns)} "
-          f"(active + initiated)")
+    DRIP_CAMPAIGNS.labels(wave=1).set(len(wave1_campaigns))
+    log.info("Wave 1 campaigns found", extra={"wave": 1, "count": len(wave1_campaigns)})
 
     for campaign in wave1_campaigns:
-        cid        = campaign["id"]
-        already    = int(campaign.get("drip_day1_delivered") or 0)
-        plan       = campaign.get("plan_name", "starter")
-        plan_limit = _get_limit_for_plan(plan)
-        last_date  = campaign.get("drip_day1_last_date", "never")
-        camp_status = campaign.get("status", "unknown")
-
-        # ✅ GUARD: Skip junk campaigns with no candidate data.
-        # Prevents broken template emails (empty subject/fields) going to recruiters.
-        # These are abandoned checkouts or corrupted records where candidate_name
-        # was never set. This guard ensures they are never processed.
-        if not campaign.get("candidate_name") or not campaign.get("plan_name"):
-            print(f"[Scheduler] Skipping campaign {cid} -- "
-                  f"candidate_name or plan_name is NULL (junk/incomplete campaign)")
-            continue
+        cid = campaign["id"]
+
+        if not _prepare_campaign(campaign, drip_day=1):
+            continue  # Junk campaign, or promotion failed — retry next tick
 
-        # ✅ Auto-promote 'initiated' → 'active' before sending
-        # This permanently fixes campaigns stuck after payment
-        if camp_status == "initiated":
-            promote_resp = requests.patch(
-                f"{supabase_url}/rest/v1/blast_campaigns?id=eq.{cid}",
-                json={"status": "active"},
-                headers=_headers()
-            )
-            if promote_resp.status_code in [200, 204]:
-                print(f"[Scheduler] ✅ Auto-promoted campaign "
-                      f"initiated→active | campaign={cid}")
-                campaign["status"] = "active"
-            else:
-                print(f"[Scheduler] ⚠️ Failed to promote campaign "
-                      f"status: {promote_resp.status_code} | campaign={cid}")
-                continue  # Skip this campaign this tick, retry next tick
-
-        print(f"[Scheduler] --> Wave 1 | campaign={cid} | "
-              f"{already}/{plan_limit} sent | last_batch={last_date}")
         stats = _send_drip_wave(campaign, drip_day=1)
-        _update_campaign_after_wave(cid, drip_day=1, stats=stats)
+        _update_campaign_after_wave(cid, drip_day=1, stats=stats, campaign=campaign)
 
     # ─────────────────────────────────────────────────────────────────────────
-    # WAVE 2 — Business hours only. Weekends skipped via _is_business_hours().
+    # WAVE 2 — Business hours only, per campaign: _is_business_hours(now, campaign)
+    # uses the campaign's send_timezone, so there is no global gate here.
     #
     # ✅ FIX 1: Removed &day4_scheduled_for=lte.{now_iso} condition.
     # Wave 2 now triggers immediately on the next business-hours tick after
     # Wave 1 completes (drip_day1_sent_at is set). No fixed date delay.
     # ─────────────────────────────────────────────────────────────────────────
-    if in_biz_hours:
-        resp4 = requests.get(
-            f"{supabase_url}/rest/v1/blast_campaigns"
-            f"?status=eq.active"
-            f"&drip_day1_sent_at=not.is.null"
-            f"&drip_day2_sent_at=is.null",
-            headers=_headers()
-        )
-        wave2_campaigns = resp4.json() if resp4.status_code == 200 else []
-        print(f"[Scheduler] Wave 2 campaigns due    : {len(wave2_campaigns)}")
-
-        for campaign in wave2_campaigns:
-            cid        = campaign["id"]
-            already    = int(campaign.get("drip_day2_delivered") or 0)
-            plan       = campaign.get("plan_name", "starter")
-            plan_limit = _get_limit_for_plan(plan)
-            last_date  = campaign.get("drip_day2_last_date", "never")
-
-            # ✅ GUARD: Skip junk campaigns with no candidate data
-            if not campaign.get("candidate_name") or not campaign.get("plan_name"):
-                print(f"[Scheduler] Skipping Wave 2 campaign {cid} -- "
-                      f"candidate_name or plan_name is NULL (junk/incomplete campaign)")
-                continue
-
-            print(f"[Scheduler] --> Wave 2 | campaign={cid} | "
-                  f"{already}/{plan_limit} sent | last_batch={last_date}")
-            stats = _send_drip_wave(campaign, drip_day=4)
-            _update_campaign_after_wave(cid, drip_day=4, stats=stats)
-    else:
-        print("[Scheduler] Outside business hours -- Wave 2 skipped this tick")
+    resp4 = requests.get(
+        f"{supabase_url}/rest/v1/blast_campaigns"
+        f"?status=eq.active"
+        f"&drip_day1_sent_at=not.is.null"
+        f"&drip_day2_sent_at=is.null",
+        headers=_headers()
+    )
+    wave2_campaigns = resp4.json() if resp4.status_code == 200 else []
+    DRIP_CAMPAIGNS.labels(wave=2).set(len(wave2_campaigns))
+    log.info("Wave 2 campaigns due", extra={"wave": 2, "count": len(wave2_campaigns)})
+
+    for campaign in wave2_campaigns:
+        cid = campaign["id"]
+
+        if not _is_business_hours(now_utc, campaign):
+            continue  # Recruiter timezone not open yet
+
+        if not _prepare_campaign(campaign, drip_day=4):
+            continue
+
+        stats = _send_drip_wave(campaign, drip_day=4)
+        _update_campaign_after_wave(cid, drip_day=4, stats=stats, campaign=campaign)
 
     # ─────────────────────────────────────────────────────────────────────────
-    # WAVE 3 — Business hours only. Weekends skipped via _is_business_hours().
+    # WAVE 3 — Business hours only, checked per campaign like Wave 2.
     #
     # ✅ FIX 2: Removed &day8_scheduled_for=lte.{now_iso} condition.
     # Wave 3 now triggers immediately on the next business-hours tick after
     # Wave 2 completes (drip_day2_sent_at is set). No fixed date delay.
     # ─────────────────────────────────────────────────────────────────────────
-    if in_biz_hours:
-        resp8 = requests.get(
-            f"{supabase_url}/rest/v1/blast_campaigns"
-            f"?status=eq.active"
-            f"&drip_day2_sent_at=not.is.null"
-            f"&drip_day3_sent_at=is.null",
-            headers=_headers()
-        )
-        wave3_campaigns = resp8.json() if resp8.status_code == 200 else []
-        print(f"[Scheduler] Wave 3 campaigns due    : {len(wave3_campaigns)}")
-
-        for campaign in wave3_campaigns:
-            cid        = campaign["id"]
-            already    = int(campaign.get("drip_day3_delivered") or 0)
-            plan       = campaign.get("plan_name", "starter")
-            plan_limit = _get_limit_for_plan(plan)
-            last_date  = campaign.get("drip_day3_last_date", "never")
-
-            # ✅ GUARD: Skip junk campaigns with no candidate data
-            if not campaign.get("candidate_name") or not campaign.get("plan_name"):
-                print(f"[Scheduler] Skipping Wave 3 campaign {cid} -- "
-                      f"candidate_name or plan_name is NULL (junk/incomplete campaign)")
-                continue
-
-            print(f"[Scheduler] --> Wave 3 | campaign={cid} | "
-                  f"{already}/{plan_limit} sent | last_batch={last_date}")
-            stats = _send_drip_wave(campaign, drip_day=8)
-            _update_campaign_after_wave(cid, drip_day=8, stats=stats)
+    resp8 = requests.get(
+        f"{supabase_url}/rest/v1/blast_campaigns"
+        f"?status=eq.active"
+        f"&drip_day2_sent_at=not.is.null"
+        f"&drip_day3_sent_at=is.null",
+        headers=_headers()
+    )
+    wave3_campaigns = resp8.json() if resp8.status_code == 200 else []
+    DRIP_CAMPAIGNS.labels(wave=3).set(len(wave3_campaigns))
+    log.info("Wave 3 campaigns due", extra={"wave": 3, "count": len(wave3_campaigns)})
+
+    for campaign in wave3_campaigns:
+        cid = campaign["id"]
+
+        if not _is_business_hours(now_utc, campaign):
+            continue  # Recruiter timezone not open yet
+
+        if not _prepare_campaign(campaign, drip_day=8):
+            continue
+
+        stats = _send_drip_wave(campaign, drip_day=8)
+        _update_campaign_after_wave(cid, drip_day=8, stats=stats, campaign=campaign)
+
+    log.info("Scheduler tick complete")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Event-driven wave dispatch
+# ─────────────────────────────────────────────────────────────────────────────
+# Only the process that owns the drip scheduler (see app.py fcntl lock) starts
+# the dispatcher. In every other worker _wave_queue stays None and
+# schedule_campaign() is a no-op; the owner picks those campaigns up on its
+# next reconcile_wave_queue() run. Wave 1 is sent inline at campaign creation,
+# so the reconcile interval only delays follow-up batches, never the first one.
+_wave_queue = None
+
+WAVE_NUMBER = {1: 1, 4: 2, 8: 3}
+
+_OPEN_CAMPAIGNS_QUERY = (
+    "?status=in.(active,initiated)"
+    "&drip_day3_sent_at=is.null"
+)
+
+
+def _current_wave(campaign: dict):
+    """The wave (drip_day key) a campaign is currently working on, or None."""
+    if not campaign.get("drip_day1_sent_at"):
+        return 1
+    if not campaign.get("drip_day2_sent_at"):
+        return 4
+    if not campaign.get("drip_day3_sent_at"):
+        return 8
+    return None
+
+
+def _next_eligible_time(campaign: dict, now: datetime = None):
+    """When this campaign may next send, based on its stored progress."""
+    now  = now or datetime.utcnow()
+    wave = _current_wave(campaign)
+    if wave is None or campaign.get("status") not in ("active", "initiated"):
+        return None
+    # Waves 2 and 3 only ever run on active campaigns (matches the tick query)
+    if wave != 1 and campaign.get("status") != "active":
+        return None
+
+    last_date = campaign.get(WAVE_FIELDS[wave]["last_date"])
+    earliest  = now
+    if last_date and str(last_date)[:10] == now.strftime("%Y-%m-%d"):
+        earliest = _start_of_tomorrow_utc(now)
+
+    return earliest if wave == 1 else _next_business_window(earliest, campaign["id"], campaign)
+
+
+def _next_time_after_wave(campaign_id: str, drip_day: int, stats: dict, now: datetime = None,
+                          campaign: dict = None):
+    """
+    When the campaign should be dispatched again after a batch for drip_day.
+    `campaign` (the row) supplies send_timezone for the wave 2/3 window.
+    """
+    now = now or datetime.utcnow()
+
+    if stats.get("wave_complete"):
+        if drip_day == 8:
+            return None                                  # Campaign finished
+        return _next_business_window(now, campaign_id, campaign)   # Next wave starts ASAP
+
+    if stats.get("sent", 0) > 0 or stats.get("quota_exceeded"):
+        earliest = _start_of_tomorrow_utc(now)           # Daily quota used
     else:
-        print("[Scheduler] Outside business hours -- Wave 3 skipped this tick")
+        earliest = now + timedelta(minutes=DRIP_WAVE_RETRY_MINUTES)  # Send failed, retry
+
+    return earliest if drip_day == 1 else _next_business_window(earliest, campaign_id, campaign)
+
+
+def schedule_campaign(campaign_id: str, due_at) -> None:
+    """Queue (or re-queue) a campaign for dispatch. No-op outside the scheduler process."""
+    if _wave_queue is None or not campaign_id:
+        return
+    if due_at is None:
+        _wave_queue.cancel(campaign_id)
+        return
+    _wave_queue.schedule(campaign_id, due_at)
+    log.info("Campaign scheduled", extra={"campaign_id": campaign_id,
+                                          "due_at": due_at.strftime("%Y-%m-%d %H:%M UTC")})
+
+
+@time_job("dispatch")
+@correlation()
+@profile_job("dispatch")
+def _dispatch_campaign(campaign_id: str) -> None:
+    """WaveQueue handler: send whichever wave the campaign is due for."""
+    resp = requests.get(
+        f"{_get_supabase_url()}/rest/v1/blast_campaigns?id=eq.{campaign_id}",
+        headers=_headers()
+    )
+    if resp.status_code != 200:
+        log.warning("Failed to load campaign -- retrying later",
+                    extra={"campaign_id": campaign_id, "status": resp.status_code})
+        schedule_campaign(campaign_id,
+                          datetime.utcnow() + timedelta(minutes=DRIP_WAVE_RETRY_MINUTES))
+        return
+    if not resp.json():
+        return
+
+    campaign = resp.json()[0]
+    drip_day = _current_wave(campaign)
+
+    # Progress may have moved on since this entry was queued (another path sent it)
+    due_at = _next_eligible_time(campaign)
+    if drip_day is None or due_at is None:
+        return
+    if due_at > datetime.utcnow():
+        schedule_campaign(campaign_id, due_at)
+        return
+
+    if not _prepare_campaign(campaign, drip_day):
+        schedule_campaign(campaign_id,
+                          datetime.utcnow() + timedelta(minutes=DRIP_WAVE_RETRY_MINUTES))
+        return
+
+    log.info("Dispatching wave", extra={"campaign_id": campaign_id, "wave": WAVE_NUMBER[drip_day]})
+    stats = _send_drip_wave(campaign, drip_day=drip_day)
+    _update_campaign_after_wave(campaign_id, drip_day=drip_day, stats=stats, campaign=campaign)
+
+    if stats.get("quota_exceeded"):
+        # _update_campaign_after_wave does not touch quota-skipped batches
+        schedule_campaign(campaign_id, _next_time_after_wave(campaign_id, drip_day, stats, campaign=campaign))
+
+
+@time_job("reconcile")
+@correlation()
+@profile_job("reconcile")
+def reconcile_wave_queue() -> int:
+    """
+    Load every open campaign from blast_campaigns and (re)queue it at its next
+    eligible time. Runs at dispatcher start and every DRIP_RECONCILE_MINUTES.
+    """
+    if _wave_queue is None:
+        return 0
+
+    resp = requests.get(
+        f"{_get_supabase_url()}/rest/v1/blast_campaigns{_OPEN_CAMPAIGNS_QUERY}",
+        headers=_headers()
+    )
+    if resp.status_code != 200:
+        log.error("Reconcile failed", extra={"status": resp.status_code, "body": resp.text[:200]})
+        return 0
+
+    queued   = 0
+    now      = datetime.utcnow()
+    per_wave = {1: 0, 4: 0, 8: 0}
+    for campaign in resp.json():
+        if _current_wave(campaign) in per_wave:
+            per_wave[_current_wave(campaign)] += 1
+        due_at = _next_eligible_time(campaign, now)
+        if due_at is None:
+            continue
+        # Keep an earlier in-memory time (e.g. a retry) rather than pushing it back
+        current = _wave_queue.next_due(campaign["id"])
+        if current is None or due_at < current:
+            _wave_queue.schedule(campaign["id"], due_at)
+        queued += 1
+
+    for drip_day, count in per_wave.items():
+        DRIP_CAMPAIGNS.labels(wave=WAVE_NUMBER[drip_day]).set(count)
+
+    log.info("Reconciled open campaigns", extra={"campaigns": queued, "queued": len(_wave_queue)})
+    return queued
+
+
+def start_wave_dispatcher():
+    """Start the dispatcher thread and seed it from the database."""
+    global _wave_queue
+    if _wave_queue is None:
+        from services.wave_queue import WaveQueue
+        _wave_queue = WaveQueue(handler=_dispatch_campaign, name="DripWaveDispatcher")
+    _wave_queue.start()
+    # Seed off the import path so app start-up is not blocked on Supabase
+    threading.Thread(target=reconcile_wave_queue, name="DripWaveSeed", daemon=True).start()
+    return _wave_queue
 
-    if not in_biz_hours:
-        print("[Scheduler] Wave 2 & Wave 3 resume at next business hours window")
 
-    print(f"[Scheduler] Tick complete\n")
\ No newline at end of file
+def get_wave_queue():
+    return _wave_queue
@@ -1,11 +1,14 @@
 # backend/services/freemium_email_service.py
 # DATABASE-DRIVEN VERSION - Fetches recruiters from freemium_recruiters table
 import os
-import resend
 import requests
 import base64
 import time
 from datetime import datetime
+from services.mail_transport import get_transport
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
 
 class FreemiumEmailService:
     """
@@ -15,14 +18,15 @@ class FreemiumEmailService:
     """
     
     def __init__(self):
-        """Initialize Resend API with API key from environment"""
+        """Initialize the mail transport (Resend unless MAIL_TRANSPORT overrides it)"""
+        # Resend by default; MAIL_TRANSPORT can swap it (e.g. local load tests)
+        self.transport = get_transport('resend')
+
+        # The key is only needed when the mail actually goes through Resend
         self.api_key = os.getenv('RESEND_API_KEY')
-        if not self.api_key:
+        if self.transport.name == 'resend' and not self.api_key:
             raise ValueError("❌ RESEND_API_KEY not found in environment variables")
         
-        # Set the Resend API key
-        resend.api_key = self.api_key
-        
         # Sender details
         self.sender_email = os.getenv('RESEND_SENDER_EMAIL', 'noreply@resumeblast.ai')
         self.sender_name = os.getenv('RESEND_SENDER_NAME', 'ResumeBlast.ai')
@@ -34,9 +38,7 @@ class FreemiumEmailService:
         if not self.supabase_url or not self.supabase_key:
             raise ValueError("❌ Supabase configuration missing for FreemiumEmailService")
         
-        print("✅ FreemiumEmailService initialized with Resend.com (Database-Driven)")
-        print(f"📧 Sender: {self.sender_name} <{self.sender_email}>")
-        print(f"💾 Database: Connected to Supabase")
+        log.info(f"FreemiumEmailService initialized: {self.sender_name} <{self.sender_email}>")
     
     def _get_db_headers(self):
         """Get Supabase headers for API requests"""
@@ -52,7 +54,7 @@ class FreemiumEmailService:
         Returns: (base64_content, filename)
         """
         try:
-            print(f"📥 Downloading resume from: {resume_url}")
+            log.info(f"Downloading resume from: {resume_url}")
             
             response = requests.get(resume_url, timeout=30)
             response.raise_for_status()
@@ -65,11 +67,11 @@ class FreemiumEmailService:
             # Convert to base64
             base64_content = base64.b64encode(response.content).decode('utf-8')
             
-            print(f"✅ Resume downloaded: {filename} ({len(base64_content)} bytes base64)")
+            log.info(f"Resume downloaded: {filename} ({len(base64_content)} bytes base64)")
             return base64_content, filename
             
         except Exception as e:
-            print(f"❌ Error downloading resume: {str(e)}")
+            log.error(f"Error downloading resume: {str(e)}")
             raise Exception(f"Failed to download resume: {str(e)}")
     
     def fetch_freemium_recruiters(self):
@@ -79,7 +81,7 @@ class FreemiumEmailService:
         Returns list of recruiter dictionaries
         """
         try:
-            print("\n📊 Fetching ACTIVE freemium recruiters from 'freemium_recruiters' table...")
+            log.info("Fetching ACTIVE freemium recruiters from 'freemium_recruiters' table...")
             
             url = f"{self.supabase_url}/rest/v1/freemium_recruiters"
             params = {
@@ -95,11 +97,8 @@ class FreemiumEmailService:
                 recruiters = response.json()
                 
                 if not recruiters or len(recruiters) == 0:
-                    print("⚠️ WARNING: No active freemium recruiters found in database!")
-                    print("   Possible reasons:")
-                    print("   1. No recruiters in 'freemium_recruiters' table")
-                    print("   2. All recruiters have bounced emails (email_status != 'active')")
-                    print("   3. All recruiters marked as is_active=false")
+                    log.warning("No active freemium recruiters found in database "
+                                "(table empty, all bounced, or all is_active=false)")
                     
                     # Check for bounced recruiters
                     url_check = f"{self.supabase_url}/rest/v1/freemium_recruiters"
@@ -114,11 +113,11 @@ class FreemiumEmailService:
                         if all_recruiters:
                             bounced_count = sum(1 for r in all_recruiters if r.get('email_status') != 'active')
                             if bounced_count > 0:
-                                print(f"   📊 Found {bounced_count} bounced/blocked recruiters out of {len(all_recruiters)} total")
+                                log.info(f"Found {bounced_count} bounced/blocked recruiters out of {len(all_recruiters)} total")
                     
                     return []
                 
-                print(f"✅ Fetched {len(recruiters)} active recruiters (bounced emails filtered out)")
+                log.info(f"Fetched {len(recruiters)} active recruiters (bounced emails filtered out)")
                 
                 # ✅ ADDED: Log any bounced recruiters for visibility
                 url_bounced = f"{self.supabase_url}/rest/v1/freemium_recruiters"
@@ -132,22 +131,16 @@ class FreemiumEmailService:
                 if response_bounced.status_code == 200:
                     bounced = response_bounced.json()
                     if bounced and len(bounced) > 0:
-                        print(f"⚠️ Found {len(bounced)} bounced/blocked recruiters (excluded from blast):")
-                        for rec in bounced[:5]:  # Show first 5
-                            print(f"   - {rec.get('email')}: {rec.get('email_status')} - {rec.get('bounce_reason', 'N/A')[:50]}")
-                        if len(bounced) > 5:
-                            print(f"   ... and {len(bounced) - 5} more")
+                        log.warning(f"Excluded {len(bounced)} bounced/blocked recruiters from blast",
+                                    extra={"sample": [rec.get('email') for rec in bounced[:5]]})
                 
                 return recruiters
             else:
-                print(f"❌ Failed to fetch recruiters: HTTP {response.status_code}")
-                print(f"   Response: {response.text}")
+                log.error(f"Failed to fetch recruiters: HTTP {response.status_code} {response.text}")
                 return []
                 
         except Exception as e:
-            print(f"❌ Error fetching freemium recruiters from database: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            log.exception(f"Error fetching freemium recruiters from database: {str(e)}")
             return []
     
     def _generate_email_template(self, candidate_data, recruiter_data):
@@ -228,7 +221,7 @@ class FreemiumEmailService:
             recruiter_email = recruiter_data['email']
             recruiter_name = recruiter_data.get('name', 'Recruiter')
             
-            print(f"\n📧 Preparing email to: {recruiter_email}")
+            log.debug(f"Preparing email to: {recruiter_email}")
             
             # Download and encode the resume file
             base64_content, filename = self._download_resume(resume_url)
@@ -236,38 +229,36 @@ class FreemiumEmailService:
             # Generate email content
             html_content = self._generate_email_template(candidate_data, recruiter_data)
             
-            # Prepare email with attachment
-            email_params = {
-                "from": f"{self.sender_name} <{self.sender_email}>",
-                "to": [recruiter_email],
+            # Prepare email with attachment (transport payload format)
+            email_payload = {
+                "sender": {"name": self.sender_name, "email": self.sender_email},
+                "to": [{"email": recruiter_email}],
                 "subject": f"Resume Submission - {candidate_data.get('candidate_name', 'Candidate')} | {candidate_data.get('job_role', 'Professional')}",
-                "html": html_content,
-                "attachments": [
+                "htmlContent": html_content,
+                "attachment": [
                     {
-                        "filename": filename,
+                        "name": filename,
                         "content": base64_content
                     }
                 ]
             }
             
-            print(f"📤 Sending via Resend API with attachment: {filename}...")
-            
             # Send email via Resend
-            response = resend.Emails.send(email_params)
+            response = self.transport.send(email_payload)
+            if not response['success']:
+                raise Exception(response['error'])
             
-            print(f"✅ Email sent successfully!")
-            print(f"   Recipient: {recruiter_name} ({recruiter_email})")
-            print(f"   Message ID: {response['id']}")
+            log.debug("Freemium email sent", extra={"to": recruiter_email, "message_id": response['message_id']})
             
             return {
                 'success': True,
                 'email': recruiter_email,
                 'name': recruiter_name,
-                'message_id': response['id']
+                'message_id': response['message_id']
             }
             
         except Exception as e:
-            print(f"❌ Failed to send to {recruiter_email}: {str(e)}")
+            log.error(f"Failed to send to {recruiter_email}: {str(e)}")
             return {
                 'success': False,
                 'email': recruiter_email,
@@ -280,9 +271,7 @@ class FreemiumEmailService:
         ✅ UPDATED: Now automatically excludes bounced/blocked recruiters
         """
         try:
-            print("\n" + "="*70)
-            print("🎁 FREEMIUM BLAST STARTED (Database-Driven - Resend.com)")
-            print("="*70)
+            log.info("Freemium blast started")
             
             if not resume_url:
                 raise ValueError("Resume URL is required for the attachment")
@@ -314,8 +303,7 @@ class FreemiumEmailService:
                 else: 
                     results['failed'] += 1
             
-            print(f"\n✅ FREEMIUM BLAST COMPLETE: {results['successful']}/{results['total']} sent")
-            print("="*70)
+            log.info(f"FREEMIUM BLAST COMPLETE: {results['successful']}/{results['total']} sent")
             
             return {
                 'success': True,
@@ -324,25 +312,25 @@ class FreemiumEmailService:
             }
             
         except Exception as e:
-            print(f"\n❌ FREEMIUM BLAST ERROR: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            log.exception(f"FREEMIUM BLAST ERROR: {str(e)}")
             return {'success': False, 'error': str(e)}
 
     def test_connection(self):
         """Test Resend API connection and database access"""
         try:
             recruiters = self.fetch_freemium_recruiters()
-            response = resend.Emails.send({
-                "from": f"{self.sender_name} <{self.sender_email}>",
-                "to": ["test@resend.dev"],
+            response = self.transport.send({
+                "sender": {"name": self.sender_name, "email": self.sender_email},
+                "to": [{"email": "test@resend.dev"}],
                 "subject": "Test Connection - ResumeBlast.ai",
-                "html": "<p>This is a test email</p>"
+                "htmlContent": "<p>This is a test email</p>"
             })
+            if not response['success']:
+                raise Exception(response['error'])
             return {
                 'success': True, 
                 'database_recruiters': len(recruiters), 
-                'resend_message_id': response['id']
+                'resend_message_id': response['message_id']
             }
         except Exception as e:
             return {'success': False, 'error': str(e)}
\ No newline at end of file
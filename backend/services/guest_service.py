@@ -1,8 +1,29 @@
 # backend/services/guest_service.py
 import os
+import threading
+import time
 import requests
 from datetime import datetime
 from urllib.parse import quote
+from services.batch_writer import BatchWriter
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+# Per-process cache of each guest's newest guest_users row (id, created_at,
+# metadata, visit_count), written through on insert/patch. Another worker's
+# init_session can add a newer row at any time, so the cached row only keys
+# a PATCH while it was read from (or inserted into) Supabase less than
+# GUEST_SESSION_RECHECK_SECONDS ago; the first write after that looks the
+# newest row up again. This keeps the burst of writes one request makes to a
+# single lookup without patching a superseded row. save_payment and
+# init_session's visit_count read always look it up (fresh=True).
+GUEST_SESSION_CACHE_TTL       = float(os.getenv("GUEST_SESSION_CACHE_TTL", "300"))
+GUEST_SESSION_CACHE_SIZE      = int(os.getenv("GUEST_SESSION_CACHE_SIZE", "10000"))
+GUEST_SESSION_RECHECK_SECONDS = float(os.getenv("GUEST_SESSION_RECHECK_SECONDS", "5"))
+
+# Append-only activity log (sql/guest_activity_events.sql), batched per process
+guest_events = BatchWriter("guest_activity_events")
 
 
 class GuestService:
@@ -12,8 +33,14 @@ class GuestService:
     REMOVED COLUMNS (dropped from DB, no longer written):
         file_size, extracted_text, blast_status, blast_completed_at,
         location, blast_plan, analysis_data, activity_log, resume_history
+
+    Activity events go to the guest_activity_events table through a
+    BatchWriter, not into the guest_users row.
     """
 
+    _rows      = {}                 # guest_id -> (expires_at, checked_at, newest session row)
+    _rows_lock = threading.Lock()
+
     @staticmethod
     def _headers():
         key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
@@ -36,29 +63,59 @@ class GuestService:
     # PRIVATE HELPERS
     # ─────────────────────────────────────────────────────────────────────
 
+    @staticmethod
+    def _cache_get(guest_id: str, max_age: float = None):
+        """
+        Cached newest session row, or None (missing / expired). With max_age,
+        also None when the row was last checked against Supabase longer ago.
+        """
+        now = time.time()
+        with GuestService._rows_lock:
+            hit = GuestService._rows.get(guest_id)
+            if hit and hit[0] > now:
+                if max_age is None or now - hit[1] <= max_age:
+                    return hit[2]
+                return None
+            GuestService._rows.pop(guest_id, None)
+            return None
+
+    @staticmethod
+    def _cache_put(guest_id: str, row: dict, checked: bool = True) -> None:
+        """checked=False (write-through) keeps the entry's last Supabase check time."""
+        now = time.time()
+        with GuestService._rows_lock:
+            rows = GuestService._rows
+            if len(rows) >= GUEST_SESSION_CACHE_SIZE and guest_id not in rows:
+                expired = [gid for gid, (exp, _, _) in rows.items() if exp <= now]
+                # Nothing expired: drop the oldest tenth (dicts keep insertion order)
+                for gid in expired or list(rows)[:len(rows) // 10 or 1]:
+                    del rows[gid]
+            checked_at = now if checked else rows.get(guest_id, (0, 0, None))[1]
+            rows[guest_id] = (now + GUEST_SESSION_CACHE_TTL, checked_at, dict(row))
+
+    @staticmethod
+    def _cache_drop(guest_id: str) -> None:
+        with GuestService._rows_lock:
+            GuestService._rows.pop(guest_id, None)
+
     @staticmethod
     def _exists(guest_id: str) -> bool:
-        try:
-            url = f"{GuestService._base_url()}?id=eq.{guest_id}&select=id"
-            resp = requests.get(url, headers=GuestService._headers(), timeout=10)
-            exists = resp.status_code == 200 and len(resp.json()) > 0
-            print(f"[GuestService] _exists({guest_id}): {exists}")
-            return exists
-        except Exception as e:
-            print(f"[GuestService] _exists ERROR: {e}")
-            return False
+        _, row = GuestService._get_latest_row(guest_id)
+        exists = row is not None
+        log.debug(f"_exists({guest_id}): {exists}")
+        return exists
 
     @staticmethod
     def _update_ip(guest_id: str, ip_address: str) -> None:
         try:
             GuestService._patch_latest(guest_id, {'ip_address': ip_address})
         except Exception as e:
-            print(f"[GuestService] _update_ip ERROR: {e}")
+            log.warning(f"_update_ip ERROR: {e}")
 
     @staticmethod
     def _insert(guest_id: str, fields: dict) -> bool:
         """
-        Insert a new row.
+        Insert a new row (the guest's newest session) and cache it.
         ✅ ONLY uses columns confirmed to exist in guest_users table.
         ✅ Does NOT include activity_log or resume_history (not in DB schema).
         """
@@ -74,7 +131,7 @@ class GuestService:
                 'metadata':       {},
                 **fields
             }
-            print(f"[GuestService] _insert attempting for {guest_id} with keys: {list(data.keys())}")
+            log.debug(f"_insert attempting for {guest_id} with keys: {list(data.keys())}")
             resp = requests.post(
                 GuestService._base_url(),
                 json=data,
@@ -83,12 +140,18 @@ class GuestService:
             )
             success = resp.status_code in [200, 201]
             if success:
-                print(f"[GuestService] _insert SUCCESS for {guest_id}")
+                created = resp.json() if resp.text else None
+                if created:
+                    # The stored created_at (as the DB formats it) is the patch key
+                    GuestService._cache_put(guest_id, created[0] if isinstance(created, list) else created)
+                else:
+                    GuestService._cache_drop(guest_id)
+                log.debug(f"_insert SUCCESS for {guest_id}")
             else:
-                print(f"[GuestService] _insert FAILED: {resp.status_code} — {resp.text}")
+                log.warning(f"_insert FAILED: {resp.status_code} — {resp.text}")
             return success
         except Exception as e:
-            print(f"[GuestService] _insert ERROR: {e}")
+            log.warning(f"_insert ERROR: {e}")
             return False
 
     @staticmethod
@@ -97,52 +160,62 @@ class GuestService:
         ✅ KEY FIX: Guarantees a guest row exists before any patch/read.
         Called before every _patch_latest to prevent 500 errors when
         /resume or /analysis fires before /init has completed.
+        A cached row answers without a request; otherwise the lookup also
+        fills the cache for the _get_latest_row call that follows.
         """
-        if GuestService._exists(guest_id):
+        _, row = GuestService._get_latest_row(guest_id)
+        if row:
             return True
-        print(f"[GuestService] ⚠️ No row for {guest_id} — auto-creating now")
+        log.warning(f"No row for {guest_id} — auto-creating now")
         return GuestService._insert(guest_id, {'visit_count': 1})
 
     @staticmethod
-    def _get_latest_row(guest_id: str):
+    def _get_latest_row(guest_id: str, fresh: bool = False, max_age: float = None):
         """
         Returns (url_encoded_created_at, row) for the newest session row.
+        Served from the per-process cache when possible (checked against
+        Supabase at most max_age seconds ago, if given); fresh=True always
+        asks Supabase (and refreshes the cache).
         """
-        try:
-            url = (
-                f"{GuestService._base_url()}"
-                f"?id=eq.{guest_id}"
-                f"&order=created_at.desc"
-                f"&limit=1"
-                f"&select=id,created_at,metadata"
-            )
-            resp = requests.get(url, headers=GuestService._headers(), timeout=10)
-            if resp.status_code == 200 and resp.json():
-                row = resp.json()[0]
-                raw_ts = row.get('created_at', '')
-                encoded_ts = quote(raw_ts, safe='')
-                return encoded_ts, row
-            print(f"[GuestService] _get_latest_row: No rows found for {guest_id}")
-            return None, None
-        except Exception as e:
-            print(f"[GuestService] _get_latest_row ERROR: {e}")
-            return None, None
+        row = None if fresh else GuestService._cache_get(guest_id, max_age)
+        if row is None:
+            try:
+                url = (
+                    f"{GuestService._base_url()}"
+                    f"?id=eq.{guest_id}"
+                    f"&order=created_at.desc"
+                    f"&limit=1"
+                    f"&select=id,created_at,metadata,visit_count"
+                )
+                resp = requests.get(url, headers=GuestService._headers(), timeout=10)
+                if resp.status_code == 200 and resp.json():
+                    row = resp.json()[0]
+                    GuestService._cache_put(guest_id, row)
+                else:
+                    log.debug(f"_get_latest_row: No rows found for {guest_id}")
+                    return None, None
+            except Exception as e:
+                log.warning(f"_get_latest_row ERROR: {e}")
+                return None, None
+        raw_ts = row.get('created_at', '')
+        encoded_ts = quote(raw_ts, safe='')
+        return encoded_ts, row
 
     @staticmethod
-    def _patch_latest(guest_id: str, fields: dict) -> bool:
+    def _patch_latest(guest_id: str, fields: dict, fresh: bool = False) -> bool:
         """
         ✅ FIXED: Calls _ensure_row_exists first so the row always exists.
-        Patches ONLY the newest row using url-encoded created_at filter.
+        Patches ONLY the newest row using url-encoded created_at filter, and
+        writes the change through to the cached row. fresh=True drops the
+        cached row first, so the newest row is looked up in Supabase.
         """
         try:
+            if fresh:
+                GuestService._cache_drop(guest_id)
+
             # ✅ Auto-create row if missing — prevents all "No row found" 500 errors
             if not GuestService._ensure_row_exists(guest_id):
-                print(f"[GuestService] _patch_latest: Could not ensure row for {guest_id}")
-                return False
-
-            encoded_ts, _ = GuestService._get_latest_row(guest_id)
-            if not encoded_ts:
-                print(f"[GuestService] _patch_latest: Still no row after ensure for {guest_id}")
+                log.warning(f"_patch_latest: Could not ensure row for {guest_id}")
                 return False
 
             data = {
@@ -150,28 +223,45 @@ class GuestService:
                 **fields
             }
 
-            patch_url = (
-                f"{GuestService._base_url()}"
-                f"?id=eq.{guest_id}"
-                f"&created_at=eq.{encoded_ts}"
-            )
-
-            print(f"[GuestService] _patch_latest patching {guest_id} with keys: {list(fields.keys())}")
-            patch_resp = requests.patch(
-                patch_url,
-                json=data,
-                headers=GuestService._headers(),
-                timeout=10
-            )
-            success = patch_resp.status_code in [200, 204]
-            if success:
-                print(f"[GuestService] _patch_latest SUCCESS for {guest_id}")
-            else:
-                print(f"[GuestService] _patch_latest FAILED: {patch_resp.status_code} — {patch_resp.text}")
-            return success
+            # A cached row that was deleted meanwhile matches nothing: drop
+            # the entry and retry once against a fresh lookup
+            for attempt in range(2):
+                encoded_ts, row = GuestService._get_latest_row(
+                    guest_id, max_age=GUEST_SESSION_RECHECK_SECONDS)
+                if not encoded_ts:
+                    log.info(f"_patch_latest: Still no row after ensure for {guest_id}")
+                    return False
+
+                patch_url = (
+                    f"{GuestService._base_url()}"
+                    f"?id=eq.{guest_id}"
+                    f"&created_at=eq.{encoded_ts}"
+                    f"&select=id"
+                )
+
+                log.debug(f"_patch_latest patching {guest_id} with keys: {list(fields.keys())}")
+                patch_resp = requests.patch(
+                    patch_url,
+                    json=data,
+                    headers=GuestService._headers(),
+                    timeout=10
+                )
+                if patch_resp.status_code not in [200, 204]:
+                    log.warning(f"_patch_latest FAILED: {patch_resp.status_code} — {patch_resp.text}")
+                    GuestService._cache_drop(guest_id)
+                    return False
+                if patch_resp.status_code == 204 or patch_resp.json():
+                    GuestService._cache_put(guest_id, {**row, **data}, checked=False)
+                    log.debug(f"_patch_latest SUCCESS for {guest_id}")
+                    return True
+                GuestService._cache_drop(guest_id)
+                if attempt == 0 and not GuestService._ensure_row_exists(guest_id):
+                    return False
+            log.warning(f"_patch_latest: newest row for {guest_id} vanished twice")
+            return False
 
         except Exception as e:
-            print(f"[GuestService] _patch_latest ERROR: {e}")
+            log.warning(f"_patch_latest ERROR: {e}")
             return False
 
     # ─────────────────────────────────────────────────────────────────────
@@ -181,46 +271,48 @@ class GuestService:
     @staticmethod
     def log_activity(guest_id: str, event_type: str, metadata: dict = None) -> dict:
         """
-        ✅ FIXED: Ensures row exists before logging.
-        Stores activity events inside the metadata JSONB column
-        since activity_log column does not exist in the DB schema.
+        ✅ FIXED: Ensures row exists before logging (once per process per guest).
+        Appends the event to guest_activity_events through the batch writer
+        instead of rewriting metadata.activity_log on the session row.
         """
         try:
             # Ensure row exists first
-            GuestService._ensure_row_exists(guest_id)
-
-            encoded_ts, row = GuestService._get_latest_row(guest_id)
-            if not row:
+            if not GuestService._ensure_row_exists(guest_id):
                 return {'success': False, 'error': 'Guest session not found after ensure'}
 
-            # ✅ Store activity inside metadata.activity_log (avoids missing column)
-            current_metadata = row.get('metadata') or {}
-            activity_log = current_metadata.get('activity_log') or []
-            activity_log.append({
-                'event':     event_type,
-                'timestamp': datetime.utcnow().isoformat() + 'Z',
-                'data':      metadata or {}
+            queued = guest_events.add({
+                'guest_id':    guest_id,
+                'event_type':  event_type,
+                'data':        metadata or {},
+                'occurred_at': datetime.utcnow().isoformat() + 'Z',
             })
-            current_metadata['activity_log'] = activity_log
-
-            success = GuestService._patch_latest(guest_id, {'metadata': current_metadata})
-            return {'success': success}
+            if not queued:
+                log.warning(f"log_activity dropped (buffer full) for {guest_id}")
+                return {'success': False, 'dropped': True, 'error': 'Activity buffer full'}
+            return {'success': True, 'queued': True}
         except Exception as e:
-            print(f"[GuestService] log_activity ERROR: {e}")
+            log.warning(f"log_activity ERROR: {e}")
             return {'success': False, 'error': str(e)}
 
     @staticmethod
     def init_session(guest_id: str, ip_address: str = None) -> dict:
-        print(f"\n[GuestService] ═══ SESSION INIT (NEW ROW): {guest_id} ═══")
+        log.info(f"Session init (new row): {guest_id}")
 
+        # Incremental: newest row's visit_count + 1 (one limit=1 lookup; not
+        # the cache, another worker may have added a session since). Only
+        # rows from before visit_count was kept are counted.
         visit_count = 1
         try:
-            url = f"{GuestService._base_url()}?id=eq.{guest_id}&select=id"
-            count_resp = requests.get(url, headers=GuestService._headers(), timeout=10)
-            if count_resp.status_code == 200:
-                visit_count = len(count_resp.json()) + 1
+            _, latest = GuestService._get_latest_row(guest_id, fresh=True)
+            if latest and latest.get('visit_count'):
+                visit_count = int(latest['visit_count']) + 1
+            elif latest:
+                url = f"{GuestService._base_url()}?id=eq.{guest_id}&select=id"
+                count_resp = requests.get(url, headers=GuestService._headers(), timeout=10)
+                if count_resp.status_code == 200:
+                    visit_count = len(count_resp.json()) + 1
         except Exception as e:
-            print(f"[GuestService] visit_count check ERROR: {e}")
+            log.warning(f"visit_count check ERROR: {e}")
 
         success = GuestService._insert(guest_id, {
             'ip_address':  ip_address,
@@ -231,19 +323,19 @@ class GuestService:
 
     @staticmethod
     def save_payment(guest_id: str, plan_name: str, stripe_session_id: str, amount: int) -> dict:
-        print(f"[GuestService] 💳 Saving Payment: {plan_name}")
+        log.info(f"Saving Payment: {plan_name}")
         fields = {
             'plan_name':         plan_name,
             'payment_status':    'completed',
             'stripe_session_id': stripe_session_id,
             'amount_paid':       amount
         }
-        success = GuestService._patch_latest(guest_id, fields)
+        success = GuestService._patch_latest(guest_id, fields, fresh=True)
         return {'success': success}
 
     @staticmethod
     def save_resume(guest_id: str, resume_data: dict) -> dict:
-        print(f"[GuestService] 📄 Saving Resume: {resume_data.get('file_name', 'unknown')}")
+        log.info(f"Saving Resume: {resume_data.get('file_name', 'unknown')}")
         fields = {
             'file_name':     resume_data.get('file_name'),
             'file_url':      resume_data.get('file_url'),
@@ -261,7 +353,7 @@ class GuestService:
 
     @staticmethod
     def save_analysis(guest_id: str, analysis_data: dict) -> dict:
-        print(f"[GuestService] 🤖 Saving Analysis | ATS: {analysis_data.get('ats_score', 0)}")
+        log.info(f"Saving Analysis | ATS: {analysis_data.get('ats_score', 0)}")
         fields = {
             'resume_status': 'analyzed',
             'metadata': {
@@ -287,7 +379,7 @@ class GuestService:
 
     @staticmethod
     def save_blast_initiated(guest_id: str, blast_data: dict) -> dict:
-        print(f"[GuestService] 🚀 Saving Blast Start")
+        log.info(f"Saving Blast Start")
         fields = {
             'blast_industry':         blast_data.get('industry', 'Not Specified'),
             'blast_recipients_count': blast_data.get('recipients_count', 0),
@@ -298,7 +390,7 @@ class GuestService:
 
     @staticmethod
     def save_blast_completed(guest_id: str, results: dict) -> dict:
-        print(f"[GuestService] ✅ Saving Blast Complete")
+        log.info(f"Saving Blast Complete")
         fields = {
             'blast_results': results,
             'metadata': {
@@ -317,5 +409,5 @@ class GuestService:
             resp = requests.get(url, headers=GuestService._headers(), timeout=10)
             return resp.json()[0] if resp.status_code == 200 and resp.json() else None
         except Exception as e:
-            print(f"[GuestService] get ERROR: {e}")
+            log.warning(f"get ERROR: {e}")
             return None
\ No newline at end of file
@@ -0,0 +1,223 @@
+# backend/services/idempotency.py
+"""
+Local idempotency-key store.
+
+Keys ("stripe-event:<id>", "blast:session:<cs_...>", "blast:user:<id>") map
+to the JSON result of the first successful execution, kept for a TTL:
+
+  * an in-memory LRU answers repeats without any I/O;
+  * a SQLite file (WAL) shares keys between Gunicorn workers and survives
+    restarts;
+  * run_once() collapses concurrent calls for the same key into one
+    execution. Callers in the same process wait on the running call, and
+    other processes see an 'in_flight' row (leased, so a crashed worker
+    does not block the key forever) and poll until it finishes.
+
+Results are only stored when should_store(result) is true (e.g. success),
+so a failed attempt can be retried straight away.
+
+This is a fast path in front of the Supabase checks, not a replacement: a
+miss still runs the callee, whose own database guards cover other hosts
+and keys that have expired.
+
+Env:
+  IDEMPOTENCY_DB_PATH      SQLite file; put it on persistent storage (default
+                           <tmp>/resumeblast-idempotency.sqlite, which app.py
+                           warns about outside development)
+  IDEMPOTENCY_TTL_SECONDS  default key lifetime (default 7 days)
+  IDEMPOTENCY_LRU_SIZE     in-memory entries (default 5000)
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+IDEMPOTENCY_DB_PATH = os.getenv(
+    "IDEMPOTENCY_DB_PATH", os.path.join(tempfile.gettempdir(), "resumeblast-idempotency.sqlite"))
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(7 * 86400)))
+IDEMPOTENCY_LRU_SIZE    = int(os.getenv("IDEMPOTENCY_LRU_SIZE", "5000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key          TEXT PRIMARY KEY,
+    state        TEXT NOT NULL,          -- in_flight | done
+    owner        TEXT,
+    result       TEXT,
+    expires_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idempotency_keys_expiry ON idempotency_keys (expires_at);
+"""
+
+
+class InFlight(Exception):
+    """Another process is still executing this key (wait timed out)."""
+
+
+class IdempotencyStore:
+
+    POLL_SECONDS = 0.2
+
+    def __init__(self, path=IDEMPOTENCY_DB_PATH, ttl=IDEMPOTENCY_TTL_SECONDS, lru_size=IDEMPOTENCY_LRU_SIZE):
+        self.path     = path
+        self.ttl      = ttl
+        self.lru_size = lru_size
+        self._owner   = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._lru     = OrderedDict()     # key -> (expires_at, result)
+        self._running = {}                # key -> threading.Event (in this process)
+        self._lock    = threading.Lock()
+        self._local   = threading.local()
+        self._last_purge = 0.0
+        self._db().executescript(_SCHEMA)
+
+    # ─────────────────────────────────────────────────────────────────────
+    # PUBLIC METHODS
+    # ─────────────────────────────────────────────────────────────────────
+
+    def get(self, key: str):
+        """Stored result for key, or None."""
+        now = time.time()
+        with self._lock:
+            hit = self._lru.get(key)
+            if hit is not None:
+                if hit[0] > now:
+                    self._lru.move_to_end(key)
+                    return hit[1]
+                del self._lru[key]
+
+        row = self._db().execute(
+            "SELECT result, expires_at FROM idempotency_keys WHERE key = ? AND state = 'done' AND expires_at > ?",
+            (key, now)).fetchone()
+        if row is None:
+            return None
+        result = json.loads(row["result"])
+        self._remember(key, result, row["expires_at"])
+        return result
+
+    def put(self, key: str, result, ttl: float = None) -> None:
+        expires_at = time.time() + (ttl or self.ttl)
+        with self._db() as db:
+            db.execute(
+                "INSERT INTO idempotency_keys (key, state, owner, result, expires_at) VALUES (?, 'done', ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET state = 'done', result = excluded.result, "
+                "expires_at = excluded.expires_at",
+                (key, self._owner, json.dumps(result, default=str), expires_at))
+        self._remember(key, result, expires_at)
+        self._maybe_purge()
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            self._lru.pop(key, None)
+        with self._db() as db:
+            db.execute("DELETE FROM idempotency_keys WHERE key = ?", (key,))
+
+    def run_once(self, key: str, fn, ttl: float = None, lease: float = 900, wait: float = 30,
+                 should_store=lambda result: True):
+        """
+        (result, duplicate). Runs fn() unless key already has a result or is
+        running elsewhere, in which case that result is returned instead
+        (duplicate=True). Raises InFlight if another process holds the key
+        for longer than `wait` seconds.
+        """
+        deadline = time.time() + wait
+        while True:
+            result = self.get(key)
+            if result is not None:
+                return result, True
+
+            with self._lock:
+                running = self._running.get(key)
+                if running is None:
+                    running = self._running[key] = threading.Event()
+                    break
+            # Same process: wait for the running call, then re-check the store
+            if not running.wait(max(deadline - time.time(), 0)):
+                raise InFlight(key)
+
+        try:
+            if not self._claim(key, lease, deadline):
+                result = self.get(key)
+                if result is not None:
+                    return result, True
+                raise InFlight(key)
+
+            result = fn()
+            if should_store(result):
+                self.put(key, result, ttl)
+            else:
+                self._release(key)
+            return result, False
+        except BaseException:
+            self._release(key)
+            raise
+        finally:
+            with self._lock:
+                self._running.pop(key, None)
+            running.set()
+
+    # ─────────────────────────────────────────────────────────────────────
+    # INTERNALS
+    # ─────────────────────────────────────────────────────────────────────
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key, result, expires_at):
+        with self._lock:
+            self._lru[key] = (expires_at, result)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _claim(self, key, lease, deadline) -> bool:
+        """Take the cross-process in_flight row; poll while another live owner has it."""
+        while True:
+            now = time.time()
+            with self._db() as db:
+                db.execute("BEGIN IMMEDIATE")
+                row = db.execute("SELECT state, owner, expires_at FROM idempotency_keys WHERE key = ?",
+                                 (key,)).fetchone()
+                if row is None or row["expires_at"] <= now:
+                    db.execute(
+                        "INSERT OR REPLACE INTO idempotency_keys (key, state, owner, result, expires_at) "
+                        "VALUES (?, 'in_flight', ?, NULL, ?)", (key, self._owner, now + lease))
+                    return True
+                if row["state"] == "done":
+                    return False
+            if time.time() >= deadline:
+                return False
+            time.sleep(self.POLL_SECONDS)
+
+    def _release(self, key):
+        try:
+            with self._db() as db:
+                db.execute("DELETE FROM idempotency_keys WHERE key = ? AND state = 'in_flight' AND owner = ?",
+                           (key, self._owner))
+        except sqlite3.Error:
+            log.exception("Could not release idempotency key", extra={"key": key})
+
+    def _maybe_purge(self):
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        with self._db() as db:
+            db.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,))
+
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,205 @@
+# backend/services/identity_resolver.py
+"""
+Resolve which registered user a checkout belongs to.
+
+The webhook has up to three candidates, in priority order: the Stripe
+client_reference_id, the real email payment.py stored in metadata, and the
+Stripe customer email. Instead of one users lookup per candidate, resolve()
+asks for all of them in a single PostgREST request
+
+    users?or=(id.eq.<cref>,email.eq.<meta>,email.eq.<customer>)&select=id,email
+
+and picks the best match by that order. users.id is a uuid, so an id that
+is not one is dropped first (it would fail the whole query). The caller's
+latest resume is embedded in the same request (resumes(...)) when the
+database has the users <- resumes relationship; otherwise (PGRST200) it
+costs one more lookup.
+
+Email -> user_id matches are cached (IDENTITY_CACHE_TTL seconds, default
+3600). A cached email, or an id the cache already knows, answers without
+any request. Only positive matches are cached, and forget() drops an
+entry; signup validation and account deletion call it.
+"""
+import os
+import threading
+import time
+import uuid
+from urllib.parse import quote
+
+import requests
+
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+IDENTITY_CACHE_TTL  = float(os.getenv("IDENTITY_CACHE_TTL", "3600"))
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+
+GUEST_EMAIL   = "guest@resumeblast.ai"
+_BAD_TOKENS   = {"", "None", "null", "undefined"}
+_RESUME_EMBED = "resumes(file_url,analysis_data,created_at)"
+
+
+def _get_supabase_url():
+    return os.getenv("SUPABASE_URL")
+
+
+def _headers():
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    return {"apikey": key, "Authorization": f"Bearer {key}", "Accept": "application/json"}
+
+
+def _value(v) -> str:
+    """Quote a value for an or=(...) list (commas, dots, @ are reserved)."""
+    return '"' + str(v).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class _EmailCache:
+
+    def __init__(self):
+        self._by_email = {}     # email -> (expires_at, user_id)
+        self._lock     = threading.Lock()
+
+    def get(self, email):
+        with self._lock:
+            hit = self._by_email.get(email)
+            if hit and hit[0] > time.time():
+                return hit[1]
+            self._by_email.pop(email, None)
+            return None
+
+    def knows_id(self, user_id) -> bool:
+        now = time.time()
+        with self._lock:
+            return any(uid == user_id and exp > now for exp, uid in self._by_email.values())
+
+    def put(self, email, user_id):
+        with self._lock:
+            if len(self._by_email) >= IDENTITY_CACHE_SIZE:
+                # Drop the entries closest to expiry
+                for key, _ in sorted(self._by_email.items(), key=lambda kv: kv[1][0])[:IDENTITY_CACHE_SIZE // 10 or 1]:
+                    del self._by_email[key]
+            self._by_email[email] = (time.time() + IDENTITY_CACHE_TTL, user_id)
+
+    def forget(self, email=None, user_id=None):
+        with self._lock:
+            for key in [k for k, (_, uid) in self._by_email.items()
+                        if (email and k == email) or (user_id and uid == user_id)]:
+                del self._by_email[key]
+
+
+_cache = _EmailCache()
+_embed_supported = True     # flipped off if PostgREST has no users <- resumes relationship
+
+
+def forget(email: str = None, user_id: str = None) -> None:
+    """Invalidate cached mappings for an email and/or user id (signup, deletion)."""
+    _cache.forget((email or "").strip() or None, user_id)
+
+
+def _usable_email(email):
+    email = (email or "").strip()
+    return email if email and email != GUEST_EMAIL else None
+
+
+def _usable_id(user_id):
+    """The id if it can be a users.id (a uuid); guest_ ids and junk tokens are not."""
+    user_id = str(user_id or "").strip()
+    if user_id in _BAD_TOKENS or user_id.startswith("guest_"):
+        return None
+    try:
+        uuid.UUID(user_id)
+    except ValueError:
+        return None
+    return user_id
+
+
+def _relationship_missing(resp) -> bool:
+    """PostgREST's "no relationship between users and resumes" (PGRST200) error."""
+    try:
+        code = resp.json().get("code")
+    except ValueError:
+        code = None
+    return code == "PGRST200" or "relationship" in resp.text.lower()
+
+
+def resolve(user_id=None, emails=(), with_resume=False) -> dict:
+    """
+    {"user_id": str | None, "matched": "id" | "email" | None, "resume": row | None}
+
+    user_id   candidate id (client_reference_id); guest_/junk ids are ignored
+    emails    candidate emails, highest priority first; the guest placeholder is ignored
+    resume    latest resumes row (file_url, analysis_data) when with_resume=True
+    Raises RuntimeError when Supabase answers with an error (caller retries).
+    """
+    global _embed_supported
+
+    cand_id = _usable_id(user_id)
+    cand_emails = list(dict.fromkeys(e for e in map(_usable_email, emails) if e))
+    result = {"user_id": None, "matched": None, "resume": None}
+    if not cand_id and not cand_emails:
+        return result
+
+    # ── Cache: id known to exist, or a cached email (in priority order) ────
+    if cand_id and _cache.knows_id(cand_id):
+        result.update(user_id=cand_id, matched="id")
+    else:
+        for email in cand_emails:
+            cached = _cache.get(email)
+            if cached and not cand_id:
+                result.update(user_id=cached, matched="email")
+                break
+    if result["user_id"] and not with_resume:
+        return result
+
+    # ── One request for every candidate (+ the resume, when embeddable) ───
+    if result["user_id"]:
+        filters = f"id=eq.{quote(result['user_id'])}"
+    else:
+        terms = ([f"id.eq.{_value(cand_id)}"] if cand_id else []) + [f"email.eq.{_value(e)}" for e in cand_emails]
+        filters = "or=(" + quote(",".join(terms), safe="=(),.\"") + ")"
+    select = "id,email"
+    embed = with_resume and _embed_supported
+    if embed:
+        select += f",{_RESUME_EMBED}&resumes.order=created_at.desc&resumes.limit=1"
+
+    base = f"{_get_supabase_url()}/rest/v1/users"
+    resp = requests.get(f"{base}?{filters}&select={select}", headers=_headers(), timeout=10)
+    if embed and resp.status_code == 400 and _relationship_missing(resp):
+        log.info("Could not embed resumes in the users lookup; resolving resume separately",
+                 extra={"error": resp.text[:200]})
+        _embed_supported = embed = False
+        resp = requests.get(f"{base}?{filters}&select=id,email", headers=_headers(), timeout=10)
+    if resp.status_code != 200:
+        raise RuntimeError(f"identity lookup failed: {resp.status_code} {resp.text[:200]}")
+
+    rows = resp.json()
+    for row in rows:
+        if row.get("email") and row.get("id"):
+            _cache.put(row["email"], row["id"])
+
+    if not result["user_id"]:
+        ranked = ([("id", r) for r in rows if cand_id and str(r.get("id")) == cand_id] +
+                  [("email", r) for email in cand_emails for r in rows if r.get("email") == email])
+        if ranked:
+            matched, row = ranked[0]
+            result.update(user_id=row["id"], matched=matched)
+
+    if with_resume and result["user_id"]:
+        if embed:
+            row = next((r for r in rows if r.get("id") == result["user_id"]), {})
+            result["resume"] = (row.get("resumes") or [None])[0]
+        else:
+            result["resume"] = latest_resume(result["user_id"])
+    return result
+
+
+def latest_resume(user_id):
+    resp = requests.get(
+        f"{_get_supabase_url()}/rest/v1/resumes?user_id=eq.{quote(str(user_id))}"
+        f"&select=file_url,analysis_data,created_at&order=created_at.desc&limit=1",
+        headers=_headers(), timeout=10)
+    if resp.status_code != 200:
+        raise RuntimeError(f"resume lookup failed: {resp.status_code} {resp.text[:200]}")
+    rows = resp.json()
+    return rows[0] if rows else None
@@ -9,8 +9,11 @@ Called from payment_webhook.py when checkout.session.completed fires.
 """
 
 import os
-import requests
 from datetime import datetime
+from services.mail_transport import get_transport
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
 
 
 class InvoiceEmailService:
@@ -18,14 +21,7 @@ class InvoiceEmailService:
         self.api_key       = os.getenv("BREVO_API_KEY")
         self.sender_email  = os.getenv("BREVO_SENDER_EMAIL", "noreply@resumeblast.ai")
         self.sender_name   = os.getenv("BREVO_SENDER_NAME", "ResumeBlast.ai")
-        self.api_url       = "https://api.brevo.com/v3/smtp/email"
-
-    def _headers(self):
-        return {
-            "accept":        "application/json",
-            "api-key":       self.api_key,
-            "content-type":  "application/json",
-        }
+        self.transport     = get_transport("brevo")
 
     def _plan_display(self, plan_name: str) -> str:
         labels = {
@@ -68,12 +64,12 @@ class InvoiceEmailService:
             stripe_session_id: Stripe checkout session ID for reference
             payment_date:      ISO date string (defaults to now)
         """
-        if not self.api_key:
-            print("[Invoice] BREVO_API_KEY not configured — skipping receipt email")
+        if not self.api_key and self.transport.name == "brevo":
+            log.info("BREVO_API_KEY not configured — skipping receipt email")
             return {"success": False, "error": "BREVO_API_KEY not set"}
 
         if not recipient_email or "@" not in recipient_email:
-            print(f"[Invoice] Invalid recipient email: {recipient_email!r}")
+            log.warning(f"Invalid recipient email: {recipient_email!r}")
             return {"success": False, "error": "Invalid recipient email"}
 
         amount_display = f"${amount_cents / 100:.2f} {currency.upper()}"
@@ -239,23 +235,19 @@ class InvoiceEmailService:
         }
 
         try:
-            print(f"[Invoice] Sending receipt to {recipient_email} for {plan_label} ({amount_display})")
-            resp = requests.post(
-                self.api_url,
-                headers=self._headers(),
-                json=email_payload,
-                timeout=15
-            )
+            log.info(f"Sending receipt to {recipient_email} for {plan_label} ({amount_display})")
+            # No 429 retries here: the checkout pipeline retries the receipt stage
+            resp = self.transport.send(email_payload, timeout=15, retries=0)
 
-            if resp.status_code in [200, 201]:
-                message_id = resp.json().get("messageId", "unknown")
-                print(f"[Invoice] Receipt sent successfully! messageId={message_id}")
+            if resp["success"]:
+                message_id = resp["message_id"]
+                log.info(f"Receipt sent successfully! messageId={message_id}")
                 return {"success": True, "message_id": message_id}
             else:
-                error_msg = f"Brevo API error ({resp.status_code}): {resp.text}"
-                print(f"[Invoice] {error_msg}")
+                error_msg = resp["error"]
+                log.warning(f"Receipt send failed: {error_msg}")
                 return {"success": False, "error": error_msg}
 
         except Exception as e:
-            print(f"[Invoice] Exception sending receipt: {e}")
+            log.warning(f"Exception sending receipt: {e}")
             return {"success": False, "error": str(e)}
\ No newline at end of file
@@ -0,0 +1,292 @@
+# backend/services/list_query.py
+"""
+Shared list-query parameters for the admin list endpoints.
+
+    GET /api/admin/users?limit=50&sort=-created_at&fields=id,email&plan_name=eq.pro
+    GET /api/admin/users?limit=50&sort=-created_at&cursor=<next_cursor>
+
+  limit    page size, 1..LIST_MAX_LIMIT
+  cursor   next_cursor from the previous page (keyset: sort value + id)
+  sort     field or -field for descending; id breaks ties, NULLs sort last
+  fields   comma-separated projection
+  <field>  filter on an allowed field: <op>.<value> with op one of
+           eq neq gt gte lt lte like ilike in is (optionally not.<op>),
+           or a bare value meaning eq. in takes a,b,c or (a,b,c).
+
+An endpoint describes what it allows with a ListSpec. spec.parse(request.args)
+returns a ListQuery; when the caller sent none of the parameters above
+(query.active is False) endpoints keep returning their full list as before.
+
+run() translates the query to PostgREST parameters and returns
+(rows, meta) where meta is
+    {"limit": 50, "next_cursor": "..." | None, "total": N}
+total comes from Content-Range (count=exact). On cursor pages the cursor
+condition is part of the count, so it is reported as "remaining" instead.
+
+apply() gives the same semantics for lists that are already in memory
+(the profile index).
+"""
+import base64
+import json
+import os
+import re
+
+import requests
+
+LIST_MAX_LIMIT = int(os.getenv("LIST_MAX_LIMIT", "1000"))
+
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_OPS   = {"eq", "neq", "gt", "gte", "lt", "lte", "like", "ilike", "in", "is"}
+RESERVED = {"limit", "cursor", "sort", "fields"}
+
+
+class ListQueryError(ValueError):
+    """Bad list parameters; endpoints turn this into a 400."""
+
+
+def _encode_cursor(value, key) -> str:
+    raw = json.dumps([value, key], default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, key = json.loads(raw)
+        return value, key
+    except Exception:
+        raise ListQueryError("invalid cursor")
+
+
+def _quote(value) -> str:
+    """PostgREST reserved-character quoting for or=/and= values."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+class ListSpec:
+    """
+    What one endpoint allows.
+      filterable / sortable  field names (None = any identifier)
+      default_sort           e.g. "-created_at"
+      key                    unique tie-breaker column (cursor)
+    """
+
+    def __init__(self, filterable=(), sortable=("created_at",), default_sort="-created_at",
+                 key="id", default_limit=None):
+        self.filterable    = None if filterable is None else set(filterable)
+        self.sortable      = None if sortable is None else set(sortable)
+        self.default_sort  = default_sort
+        self.key           = key
+        self.default_limit = default_limit
+
+    def _allowed(self, field, allowed):
+        return _IDENT.match(field) and (allowed is None or field in allowed)
+
+    def parse(self, args) -> "ListQuery":
+        active = any(name in args for name in RESERVED)
+
+        limit = args.get("limit")
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                raise ListQueryError("limit must be an integer")
+            if not 1 <= limit <= LIST_MAX_LIMIT:
+                raise ListQueryError(f"limit must be between 1 and {LIST_MAX_LIMIT}")
+        elif args.get("cursor"):
+            raise ListQueryError("cursor requires limit")
+        else:
+            limit = self.default_limit
+
+        sort = args.get("sort") or self.default_sort
+        descending = sort.startswith("-")
+        sort_field = sort.lstrip("-+")
+        if sort_field != self.key and not self._allowed(sort_field, self.sortable):
+            raise ListQueryError(f"cannot sort by {sort_field!r}")
+
+        fields = None
+        if args.get("fields"):
+            fields = [f.strip() for f in args["fields"].split(",") if f.strip()]
+            bad = [f for f in fields if not _IDENT.match(f)]
+            if bad:
+                raise ListQueryError(f"invalid field(s): {bad}")
+
+        filters = []
+        for name in args:
+            if name in RESERVED or self.filterable is not None and name not in self.filterable:
+                continue
+            if not _IDENT.match(name):
+                continue
+            for raw in args.getlist(name) if hasattr(args, "getlist") else [args[name]]:
+                filters.append(self._parse_filter(name, raw))
+        active = active or bool(filters)
+
+        cursor = _decode_cursor(args["cursor"]) if args.get("cursor") else None
+        return ListQuery(self, limit, cursor, sort_field, descending, fields, filters, active)
+
+    @staticmethod
+    def _parse_filter(field, raw):
+        negate = raw.startswith("not.")
+        body = raw[4:] if negate else raw
+        op, dot, value = body.partition(".")
+        if not dot or op not in _OPS:
+            op, value = "eq", body
+        if op == "in" and not value.startswith("("):
+            value = f"({value})"
+        return field, ("not." if negate else "") + op, value
+
+
+class ListQuery:
+
+    def __init__(self, spec, limit, cursor, sort_field, descending, fields, filters, active):
+        self.spec       = spec
+        self.limit      = limit
+        self.cursor     = cursor
+        self.sort_field = sort_field
+        self.descending = descending
+        self.fields     = fields
+        self.filters    = filters
+        self.active     = active
+
+    # ── PostgREST ────────────────────────────────────────────────────────────
+
+    def _select(self):
+        if not self.fields:
+            return "*"
+        needed = [self.spec.key, self.sort_field]
+        return ",".join(dict.fromkeys(self.fields + needed))
+
+    def postgrest_params(self, select=True) -> list:
+        key, field = self.spec.key, self.sort_field
+        direction  = "desc" if self.descending else "asc"
+        params = [("order", f"{field}.{direction}.nullslast" +
+                   (f",{key}.{direction}" if field != key else ""))]
+        if select:
+            params.append(("select", self._select()))
+        params += [(f, f"{op}.{value}") for f, op, value in self.filters]
+
+        if self.cursor is not None:
+            value, last_key = self.cursor
+            cmp = "lt" if self.descending else "gt"
+            if field == key:
+                params.append((key, f"{cmp}.{value}"))
+            elif value is None:
+                params.append(("and", f"({field}.is.null,{key}.{cmp}.{_quote(last_key)})"))
+            else:
+                params.append(("or", f"({field}.{cmp}.{_quote(value)},"
+                                     f"and({field}.eq.{_quote(value)},{key}.{cmp}.{_quote(last_key)}),"
+                                     f"{field}.is.null)"))
+        if self.limit is not None:
+            params.append(("limit", str(self.limit + 1)))   # one extra row = "has more"
+        return params
+
+    def _finish(self, rows, total, project=True):
+        next_cursor = None
+        if self.limit is not None and len(rows) > self.limit:
+            rows = rows[:self.limit]
+            last = rows[-1]
+            next_cursor = _encode_cursor(last.get(self.sort_field), last.get(self.spec.key))
+        if project:
+            rows = self.project(rows)
+        meta = {"limit": self.limit, "next_cursor": next_cursor}
+        meta["remaining" if self.cursor is not None else "total"] = total
+        return rows, meta
+
+    def project(self, rows):
+        """Apply fields= to rows already shaped for the response."""
+        if not self.fields:
+            return rows
+        return [{f: row.get(f) for f in self.fields} for row in rows]
+
+    # ── in-memory ────────────────────────────────────────────────────────────
+
+    def _matches(self, row):
+        for field, op, value in self.filters:
+            negate = op.startswith("not.")
+            ok = _compare(row.get(field), op[4:] if negate else op, value)
+            if ok == negate:
+                return False
+        return True
+
+    def apply(self, rows):
+        """Filter / sort / cursor-page a list of dicts. Returns (rows, meta)."""
+        key, field, desc = self.spec.key, self.sort_field, self.descending
+        rows = [r for r in rows if self._matches(r)]
+        present = sorted((r for r in rows if r.get(field) is not None),
+                         key=lambda r: (r.get(field), str(r.get(key))), reverse=desc)
+        nulls   = sorted((r for r in rows if r.get(field) is None),
+                         key=lambda r: str(r.get(key)), reverse=desc)
+        ordered = present + nulls
+
+        if self.cursor is not None:
+            cv, ck = self.cursor
+            ck = str(ck)
+
+            def after(r):
+                v, k = r.get(field), str(r.get(key))
+                if cv is None:
+                    return v is None and (k < ck if desc else k > ck)
+                if v is None:
+                    return True
+                if v != cv:
+                    return v < cv if desc else v > cv
+                return k < ck if desc else k > ck
+            ordered = [r for r in ordered if after(r)]
+
+        total = len(ordered)
+        if self.limit is not None:
+            ordered = ordered[:self.limit + 1]
+        return self._finish(ordered, total)
+
+
+def _compare(actual, op, value):
+    if op == "is":
+        target = {"null": None, "true": True, "false": False}.get(value.lower(), value)
+        return actual is target if target is None or isinstance(target, bool) else actual == target
+    if op == "in":
+        return str(actual) in {v.strip().strip('"') for v in value.strip("()").split(",")}
+    if op in ("like", "ilike"):
+        pattern = "^" + ".*".join(re.escape(p) for p in re.split(r"[*%]", value)) + "$"
+        return actual is not None and re.match(pattern, str(actual),
+                                               re.IGNORECASE if op == "ilike" else 0) is not None
+    if actual is None:
+        return op == "neq"
+    left, right = actual, value
+    if isinstance(actual, bool):
+        right = value.lower() == "true"
+    elif isinstance(actual, (int, float)):
+        try:
+            right = float(value)
+        except ValueError:
+            left = str(actual)
+    else:
+        left = str(actual)
+    return {
+        "eq":  left == right, "neq": left != right,
+        "gt":  left > right,  "gte": left >= right,
+        "lt":  left < right,  "lte": left <= right,
+    }[op]
+
+
+def run(query: ListQuery, base_url: str, headers: dict, extra_params=(), select=True, timeout=30):
+    """
+    Fetch one page from PostgREST. Returns (rows, meta); raises RuntimeError on HTTP errors.
+    select=False reads select=* and leaves fields= to the caller (for endpoints
+    that rename columns in their response and project with query.project()).
+    """
+    params = list(extra_params) + query.postgrest_params(select=select)
+    if not select:
+        params.append(("select", "*"))
+    resp = requests.get(
+        base_url,
+        headers={**headers, "Prefer": "count=exact"},
+        params=params,
+        timeout=timeout,
+    )
+    if resp.status_code not in (200, 206):
+        raise RuntimeError(f"{resp.status_code} — {resp.text[:200]}")
+    total = (resp.headers.get("Content-Range") or "").rpartition("/")[2]
+    return query._finish(resp.json(), int(total) if total.isdigit() else None, project=select)
@@ -0,0 +1,240 @@
+# backend/services/mail_transport.py
+"""
+Pluggable outbound mail transport.
+
+Every sender in the backend builds a Brevo-shaped payload
+(sender / to / replyTo / subject / htmlContent / templateId / params /
+attachment / tags) and hands it to a transport:
+
+  BrevoTransport   POST {BREVO_API_BASE}/smtp/email, retries on 429
+  ResendTransport  translates the payload and sends through the Resend SDK
+  LocalTransport   keeps messages in memory, no network at all
+
+send() never raises; it returns
+  {"success": bool, "message_id": str|None, "status": int|None, "error": str|None}
+
+A 429 is retried up to MAIL_RATE_LIMIT_RETRIES times, sleeping up to
+MAX_RETRY_AFTER_SECONDS each time. That suits the drip scheduler; senders on
+a request thread (password reset, checkout receipt) pass retries=0 so a rate
+limit fails fast instead of holding the request.
+
+Config (env):
+  MAIL_TRANSPORT          force every sender onto one transport
+                          (brevo | resend | local); unset = each sender's default
+  BREVO_API_BASE          Brevo API root   (https://api.brevo.com/v3)
+  RESEND_API_URL          Resend API root  (read by the resend SDK)
+  MAIL_RATE_LIMIT_RETRIES retries after a 429 before giving up  (3)
+  LOCAL_MAIL_LATENCY_MS   simulated send latency for LocalTransport (0)
+
+Point BREVO_API_BASE / RESEND_API_URL at devtools/fake_mail_server.py to
+load-test the real HTTP code paths without touching the providers.
+"""
+import os
+import time
+import uuid
+import threading
+import requests
+from collections import deque
+
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+BREVO_API_BASE          = os.getenv("BREVO_API_BASE", "https://api.brevo.com/v3")
+MAIL_RATE_LIMIT_RETRIES = int(os.getenv("MAIL_RATE_LIMIT_RETRIES", "3"))
+LOCAL_MAIL_LATENCY_MS   = float(os.getenv("LOCAL_MAIL_LATENCY_MS", "0"))
+
+# Longest we will honour a provider's Retry-After before giving up on a send
+MAX_RETRY_AFTER_SECONDS = 30
+
+
+def _result(success, message_id=None, status=None, error=None) -> dict:
+    return {"success": success, "message_id": message_id, "status": status, "error": error}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Brevo
+# ─────────────────────────────────────────────────────────────────────────────
+
+class BrevoTransport:
+    name = "brevo"
+
+    def __init__(self, api_key: str = None, api_base: str = None):
+        self.api_key = api_key or os.getenv("BREVO_API_KEY")
+        self.api_url = f"{(api_base or BREVO_API_BASE).rstrip('/')}/smtp/email"
+        # One pooled session per transport — keeps the TLS connection warm
+        # across a drip batch instead of reconnecting for every recruiter.
+        self._session = requests.Session()
+
+    def _headers(self):
+        return {
+            "accept":       "application/json",
+            "api-key":      self.api_key,
+            "content-type": "application/json",
+        }
+
+    @staticmethod
+    def _retry_after(resp, attempt: int) -> float:
+        for header in ("Retry-After", "x-sib-ratelimit-reset"):
+            value = resp.headers.get(header)
+            if value:
+                try:
+                    return min(float(value), MAX_RETRY_AFTER_SECONDS)
+                except ValueError:
+                    pass
+        return min(2 ** attempt, MAX_RETRY_AFTER_SECONDS)
+
+    def send(self, payload: dict, timeout: float = 30, retries: int = None) -> dict:
+        if not self.api_key:
+            return _result(False, error="BREVO_API_KEY not configured in environment variables")
+
+        retries = MAIL_RATE_LIMIT_RETRIES if retries is None else retries
+        attempt = 0
+        while True:
+            try:
+                resp = self._session.post(self.api_url, headers=self._headers(),
+                                          json=payload, timeout=timeout)
+            except requests.RequestException as e:
+                return _result(False, error=str(e))
+
+            if resp.status_code in [200, 201]:
+                return _result(True, message_id=resp.json().get("messageId", "unknown"),
+                               status=resp.status_code)
+
+            if resp.status_code == 429 and attempt < retries:
+                wait = self._retry_after(resp, attempt)
+                log.warning("Brevo rate limited -- retrying", extra={
+                    "wait_seconds": round(wait, 1), "attempt": attempt + 1,
+                    "max_retries": retries})
+                time.sleep(wait)
+                attempt += 1
+                continue
+
+            return _result(False, status=resp.status_code,
+                           error=f"Brevo API error ({resp.status_code}): {resp.text}")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Resend
+# ─────────────────────────────────────────────────────────────────────────────
+
+class ResendTransport:
+    name = "resend"
+
+    def __init__(self, api_key: str = None):
+        self.api_key = api_key or os.getenv("RESEND_API_KEY")
+
+    @staticmethod
+    def _address(entry: dict) -> str:
+        name = entry.get("name")
+        return f"{name} <{entry['email']}>" if name else entry["email"]
+
+    @staticmethod
+    def to_resend_params(payload: dict) -> dict:
+        """Translate a Brevo-shaped payload into resend.Emails.send params."""
+        params = {
+            "from":    ResendTransport._address(payload["sender"]),
+            "to":      [r["email"] for r in payload.get("to", [])],
+            "subject": payload.get("subject", ""),
+        }
+        if payload.get("htmlContent"):
+            params["html"] = payload["htmlContent"]
+        if payload.get("textContent"):
+            params["text"] = payload["textContent"]
+        if payload.get("replyTo"):
+            params["reply_to"] = payload["replyTo"]["email"]
+        if payload.get("attachment"):
+            params["attachments"] = [
+                {"filename": a["name"], "content": a["content"]} for a in payload["attachment"]
+            ]
+        if payload.get("tags"):
+            params["tags"] = [{"name": "tag", "value": str(t)} for t in payload["tags"]]
+        return params
+
+    def send(self, payload: dict, timeout: float = 30, retries: int = None) -> dict:
+        import resend
+
+        if not self.api_key:
+            return _result(False, error="RESEND_API_KEY not configured in environment variables")
+        if payload.get("templateId"):
+            return _result(False, error="Brevo templates are not supported by the Resend transport")
+
+        resend.api_key = self.api_key
+        params = self.to_resend_params(payload)
+
+        retries = MAIL_RATE_LIMIT_RETRIES if retries is None else retries
+        attempt = 0
+        while True:
+            try:
+                response = resend.Emails.send(params)
+                return _result(True, message_id=response["id"], status=200)
+            except Exception as e:
+                rate_limited = (str(getattr(e, "code", "")) == "429"
+                                or "rate_limit" in str(getattr(e, "error_type", "")))
+                if rate_limited and attempt < retries:
+                    time.sleep(min(2 ** attempt, MAX_RETRY_AFTER_SECONDS))
+                    attempt += 1
+                    continue
+                return _result(False, status=429 if rate_limited else None, error=str(e))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Local (in-memory)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class LocalTransport:
+    name = "local"
+
+    def __init__(self, latency_ms: float = None, keep: int = 1000):
+        self.latency_ms = LOCAL_MAIL_LATENCY_MS if latency_ms is None else latency_ms
+        self.outbox     = deque(maxlen=keep)
+        self.sent_count = 0
+        self._lock      = threading.Lock()
+
+    def send(self, payload: dict, timeout: float = 30, retries: int = None) -> dict:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        message_id = f"<{uuid.uuid4()}@local.transport>"
+        with self._lock:
+            self.outbox.append({"message_id": message_id, "payload": payload})
+            self.sent_count += 1
+        return _result(True, message_id=message_id, status=201)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Factory
+# ─────────────────────────────────────────────────────────────────────────────
+_TRANSPORTS = {"brevo": BrevoTransport, "resend": ResendTransport, "local": LocalTransport}
+_instances  = {}
+_lock       = threading.Lock()
+
+def _instrument(transport):
+    """Record every send of `transport` in the mail_send_seconds histogram."""
+    from services.metrics import MAIL_SEND_SECONDS
+    send = transport.send
+
+    def timed_send(payload: dict, timeout: float = 30, retries: int = None) -> dict:
+        started = time.perf_counter()
+        result  = send(payload, timeout, retries)
+        MAIL_SEND_SECONDS.labels(transport=transport.name,
+                                 outcome="ok" if result["success"] else "error"
+                                 ).observe(time.perf_counter() - started)
+        return result
+
+    transport.send = timed_send
+    return transport
+
+
+def get_transport(default: str = "brevo"):
+    """
+    Shared transport for a sender whose provider is `default`.
+    MAIL_TRANSPORT overrides it for every sender (e.g. 'local' in load tests).
+    """
+    name = (os.getenv("MAIL_TRANSPORT") or default).lower()
+    if name not in _TRANSPORTS:
+        log.warning(f"Unknown MAIL_TRANSPORT {name!r} -- using {default}")
+        name = default
+    with _lock:
+        if name not in _instances:
+            _instances[name] = _instrument(_TRANSPORTS[name]())
+        return _instances[name]
@@ -0,0 +1,137 @@
+# backend/services/metrics.py
+"""
+Prometheus metrics registry for the backend.
+
+All metrics live here so their names and labels stay in one place; callers
+import the metric objects and use the prometheus_client API directly:
+
+    from services.metrics import DRIP_EMAILS
+    DRIP_EMAILS.labels(wave="1", plan="basic", outcome="sent").inc()
+
+Gunicorn runs several workers, so when PROMETHEUS_MULTIPROC_DIR is set (the
+bundled gunicorn.conf.py sets and cleans it) every worker writes its samples
+to that directory and /metrics aggregates them with MultiProcessCollector.
+Without it (python app.py, scripts) the default in-process registry is used.
+
+Metrics:
+  drip_emails_total{wave,plan,outcome}          drip sends, outcome=sent|failed
+  mail_send_seconds{transport,outcome}          provider send latency
+  drip_job_seconds{job}                         tick / reconcile / dispatch duration
+  drip_campaigns{wave}                          open campaigns per wave (last count)
+  webhook_events_total{source,event}            Brevo / Stripe / Resend events
+                                                (event from WEBHOOK_EVENT_TYPES, else "other")
+  webhook_counter_flush_lag_seconds             Brevo event time -> campaign counter write
+  checkout_stage_seconds{stage,outcome}         Stripe checkout pipeline stage runs
+  batch_writer_queue_depth{table}               rows buffered for a batched insert
+  batch_writer_rows_total{table,outcome}        outcome=queued|written|dropped|failed
+  claude_analysis_seconds{outcome}              resume analysis call latency
+  claude_tokens_total{direction}                input / output tokens
+  supabase_request_seconds{table,method,status} PostgREST call latency per table
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+    REGISTRY, generate_latest, multiprocess,
+)
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+_JOB_BUCKETS     = (0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+_LAG_BUCKETS     = (0.5, 1, 5, 15, 30, 60, 300, 900, 3600, 21600, 86400)
+
+DRIP_EMAILS = Counter(
+    "drip_emails_total", "Drip emails by wave, plan and outcome",
+    ["wave", "plan", "outcome"])
+
+MAIL_SEND_SECONDS = Histogram(
+    "mail_send_seconds", "Mail provider send latency",
+    ["transport", "outcome"], buckets=_LATENCY_BUCKETS)
+
+DRIP_JOB_SECONDS = Histogram(
+    "drip_job_seconds", "Duration of drip scheduler jobs",
+    ["job"], buckets=_JOB_BUCKETS)
+
+DRIP_CAMPAIGNS = Gauge(
+    "drip_campaigns", "Open drip campaigns per wave at the last count",
+    ["wave"], multiprocess_mode="livemostrecent")
+
+WEBHOOK_EVENTS = Counter(
+    "webhook_events_total", "Webhook events received",
+    ["source", "event"])
+
+# Event label values per source. Webhook payloads are caller-controlled, so
+# anything else is counted as "other" to keep the series count fixed.
+WEBHOOK_EVENT_TYPES = {
+    "brevo":  {"delivered", "opened", "click", "hard_bounce", "soft_bounce",
+               "blocked", "spam", "unsubscribed"},
+    "resend": {"email.bounced", "email.complained"},
+    "stripe": {"checkout.session.completed"},
+}
+
+WEBHOOK_COUNTER_LAG = Histogram(
+    "webhook_counter_flush_lag_seconds",
+    "Delay between a Brevo event and the campaign counter update",
+    buckets=_LAG_BUCKETS)
+
+CHECKOUT_STAGE_SECONDS = Histogram(
+    "checkout_stage_seconds", "Checkout pipeline stage duration",
+    ["stage", "outcome"], buckets=_JOB_BUCKETS)
+
+BATCH_WRITER_QUEUE_DEPTH = Gauge(
+    "batch_writer_queue_depth", "Rows waiting in a BatchWriter queue",
+    ["table"], multiprocess_mode="livesum")
+
+BATCH_WRITER_ROWS = Counter(
+    "batch_writer_rows_total", "BatchWriter rows by outcome",
+    ["table", "outcome"])
+
+CLAUDE_ANALYSIS_SECONDS = Histogram(
+    "claude_analysis_seconds", "Resume analysis call latency",
+    ["outcome"], buckets=_JOB_BUCKETS[:6] + (60,))
+
+CLAUDE_TOKENS = Counter(
+    "claude_tokens_total", "Tokens used by resume analysis",
+    ["direction"])
+
+SUPABASE_REQUEST_SECONDS = Histogram(
+    "supabase_request_seconds", "Supabase (PostgREST / auth) call latency",
+    ["table", "method", "status"], buckets=_LATENCY_BUCKETS)
+
+
+@contextmanager
+def time_job(job: str):
+    """Observe the duration of a block in drip_job_seconds."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        DRIP_JOB_SECONDS.labels(job=job).observe(time.perf_counter() - started)
+
+
+def count_webhook_event(source: str, event) -> None:
+    """webhook_events_total, with unknown event types folded into "other"."""
+    label = event if event in WEBHOOK_EVENT_TYPES.get(source, ()) else "other"
+    WEBHOOK_EVENTS.labels(source=source, event=label).inc()
+
+
+def observe_outbound_call(service, method, target, status, duration_ms):
+    """services/request_tracing.py observer: Supabase latency per table."""
+    if service == "supabase":
+        SUPABASE_REQUEST_SECONDS.labels(
+            table=target, method=method,
+            status=str(status) if status is not None else "error"
+        ).observe(duration_ms / 1000.0)
+
+
+def render() -> tuple:
+    """Returns (body, content_type) for the /metrics endpoint."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,156 @@
+# backend/services/plans_catalog.py
+"""
+In-memory snapshot of the `plans` table.
+
+Checkout, the blast path, the drip scheduler and /api/plans/public all read
+plan prices and recruiter limits from here instead of querying `plans` on
+every call. The snapshot holds every row (active or not), is refetched
+after PLANS_CACHE_TTL seconds (default 300), and is refreshed straight
+away by /api/admin/plans/update. Other workers pick up an admin edit on
+their next refresh.
+
+If Supabase cannot be reached the last snapshot stays in use. Without one,
+recruiter limits fall back to DEFAULT_RECRUITER_LIMITS. A failed fetch is
+retried at most every PLANS_RETRY_SECONDS, so an outage does not add a
+request to every hot-path call.
+
+Env:
+  PLANS_CACHE_TTL       seconds between refreshes (default 300)
+  PLANS_RETRY_SECONDS   wait after a failed fetch (default 30)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+PLANS_CACHE_TTL     = float(os.getenv("PLANS_CACHE_TTL", "300"))
+PLANS_RETRY_SECONDS = float(os.getenv("PLANS_RETRY_SECONDS", "30"))
+
+# Used only when the plan is missing from the table (or no snapshot yet)
+DEFAULT_RECRUITER_LIMITS = {
+    "free":         11,
+    "starter":      250,
+    "basic":        500,
+    "professional": 750,
+    "growth":       1000,
+    "advanced":     1250,
+    "premium":      1500
+}
+DEFAULT_RECRUITER_LIMIT = 250
+
+
+def _get_supabase_url():
+    return os.getenv("SUPABASE_URL")
+
+
+def _headers():
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    return {"apikey": key, "Authorization": f"Bearer {key}", "Accept": "application/json"}
+
+
+def _norm(name) -> str:
+    return str(name or "").lower().strip()
+
+
+class PlansCatalog:
+
+    def __init__(self, ttl=PLANS_CACHE_TTL):
+        self.ttl          = ttl
+        self._rows        = None      # all plans, price_cents ascending
+        self._by_key      = {}        # key_name -> row
+        self._by_display  = {}        # display_name -> row
+        self._public_etag = None
+        self._loaded_at   = 0.0
+        self._next_try    = 0.0
+        self._lock        = threading.Lock()
+
+    # ─────────────────────────────────────────────────────────────────────
+    # PUBLIC METHODS
+    # ─────────────────────────────────────────────────────────────────────
+
+    def all(self) -> list:
+        """Every plan row (price_cents ascending); [] if never loaded."""
+        self._ensure_fresh()
+        return list(self._rows or [])
+
+    def public(self) -> tuple:
+        """(active plans, ETag) for /api/plans/public."""
+        self._ensure_fresh()
+        with self._lock:
+            rows = [p for p in (self._rows or []) if p.get("is_active")]
+            return rows, self._public_etag or self._etag(rows)
+
+    def get(self, name: str):
+        """Plan row by key_name, else by display_name (case-insensitive), or None."""
+        self._ensure_fresh()
+        name = _norm(name)
+        with self._lock:
+            return self._by_key.get(name) or self._by_display.get(name)
+
+    def recruiter_limit(self, name: str) -> int:
+        plan = self.get(name)
+        if plan and plan.get("recruiter_limit") is not None:
+            return int(plan["recruiter_limit"])
+        return DEFAULT_RECRUITER_LIMITS.get(_norm(name), DEFAULT_RECRUITER_LIMIT)
+
+    def refresh(self) -> list:
+        """Refetch the table now. Raises RuntimeError when Supabase fails."""
+        resp = requests.get(f"{_get_supabase_url()}/rest/v1/plans?select=*&order=price_cents.asc",
+                            headers=_headers(), timeout=10)
+        if resp.status_code not in (200, 206):
+            raise RuntimeError(f"plans fetch failed: {resp.status_code} {resp.text[:200]}")
+        rows = resp.json()
+        self._load(rows)
+        return list(rows)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = self._next_try = 0.0
+
+    def status(self) -> dict:
+        with self._lock:
+            return {"plans": len(self._rows or []), "etag": self._public_etag,
+                    "age_seconds": round(time.time() - self._loaded_at, 1) if self._rows is not None else None}
+
+    # ─────────────────────────────────────────────────────────────────────
+    # INTERNALS
+    # ─────────────────────────────────────────────────────────────────────
+
+    def _ensure_fresh(self):
+        now = time.time()
+        if now - self._loaded_at < self.ttl or now < self._next_try:
+            return
+        with self._lock:
+            # Another thread may have refreshed (or failed) while we waited
+            if now - self._loaded_at < self.ttl or now < self._next_try:
+                return
+            self._next_try = now + PLANS_RETRY_SECONDS
+        try:
+            self.refresh()
+        except Exception as e:
+            log.warning(f"Plans refresh failed, serving last snapshot: {e}")
+
+    def _load(self, rows):
+        by_key     = {_norm(p.get("key_name")): p for p in rows if p.get("key_name")}
+        by_display = {_norm(p.get("display_name")): p for p in rows if p.get("display_name")}
+        etag       = self._etag([p for p in rows if p.get("is_active")])
+        with self._lock:
+            self._rows, self._by_key, self._by_display = rows, by_key, by_display
+            self._public_etag = etag
+            self._loaded_at   = time.time()
+            self._next_try    = 0.0
+
+    @staticmethod
+    def _etag(rows) -> str:
+        body = json.dumps(rows, sort_keys=True, default=str).encode()
+        return hashlib.sha256(body).hexdigest()[:32]
+
+
+plans_catalog = PlansCatalog()
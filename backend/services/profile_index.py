@@ -0,0 +1,337 @@
+# backend/services/profile_index.py
+"""
+In-memory user classification index for the admin profile views.
+
+/api/admin/profiles/incomplete and /api/admin/profiles/overview used to pull
+every row of users, blast_campaigns, payments and resumes on each request
+and rebuild the same sets. The index keeps that state between requests:
+
+  users            user_id -> profile fields (+ profile_completed)
+  paid             user_ids / emails with a completed payment
+  analyzed         user_ids with a resume
+  latest campaign  user_id -> (status, created_at) of the newest campaign
+
+It is kept current three ways:
+
+  * hooks  — the payment (verify + Stripe webhook), analyze, profile and
+             campaign-creation write paths call record_*() right after a
+             successful write, so the worker that took the write is exact.
+  * deltas — every PROFILE_INDEX_REFRESH_SECONDS a read first fetches rows
+             changed since each table's watermark (the newest timestamp
+             loaded from Supabase: users.created_at, payments.completed_at,
+             resumes.created_at, blast_campaigns created/completed stamps).
+             Hook rows never move a watermark: their timestamps come from
+             this server's clock, and a mark ahead of the database would
+             hide rows other workers write in between.
+  * rebuild — every PROFILE_INDEX_REBUILD_SECONDS a full reload catches
+             what has no timestamp (profile edits and campaign promotions
+             handled by another worker, deletions).
+
+Config (env):
+  PROFILE_INDEX_REFRESH_SECONDS   delta refresh interval          (30)
+  PROFILE_INDEX_REBUILD_SECONDS   full rebuild interval           (900)
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import requests
+
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+PROFILE_INDEX_REFRESH_SECONDS = float(os.getenv("PROFILE_INDEX_REFRESH_SECONDS", "30"))
+PROFILE_INDEX_REBUILD_SECONDS = float(os.getenv("PROFILE_INDEX_REBUILD_SECONDS", "900"))
+
+PAGE_SIZE = 1000
+
+USER_FIELDS = ("id", "email", "first_name", "last_name", "phone",
+               "primary_skills", "profile_completed", "created_at")
+PROFILE_FIELDS = ("first_name", "last_name", "phone", "primary_skills")
+
+# Guest checkouts store this placeholder in payments.user_email
+PLACEHOLDER_EMAILS = {"guest@resumeblast.ai"}
+
+USER_TYPE_ORDER = {"paid": 0, "analyzed-only": 1, "signup-only": 2}
+
+_CAMPAIGN_STAMPS = ("created_at", "completed_at", "drip_day3_sent_at")
+
+
+def _get_supabase_url():
+    return os.getenv("SUPABASE_URL")
+
+
+def _headers():
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    return {"apikey": key, "Authorization": f"Bearer {key}", "Accept": "application/json"}
+
+
+def _norm_email(email) -> str:
+    return (email or "").strip().lower()
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _fetch_rows(table: str, params: list) -> list:
+    """All rows matching params, paged with limit/offset. Raises on HTTP errors."""
+    rows, offset = [], 0
+    while True:
+        resp = requests.get(
+            f"{_get_supabase_url()}/rest/v1/{table}",
+            headers=_headers(),
+            params=params + [("limit", str(PAGE_SIZE)), ("offset", str(offset))],
+            timeout=30,
+        )
+        if resp.status_code not in (200, 206):
+            raise RuntimeError(f"{table} fetch failed: {resp.status_code} {resp.text[:200]}")
+        batch = resp.json()
+        rows.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            return rows
+        offset += PAGE_SIZE
+
+
+def classify_user_type(user_id, paid_user_ids, resume_user_ids, email=None, paid_emails=None):
+    """paid > analyzed-only > signup-only. Paid matches by user_id OR email."""
+    if user_id in paid_user_ids or (paid_emails and _norm_email(email) in paid_emails):
+        return "paid"
+    if user_id in resume_user_ids:
+        return "analyzed-only"
+    return "signup-only"
+
+
+class ProfileIndex:
+    """Thread-safe; one per process (see profile_index below)."""
+
+    def __init__(self):
+        self._lock         = threading.RLock()   # guards the state below
+        self._refresh_lock = threading.Lock()    # one rebuild / refresh at a time
+        self._replay       = None                # hook calls made during a rebuild
+        self._clear()
+
+    def _clear(self):
+        self.users         = {}    # user_id -> user row
+        self.email_to_id   = {}
+        self.paid_ids      = set()
+        self.paid_emails   = set()
+        self.analyzed_ids  = set()
+        self.latest        = {}    # user_id -> (status, created_at)
+        self.watermarks    = {}    # table -> newest timestamp seen
+        self.built_at      = None  # monotonic
+        self.refreshed_at  = None
+        self.last_built    = None  # wall clock, for the API
+        self.last_refreshed = None
+
+    # ── state updates (callers hold the lock) ────────────────────────────────
+
+    def _bump(self, table, *stamps):
+        for stamp in stamps:
+            if stamp and stamp > (self.watermarks.get(table) or ""):
+                self.watermarks[table] = stamp
+
+    def _apply_user(self, row, from_db=True):
+        uid = row.get("id")
+        if not uid:
+            return
+        old = self.users.get(uid)
+        if old and _norm_email(old.get("email")) != _norm_email(row.get("email")):
+            self.email_to_id.pop(_norm_email(old.get("email")), None)
+        self.users[uid] = {f: row.get(f) for f in USER_FIELDS}
+        if row.get("email"):
+            self.email_to_id[_norm_email(row["email"])] = uid
+        if from_db:
+            self._bump("users", row.get("created_at"))
+
+    def _apply_payment(self, row, from_db=True):
+        if row.get("user_id"):
+            self.paid_ids.add(row["user_id"])
+        email = _norm_email(row.get("user_email"))
+        if email and email not in PLACEHOLDER_EMAILS:
+            self.paid_emails.add(email)
+        if from_db:
+            self._bump("payments", row.get("completed_at"))
+
+    def _apply_resume(self, row, from_db=True):
+        if row.get("user_id"):
+            self.analyzed_ids.add(row["user_id"])
+        if from_db:
+            self._bump("resumes", row.get("created_at"))
+
+    def _apply_campaign(self, row, from_db=True):
+        uid = row.get("user_id")
+        created = row.get("created_at") or ""
+        if uid and (uid not in self.latest or created >= self.latest[uid][1]):
+            self.latest[uid] = (row.get("status"), created)
+        if from_db:
+            self._bump("blast_campaigns", *(row.get(s) for s in _CAMPAIGN_STAMPS))
+
+    # ── loading ──────────────────────────────────────────────────────────────
+
+    def _since(self, table, column):
+        mark = self.watermarks.get(table)
+        # gte, not gt: rows sharing the watermark timestamp are re-applied (idempotent)
+        return [(column, f"gte.{mark}")] if mark else []
+
+    def rebuild(self):
+        """Reload everything from Supabase."""
+        with self._lock:
+            self._replay = []
+        try:
+            self._load_all()
+        finally:
+            with self._lock:
+                self._replay = None
+
+    def _load_all(self):
+        users     = _fetch_rows("users", [("select", ",".join(USER_FIELDS))])
+        payments  = _fetch_rows("payments", [("status", "eq.completed"),
+                                             ("select", "user_id,user_email,completed_at")])
+        resumes   = _fetch_rows("resumes", [("select", "user_id,created_at")])
+        campaigns = _fetch_rows("blast_campaigns",
+                                [("select", "user_id,status," + ",".join(_CAMPAIGN_STAMPS))])
+        with self._lock:
+            self._clear()
+            for row in users:
+                self._apply_user(row)
+            for row in payments:
+                self._apply_payment(row)
+            for row in resumes:
+                self._apply_resume(row)
+            for row in campaigns:
+                self._apply_campaign(row)
+            # Writes that landed while we were fetching may be missing from the snapshot
+            for hook, args in self._replay:
+                hook(*args)
+            self.built_at = self.refreshed_at = time.monotonic()
+            self.last_built = self.last_refreshed = _now_iso()
+        log.info("Profile index rebuilt", extra={
+            "users": len(users), "payments": len(payments),
+            "resumes": len(resumes), "campaigns": len(campaigns)})
+
+    def refresh(self):
+        """Apply rows changed since each table's watermark."""
+        with self._lock:
+            user_q     = self._since("users", "created_at")
+            payment_q  = self._since("payments", "completed_at")
+            resume_q   = self._since("resumes", "created_at")
+            mark       = self.watermarks.get("blast_campaigns")
+        campaign_q = ([("or", "(" + ",".join(f"{s}.gte.{mark}" for s in _CAMPAIGN_STAMPS) + ")")]
+                      if mark else [])
+
+        users     = _fetch_rows("users", [("select", ",".join(USER_FIELDS))] + user_q)
+        payments  = _fetch_rows("payments", [("status", "eq.completed"),
+                                             ("select", "user_id,user_email,completed_at")] + payment_q)
+        resumes   = _fetch_rows("resumes", [("select", "user_id,created_at")] + resume_q)
+        campaigns = _fetch_rows("blast_campaigns",
+                                [("select", "user_id,status," + ",".join(_CAMPAIGN_STAMPS))] + campaign_q)
+        with self._lock:
+            for row in users:
+                self._apply_user(row)
+            for row in payments:
+                self._apply_payment(row)
+            for row in resumes:
+                self._apply_resume(row)
+            for row in campaigns:
+                self._apply_campaign(row)
+            self.refreshed_at = time.monotonic()
+            self.last_refreshed = _now_iso()
+
+    def ensure_fresh(self, force: str = None):
+        """
+        Rebuild or delta-refresh if due. force="full" rebuilds, force="delta"
+        refreshes regardless of age.
+        """
+        with self._refresh_lock:
+            now = time.monotonic()
+            if (force == "full" or self.built_at is None
+                    or now - self.built_at >= PROFILE_INDEX_REBUILD_SECONDS):
+                self.rebuild()
+            elif force == "delta" or now - self.refreshed_at >= PROFILE_INDEX_REFRESH_SECONDS:
+                self.refresh()
+
+    # ── write-path hooks ─────────────────────────────────────────────────────
+
+    def _hook(self, fn, *args):
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((fn, args))
+            if self.built_at is not None:
+                fn(*args)
+
+    def _profile_update(self, email, fields):
+        uid = self.email_to_id.get(_norm_email(email))
+        if uid in self.users:
+            self.users[uid].update({k: v for k, v in fields.items() if k in USER_FIELDS})
+
+    def record_payment(self, user_id=None, email=None, completed_at=None):
+        self._hook(self._apply_payment, {"user_id": user_id, "user_email": email,
+                                         "completed_at": completed_at}, False)
+
+    def record_analysis(self, user_id):
+        if user_id:
+            self._hook(self._apply_resume, {"user_id": user_id}, False)
+
+    def record_profile(self, email, fields: dict):
+        self._hook(self._profile_update, email, dict(fields))
+
+    def record_campaign(self, user_id, status, created_at):
+        self._hook(self._apply_campaign, {"user_id": user_id, "status": status,
+                                          "created_at": created_at}, False)
+
+    # ── reads ────────────────────────────────────────────────────────────────
+
+    def entries(self) -> list:
+        """Every user with user_type / campaign_status / paid / complete flags."""
+        with self._lock:
+            result = []
+            for uid, u in self.users.items():
+                user_type = classify_user_type(uid, self.paid_ids, self.analyzed_ids,
+                                               u.get("email"), self.paid_emails)
+                result.append({
+                    "id":              uid,
+                    "email":           u.get("email"),
+                    "first_name":      u.get("first_name"),
+                    "last_name":       u.get("last_name"),
+                    "phone":           u.get("phone"),
+                    "primary_skills":  u.get("primary_skills"),
+                    "user_type":       user_type,
+                    "campaign_status": self.latest.get(uid, (None,))[0],
+                    "created_at":      u.get("created_at"),
+                    "is_paid":         user_type == "paid",
+                    "is_complete":     bool(u.get("profile_completed")),
+                    "profile_completed": u.get("profile_completed"),
+                })
+            return result
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "users":          len(self.users),
+                "built_at":       self.last_built,
+                "refreshed_at":   self.last_refreshed,
+                "watermarks":     dict(self.watermarks),
+            }
+
+
+profile_index = ProfileIndex()
+
+
+def _safe(hook):
+    """Write paths must never fail because of the index."""
+    def wrapper(*args, **kwargs):
+        try:
+            hook(*args, **kwargs)
+        except Exception as e:
+            log.warning(f"Profile index hook {hook.__name__} failed: {e}")
+    wrapper.__name__ = hook.__name__
+    return wrapper
+
+
+record_payment  = _safe(profile_index.record_payment)
+record_analysis = _safe(profile_index.record_analysis)
+record_profile  = _safe(profile_index.record_profile)
+record_campaign = _safe(profile_index.record_campaign)
@@ -0,0 +1,209 @@
+# backend/services/profiling.py
+"""
+Opt-in cProfile capture for admin requests and drip scheduler jobs.
+
+Nothing here runs unless it is switched on by env, so production pays no
+cost when profiling is off: install(app) registers no hooks and
+profile_job() returns the function unchanged.
+
+  * Requests — with PROFILING=1, an /api/admin/* request that sends
+    `X-Profile: 1` (or `?profile=1`) is run under cProfile. The saved
+    profile's name comes back in the X-Profile-Id response header.
+  * Scheduler — PROFILE_SCHEDULER=1 profiles every scheduler job, or
+    PROFILE_SCHEDULER=tick,reconcile only the named ones (job names as in
+    drip_job_seconds).
+
+Profiles are written as pstats files to PROFILE_DIR (shared by all gunicorn
+workers) and only the newest PROFILE_KEEP are kept. routes/profiling.py
+lists them and serves them either raw (snakeviz / python -m pstats) or as
+a text summary.
+
+Config (env):
+  PROFILING          1 = allow per-request profiling on admin routes  (0)
+  PROFILE_SCHEDULER  1 | all | comma-separated job names              (off)
+  PROFILE_DIR        where profiles are written       ($TMPDIR/resumeblast-profiles)
+  PROFILE_KEEP       profiles kept before the oldest are deleted      (50)
+"""
+import cProfile
+import functools
+import io
+import os
+import pstats
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+PROFILING         = os.getenv("PROFILING", "0").lower() in ("1", "true", "yes")
+PROFILE_SCHEDULER = os.getenv("PROFILE_SCHEDULER", "").strip().lower()
+PROFILE_DIR       = os.getenv("PROFILE_DIR") or os.path.join(tempfile.gettempdir(), "resumeblast-profiles")
+PROFILE_KEEP      = int(os.getenv("PROFILE_KEEP", "50"))
+
+PROFILE_SUFFIX = ".prof"
+_NAME_RE       = re.compile(r"^[\w.-]+\.prof$")
+_ADMIN_PREFIX  = "/api/admin/"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Capture / storage
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^\w-]+", "_", value).strip("_")[:60] or "root"
+
+
+def _rotate():
+    profiles = list_profiles()
+    for entry in profiles[PROFILE_KEEP:]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, entry["name"]))
+        except OSError:
+            pass
+
+
+def save(profiler: cProfile.Profile, kind: str, label: str) -> str:
+    """Dump a finished profiler to PROFILE_DIR; returns the profile name."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    name  = f"{stamp}-{kind}-{_slug(label)}-{os.getpid()}{PROFILE_SUFFIX}"
+    profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+    _rotate()
+    return name
+
+
+@contextmanager
+def profiled(kind: str, label: str):
+    """
+    Profile a block and save it. Yields a dict that gets the profile
+    "name" and "elapsed_ms" once the block exits.
+    """
+    result   = {}
+    profiler = cProfile.Profile()
+    started  = time.perf_counter()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        try:
+            result["name"] = save(profiler, kind, label)
+            log.info("Profile saved", extra={"profile": result["name"], "kind": kind,
+                                             "label": label, "elapsed_ms": result["elapsed_ms"]})
+        except OSError as e:
+            log.warning(f"Could not save profile for {kind}/{label}: {e}")
+
+
+def list_profiles() -> list:
+    """Saved profiles, newest first."""
+    try:
+        names = [n for n in os.listdir(PROFILE_DIR) if _NAME_RE.match(n)]
+    except FileNotFoundError:
+        return []
+    entries = []
+    for name in names:
+        try:
+            st = os.stat(os.path.join(PROFILE_DIR, name))
+        except OSError:
+            continue
+        stamp, kind, rest = (name[:-len(PROFILE_SUFFIX)].split("-", 2) + ["", ""])[:3]
+        entries.append({
+            "name":       name,
+            "kind":       kind,
+            "label":      rest.rpartition("-")[0] or rest,
+            "created_at": datetime.fromtimestamp(st.st_mtime, timezone.utc).isoformat(),
+            "size_bytes": st.st_size,
+        })
+    entries.sort(key=lambda e: e["name"], reverse=True)
+    return entries
+
+
+def profile_path(name: str):
+    """Absolute path of a saved profile, or None for unknown / unsafe names."""
+    if not _NAME_RE.match(name or ""):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def render_text(path: str, sort: str = "cumulative", limit: int = 50) -> str:
+    """pstats summary of a saved profile."""
+    out   = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Scheduler jobs
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _scheduler_enabled(job: str) -> bool:
+    if PROFILE_SCHEDULER in ("", "0", "false", "no", "off"):
+        return False
+    if PROFILE_SCHEDULER in ("1", "true", "yes", "all"):
+        return True
+    return job in {j.strip() for j in PROFILE_SCHEDULER.split(",")}
+
+
+def profile_job(job: str):
+    """Decorator: profile every run of a scheduler job when PROFILE_SCHEDULER selects it."""
+    def decorator(fn):
+        if not _scheduler_enabled(job):
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with profiled("job", job):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Flask hooks
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _wants_profile(request) -> bool:
+    if not request.path.startswith(_ADMIN_PREFIX):
+        return False
+    flag = request.headers.get("X-Profile") or request.args.get("profile") or ""
+    return flag.lower() in ("1", "true", "yes")
+
+
+def install(app):
+    """Register the per-request profiling hooks (only when PROFILING=1)."""
+    if not PROFILING:
+        return
+
+    from flask import request, g
+
+    @app.before_request
+    def _start_profile():
+        if _wants_profile(request):
+            g._profile = profiled("request", f"{request.method} {request.path}")
+            g._profile_result = g._profile.__enter__()
+
+    @app.after_request
+    def _finish_profile(response):
+        ctx = g.pop("_profile", None)
+        if ctx is not None:
+            ctx.__exit__(None, None, None)
+            name = g.pop("_profile_result", {}).get("name")
+            if name:
+                response.headers["X-Profile-Id"] = name
+        return response
+
+    @app.teardown_request
+    def _abandon_profile(exc):
+        # after_request is skipped when the view raised
+        ctx = g.pop("_profile", None)
+        if ctx is not None:
+            ctx.__exit__(None, None, None)
+
+    log.info("Request profiling enabled", extra={"profile_dir": PROFILE_DIR})
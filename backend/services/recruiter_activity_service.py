@@ -2,6 +2,13 @@ import os
 import requests
 from datetime import datetime
 import json
+from services.batch_writer import BatchWriter
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+# Activity rows are inserted in batches (services/batch_writer.py)
+recruiter_activity_events = BatchWriter("recruiter_activity")
 
 class RecruiterActivityService:
     """
@@ -28,7 +35,8 @@ class RecruiterActivityService:
     @staticmethod
     def log_activity(recruiter_id, activity_type, activity_details=None):
         """
-        Log recruiter activity to recruiter_activity table
+        Log recruiter activity to recruiter_activity table (queued; a
+        background flusher inserts batches)
         
         Args:
             recruiter_id: UUID of the recruiter
@@ -36,11 +44,9 @@ class RecruiterActivityService:
             activity_details: Additional details as dictionary
         
         Returns:
-            dict: {'success': bool, 'data': dict/None, 'error': str/None}
+            dict: {'success': bool, 'data': None, 'error': str/None}
         """
         try:
-            url = f"{RecruiterActivityService._get_base_url()}/recruiter_activity"
-            
             # ✅ FIX: Extract email from activity_details to populate recruiter_email column
             details = activity_details or {}
             email = details.get('email')
@@ -53,27 +59,15 @@ class RecruiterActivityService:
                 'created_at': datetime.utcnow().isoformat()
             }
             
-            print(f"📝 Logging recruiter activity: {activity_type} for recruiter {recruiter_id}")
+            log.info(f"Logging recruiter activity: {activity_type} for recruiter {recruiter_id}")
             
-            response = requests.post(
-                url,
-                headers=RecruiterActivityService._get_headers(),
-                json=activity_data,
-                timeout=10
-            )
-            
-            if response.status_code in [200, 201]:
-                print(f"✅ Recruiter activity logged successfully: {activity_type}")
-                return {'success': True, 'data': response.json()}
-            else:
-                error_msg = f"Status {response.status_code}: {response.text}"
-                print(f"❌ Failed to log activity: {error_msg}")
-                return {'success': False, 'error': error_msg}
+            if not recruiter_activity_events.add(activity_data):
+                log.warning(f"Recruiter activity dropped (buffer full): {activity_type}")
+                return {'success': False, 'dropped': True, 'error': 'Activity buffer full'}
+            return {'success': True, 'queued': True, 'data': None}
             
         except Exception as e:
-            print(f"❌ Error logging recruiter activity: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            log.exception(f"Error logging recruiter activity: {str(e)}")
             return {'success': False, 'error': str(e)}
     
     @staticmethod
@@ -102,7 +96,7 @@ class RecruiterActivityService:
             if activity_type:
                 params['activity_type'] = f'eq.{activity_type}'
             
-            print(f"🔍 Fetching activities for recruiter: {recruiter_id}")
+            log.info(f"Fetching activities for recruiter: {recruiter_id}")
             
             response = requests.get(
                 url,
@@ -112,17 +106,15 @@ class RecruiterActivityService:
             )
             
             if response.status_code == 200:
-                print(f"✅ Successfully fetched {len(response.json())} activities")
+                log.info(f"Successfully fetched {len(response.json())} activities")
                 return {'success': True, 'data': response.json()}
             else:
                 error_msg = f"Status {response.status_code}: {response.text}"
-                print(f"❌ Failed to fetch activities: {error_msg}")
+                log.error(f"Failed to fetch activities: {error_msg}")
                 return {'success': False, 'error': error_msg}
             
         except Exception as e:
-            print(f"❌ Error fetching recruiter activities: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            log.exception(f"Error fetching recruiter activities: {str(e)}")
             return {'success': False, 'error': str(e)}
     
     @staticmethod
@@ -146,7 +138,7 @@ class RecruiterActivityService:
                 'limit': limit
             }
             
-            print(f"🔍 Fetching all recruiter activities (limit: {limit})")
+            log.info(f"Fetching all recruiter activities (limit: {limit})")
             
             response = requests.get(
                 url,
@@ -157,15 +149,13 @@ class RecruiterActivityService:
             
             if response.status_code == 200:
                 activities = response.json()
-                print(f"✅ Successfully fetched {len(activities)} activities")
+                log.info(f"Successfully fetched {len(activities)} activities")
                 return {'success': True, 'data': activities}
             else:
                 error_msg = f"Status {response.status_code}: {response.text}"
-                print(f"❌ Failed to fetch all activities: {error_msg}")
+                log.error(f"Failed to fetch all activities: {error_msg}")
                 return {'success': False, 'error': error_msg}
             
         except Exception as e:
-            print(f"❌ Error fetching all recruiter activities: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            log.exception(f"Error fetching all recruiter activities: {str(e)}")
             return {'success': False, 'error': str(e)}
\ No newline at end of file
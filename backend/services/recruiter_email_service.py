@@ -14,6 +14,10 @@ import os
 import requests
 import base64
 from datetime import datetime
+from services.mail_transport import get_transport
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
 
 class RecruiterEmailService:
     """
@@ -25,15 +29,7 @@ class RecruiterEmailService:
         self.api_key = os.getenv('BREVO_API_KEY')
         self.sender_email = os.getenv('BREVO_SENDER_EMAIL', 'noreply@resumeblast.ai')
         self.sender_name = os.getenv('BREVO_SENDER_NAME', 'ResumeBlast.ai')
-        self.api_url = 'https://api.brevo.com/v3/smtp/email'
-        
-    def _get_headers(self):
-        """Get headers for Brevo API requests"""
-        return {
-            'accept': 'application/json',
-            'api-key': self.api_key,
-            'content-type': 'application/json'
-        }
+        self.transport = get_transport('brevo')
     
     def _download_resume(self, resume_url):
         """
@@ -41,7 +37,7 @@ class RecruiterEmailService:
         Returns: (base64_content, filename, mime_type)
         """
         try:
-            print(f"📥 Downloading resume from: {resume_url}")
+            log.info(f"Downloading resume from: {resume_url}")
             
             response = requests.get(resume_url, timeout=30)
             response.raise_for_status()
@@ -64,11 +60,11 @@ class RecruiterEmailService:
             # Convert to base64
             base64_content = base64.b64encode(response.content).decode('utf-8')
             
-            print(f"✅ Resume downloaded: {filename} ({len(base64_content)} bytes base64)")
+            log.info(f"Resume downloaded: {filename} ({len(base64_content)} bytes base64)")
             return base64_content, filename, mime_type
             
         except Exception as e:
-            print(f"❌ Error downloading resume: {str(e)}")
+            log.error(f"Error downloading resume: {str(e)}")
             raise Exception(f"Failed to download resume: {str(e)}")
     
     def _generate_email_template(self, candidate_data, recruiter_data):
@@ -191,10 +187,7 @@ class RecruiterEmailService:
         Send resume email to a single recruiter with attachment
         """
         try:
-            if not self.api_key:
-                raise Exception("BREVO_API_KEY not configured in environment variables")
-            
-            print(f"\n📧 Preparing email for: {recruiter_data.get('email')}")
+            log.debug(f"Preparing email for: {recruiter_data.get('email')}")
             
             # Download and encode resume
             base64_content, filename, mime_type = self._download_resume(resume_url)
@@ -239,22 +232,14 @@ class RecruiterEmailService:
             # This prevents the "missing_parameter" error when campaign_id is blank
             if campaign_id:
                 email_payload["tags"] = [str(campaign_id)]
-                print(f"   🏷️  Tagged with campaign_id: {campaign_id}")
             
-            print(f"📤 Sending email via Brevo API...")
             
-            # Send email via Brevo
-            response = requests.post(
-                self.api_url,
-                headers=self._get_headers(),
-                json=email_payload,
-                timeout=30
-            )
+            # Send email via the configured transport (Brevo by default)
+            response = self.transport.send(email_payload, timeout=30)
             
-            if response.status_code in [200, 201]:
-                result = response.json()
-                message_id = result.get('messageId', 'unknown')
-                print(f"✅ Email sent successfully! Message ID: {message_id}")
+            if response['success']:
+                message_id = response['message_id']
+                log.debug("Recruiter email sent", extra={"to": recruiter_data.get('email'), "message_id": message_id, "campaign_id": campaign_id})
                 return {
                     'success': True,
                     'message_id': message_id,
@@ -262,8 +247,8 @@ class RecruiterEmailService:
                     'error': None
                 }
             else:
-                error_msg = f"Brevo API error ({response.status_code}): {response.text}"
-                print(f"❌ {error_msg}")
+                error_msg = response['error']
+                log.warning(f"Send to {recruiter_data.get('email')} failed: {error_msg}")
                 return {
                     'success': False,
                     'message_id': None,
@@ -273,9 +258,7 @@ class RecruiterEmailService:
                 
         except Exception as e:
             error_msg = str(e)
-            print(f"❌ Error sending email to {recruiter_data.get('email')}: {error_msg}")
-            import traceback
-            traceback.print_exc()
+            log.exception(f"Error sending email to {recruiter_data.get('email')}: {error_msg}")
             return {
                 'success': False,
                 'message_id': None,
@@ -287,22 +270,16 @@ class RecruiterEmailService:
         """
         Send resume to multiple recruiters
         """
-        print(f"\n{'='*70}")
-        print(f"🚀 STARTING RESUME BLAST")
-        print(f"{'='*70}")
-        print(f"📊 Total Recipients: {len(recruiters_list)}")
-        print(f"👤 Candidate: {candidate_data.get('candidate_name')}")
-        print(f"📄 Resume: {resume_name}")
-        if campaign_id:
-            print(f"🏷️  Campaign ID (Brevo tag): {campaign_id}")
-        print(f"{'='*70}\n")
+        log.info("Starting resume blast", extra={
+            "recipients": len(recruiters_list), "candidate": candidate_data.get('candidate_name'),
+            "resume": resume_name, "campaign_id": campaign_id,
+        })
         
         results = []
         successful = 0
         failed = 0
         
         for i, recruiter in enumerate(recruiters_list, 1):
-            print(f"\n📮 [{i}/{len(recruiters_list)}] Processing: {recruiter.get('name')} ({recruiter.get('email')})")
             
             result = self.send_resume_to_recruiter(
                 candidate_data=candidate_data,
@@ -316,18 +293,13 @@ class RecruiterEmailService:
             
             if result['success']:
                 successful += 1
-                print(f"   ✅ Success")
             else:
                 failed += 1
-                print(f"   ❌ Failed: {result['error']}")
         
-        print(f"\n{'='*70}")
-        print(f"📊 BLAST COMPLETE")
-        print(f"{'='*70}")
-        print(f"✅ Successful: {successful}")
-        print(f"❌ Failed: {failed}")
-        print(f"📈 Success Rate: {(successful/len(recruiters_list)*100):.1f}%")
-        print(f"{'='*70}\n")
+        log.info("Resume blast complete", extra={
+            "campaign_id": campaign_id, "successful": successful, "failed": failed,
+            "success_rate": round(successful / len(recruiters_list) * 100, 1) if recruiters_list else 0.0,
+        })
         
         return {
             'total': len(recruiters_list),
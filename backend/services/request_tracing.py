@@ -0,0 +1,282 @@
+# backend/services/request_tracing.py
+"""
+Request-scoped tracing of outbound calls (Supabase, Stripe, Brevo, Resend,
+Anthropic).
+
+install(app) patches requests.Session.send (used by our PostgREST calls, the
+Stripe SDK, the Resend SDK and the mail transports) and httpx.Client.send
+(Anthropic SDK) once per process. While a Flask request is being handled,
+every outbound call is recorded with service, host, method, table/path,
+status and duration. after_request then:
+
+  * adds a Server-Timing header, one entry per service plus the totals:
+        Server-Timing: supabase;dur=41.2;desc="6 calls", stripe;dur=310.0;desc="1 call",
+                       ext;dur=351.2;desc="7 calls", app;dur=402.8
+  * logs one structured "Request summary" record with the request, the
+    call count, total external time, per-service breakdown and the slowest
+    call — for every request, or only slow ones (REQUEST_TRACE_LOG).
+
+Calls made outside a request (drip scheduler threads, CLI scripts) are not
+part of a trace, but are still passed to observers registered with
+add_observer() (services/metrics.py uses this for Supabase latency).
+
+Config (env):
+  REQUEST_TRACING           1 = enabled                                (1)
+  REQUEST_TRACE_LOG         all | slow | off                           (slow)
+  SLOW_REQUEST_MS           request wall time that counts as slow      (1000)
+  SLOW_REQUEST_CALLS        external call count that counts as slow    (10)
+  SLOW_EXTERNAL_CALL_MS     a single call this slow marks it slow too  (500)
+"""
+import logging
+import os
+import time
+from contextvars import ContextVar
+from urllib.parse import urlparse
+
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+REQUEST_TRACING       = os.getenv("REQUEST_TRACING", "1").lower() in ("1", "true", "yes")
+REQUEST_TRACE_LOG     = os.getenv("REQUEST_TRACE_LOG", "slow").lower()
+SLOW_REQUEST_MS       = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+SLOW_REQUEST_CALLS    = int(os.getenv("SLOW_REQUEST_CALLS", "10"))
+SLOW_EXTERNAL_CALL_MS = float(os.getenv("SLOW_EXTERNAL_CALL_MS", "500"))
+
+_KNOWN_HOSTS = {
+    "api.stripe.com":    "stripe",
+    "api.brevo.com":     "brevo",
+    "api.sendinblue.com": "brevo",
+    "api.resend.com":    "resend",
+    "api.anthropic.com": "anthropic",
+}
+
+_current_trace: ContextVar = ContextVar("request_trace", default=None)
+_installed = False
+_observers = []
+
+
+class RequestTrace:
+    """Outbound calls made while handling one request."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.calls      = []
+
+    def record(self, service, host, method, target, status, duration_ms):
+        self.calls.append({
+            "service":     service,
+            "host":        host,
+            "method":      method,
+            "target":      target,
+            "status":      status,
+            "duration_ms": round(duration_ms, 2),
+        })
+
+    def summary(self) -> dict:
+        by_service = {}
+        for call in self.calls:
+            entry = by_service.setdefault(call["service"], {"count": 0, "duration_ms": 0.0})
+            entry["count"]       += 1
+            entry["duration_ms"] += call["duration_ms"]
+        for entry in by_service.values():
+            entry["duration_ms"] = round(entry["duration_ms"], 2)
+        slowest = max(self.calls, key=lambda c: c["duration_ms"]) if self.calls else None
+        return {
+            "external_calls": len(self.calls),
+            "external_ms":    round(sum(c["duration_ms"] for c in self.calls), 2),
+            "by_service":     by_service,
+            "slowest":        slowest,
+            "elapsed_ms":     round((time.perf_counter() - self.started_at) * 1000, 2),
+        }
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Call classification
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _service_hosts() -> dict:
+    hosts = dict(_KNOWN_HOSTS)
+    for env, service in (("SUPABASE_URL", "supabase"), ("BREVO_API_BASE", "brevo"),
+                         ("RESEND_API_URL", "resend")):
+        host = urlparse(os.getenv(env) or "").netloc
+        if host:
+            hosts[host] = service
+    return hosts
+
+
+def classify(url: str):
+    """Returns (service, host, target) for an outbound URL."""
+    parsed = urlparse(url)
+    host   = parsed.netloc
+    path   = parsed.path or "/"
+    service = _service_hosts().get(host)
+    if service is None:
+        service = "supabase" if host.endswith(".supabase.co") else "other"
+
+    if service == "supabase":
+        parts = path.strip("/").split("/")
+        if parts[:2] == ["rest", "v1"] and len(parts) > 2:
+            target = "rpc/" + parts[3] if parts[2] == "rpc" and len(parts) > 3 else parts[2]
+        elif parts[:1] == ["auth"]:
+            target = "auth/" + "/".join(parts[2:4])
+        elif parts[:1] == ["storage"]:
+            target = "storage/" + "/".join(parts[2:4])
+        else:
+            target = path
+    else:
+        # Drop ids (cs_..., msg_...) so targets aggregate: /v1/checkout/sessions
+        segments = [s for s in path.strip("/").split("/") if s]
+        target = "/" + "/".join(s for s in segments[:3] if not any(ch.isdigit() for ch in s))
+    return service, host, target
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Patching
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _record(method, url, status, started):
+    duration_ms = (time.perf_counter() - started) * 1000
+    service, host, target = classify(str(url))
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record(service, host, method, target, status, duration_ms)
+    for observer in _observers:
+        try:
+            observer(service, method, target, status, duration_ms)
+        except Exception as e:
+            log.warning(f"Observer {getattr(observer, '__name__', observer)} failed: {e}")
+
+
+def _active() -> bool:
+    return bool(_observers) or _current_trace.get() is not None
+
+
+def _patch_requests():
+    import requests
+
+    original = requests.Session.send
+    if getattr(original, "_traced", False):
+        return
+
+    def send(self, request, **kwargs):
+        if not _active():
+            return original(self, request, **kwargs)
+        started = time.perf_counter()
+        status  = None
+        try:
+            response = original(self, request, **kwargs)
+            status   = response.status_code
+            return response
+        finally:
+            _record(request.method, request.url, status, started)
+
+    send._traced = True
+    requests.Session.send = send
+
+
+def _patch_httpx():
+    try:
+        import httpx
+    except ImportError:
+        return
+
+    original = httpx.Client.send
+    if getattr(original, "_traced", False):
+        return
+
+    def send(self, request, **kwargs):
+        if not _active():
+            return original(self, request, **kwargs)
+        started = time.perf_counter()
+        status  = None
+        try:
+            response = original(self, request, **kwargs)
+            status   = response.status_code
+            return response
+        finally:
+            _record(request.method, request.url, status, started)
+
+    send._traced = True
+    httpx.Client.send = send
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Flask hooks
+# ─────────────────────────────────────────────────────────────────────────────
+
+def server_timing(summary: dict) -> str:
+    entries = []
+    for service, entry in sorted(summary["by_service"].items()):
+        noun = "call" if entry["count"] == 1 else "calls"
+        entries.append(f'{service};dur={entry["duration_ms"]};desc="{entry["count"]} {noun}"')
+    entries.append(f'ext;dur={summary["external_ms"]};desc="{summary["external_calls"]} calls"')
+    entries.append(f'app;dur={summary["elapsed_ms"]}')
+    return ", ".join(entries)
+
+
+def is_slow(summary: dict) -> bool:
+    slowest = summary["slowest"]
+    return (summary["elapsed_ms"] >= SLOW_REQUEST_MS
+            or summary["external_calls"] >= SLOW_REQUEST_CALLS
+            or (slowest is not None and slowest["duration_ms"] >= SLOW_EXTERNAL_CALL_MS))
+
+
+def _install_patches():
+    global _installed
+    if not _installed:
+        _patch_requests()
+        _patch_httpx()
+        _installed = True
+
+
+def add_observer(fn):
+    """Call fn(service, method, target, status, duration_ms) for every outbound call."""
+    _install_patches()
+    if fn not in _observers:
+        _observers.append(fn)
+
+
+def install(app):
+    """Patch the HTTP clients and register the Flask hooks on `app`."""
+    if not REQUEST_TRACING:
+        log.info("Request tracing disabled (REQUEST_TRACING=0)")
+        return
+
+    from flask import request, g
+
+    _install_patches()
+
+    @app.before_request
+    def _start_trace():
+        g._trace_token = _current_trace.set(RequestTrace())
+
+    @app.after_request
+    def _finish_trace(response):
+        trace = _current_trace.get()
+        if trace is None:
+            return response
+        summary = trace.summary()
+        response.headers["Server-Timing"] = server_timing(summary)
+
+        slow = is_slow(summary)
+        if REQUEST_TRACE_LOG == "all" or (REQUEST_TRACE_LOG == "slow" and slow):
+            log.log(logging.WARNING if slow else logging.INFO, "Request summary", extra={
+                "method":   request.method,
+                "path":     request.path,
+                "endpoint": request.endpoint,
+                "status":   response.status_code,
+                "slow":     slow,
+                **summary,
+            })
+        return response
+
+    @app.teardown_request
+    def _end_trace(exc):
+        token = g.pop("_trace_token", None)
+        if token is not None:
+            _current_trace.reset(token)
@@ -0,0 +1,254 @@
+# backend/services/send_calendar.py
+"""
+Send-window calendar for recruiter emails.
+
+Business hours are defined in recruiter-local time (default America/New_York)
+and precomputed into a sorted list of disjoint UTC intervals per timezone,
+with weekends and holidays removed. "Is it open now?" and "when does it next
+open?" are then a single bisect — O(log n) — and DST shifts are handled by
+zoneinfo when the intervals are built.
+
+All datetimes in and out are NAIVE UTC, matching datetime.utcnow() used
+throughout the drip scheduler.
+
+Config (env):
+  SEND_CALENDAR_TIMEZONE      default recruiter timezone   (America/New_York)
+  SEND_WINDOWS                local windows                (10:00-12:00,13:30-15:00)
+  SEND_WEEKDAYS               allowed weekdays, Mon=0      (0-4)
+  SEND_CALENDAR_US_HOLIDAYS   skip US federal holidays     (1)
+  SEND_CALENDAR_HOLIDAYS      extra closed dates           (YYYY-MM-DD,...)
+  SEND_CALENDAR_HORIZON_DAYS  days precomputed per build   (120)
+"""
+import os
+import bisect
+import hashlib
+import threading
+from datetime import datetime, date, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_TIMEZONE = os.getenv("SEND_CALENDAR_TIMEZONE", "America/New_York")
+
+# 10:00–12:00 and 13:30–15:00 Eastern are the old hard-coded 14:00–16:00 and
+# 17:30–19:00 UTC windows during daylight saving time.
+SEND_WINDOWS     = os.getenv("SEND_WINDOWS", "10:00-12:00,13:30-15:00")
+SEND_WEEKDAYS    = os.getenv("SEND_WEEKDAYS", "0-4")
+USE_US_HOLIDAYS  = os.getenv("SEND_CALENDAR_US_HOLIDAYS", "1") not in ("0", "false", "False")
+EXTRA_HOLIDAYS   = os.getenv("SEND_CALENDAR_HOLIDAYS", "")
+HORIZON_DAYS     = int(os.getenv("SEND_CALENDAR_HORIZON_DAYS", "120"))
+
+# Campaigns that become due outside a window are spread over the first half
+# of the next window instead of all starting at the opening minute.
+SPREAD_FRACTION  = 0.5
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Config parsing
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _parse_windows(spec: str) -> list:
+    windows = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, end = part.split("-")
+        windows.append((time.fromisoformat(start.strip()), time.fromisoformat(end.strip())))
+    return sorted(windows)
+
+def _parse_weekdays(spec: str) -> set:
+    days = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if "-" in part:
+            lo, hi = part.split("-")
+            days.update(range(int(lo), int(hi) + 1))
+        elif part:
+            days.add(int(part))
+    return days
+
+def _parse_dates(spec: str) -> set:
+    return {date.fromisoformat(d.strip()) for d in spec.split(",") if d.strip()}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Holidays
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th (1-based) weekday of a month; n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _observed(d: date) -> date:
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+def us_federal_holidays(year: int) -> set:
+    """
+    US federal holidays (observed dates) falling in a year. A Saturday
+    New Year's Day is observed on Dec 31, so next year's one is included.
+    """
+    holidays = {
+        _observed(date(year, 1, 1)),            # New Year's Day
+        _observed(date(year + 1, 1, 1)),        # next New Year's Day (observed Dec 31)
+        _nth_weekday(year, 1, 0, 3),            # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),            # Presidents' Day
+        _nth_weekday(year, 5, 0, -1),           # Memorial Day
+        _observed(date(year, 6, 19)),           # Juneteenth
+        _observed(date(year, 7, 4)),            # Independence Day
+        _nth_weekday(year, 9, 0, 1),            # Labor Day
+        _nth_weekday(year, 10, 0, 2),           # Columbus Day
+        _observed(date(year, 11, 11)),          # Veterans Day
+        _nth_weekday(year, 11, 3, 4),           # Thanksgiving
+        _observed(date(year, 12, 25)),          # Christmas Day
+    }
+    return {d for d in holidays if d.year == year}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SendCalendar
+# ─────────────────────────────────────────────────────────────────────────────
+
+class SendCalendar:
+
+    def __init__(self, tz_name=DEFAULT_TIMEZONE, windows=None, weekdays=None,
+                 holidays=None, us_holidays=USE_US_HOLIDAYS, horizon_days=HORIZON_DAYS):
+        self.tz_name      = tz_name
+        self.zone         = ZoneInfo(tz_name)
+        self.windows      = windows  if windows  is not None else _parse_windows(SEND_WINDOWS)
+        self.weekdays     = weekdays if weekdays is not None else _parse_weekdays(SEND_WEEKDAYS)
+        self.holidays     = holidays if holidays is not None else _parse_dates(EXTRA_HOLIDAYS)
+        self.us_holidays  = us_holidays
+        self.horizon_days = horizon_days
+        self._lock        = threading.Lock()
+        self._starts      = []
+        self._ends        = []
+        self._covers_from = None
+        self._covers_to   = None
+
+    # ── interval table ───────────────────────────────────────────────────────
+
+    def _is_closed_day(self, d: date) -> bool:
+        if d.weekday() not in self.weekdays or d in self.holidays:
+            return True
+        return self.us_holidays and d in us_federal_holidays(d.year)
+
+    def _to_utc(self, d: date, t: time) -> datetime:
+        local = datetime.combine(d, t, tzinfo=self.zone)
+        return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+    def _build(self, around: datetime) -> None:
+        first_day = (around - timedelta(days=2)).date()
+        intervals = []
+        for offset in range(self.horizon_days + 3):
+            d = first_day + timedelta(days=offset)
+            if self._is_closed_day(d):
+                continue
+            for start, end in self.windows:
+                intervals.append((self._to_utc(d, start), self._to_utc(d, end)))
+
+        # Keep the table disjoint so one bisect answers every query
+        intervals.sort()
+        starts, ends = [], []
+        for start, end in intervals:
+            if end <= start:
+                continue
+            if ends and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+
+        self._starts, self._ends = starts, ends
+        self._covers_from = datetime.combine(first_day + timedelta(days=1), time())
+        self._covers_to   = datetime.combine(first_day + timedelta(days=self.horizon_days), time())
+
+    def _table(self, at: datetime):
+        with self._lock:
+            if self._covers_from is None or not (self._covers_from <= at < self._covers_to):
+                self._build(at)
+            return self._starts, self._ends
+
+    # ── queries ──────────────────────────────────────────────────────────────
+
+    def window_at(self, at: datetime = None):
+        """(start, end) of the window containing `at`, or None if closed."""
+        at = at or datetime.utcnow()
+        starts, ends = self._table(at)
+        i = bisect.bisect_right(starts, at) - 1
+        if i >= 0 and at < ends[i]:
+            return starts[i], ends[i]
+        return None
+
+    def is_open(self, at: datetime = None) -> bool:
+        return self.window_at(at) is not None
+
+    def next_window(self, after: datetime = None):
+        """The window containing `after`, else the next one to open."""
+        after = after or datetime.utcnow()
+        for _ in range(2):
+            starts, ends = self._table(after)
+            i = bisect.bisect_right(starts, after) - 1
+            if i >= 0 and after < ends[i]:
+                return starts[i], ends[i]
+            if i + 1 < len(starts):
+                return starts[i + 1], ends[i + 1]
+            # Past the precomputed horizon — rebuild from the last known point
+            after = max(after, self._covers_to)
+        return None
+
+    def next_open(self, after: datetime = None) -> datetime:
+        """First moment at or after `after` when sending is allowed."""
+        after  = after or datetime.utcnow()
+        window = self.next_window(after)
+        return max(after, window[0]) if window else after
+
+    def next_slot(self, after: datetime = None, key: str = "") -> datetime:
+        """
+        Like next_open(), but when `after` falls outside a window the result
+        is offset by a stable per-key amount, so many campaigns that become
+        due overnight are spread over the window instead of all firing at
+        its first minute.
+        """
+        after  = after or datetime.utcnow()
+        window = self.next_window(after)
+        if window is None:
+            return after
+        start, end = window
+        if after >= start or not key:
+            return max(after, start)
+        spread = (end - start).total_seconds() * SPREAD_FRACTION
+        digest = int(hashlib.sha1(str(key).encode()).hexdigest()[:8], 16)
+        return start + timedelta(seconds=digest % max(int(spread), 1))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Per-timezone registry
+# ─────────────────────────────────────────────────────────────────────────────
+_calendars      = {}
+_calendars_lock = threading.Lock()
+
+def calendar_for(tz_name: str = None) -> SendCalendar:
+    """Shared calendar for a timezone; unknown zones fall back to the default."""
+    tz_name = (tz_name or DEFAULT_TIMEZONE).strip()
+    with _calendars_lock:
+        cal = _calendars.get(tz_name)
+        if cal is None:
+            try:
+                cal = SendCalendar(tz_name)
+            except (ZoneInfoNotFoundError, ValueError):
+                log.warning(f"Unknown timezone {tz_name!r} -- using {DEFAULT_TIMEZONE}")
+                cal = _calendars.get(DEFAULT_TIMEZONE) or SendCalendar(DEFAULT_TIMEZONE)
+                _calendars[DEFAULT_TIMEZONE] = cal
+            _calendars[tz_name] = cal
+        return cal
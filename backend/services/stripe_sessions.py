@@ -0,0 +1,96 @@
+# backend/services/stripe_sessions.py
+"""
+Short-lived cache of Stripe Checkout Session objects.
+
+The webhook payload and /api/payment/verify already hold the full session,
+so they put() it here; the blast path then reads it with get()/fetch()
+instead of calling GET /v1/checkout/sessions/{id} again. fetch() only goes
+to Stripe on a miss, and always with a timeout.
+
+Entries are plain dicts (Stripe SDK objects are converted), kept for
+STRIPE_SESSION_CACHE_TTL seconds (default 300) per process.
+
+Env:
+  STRIPE_SESSION_CACHE_TTL   seconds (default 300)
+  STRIPE_SESSION_CACHE_SIZE  max entries (default 2000)
+  STRIPE_API_TIMEOUT         seconds for the fallback fetch (default 10)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+STRIPE_SESSION_CACHE_TTL  = float(os.getenv("STRIPE_SESSION_CACHE_TTL", "300"))
+STRIPE_SESSION_CACHE_SIZE = int(os.getenv("STRIPE_SESSION_CACHE_SIZE", "2000"))
+STRIPE_API_TIMEOUT        = float(os.getenv("STRIPE_API_TIMEOUT", "10"))
+
+
+def _as_dict(session) -> dict:
+    """Stripe SDK object (any version) or dict -> plain dict."""
+    for attr in ("to_dict_recursive", "to_dict"):
+        if hasattr(session, attr):
+            return getattr(session, attr)()
+    return dict(session)
+
+
+class StripeSessionCache:
+
+    def __init__(self, ttl=STRIPE_SESSION_CACHE_TTL, size=STRIPE_SESSION_CACHE_SIZE):
+        self.ttl      = ttl
+        self.size     = size
+        self._entries = OrderedDict()     # session_id -> (expires_at, session dict)
+        self._lock    = threading.Lock()
+
+    def put(self, session) -> dict:
+        data = _as_dict(session)
+        session_id = data.get("id")
+        if session_id:
+            with self._lock:
+                self._entries[session_id] = (time.time() + self.ttl, data)
+                self._entries.move_to_end(session_id)
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+        return data
+
+    def get(self, session_id: str):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[session_id]
+                return None
+            return entry[1]
+
+    def fetch(self, session_id: str):
+        """Cached session, else GET it from Stripe (None on failure)."""
+        cached = self.get(session_id)
+        if cached is not None:
+            return cached
+
+        stripe_key = os.getenv("STRIPE_SECRET_KEY")
+        if not stripe_key:
+            log.warning("STRIPE_SECRET_KEY not set, skipping Stripe session fetch")
+            return None
+        try:
+            resp = requests.get(
+                f"https://api.stripe.com/v1/checkout/sessions/{session_id}",
+                auth=(stripe_key, ""),
+                timeout=STRIPE_API_TIMEOUT,
+            )
+        except requests.RequestException as e:
+            log.warning(f"Stripe session fetch error: {e}")
+            return None
+        if resp.status_code != 200:
+            log.warning(f"Stripe session fetch failed: {resp.status_code}")
+            return None
+        return self.put(resp.json())
+
+
+stripe_sessions = StripeSessionCache()
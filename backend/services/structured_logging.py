@@ -0,0 +1,304 @@
+# backend/services/structured_logging.py
+"""
+Structured, buffered logging.
+
+Callers log through the stdlib:
+
+    from services.structured_logging import get_logger
+    log = get_logger(__name__)
+    log.info("Batch done", extra={"campaign_id": cid, "sent": 42})
+
+configure_logging() (run once, by get_logger or app.py) installs a single
+QueueHandler on the root logger. Records are handed to a bounded in-memory
+queue and written to stdout by a QueueListener thread, so request threads
+never block on stdout; if the queue is full the record is dropped and
+counted instead. Each line is one JSON object:
+
+    {"ts": "...", "level": "INFO", "logger": "services.drip_scheduler",
+     "msg": "Batch done", "correlation_id": "a1b2c3...", "campaign_id": "...", "sent": 42}
+
+Correlation ids come from a contextvar: install(app) sets one per request
+(from X-Request-ID when the caller sends one) and echoes it back in the
+X-Request-ID response header; background jobs use correlation(...).
+
+`extra` keys that clash with LogRecord attributes ("name", "module",
+"message", ...) make the stdlib raise KeyError inside the log call, which
+would fail the request. Loggers from get_logger rename them to
+"extra_<key>" instead.
+
+Config (env):
+  LOG_LEVEL       root level                                        (INFO)
+  LOG_FORMAT      json | text                                       (json)
+  LOG_SAMPLE      per-logger sampling of records below ERROR, e.g.
+                  "routes.webhooks=0.1,services.drip_scheduler=0.5"  (none)
+                  a logger matches its own entry or its parent's
+  LOG_QUEUE_SIZE  records buffered before new ones are dropped      (10000)
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+LOG_LEVEL      = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT     = os.getenv("LOG_FORMAT", "json").lower()
+LOG_SAMPLE     = os.getenv("LOG_SAMPLE", "")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+_correlation_id: ContextVar = ContextVar("correlation_id", default=None)
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "correlation_id", "taskName",
+}
+
+# extra= keys the stdlib refuses (it raises KeyError for these)
+_RESERVED_EXTRA = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_configured = False
+_config_lock = threading.Lock()
+_listener = None
+_handler = None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Correlation ids
+# ─────────────────────────────────────────────────────────────────────────────
+
+def new_correlation_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def get_correlation_id():
+    return _correlation_id.get()
+
+
+def set_correlation_id(value):
+    """Returns a token for reset_correlation_id()."""
+    return _correlation_id.set(value)
+
+
+def reset_correlation_id(token):
+    _correlation_id.reset(token)
+
+
+@contextmanager
+def correlation(value: str = None):
+    """Run a block (e.g. a scheduler job) under its own correlation id."""
+    token = _correlation_id.set(value or new_correlation_id())
+    try:
+        yield _correlation_id.get()
+    finally:
+        _correlation_id.reset(token)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Filters / formatters / handler
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _parse_sample(spec: str) -> dict:
+    rates = {}
+    for item in spec.split(","):
+        name, _, rate = item.strip().partition("=")
+        if name and rate:
+            try:
+                rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+            except ValueError:
+                print(f"[Logging] Ignoring bad LOG_SAMPLE entry {item!r}", file=sys.stderr)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of sub-ERROR records from the configured loggers."""
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates   = rates
+        self.dropped = 0
+
+    def _rate(self, name: str):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        if rate is None or rate >= 1.0 or random.random() < rate:
+            return True
+        self.dropped += 1
+        return False
+
+
+class SafeExtraLogger(logging.Logger):
+    """Prefixes reserved `extra` keys instead of raising."""
+
+    def makeRecord(self, name, level, fn, lno, msg, args, exc_info,
+                   func=None, extra=None, sinfo=None):
+        if extra and not _RESERVED_EXTRA.isdisjoint(extra):
+            extra = {(f"extra_{key}" if key in _RESERVED_EXTRA else key): value
+                     for key, value in extra.items()}
+        return super().makeRecord(name, level, fn, lno, msg, args, exc_info, func, extra, sinfo)
+
+
+logging.setLoggerClass(SafeExtraLogger)
+
+
+class CorrelationFilter(logging.Filter):
+    """Stamps the caller's correlation id before the record changes thread."""
+
+    def filter(self, record):
+        if not hasattr(record, "correlation_id"):
+            record.correlation_id = _correlation_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = {
+            "ts":     datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level":  record.levelname,
+            "logger": record.name,
+            "msg":    record.getMessage(),
+        }
+        if getattr(record, "correlation_id", None):
+            entry["correlation_id"] = record.correlation_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(correlation_id)s] %(message)s")
+
+    def format(self, record):
+        if not hasattr(record, "correlation_id"):
+            record.correlation_id = "-"
+        return super().format(record)
+
+
+class BufferedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: drops (and counts) when the queue is full."""
+
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Render message and traceback now (args may not survive the thread
+        # hop) but keep `extra` fields for the JSON formatter.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg  = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Setup
+# ─────────────────────────────────────────────────────────────────────────────
+
+def configure_logging(force: bool = False):
+    """Route every logger through the async JSON handler. Idempotent."""
+    global _configured, _listener, _handler
+    with _config_lock:
+        if _configured and not force:
+            return
+        if _listener is not None:
+            _listener.stop()
+
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+
+        _handler = BufferedQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+        _handler.addFilter(SamplingFilter(_parse_sample(LOG_SAMPLE)))
+        _handler.addFilter(CorrelationFilter())
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(_handler)
+        root.setLevel(LOG_LEVEL)
+
+        _listener = logging.handlers.QueueListener(_handler.queue, stream, respect_handler_level=False)
+        _listener.start()
+        if not _configured:
+            atexit.register(shutdown_logging)
+        _configured = True
+
+
+def shutdown_logging():
+    """Flush the queue. Registered with atexit."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    configure_logging()
+    return logging.getLogger(name)
+
+
+def stats() -> dict:
+    """Dropped-record counters (queue overflow / sampling)."""
+    if _handler is None:
+        return {"queue_dropped": 0, "sampled_out": 0}
+    sampler = next((f for f in _handler.filters if isinstance(f, SamplingFilter)), None)
+    return {
+        "queue_dropped": _handler.dropped,
+        "sampled_out":   sampler.dropped if sampler else 0,
+        "queued":        _handler.queue.qsize(),
+    }
+
+
+def install(app):
+    """Per-request correlation ids (X-Request-ID in and out)."""
+    from flask import request, g
+
+    configure_logging()
+
+    @app.before_request
+    def _bind_correlation_id():
+        incoming = (request.headers.get("X-Request-ID") or "")[:64]
+        g._correlation_token = _correlation_id.set(incoming or new_correlation_id())
+
+    @app.after_request
+    def _echo_correlation_id(response):
+        cid = _correlation_id.get()
+        if cid:
+            response.headers["X-Request-ID"] = cid
+        return response
+
+    @app.teardown_request
+    def _unbind_correlation_id(exc):
+        token = g.pop("_correlation_token", None)
+        if token is not None:
+            _correlation_id.reset(token)
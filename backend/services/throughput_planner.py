@@ -0,0 +1,268 @@
+# backend/services/throughput_planner.py
+"""
+Daily throughput planner for drip campaigns.
+
+Single home for the per-plan constants (recruiter limits, send delays,
+priority) that used to be copied between drip_scheduler.py,
+drip_campaign.py and blast.py.
+
+Instead of a flat DAILY_EMAIL_LIMIT per campaign, each campaign gets a daily
+allotment carved out of the account-wide Brevo capacity for the day:
+
+  1. Capacity = what the Brevo plan still allows today (free plan: 300/day
+     minus today's sends; credit plans: remaining monthly credits spread over
+     the rest of the month), minus a reserve for transactional mail.
+  2. Demand  = recruiters left in each open campaign's current wave, capped
+     at MAX_DAILY_PER_CAMPAIGN.
+  3. Capacity is water-filled across campaigns weighted by PLAN_PRIORITY:
+     every campaign gets capacity in proportion to its weight, campaigns
+     that need less than their share are filled and the surplus flows to the
+     rest, so the whole budget is used whenever there is demand for it.
+
+The plan is recomputed once per UTC day (and when a campaign appears that is
+not in today's plan). Campaigns that already sent today are left out of a
+re-plan, since their share is already reflected in Brevo's usage numbers.
+If Brevo stats are unavailable the planner falls back to DAILY_EMAIL_LIMIT
+per campaign, i.e. the previous behaviour.
+
+Config (env):
+  DAILY_EMAIL_LIMIT           fallback / minimum per-campaign batch   (50)
+  MAX_DAILY_PER_CAMPAIGN      hard cap per campaign per day           (300)
+  BREVO_DAILY_CAPACITY        fixed account capacity, skips Brevo API (unset)
+  BREVO_CAPACITY_RESERVE      fraction kept for transactional mail    (0.1)
+  THROUGHPUT_REPLAN_MINUTES   min gap between unscheduled re-plans    (15)
+  DRIP_SEND_DELAY_SCALE       multiplier on PLAN_SEND_DELAYS          (1.0)
+"""
+import os
+import threading
+import requests
+from calendar import monthrange
+from datetime import datetime, timedelta
+
+from services.plans_catalog import plans_catalog
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+DAILY_EMAIL_LIMIT         = int(os.getenv("DAILY_EMAIL_LIMIT", "50"))
+MAX_DAILY_PER_CAMPAIGN    = int(os.getenv("MAX_DAILY_PER_CAMPAIGN", "300"))
+BREVO_DAILY_CAPACITY      = os.getenv("BREVO_DAILY_CAPACITY")
+BREVO_CAPACITY_RESERVE    = float(os.getenv("BREVO_CAPACITY_RESERVE", "0.1"))
+THROUGHPUT_REPLAN_MINUTES = int(os.getenv("THROUGHPUT_REPLAN_MINUTES", "15"))
+DRIP_SEND_DELAY_SCALE     = float(os.getenv("DRIP_SEND_DELAY_SCALE", "1.0"))
+
+PLAN_SEND_DELAYS = {
+    "starter":      2.0,
+    "basic":        2.5,
+    "professional": 3.0,
+    "growth":       3.5,
+    "advanced":     4.0,
+    "premium":      4.5
+}
+
+# Relative share of the daily capacity. Bigger plans have more recruiters to
+# reach, so they get a proportionally larger slice.
+PLAN_PRIORITY = {
+    "free":         0.5,
+    "starter":      1.0,
+    "basic":        1.5,
+    "professional": 2.0,
+    "growth":       2.5,
+    "advanced":     3.0,
+    "premium":      3.5
+}
+
+
+def get_limit_for_plan(plan_name: str) -> int:
+    # Recruiter limits live in the plans table (services/plans_catalog.py)
+    return plans_catalog.recruiter_limit(plan_name)
+
+def get_delay_for_plan(plan_name: str) -> float:
+    return PLAN_SEND_DELAYS.get(plan_name, 2.0) * DRIP_SEND_DELAY_SCALE
+
+def get_priority_for_plan(plan_name: str) -> float:
+    return PLAN_PRIORITY.get(plan_name, 1.0)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Allocation
+# ─────────────────────────────────────────────────────────────────────────────
+
+def allocate(capacity: int, demands: dict, weights: dict) -> dict:
+    """
+    Weighted water-filling of `capacity` over {key: demand}.
+    Returns {key: allotment} with sum(allotment) <= capacity and
+    allotment <= demand for every key.
+    """
+    shares  = {k: 0.0 for k in demands}
+    active  = {k for k, d in demands.items() if d > 0}
+    left    = float(max(capacity, 0))
+
+    while active and left > 1e-9:
+        total_weight = sum(weights[k] for k in active)
+        filled = set()
+        for k in active:
+            if demands[k] - shares[k] <= left * weights[k] / total_weight:
+                filled.add(k)
+        if not filled:
+            for k in active:
+                shares[k] += left * weights[k] / total_weight
+            left = 0
+            break
+        for k in filled:
+            left -= demands[k] - shares[k]
+            shares[k] = float(demands[k])
+        active -= filled
+
+    # Round down, then hand leftover units to the largest remainders
+    result   = {k: int(v) for k, v in shares.items()}
+    leftover = min(int(max(capacity, 0)) - sum(result.values()),
+                   sum(demands[k] - result[k] for k in demands))
+    for k in sorted(shares, key=lambda k: shares[k] - result[k], reverse=True):
+        if leftover <= 0:
+            break
+        if result[k] < demands[k]:
+            result[k] += 1
+            leftover  -= 1
+    return result
+
+
+def daily_capacity(stats: dict, now: datetime = None) -> int:
+    """
+    Emails the account can still send today, from BrevoStatsService data.
+    Returns None when capacity cannot be determined.
+    """
+    if BREVO_DAILY_CAPACITY:
+        return max(int(int(BREVO_DAILY_CAPACITY) * (1 - BREVO_CAPACITY_RESERVE)), 0)
+    if not stats or not stats.get("success"):
+        return None
+
+    now        = now or datetime.utcnow()
+    details    = stats["plan_details"]
+    daily_sent = int(details.get("daily_sent") or 0)
+
+    if details.get("type") == "free":
+        budget = details.get("total_limit", 0)
+    else:
+        # Spread what is left of the month's credits over the remaining days,
+        # counting today's sends back in so a mid-day re-plan stays stable.
+        days_left = monthrange(now.year, now.month)[1] - now.day + 1
+        budget    = (int(details.get("credits_remaining") or 0) + daily_sent) / days_left
+
+    return max(int(budget * (1 - BREVO_CAPACITY_RESERVE)) - daily_sent, 0)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ThroughputPlanner
+# ─────────────────────────────────────────────────────────────────────────────
+
+class ThroughputPlanner:
+
+    def __init__(self):
+        self._lock       = threading.Lock()
+        self._day        = None
+        self._planned_at = None
+        self._capacity   = None
+        self._allotments = {}
+        self._replanning = False    # one thread computes a plan; the rest use the current one
+
+    def _load_open_campaigns(self) -> list:
+        from services.drip_scheduler import _get_supabase_url, _headers, _OPEN_CAMPAIGNS_QUERY
+
+        resp = requests.get(
+            f"{_get_supabase_url()}/rest/v1/blast_campaigns{_OPEN_CAMPAIGNS_QUERY}",
+            headers=_headers(),
+            timeout=15
+        )
+        if resp.status_code != 200:
+            log.error("Failed to load campaigns", extra={"status": resp.status_code,
+                                                         "body": resp.text[:200]})
+            return []
+        return resp.json()
+
+    def _compute_plan(self, now: datetime) -> tuple:
+        """(capacity, allotments) for today. Makes the Supabase / Brevo calls; no locking."""
+        from services.brevo_stats_service import BrevoStatsService
+        from services.drip_scheduler import _current_wave, WAVE_FIELDS
+
+        today = now.strftime("%Y-%m-%d")
+        demands, weights = {}, {}
+        for campaign in self._load_open_campaigns():
+            wave = _current_wave(campaign)
+            if wave is None:
+                continue
+            fields = WAVE_FIELDS[wave]
+            if str(campaign.get(fields["last_date"]) or "")[:10] == today:
+                continue  # Already had its batch today
+            plan      = campaign.get("plan_name", "starter")
+            remaining = get_limit_for_plan(plan) - int(campaign.get(fields["delivered"]) or 0)
+            demands[campaign["id"]] = max(min(remaining, MAX_DAILY_PER_CAMPAIGN), 0)
+            weights[campaign["id"]] = get_priority_for_plan(plan)
+
+        stats = None
+        if not BREVO_DAILY_CAPACITY:
+            try:
+                stats = BrevoStatsService.get_account_stats()
+            except Exception as e:
+                log.warning(f"Brevo stats unavailable: {e}")
+
+        capacity = daily_capacity(stats, now)
+        if capacity is None:
+            allotments = {cid: min(d, DAILY_EMAIL_LIMIT) for cid, d in demands.items()}
+        else:
+            allotments = allocate(capacity, demands, weights)
+
+        log.info("Daily plan", extra={"day": today, "capacity": capacity,
+                                      "campaigns": len(demands), "allotted": sum(allotments.values())})
+        return capacity, allotments
+
+    def allotment_for(self, campaign_id: str, plan_name: str = "starter") -> int:
+        """
+        Emails this campaign may send today. A re-plan runs outside the lock,
+        so callers never wait on its Supabase / Brevo calls; while it runs
+        they get the current plan (or the fallback for an unknown campaign).
+        """
+        now   = datetime.utcnow()
+        today = now.strftime("%Y-%m-%d")
+        with self._lock:
+            stale = self._day != today
+            unknown = campaign_id not in self._allotments
+            cooled = (self._planned_at is None or
+                      now - self._planned_at >= timedelta(minutes=THROUGHPUT_REPLAN_MINUTES))
+            replan = (stale or (unknown and cooled)) and not self._replanning
+            if replan:
+                self._replanning = True
+            elif not stale and campaign_id in self._allotments:
+                return self._allotments[campaign_id]
+
+        if replan:
+            try:
+                capacity, allotments = self._compute_plan(now)
+            except Exception as e:
+                log.warning(f"Re-plan failed, using DAILY_EMAIL_LIMIT: {e}")
+                with self._lock:
+                    self._replanning = False
+                return DAILY_EMAIL_LIMIT
+            with self._lock:
+                self._day, self._planned_at = today, now
+                self._capacity, self._allotments = capacity, allotments
+                self._replanning = False
+                if campaign_id in allotments:
+                    return allotments[campaign_id]
+        # Created after the last plan, inside the re-plan cool-down, or while
+        # another thread is re-planning
+        return min(DAILY_EMAIL_LIMIT, get_limit_for_plan(plan_name))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "day":        self._day,
+                "capacity":   self._capacity,
+                "allotments": dict(self._allotments),
+            }
+
+
+_planner = ThroughputPlanner()
+
+def get_planner() -> ThroughputPlanner:
+    return _planner
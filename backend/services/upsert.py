@@ -0,0 +1,144 @@
+# backend/services/upsert.py
+"""
+Single-statement PostgREST upserts.
+
+    upsert("payments", record, on_conflict="stripe_session_id")
+
+POSTs to /rest/v1/<table>?on_conflict=<cols> with
+Prefer: resolution=merge-duplicates. The database inserts or updates in one
+statement, which replaces the GET-then-PATCH-or-POST pattern: one round
+trip instead of two, and no window where two writers both see "missing"
+and insert twice. The conflict columns need a unique index or constraint
+(see sql/).
+
+merge-duplicates only overwrites the columns present in the payload, so
+leave out whatever must survive an update. ignore_duplicates=True makes it
+insert-if-missing instead.
+
+rows may be one dict or a list. PostgREST wants every object in a bulk
+body to have the same keys, so rows are grouped by key set and sent as one
+array per group, UPSERT_BATCH_SIZE (default 500) rows at a time.
+
+Until the unique index exists, Postgres rejects on_conflict with 42P10.
+The upsert then falls back to the old per-row path (PATCH by the conflict
+columns, POST when nothing matched; for ignore_duplicates, a lookup and
+POST), and remembers that for the table so later calls go straight there.
+The fallback is two round trips per row and not atomic: apply the index.
+"""
+import os
+from urllib.parse import quote
+
+import requests
+
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "500"))
+
+
+class UpsertError(RuntimeError):
+    """Supabase rejected the upsert; .status_code and .text carry the response."""
+
+    def __init__(self, table, status_code, text):
+        super().__init__(f"{table} upsert failed: {status_code} {text[:200]}")
+        self.status_code = status_code
+        self.text        = text
+
+
+def _get_supabase_url():
+    return os.getenv("SUPABASE_URL")
+
+
+def _headers(prefer):
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    return {
+        "apikey":        key,
+        "Authorization": f"Bearer {key}",
+        "Content-Type":  "application/json",
+        "Prefer":        prefer,
+    }
+
+
+_no_unique_index = set()    # (table, on_conflict) that answered 42P10
+
+
+def _is_missing_index(resp) -> bool:
+    try:
+        return resp.json().get("code") == "42P10"
+    except ValueError:
+        return False
+
+
+def _upsert_row_by_row(table, rows, on_conflict, ignore_duplicates, returning, timeout) -> list:
+    """PATCH-then-POST per row, for tables without the on_conflict unique index."""
+    base, keys, written = f"{_get_supabase_url()}/rest/v1/{table}", on_conflict.split(","), []
+    for row in rows:
+        if any(row.get(k) is None for k in keys):
+            raise UpsertError(table, 400, f"row has no value for {on_conflict}")
+        match = "&".join(f"{k}=eq.{quote(str(row[k]), safe='')}" for k in keys)
+        if ignore_duplicates:
+            resp = requests.get(f"{base}?{match}&select={keys[0]}&limit=1",
+                                headers=_headers("return=minimal"), timeout=timeout)
+            if resp.status_code != 200:
+                raise UpsertError(table, resp.status_code, resp.text)
+            if resp.json():
+                continue
+        else:
+            resp = requests.patch(f"{base}?{match}", json=row,
+                                  headers=_headers("return=representation"), timeout=timeout)
+            if resp.status_code not in (200, 204):
+                raise UpsertError(table, resp.status_code, resp.text)
+            if resp.status_code == 200 and resp.json():
+                if returning == "representation":
+                    written.extend(resp.json())
+                continue
+        resp = requests.post(base, json=row, headers=_headers(f"return={returning}"), timeout=timeout)
+        if resp.status_code not in (200, 201, 204):
+            raise UpsertError(table, resp.status_code, resp.text)
+        if returning == "representation" and resp.text:
+            written.extend(resp.json())
+    return written
+
+
+def upsert(table: str, rows, on_conflict: str, ignore_duplicates: bool = False,
+           returning: str = "minimal", timeout: float = 10) -> list:
+    """
+    Insert or merge rows on the on_conflict columns. Returns the written rows
+    when returning="representation", else []. Raises UpsertError.
+    """
+    rows = [rows] if isinstance(rows, dict) else list(rows)
+    if (table, on_conflict) in _no_unique_index:
+        return _upsert_row_by_row(table, rows, on_conflict, ignore_duplicates, returning, timeout)
+    resolution = "ignore-duplicates" if ignore_duplicates else "merge-duplicates"
+    headers = _headers(f"resolution={resolution},return={returning}")
+    url = f"{_get_supabase_url()}/rest/v1/{table}?on_conflict={on_conflict}"
+
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+
+    written = []
+    for group in groups.values():
+        for i in range(0, len(group), UPSERT_BATCH_SIZE):
+            batch = group[i:i + UPSERT_BATCH_SIZE]
+            if (table, on_conflict) in _no_unique_index:
+                written.extend(_upsert_row_by_row(table, batch, on_conflict, ignore_duplicates,
+                                                  returning, timeout))
+                continue
+            resp = requests.post(url, json=batch if len(batch) > 1 else batch[0],
+                                 headers=headers, timeout=timeout)
+            if resp.status_code == 400 and _is_missing_index(resp):
+                log.warning(f"No unique index on {table}({on_conflict}) — upserting row by row; "
+                            f"apply the migration in sql/")
+                _no_unique_index.add((table, on_conflict))
+                written.extend(_upsert_row_by_row(table, batch, on_conflict, ignore_duplicates,
+                                                  returning, timeout))
+                continue
+            if resp.status_code not in (200, 201, 204):
+                raise UpsertError(table, resp.status_code, resp.text)
+            if returning == "representation" and resp.text:
+                body = resp.json()
+                written.extend(body if isinstance(body, list) else [body])
+    log.debug("Upserted", extra={"table": table, "rows": len(rows), "groups": len(groups)})
+    return written
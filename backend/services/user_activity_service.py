@@ -1,8 +1,13 @@
 # backend/services/user_activity_service.py
-import os
-import requests
 from datetime import datetime
+from services.batch_writer import BatchWriter
 from services.guest_service import GuestService
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+# Registered-user events, inserted in batches (services/batch_writer.py)
+user_activity_events = BatchWriter("user_activity")
 
 
 class UserActivityService:
@@ -10,30 +15,18 @@ class UserActivityService:
     Activity logging service.
 
     REGISTERED USERS  →  user_activity table (unchanged, no RLS touched)
-    GUEST USERS       →  guest_users.activity_log JSONB array (new table only)
+    GUEST USERS       →  guest_activity_events table (batched, via GuestService)
 
     This split means we never alter user_activity's schema or policies.
+    Both paths are buffered: log_activity() queues the row and returns,
+    and a background flusher inserts batches.
     """
 
-    @staticmethod
-    def _get_headers():
-        key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-        return {
-            'apikey': key,
-            'Authorization': f"Bearer {key}",
-            'Content-Type': 'application/json',
-            'Prefer': 'return=representation'
-        }
-
-    @staticmethod
-    def _get_base_url():
-        return f"{os.getenv('SUPABASE_URL')}/rest/v1"
-
     @staticmethod
     def log_activity(user_id, email, event_type, metadata=None):
         """
         Route activity logs based on user type:
-        - Guest IDs (guest_...) → guest_users.activity_log via GuestService
+        - Guest IDs (guest_...) → guest_activity_events via GuestService
         - Registered UUIDs     → user_activity table (existing, untouched)
         """
         try:
@@ -41,9 +34,9 @@ class UserActivityService:
 
             if is_guest:
                 # ── GUEST PATH ──────────────────────────────────────────────
-                # Logs go into guest_users.activity_log JSONB array only.
+                # Logs go into guest_activity_events only (batched insert).
                 # The user_activity table is NOT touched for guests at all.
-                print(f"📝 Guest Activity: [{event_type}] for {user_id}")
+                log.info(f"Guest Activity: [{event_type}] for {user_id}")
                 return GuestService.log_activity(
                     guest_id=str(user_id),
                     event_type=event_type,
@@ -57,9 +50,8 @@ class UserActivityService:
 
             else:
                 # ── REGISTERED USER PATH ────────────────────────────────────
-                # Logs go into user_activity table exactly as before.
-                # Zero changes to existing behavior.
-                url = f"{UserActivityService._get_base_url()}/user_activity"
+                # Logs go into user_activity table exactly as before,
+                # queued for a batched insert.
                 activity_data = {
                     'user_id': str(user_id),
                     'email': email,
@@ -73,22 +65,13 @@ class UserActivityService:
                     'created_at': datetime.utcnow().isoformat()
                 }
 
-                print(f"📝 Registered Activity: [{event_type}] for {email}")
-
-                response = requests.post(
-                    url,
-                    headers=UserActivityService._get_headers(),
-                    json=activity_data,
-                    timeout=10
-                )
+                log.info(f"Registered Activity: [{event_type}] for {email}")
 
-                if response.status_code in [200, 201]:
-                    print(f"✅ Activity logged: {event_type}")
-                    return {'success': True}
-                else:
-                    print(f"❌ Activity log failed: {response.status_code} | {response.text}")
-                    return {'success': False, 'error': response.text}
+                if not user_activity_events.add(activity_data):
+                    log.warning(f"Activity dropped (buffer full): {event_type}")
+                    return {'success': False, 'dropped': True, 'error': 'Activity buffer full'}
+                return {'success': True, 'queued': True}
 
         except Exception as e:
-            print(f"❌ log_activity EXCEPTION: {str(e)}")
+            log.error(f"log_activity EXCEPTION: {str(e)}")
             return {'success': False, 'error': str(e)}
\ No newline at end of file
@@ -3,7 +3,10 @@ import os
 import requests
 from datetime import datetime
 import json
-import traceback
+from services import identity_resolver
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
 
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
@@ -31,7 +34,7 @@ class UserService:
                 return data[0] if data else None
             return None
         except Exception as e:
-            print(f"⚠️ Failed to fetch user archive data: {e}")
+            log.warning(f"Failed to fetch user archive data: {e}")
             return None
 
     @staticmethod
@@ -45,11 +48,7 @@ class UserService:
         5. Ban user in users table
         6. Delete from Supabase Auth
         """
-        print(f"\n{'='*70}")
-        print(f"🗑️  STARTING USER DELETION")
-        print(f"{'='*70}")
-        print(f"📧 Email: {email}")
-        print(f"👤 Deleted By: {deleted_by}")
+        log.info(f"Starting user deletion for {email}", extra={"deleted_by": deleted_by})
         
         deletion_summary = {
             'email': email,
@@ -60,64 +59,64 @@ class UserService:
         
         # STEP 1: Resolve User ID
         if not user_id:
-            print(f"\n🔍 Step 1: Resolving user ID...")
+            log.info(f"Step 1: Resolving user ID...")
             user_id = UserService.get_user_id_by_email(email)
             if user_id:
-                print(f"✅ User ID found: {user_id}")
+                log.info(f"User ID found: {user_id}")
                 deletion_summary['user_id'] = user_id
             else:
-                print(f"⚠️  User ID not found for {email}")
+                log.warning(f"User ID not found for {email}")
                 deletion_summary['user_id'] = None
         else:
             deletion_summary['user_id'] = user_id
-            print(f"✅ User ID provided: {user_id}")
+            log.info(f"User ID provided: {user_id}")
+
+        identity_resolver.forget(email=email, user_id=user_id)
         
         # STEP 1.5: Fetch Data to Archive (Before deleting!)
         user_archive_data = None
         if user_id:
-            print(f"\n📦 Step 1.5: Fetching user data for archiving...")
+            log.info(f"Step 1.5: Fetching user data for archiving...")
             user_archive_data = UserService.get_full_user_data(user_id)
             if user_archive_data:
-                print(f"✅ User data archived (contains {len(user_archive_data)} fields)")
+                log.info(f"User data archived (contains {len(user_archive_data)} fields)")
             else:
-                print(f"⚠️  No user data found to archive")
+                log.warning(f"No user data found to archive")
 
         # STEP 2: Add to Blacklist (CRITICAL - Do this first!)
-        print(f"\n🚫 Step 2: Adding to blacklist...")
+        log.info(f"Step 2: Adding to blacklist...")
         
         # ✅ Pass deleted_by and the archived data
         blacklist_result = UserService.add_to_blacklist(email, user_id, reason, deleted_by, user_archive_data)
         
         if blacklist_result:
-            print(f"   ✅ BLACKLIST STEP SUCCEEDED")
+            log.info("Blacklist step succeeded")
             deletion_summary['steps_completed'].append('blacklist')
         else:
-            print(f"   ❌ BLACKLIST STEP FAILED")
+            log.error("Blacklist step failed")
         
         if user_id:
             # STEP 3: Ban user in users table (before deletion)
             # This ensures if deletion fails, they are at least locked out
-            print(f"\n⛔ Step 3: Banning user account...")
+            log.info(f"Step 3: Banning user account...")
             UserService.ban_user(user_id, reason)
             deletion_summary['steps_completed'].append('ban_user')
             
             # STEP 4: Delete from all database tables
-            print(f"\n🗂️  Step 4: Deleting from database tables...")
+            log.info(f"Step 4: Deleting from database tables...")
             tables_deleted = UserService.delete_from_all_tables(user_id)
             deletion_summary['steps_completed'].append('database_cleanup')
             deletion_summary['tables_deleted'] = tables_deleted
             
             # STEP 5: Delete from Supabase Auth
-            print(f"\n🔐 Step 5: Deleting from authentication...")
+            log.info(f"Step 5: Deleting from authentication...")
             UserService.delete_from_auth(user_id)
             deletion_summary['steps_completed'].append('auth_deletion')
         
-        print(f"\n{'='*70}")
-        print(f"✅ USER DELETION COMPLETED")
-        print(f"{'='*70}")
-        print(f"Steps completed: {deletion_summary.get('steps_completed')}")
-        print(f"Tables deleted: {len(deletion_summary.get('tables_deleted', []))}")
-        print(f"{'='*70}\n")
+        log.info(f"User deletion completed for {email}", extra={
+            "steps_completed": deletion_summary.get('steps_completed'),
+            "tables_deleted":  len(deletion_summary.get('tables_deleted', [])),
+        })
         
         return deletion_summary
 
@@ -146,7 +145,7 @@ class UserService:
             return None
             
         except Exception as e:
-            print(f"❌ Error finding user ID: {e}")
+            log.error(f"Error finding user ID: {e}")
             return None
 
     @staticmethod
@@ -179,12 +178,11 @@ class UserService:
             if response.status_code in [200, 201]:
                 return True
             else:
-                print(f"   ❌ FAILED to add to blacklist! Status: {response.status_code}")
-                print(f"      Response: {response.text}")
+                log.error(f"Failed to add to blacklist: {response.status_code} {response.text}")
                 return False
                 
         except Exception as e:
-            print(f"   ❌ UNEXPECTED ERROR in add_to_blacklist: {str(e)}")
+            log.error(f"UNEXPECTED ERROR in add_to_blacklist: {str(e)}")
             return False
 
     @staticmethod
@@ -203,7 +201,7 @@ class UserService:
             
             requests.patch(url, json=data, headers=UserService._get_headers())
         except Exception as e:
-            print(f"⚠️  Error banning user: {e}")
+            log.warning(f"Error banning user: {e}")
 
     @staticmethod
     def delete_from_all_tables(user_id):
@@ -244,31 +242,30 @@ class UserService:
                 response = requests.delete(url, headers=UserService._get_headers())
                 
                 if response.status_code in [200, 204]:
-                    print(f"   ✓ Cleared: {table}")
+                    log.info(f"Cleared: {table}")
                     deleted_tables.append(table)
                 else:
                     # Ignore 404s or cases where table doesn't exist/empty
-                    print(f"   - Skipped: {table} ({response.status_code})")
+                    log.info(f"- Skipped: {table} ({response.status_code})")
                     
             except Exception as e:
-                print(f"   ⚠  Error clearing {table}: {e}")
+                log.warning(f"Error clearing {table}: {e}")
         
         # 2. Finally Delete from 'users' table
         try:
-            print(f"   🗑️ Attempting to delete from 'users' table...")
+            log.info(f"Attempting to delete from 'users' table...")
             url = f"{SUPABASE_URL}/rest/v1/users?id=eq.{user_id}"
             response = requests.delete(url, headers=UserService._get_headers())
             
             if response.status_code in [200, 204]:
-                print(f"   ✅ SUCCESSFULLY DELETED USER RECORD")
+                log.info("Deleted user record")
                 deleted_tables.append('users')
             else:
-                print(f"   ❌ Failed to delete from users table. Status: {response.status_code}")
-                print(f"      Error: {response.text}")
-                print(f"      HINT: Check if there are other tables referencing 'users.id' that are not in the list above.")
+                log.error(f"Failed to delete from users table: {response.status_code} {response.text} "
+                          "(check for other tables referencing users.id)")
                 
         except Exception as e:
-            print(f"   ⚠  Error clearing users: {e}")
+            log.warning(f"Error clearing users: {e}")
         
         return deleted_tables
 
@@ -280,9 +277,9 @@ class UserService:
             response = requests.delete(url, headers=UserService._get_headers())
             
             if response.status_code in [200, 204]:
-                print(f"✅ Deleted from Supabase Auth")
+                log.info(f"Deleted from Supabase Auth")
             else:
-                print(f"⚠️  Auth deletion response: {response.status_code}")
+                log.warning(f"Auth deletion response: {response.status_code}")
                 
         except Exception as e:
-            print(f"⚠️  Auth deletion error: {e}")
\ No newline at end of file
+            log.warning(f"Auth deletion error: {e}")
\ No newline at end of file
@@ -0,0 +1,119 @@
+# backend/services/wave_queue.py
+"""
+In-process "next eligible time" queue for drip campaigns.
+
+Each campaign sits in a min-heap keyed by the UTC time it next becomes
+eligible to send. A single dispatcher thread sleeps until the head of the
+heap is due and then hands the campaign id to the handler, so work starts
+exactly when a campaign becomes eligible instead of on the next poll.
+
+Rescheduling a campaign simply pushes a new entry; the old one is skipped
+when it reaches the head (lazy deletion), so schedule() stays O(log n).
+"""
+import heapq
+import itertools
+import threading
+from datetime import datetime
+
+from services.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+
+class WaveQueue:
+
+    # Upper bound on a single wait so clock jumps (NTP, suspend) self-correct.
+    MAX_SLEEP_SECONDS = 300
+
+    def __init__(self, handler, name="WaveQueue"):
+        self._handler = handler
+        self._name    = name
+        self._heap    = []      # (due_at, seq, campaign_id)
+        self._due     = {}      # campaign_id -> due_at of the live heap entry
+        self._seq     = itertools.count()
+        self._cond    = threading.Condition()
+        self._thread  = None
+        self._stopped = False
+
+    # ─────────────────────────────────────────────────────────────────────
+    # PUBLIC METHODS
+    # ─────────────────────────────────────────────────────────────────────
+
+    def schedule(self, campaign_id: str, due_at: datetime) -> None:
+        """Set (or move) the next eligible time for a campaign."""
+        with self._cond:
+            self._due[campaign_id] = due_at
+            heapq.heappush(self._heap, (due_at, next(self._seq), campaign_id))
+            # Only wake the dispatcher if this entry is now the earliest one
+            if self._heap[0][2] == campaign_id:
+                self._cond.notify()
+
+    def cancel(self, campaign_id: str) -> None:
+        with self._cond:
+            self._due.pop(campaign_id, None)
+
+    def next_due(self, campaign_id: str):
+        with self._cond:
+            return self._due.get(campaign_id)
+
+    def snapshot(self) -> list:
+        """Sorted (campaign_id, due_at) pairs — for health/admin output."""
+        with self._cond:
+            return sorted(self._due.items(), key=lambda item: item[1])
+
+    def __len__(self):
+        with self._cond:
+            return len(self._due)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopped = False
+        self._thread  = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    # ─────────────────────────────────────────────────────────────────────
+    # PRIVATE HELPERS
+    # ─────────────────────────────────────────────────────────────────────
+
+    def _pop_due(self):
+        """Block until an entry is due; returns its campaign id (None on stop)."""
+        with self._cond:
+            while not self._stopped:
+                # Drop entries superseded by a later schedule() or cancel()
+                while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+                    heapq.heappop(self._heap)
+
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                due_at, _, campaign_id = self._heap[0]
+                delay = (due_at - datetime.utcnow()).total_seconds()
+                if delay <= 0:
+                    heapq.heappop(self._heap)
+                    del self._due[campaign_id]
+                    return campaign_id
+
+                self._cond.wait(timeout=min(delay, self.MAX_SLEEP_SECONDS))
+            return None
+
+    def _run(self) -> None:
+        while True:
+            campaign_id = self._pop_due()
+            if campaign_id is None:
+                return
+            try:
+                self._handler(campaign_id)
+            except Exception:
+                log.exception("Wave handler failed", extra={"queue": self._name,
+                                                            "campaign_id": campaign_id})
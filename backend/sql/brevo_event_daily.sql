@@ -0,0 +1,94 @@
+-- backend/sql/brevo_event_daily.sql
+-- ─────────────────────────────────────────────────────────────────────────────
+-- Per-day, per-event-type rollup of brevo_event_logs.
+--
+-- brevo_event_daily is maintained by a trigger on brevo_event_logs (insert
+-- and delete), so the admin summary reads at most days x event types rows
+-- instead of the raw log. Days are UTC calendar days of "timestamp".
+--
+-- brevo_event_summary(p_start, p_end, p_email) is what
+-- GET /api/admin/brevo-logs/summary calls:
+--   p_email NULL  -> read from the rollup
+--   p_email set   -> group the raw log for that recipient (ilike %p_email%)
+--
+-- Apply once in the Supabase SQL editor (idempotent; the backfill at the
+-- end rebuilds the rollup from the existing log).
+-- ─────────────────────────────────────────────────────────────────────────────
+
+create table if not exists public.brevo_event_daily (
+    day         date   not null,
+    event_type  text   not null,
+    events      bigint not null default 0,
+    primary key (day, event_type)
+);
+
+create index if not exists brevo_event_logs_timestamp_idx
+    on public.brevo_event_logs ("timestamp");
+
+
+create or replace function public.brevo_event_daily_apply()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' then
+        insert into public.brevo_event_daily (day, event_type, events)
+        values ((coalesce(new."timestamp", now()) at time zone 'utc')::date,
+                coalesce(new.event_type, 'unknown'), 1)
+        on conflict (day, event_type)
+        do update set events = brevo_event_daily.events + 1;
+        return new;
+    end if;
+
+    update public.brevo_event_daily
+       set events = greatest(events - 1, 0)
+     where day = (coalesce(old."timestamp", now()) at time zone 'utc')::date
+       and event_type = coalesce(old.event_type, 'unknown');
+    return old;
+end;
+$$;
+
+drop trigger if exists brevo_event_daily_trg on public.brevo_event_logs;
+create trigger brevo_event_daily_trg
+    after insert or delete on public.brevo_event_logs
+    for each row execute function public.brevo_event_daily_apply();
+
+
+create or replace function public.brevo_event_summary(
+    p_start date,
+    p_end   date default (now() at time zone 'utc')::date,
+    p_email text default null
+)
+returns table (day date, event_type text, events bigint)
+language sql
+stable
+as $$
+    select d.day, d.event_type, d.events
+      from public.brevo_event_daily d
+     where p_email is null
+       and d.day between p_start and p_end
+       and d.events > 0
+    union all
+    select (coalesce(l."timestamp", now()) at time zone 'utc')::date,
+           coalesce(l.event_type, 'unknown'),
+           count(*)
+      from public.brevo_event_logs l
+     where p_email is not null
+       and l.email_to ilike '%' || p_email || '%'
+       and l."timestamp" >= p_start
+       and l."timestamp" <  p_end + 1
+     group by 1, 2
+$$;
+
+
+-- Backfill (safe to re-run: recomputes every day from the raw log)
+begin;
+lock table public.brevo_event_logs in share mode;
+truncate public.brevo_event_daily;
+insert into public.brevo_event_daily (day, event_type, events)
+select (coalesce("timestamp", now()) at time zone 'utc')::date,
+       coalesce(event_type, 'unknown'),
+       count(*)
+  from public.brevo_event_logs
+ group by 1, 2;
+commit;
@@ -0,0 +1,42 @@
+-- backend/sql/guest_activity_events.sql
+-- ─────────────────────────────────────────────────────────────────────────────
+-- Append-only guest activity log.
+--
+-- GuestService.log_activity used to append each event to
+-- guest_users.metadata.activity_log and PATCH the whole growing JSON blob
+-- back. Events are now rows here, inserted in batches by
+-- services/batch_writer.py (one POST per batch, JSON array body).
+--
+-- Apply once in the Supabase SQL editor (idempotent). The optional block at
+-- the end copies events already stored in guest_users.metadata.
+-- ─────────────────────────────────────────────────────────────────────────────
+
+create table if not exists public.guest_activity_events (
+    id           bigint generated always as identity primary key,
+    guest_id     text        not null,
+    event_type   text        not null,
+    data         jsonb       not null default '{}'::jsonb,
+    occurred_at  timestamptz not null default now(),
+    created_at   timestamptz not null default now()
+);
+
+create index if not exists guest_activity_events_guest_idx
+    on public.guest_activity_events (guest_id, occurred_at desc);
+
+create index if not exists guest_activity_events_occurred_idx
+    on public.guest_activity_events (occurred_at);
+
+alter table public.guest_activity_events enable row level security;
+-- No policies: only the service role (backend) reads and writes.
+
+
+-- Optional one-off backfill from the old JSONB array
+insert into public.guest_activity_events (guest_id, event_type, data, occurred_at)
+select g.id,
+       coalesce(e->>'event', 'unknown'),
+       coalesce(e->'data', '{}'::jsonb),
+       coalesce((e->>'timestamp')::timestamptz, g.created_at)
+from public.guest_users g
+cross join lateral jsonb_array_elements(g.metadata::jsonb->'activity_log') as e
+where jsonb_typeof(g.metadata::jsonb->'activity_log') = 'array'
+  and not exists (select 1 from public.guest_activity_events x where x.guest_id = g.id);
@@ -0,0 +1,58 @@
+-- backend/sql/payments_stripe_session_unique.sql
+-- ─────────────────────────────────────────────────────────────────────────────
+-- One payments row per Stripe Checkout Session.
+--
+-- Checkout, the Stripe webhook and /api/payment/verify all write payments
+-- with a single upsert (services/upsert.py)
+--   POST /rest/v1/payments?on_conflict=stripe_session_id
+--   Prefer: resolution=merge-duplicates   (checkout: ignore-duplicates)
+-- which PostgREST can only run when stripe_session_id is unique. The webhook
+-- and verify leave initiated_at out of the payload, so a row they have to
+-- create gets the column default.
+--
+-- Apply once in the Supabase SQL editor (idempotent). Existing duplicates
+-- are collapsed first: the completed row wins, then the most recent one.
+-- The other rows are not thrown away: they are copied to payments_duplicates
+-- (with the time they were moved) before they leave payments, so amounts,
+-- refunds and user links can still be reconciled by hand.
+-- ─────────────────────────────────────────────────────────────────────────────
+
+create table if not exists public.payments_duplicates
+    (like public.payments including defaults);
+
+alter table public.payments_duplicates
+    add column if not exists moved_at timestamptz not null default now();
+
+begin;
+
+create temporary table payments_losers on commit drop as
+select ctid as row_ctid
+from (
+    select ctid,
+           row_number() over (
+               partition by stripe_session_id
+               order by (status = 'completed') desc nulls last,
+                        completed_at desc nulls last,
+                        initiated_at desc nulls last
+           ) as rn
+    from public.payments
+    where stripe_session_id is not null
+) ranked
+where rn > 1;
+
+insert into public.payments_duplicates
+select p.*, now()
+from public.payments p
+join payments_losers l on p.ctid = l.row_ctid;
+
+delete from public.payments p
+using payments_losers l
+where p.ctid = l.row_ctid;
+
+commit;
+
+create unique index if not exists payments_stripe_session_id_key
+    on public.payments (stripe_session_id);
+
+alter table public.payments
+    alter column initiated_at set default now();